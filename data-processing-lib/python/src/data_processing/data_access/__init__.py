@@ -1,4 +1,4 @@
-from data_processing.data_access.arrow_s3 import ArrowS3
+from data_processing.data_access.arrow_s3 import ArrowS3, S3_TRANSFER_KEYS
 from data_processing.data_access.data_access import DataAccess
 from data_processing.data_access.data_access_local import DataAccessLocal
 from data_processing.data_access.data_access_s3 import DataAccessS3
@@ -10,16 +10,30 @@
 # limitations under the License.
 ################################################################################
 
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Any
 
 import boto3
 import pyarrow as pa
 from botocore.config import Config
-from data_processing.utils import TransformUtils, get_logger
+from botocore.exceptions import ClientError
+from data_processing.utils import MB, TransformUtils, get_logger
 
 
 logger = get_logger(__name__)
 
+# names of the S3 transfer tuning parameters, that can be passed to ArrowS3
+S3_TRANSFER_KEYS = [
+    "max_pool_connections",
+    "multipart_threshold",
+    "part_size",
+    "transfer_threads",
+    "backoff_base",
+    "backoff_max",
+]
+
 
 class ArrowS3:
     """
@@ -36,6 +50,13 @@ class ArrowS3:
         region: str = None,
         s3_retries: int = 10,
         s3_max_attempts=10,
+        list_threads: int = 1,
+        max_pool_connections: int = 32,
+        multipart_threshold: int = 64 * MB,
+        part_size: int = 16 * MB,
+        transfer_threads: int = 8,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
     ) -> None:
         """
         Initialization
@@ -45,6 +66,14 @@ class ArrowS3:
         :param region: s3 region
         :param s3_retries: number of S3 retries - default 10
         :param s3_max_attempts - boto s3 client internal retries - default 10
+        :param list_threads: number of threads listing sub folders concurrently - default 1
+        :param max_pool_connections: max number of connections kept in the boto connection pool - default 32
+        :param multipart_threshold: objects larger than this are read with parallel ranged GETs and written
+                                    with multipart upload - default 64MB
+        :param part_size: size of the part for ranged GETs and multipart uploads, min 5MB - default 16MB
+        :param transfer_threads: number of threads transferring parts of a single object - default 8
+        :param backoff_base: initial delay (sec) between retries, doubled on every attempt - default 0.5
+        :param backoff_max: max delay (sec) between retries - default 30
         """
         # Create boto S3 client
         self.s3_client = boto3.client(
@@ -53,10 +82,37 @@ class ArrowS3:
             aws_secret_access_key=secret_key,
             endpoint_url=endpoint,
             region_name=region,
-            config=Config(retries={"max_attempts": s3_max_attempts, "mode": "standard"}),
+            config=Config(
+                retries={"max_attempts": s3_max_attempts, "mode": "standard"},
+                max_pool_connections=max_pool_connections,
+            ),
         )
         self.retries = s3_retries
         self.s3_max_attempts = s3_max_attempts
+        self.list_threads = list_threads
+        self.multipart_threshold = multipart_threshold
+        # S3 does not allow parts smaller then 5MB (except the last one)
+        self.part_size = max(part_size, 5 * MB)
+        self.transfer_threads = transfer_threads
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _backoff(self, attempt: int, error: Exception) -> bool:
+        """
+        Check whether a failed request should be retried and sleep before the next retry, using exponential
+        backoff with full jitter. Client errors (4xx), for example NoSuchKey, AccessDenied or PreconditionFailed,
+        do not succeed on retry and fail fast, except for request timeouts and throttling
+        :param attempt: number of the failed attempt, starting from 0
+        :param error: exception of the failed attempt
+        :return: True if the request should be retried
+        """
+        if isinstance(error, ClientError):
+            status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+            if 400 <= status < 500 and status not in (408, 429):
+                return False
+        if attempt < self.retries - 1:
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt)))
+        return True
 
     @staticmethod
     def _get_bucket_key(key: str) -> tuple[str, str]:
@@ -76,6 +132,10 @@ class ArrowS3:
         :return: list of dictionaries, containing file names and length and number of retries
         """
         bucket, prefix = self._get_bucket_key(key)
+        if self.list_threads > 1:
+            # list sub folders concurrently
+            files, _, retries = self._list_hierarchy(bucket=bucket, prefix=prefix)
+            return sorted(files, key=lambda f: f["name"]), retries
         # Use paginator here to get all the files rather then 1 page
         paginator = self.s3_client.get_paginator("list_objects_v2")
         pages = paginator.paginate(Bucket=bucket, Prefix=prefix)
@@ -114,27 +174,144 @@ class ArrowS3:
                     sub_folders.extend(sf)
             return sub_folders, internal_retries
         bucket, prefix = self._get_bucket_key(key)
+        if self.list_threads > 1:
+            # list sub folders concurrently
+            _, subs, retries = self._list_hierarchy(bucket=bucket, prefix=prefix)
+            return [f"{bucket}/{f}" for f in sorted(subs)], retries
         subs, retries = _get_sub_folders(bck=bucket, p=prefix)
         return [f"{bucket}/{f}" for f in subs], retries
 
+    def _list_level(self, bucket: str, prefix: str) -> tuple[list[dict[str, Any]], list[str], int]:
+        """
+        List a single level of the folder hierarchy
+        :param bucket: bucket name
+        :param prefix: folder prefix
+        :return: list of dictionaries, containing file names and length, list of sub folder prefixes
+                 and number of retries
+        """
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        # use Delimiter to get files and sub folders of this level only
+        pages = paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/")
+        files = []
+        sub_folders = []
+        retries = 0
+        for page in pages:
+            retries += page.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+            for obj in page.get("Contents", []):
+                files.append({"name": f"{bucket}/{obj['Key']}", "size": obj["Size"]})
+            for p in page.get("CommonPrefixes", []):
+                sub_folders.append(p["Prefix"])
+        return files, sub_folders, retries
+
+    def _list_hierarchy(self, bucket: str, prefix: str) -> tuple[list[dict[str, Any]], list[str], int]:
+        """
+        List all files and sub folders of the folder, submitting every discovered sub folder
+        to the thread pool, so that the listing is sharded by the folder hierarchy
+        :param bucket: bucket name
+        :param prefix: folder prefix
+        :return: list of dictionaries, containing file names and length, list of sub folder prefixes
+                 and number of retries
+        """
+        files = []
+        folders = []
+        retries = 0
+        with ThreadPoolExecutor(max_workers=self.list_threads) as executor:
+            pending = {executor.submit(self._list_level, bucket, prefix)}
+            while len(pending) > 0:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    level_files, level_folders, level_retries = future.result()
+                    files.extend(level_files)
+                    folders.extend(level_folders)
+                    retries += level_retries
+                    for sub_folder in level_folders:
+                        pending.add(executor.submit(self._list_level, bucket, sub_folder))
+        return files, folders, retries
+
     def read_file(self, key: str) -> tuple[bytes, int]:
         """
-        Read an s3 file by name
+        Read an s3 file by name. Large objects are read with parallel ranged GETs directly into a preallocated
+        buffer, which is converted to bytes once all the parts are read, so that no list of parts is kept. All ranges
+        are pinned to the ETag of the first one, so that an object overwritten during the read fails instead of
+        returning a mix of both versions
         :param key: complete path
         :return: byte array of file content or None if the file does not exist and a number of retries
         """
         bucket, prefix = self._get_bucket_key(key)
+        # Read the first part. For large objects, its content range provides the object size
+        data, size, etag, retries = self._read_range(bucket=bucket, prefix=prefix, start=0)
+        if data is None:
+            logger.error(f"failed to read file {key} in {self.retries} attempts. Skipping it")
+            return None, retries
+        if size is None or size <= len(data):
+            return data, retries
+        # read the rest of the object with parallel ranged GETs
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        view[: len(data)] = data
+        starts = range(len(data), size, self.part_size)
+        del data
+        with ThreadPoolExecutor(max_workers=min(self.transfer_threads, len(starts))) as executor:
+            parts = list(
+                executor.map(
+                    lambda start: self._read_range(bucket=bucket, prefix=prefix, start=start, etag=etag, buffer=view),
+                    starts,
+                )
+            )
+        for start, (part_size, _, _, part_retries) in zip(starts, parts):
+            retries += part_retries
+            if part_size is None:
+                logger.error(f"failed to read file {key} range starting at {start}. Skipping it")
+                return None, retries
+        return bytes(buffer), retries
+
+    def _read_range(
+        self, bucket: str, prefix: str, start: int, etag: str = None, buffer: memoryview = None
+    ) -> tuple[Any, int, str, int]:
+        """
+        Read a single part of the object, retrying with exponential backoff. If the object is smaller
+        than multipart threshold, the first part is the complete object
+        :param bucket: bucket name
+        :param prefix: object key
+        :param start: start offset of the part
+        :param etag: ETag of the object version to read, the read fails if the object has changed
+        :param buffer: buffer holding the complete object, if given the part is copied into it at its offset
+        :return: part content (or its size, if buffer is given) or None if read failed, object size (if known),
+                 object ETag and the number of retries
+        """
         retries = 0
+        if start == 0:
+            end = self.multipart_threshold - 1
+        else:
+            end = start + self.part_size - 1
+        byte_range = f"bytes={start}-{end}"
+        version = {} if etag is None else {"IfMatch": etag}
         for n in range(self.retries):
             try:
-                obj = self.s3_client.get_object(Bucket=bucket, Key=prefix)
+                try:
+                    obj = self.s3_client.get_object(Bucket=bucket, Key=prefix, Range=byte_range, **version)
+                except ClientError as e:
+                    # ranged read of an empty object is rejected, read it as a whole
+                    if start != 0 or e.response.get("Error", {}).get("Code", "") != "InvalidRange":
+                        raise e
+                    obj = self.s3_client.get_object(Bucket=bucket, Key=prefix)
                 retries += obj.get("ResponseMetadata", {}).get("RetryAttempts", 0)
-                return obj["Body"].read(), retries
+                # content range has a form of "bytes start-end/size"
+                content_range = obj.get("ContentRange", None)
+                size = None
+                if content_range is not None:
+                    size = int(content_range.split("/")[-1])
+                part = obj["Body"].read()
+                if buffer is not None:
+                    buffer[start : start + len(part)] = part
+                    part = len(part)
+                return part, size, obj.get("ETag", None), retries
             except Exception as e:
-                logger.error(f"failed to read file {key}, exception {e}, attempt {n}")
+                logger.error(f"failed to read file {bucket}/{prefix} range {start}-{end}, exception {e}, attempt {n}")
                 retries += self.s3_max_attempts
-        logger.error(f"failed to read file {key} in {self.retries} attempts. Skipping it")
-        return None, retries
+                if not self._backoff(attempt=n, error=e):
+                    break
+        return None, None, None, retries
 
     def save_file(self, key: str, data: bytes) -> tuple[dict[str, Any], int]:
         """
@@ -146,6 +323,8 @@ class ArrowS3:
         in the case of failure dict is None and the number of retries
         """
         bucket, prefix = self._get_bucket_key(key)
+        if len(data) > self.multipart_threshold:
+            return self._save_file_multipart(bucket=bucket, prefix=prefix, data=data)
         retries = 0
         for n in range(self.retries):
             try:
@@ -155,21 +334,99 @@ class ArrowS3:
             except Exception as e:
                 logger.error(f"Failed to upload file to to key {key}, exception {e}")
                 retries += self.s3_max_attempts
+                if not self._backoff(attempt=n, error=e):
+                    break
+        logger.error(f"Failed to upload file {key}, skipping it")
+        return None, retries
+
+    def _save_file_multipart(self, bucket: str, prefix: str, data: bytes) -> tuple[dict[str, Any], int]:
+        """
+        Save large file to S3 using multipart upload. Parts are uploaded in parallel and every part is
+        retried independently, so that a failure does not restart the complete upload
+        :param bucket: bucket name
+        :param prefix: object key
+        :param data: byte array of the file content
+        :return: dictionary as
+        defined https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/complete_multipart_upload.html
+        in the case of failure dict is None and the number of retries
+        """
+        key = f"{bucket}/{prefix}"
+        retries = 0
+        upload_id = None
+        for n in range(self.retries):
+            try:
+                res = self.s3_client.create_multipart_upload(Bucket=bucket, Key=prefix)
+                retries += res.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+                upload_id = res["UploadId"]
+                break
+            except Exception as e:
+                logger.error(f"Failed to create multipart upload for key {key}, exception {e}")
+                retries += self.s3_max_attempts
+                if not self._backoff(attempt=n, error=e):
+                    break
+        if upload_id is None:
+            logger.error(f"Failed to upload file {key}, skipping it")
+            return None, retries
+        view = memoryview(data)
+
+        def _upload_part(number: int) -> tuple[str, int]:
+            part_retries = 0
+            start = (number - 1) * self.part_size
+            body = view[start : start + self.part_size]
+            for attempt in range(self.retries):
+                try:
+                    part = self.s3_client.upload_part(
+                        Bucket=bucket, Key=prefix, UploadId=upload_id, PartNumber=number, Body=body.tobytes()
+                    )
+                    part_retries += part.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+                    return part["ETag"], part_retries
+                except Exception as ex:
+                    logger.error(f"Failed to upload part {number} of key {key}, exception {ex}, attempt {attempt}")
+                    part_retries += self.s3_max_attempts
+                    if not self._backoff(attempt=attempt, error=ex):
+                        break
+            return None, part_retries
+
+        numbers = range(1, (len(data) + self.part_size - 1) // self.part_size + 1)
+        with ThreadPoolExecutor(max_workers=min(self.transfer_threads, len(numbers))) as executor:
+            parts = list(executor.map(_upload_part, numbers))
+        retries += sum(part_retries for _, part_retries in parts)
+        if any(etag is None for etag, _ in parts):
+            logger.error(f"Failed to upload file {key}, skipping it")
+            try:
+                self.s3_client.abort_multipart_upload(Bucket=bucket, Key=prefix, UploadId=upload_id)
+            except Exception as e:
+                logger.warning(f"Failed to abort multipart upload for key {key}, exception {e}")
+            return None, retries
+        completed = {"Parts": [{"ETag": etag, "PartNumber": number} for number, (etag, _) in zip(numbers, parts)]}
+        for n in range(self.retries):
+            try:
+                res = self.s3_client.complete_multipart_upload(
+                    Bucket=bucket, Key=prefix, UploadId=upload_id, MultipartUpload=completed
+                )
+                retries += res.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+                return res, retries
+            except Exception as e:
+                logger.error(f"Failed to complete multipart upload for key {key}, exception {e}")
+                retries += self.s3_max_attempts
+                if not self._backoff(attempt=n, error=e):
+                    break
         logger.error(f"Failed to upload file {key}, skipping it")
         return None, retries
 
-    def read_table(self, key: str, schema: pa.schema = None) -> tuple[pa.Table, int]:
+    def read_table(self, key: str, schema: pa.schema = None, columns: list[str] = None) -> tuple[pa.Table, int]:
         """
         Get an arrow table from a file with a given name
         :param key: complete path
         :param schema: Schema used for reading table, default None
+        :param columns: list of columns to read, default None - all columns
         :return: table or None if the read failed and the number of retries
         """
         # Read file as bytes
         data, retries = self.read_file(key)
         if data is None:
             return None, retries
-        return TransformUtils.convert_binary_to_arrow(data=data, schema=schema), retries
+        return TransformUtils.convert_binary_to_arrow(data=data, schema=schema, columns=columns), retries
 
     def save_table(self, key: str, table: pa.Table) -> tuple[int, dict[str, Any], int]:
         """
@@ -204,6 +461,8 @@ class ArrowS3:
             except Exception as e:
                 logger.error(f"failed to delete file {key}, exception {e}")
                 retries += self.s3_max_attempts
+                if not self._backoff(attempt=n, error=e):
+                    break
         return retries
 
     def move_file(self, source: str, dest: str) -> int:
@@ -227,4 +486,6 @@ class ArrowS3:
             except Exception as e:
                 logger.error(f"failed to copy file {source} to {dest}, exception {e}")
                 retries += self.s3_max_attempts
+                if not self._backoff(attempt=n, error=e):
+                    break
         return retries
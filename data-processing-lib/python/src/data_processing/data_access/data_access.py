@@ -10,10 +10,14 @@
 # limitations under the License.
 ################################################################################
 
+import os
 import random
+import time
+import uuid
 from typing import Any
 
 import pyarrow as pa
+import pyarrow.parquet as pq
 from data_processing.utils import KB, MB, GB, TransformUtils, get_logger
 
 
@@ -29,6 +33,9 @@ class DataAccess:
             n_samples: int,
             files_to_use: list[str],
             files_to_checkpoint: list[str],
+            listing_cache: str = None,
+            listing_cache_ttl: int = 86400,
+            checkpoint_manifest: bool = False,
     ):
         """
         Create data access class for folder based configuration
@@ -38,6 +45,10 @@ class DataAccess:
         :param n_samples: amount of files to randomly sample
         :param files_to_use: files extensions of files to include
         :param files_to_checkpoint: files extensions of files to use for checkpointing
+        :param listing_cache: local folder for caching input files listings, None - no caching
+        :param listing_cache_ttl: max age (sec) of the cached listings, that can not be validated otherwise
+        :param checkpoint_manifest: flag to record processed files in the completed files manifest and to use
+                                    it (instead of listing output folder) for checkpointing
         """
         self.d_sets = d_sets
         self.checkpoint = checkpoint
@@ -45,6 +56,10 @@ class DataAccess:
         self.n_samples = n_samples
         self.files_to_use = files_to_use
         self.files_to_checkpoint = files_to_checkpoint
+        self.listing_cache = listing_cache
+        self.listing_cache_ttl = listing_cache_ttl
+        self.checkpoint_manifest = checkpoint_manifest
+        self.completed_base_names = None
         self.logger = get_logger(__name__)
 
     def get_output_folder(self) -> str:
@@ -114,6 +129,8 @@ class DataAccess:
         and number of operation retries.
         Retries are performed on operation failures and are typically due to the resource overload.
         """
+        # completed files can change between invocations, make sure we re read them
+        self.completed_base_names = None
         # Check if we are using data sets
         if self.d_sets is not None:
             # get folders for the input
@@ -168,7 +185,8 @@ class DataAccess:
             files_to_use: list[str],
             cm_files: int,
             max_file_size: int = 0,
-            min_file_size: int = MB * GB
+            min_file_size: int = MB * GB,
+            use_cache: bool = False,
     ) -> tuple[list[dict[str, Any]], dict[str, float], int]:
         """
         Support method to get list input files and their profile
@@ -177,13 +195,17 @@ class DataAccess:
         :param max_file_size: max file size
         :param min_file_size: min file size
         :param cm_files: overwrite for the m_files in the class
+        :param use_cache: flag to use listing cache (if configured)
         :return: tuple of file list, profile and number of retries
         """
         # Get files list.
         p_list = []
         total_input_file_size = 0
         i = 0
-        files, retries = self._list_files_folder(path=path)
+        if use_cache and self.listing_cache is not None:
+            files, retries = self._list_files_folder_cached(path=path)
+        else:
+            files, retries = self._list_files_folder(path=path)
         for file in files:
             if i >= cm_files > 0:
                 break
@@ -233,23 +255,17 @@ class DataAccess:
                 cm_files=cm_files,
                 min_file_size=min_file_size,
                 max_file_size=max_file_size,
+                use_cache=True,
             )
             files = [fs["name"] for fs in file_sizes]
             return files, profile, retries
 
-        pout_list, _, retries1 = self._get_files_folder(
-            path=output_path, files_to_use=self.files_to_checkpoint, cm_files=-1
-        )
-        output_base_names_ext = [file["name"].replace(self.get_output_folder(), self.get_input_folder())
-                                 for file in pout_list]
-        # In the case of binary transforms, an extension can be different, so just use the file names.
-        # Also remove duplicates
-        output_base_names = list(set([TransformUtils.get_file_extension(file)[0] for file in output_base_names_ext]))
+        output_base_names, retries1 = self._get_completed_base_names(output_path=output_path)
         p_list = []
         total_input_file_size = 0
         i = 0
         files, _, retries = self._get_files_folder(
-            path=input_path, files_to_use=self.files_to_use, cm_files=-1
+            path=input_path, files_to_use=self.files_to_use, cm_files=-1, use_cache=True
         )
         retries += retries1
         for file in files:
@@ -279,6 +295,77 @@ class DataAccess:
             retries,
         )
 
+    def _get_completed_base_names(self, output_path: str) -> tuple[set[str], int]:
+        """
+        Get base names (input file names without extension) of the already processed files. If the completed
+        files manifest is used and is not empty, it is used, otherwise the output folder is listed
+        :param output_path: output path
+        :return: set of base names and number of retries
+        """
+        if self.checkpoint_manifest:
+            retries = 0
+            if self.completed_base_names is None:
+                # read manifest only once for all data sets
+                completed, retries = self.get_completed_files()
+                self.completed_base_names = {TransformUtils.get_file_extension(file)[0] for file in completed}
+            if len(self.completed_base_names) > 0:
+                return self.completed_base_names, retries
+            self.logger.info("Completed files manifest is empty, using output folder for checkpointing")
+        pout_list, _, retries = self._get_files_folder(
+            path=output_path, files_to_use=self.files_to_checkpoint, cm_files=-1
+        )
+        # In the case of binary transforms, an extension can be different, so just use the file names.
+        # Set also removes duplicates and provides constant time lookups
+        output_base_names = {
+            TransformUtils.get_file_extension(file["name"].replace(self.get_output_folder(), self.get_input_folder()))[0]
+            for file in pout_list
+        }
+        return output_base_names, retries
+
+    def get_checkpoint_folder(self) -> str:
+        """
+        Get folder containing completed files manifest
+        :return: checkpoint folder
+        """
+        if self.get_output_folder() is None:
+            return None
+        return os.path.join(self.get_output_folder(), "checkpoint", "")
+
+    def save_completed_files(self, files: list[str]) -> tuple[dict[str, Any], int]:
+        """
+        Append files to the completed files manifest. Every invocation writes a new manifest segment,
+        so that concurrent workers never overwrite each other
+        :param files: list of the completely processed input files
+        :return: a dictionary as
+        defined https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/put_object.html
+        in the case of failure dict is None and number of operation retries.
+        """
+        if self.get_checkpoint_folder() is None:
+            self.logger.error("Output folder is not defined, can't save completed files")
+            return None, 0
+        return self.save_file(
+            path=os.path.join(self.get_checkpoint_folder(), f"{uuid.uuid4()}.manifest"),
+            data="\n".join(files).encode("utf-8"),
+        )
+
+    def get_completed_files(self) -> tuple[set[str], int]:
+        """
+        Read completed files manifest
+        :return: set of completely processed input files and number of operation retries.
+        """
+        completed = set()
+        if self.get_checkpoint_folder() is None:
+            return completed, 0
+        segments, _, retries = self._get_files_folder(
+            path=self.get_checkpoint_folder(), files_to_use=[".manifest"], cm_files=-1
+        )
+        for segment in segments:
+            data, retries1 = self.get_file(path=segment["name"])
+            retries += retries1
+            if data is not None:
+                completed.update(data.decode("utf-8").splitlines())
+        return completed, retries
+
     def _list_files_folder(self, path: str) -> tuple[list[dict[str, Any]], int]:
         """
         Get files for a given folder and all sub folders
@@ -287,10 +374,61 @@ class DataAccess:
         """
         raise NotImplementedError("Subclasses should implement this!")
 
-    def get_table(self, path: str) -> tuple[pa.table, int]:
+    def _get_listing_version(self, path: str) -> str:
+        """
+        Get version of the folder content, used to validate cached listing. Implementations should
+        return a value, that changes when files are added to or removed from the folder and its sub folders
+        :param path: path
+        :return: version string or None, if the version can not be cheaply computed. In this case
+                 cached listing is considered valid for listing_cache_ttl seconds
+        """
+        return None
+
+    def _list_files_folder_cached(self, path: str) -> tuple[list[dict[str, Any]], int]:
+        """
+        Get files for a given folder and all sub folders, using listing manifest cached in the listing cache
+        folder. If the manifest does not exist or is not valid, the folder is listed and manifest is updated
+        :param path: path
+        :return: List of files and number of retries
+        """
+        manifest = os.path.join(self.listing_cache, f"{TransformUtils.str_to_hash(path)}.parquet")
+        version = self._get_listing_version(path=path)
+        try:
+            table = pq.read_table(manifest)
+            metadata = table.schema.metadata
+            if metadata[b"path"].decode("utf-8") == path:
+                if version is None:
+                    valid = time.time() - float(metadata[b"time"]) < self.listing_cache_ttl
+                else:
+                    valid = metadata[b"version"].decode("utf-8") == version
+                if valid:
+                    self.logger.info(f"Using cached listing {manifest} for {path}")
+                    names = table.column("name").to_pylist()
+                    sizes = table.column("size").to_pylist()
+                    return [{"name": name, "size": size} for name, size in zip(names, sizes)], 0
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Failed to read cached listing {manifest} - {e}")
+        files, retries = self._list_files_folder(path=path)
+        try:
+            table = pa.Table.from_pydict(
+                {"name": [f["name"] for f in files], "size": [f["size"] for f in files]},
+                schema=pa.schema([("name", pa.string()), ("size", pa.int64())]),
+            ).replace_schema_metadata(
+                {"path": path, "version": version if version is not None else "", "time": str(time.time())}
+            )
+            os.makedirs(self.listing_cache, exist_ok=True)
+            pq.write_table(table, manifest)
+        except Exception as e:
+            self.logger.warning(f"Failed to save cached listing {manifest} - {e}")
+        return files, retries
+
+    def get_table(self, path: str, columns: list[str] = None) -> tuple[pa.table, int]:
         """
         Get pyArrow table for a given path
         :param path - file path
+        :param columns - optional list of columns to read, default None - all columns
         :return: pyArrow table or None, if the table read failed and number of operation retries.
                  Retries are performed on operation failures and are typically due to the resource overload.
         """
@@ -19,6 +19,7 @@ from data_processing.data_access import (
     DataAccessFactoryBase,
     DataAccessLocal,
     DataAccessS3,
+    S3_TRANSFER_KEYS,
 )
 from data_processing.utils import ParamsUtils, str2bool
 
@@ -116,6 +117,12 @@ class DataAccessFactory(DataAccessFactoryBase):
         # In the case of binary files, the resulting extension can be different from the source extension
         # The checkpointing extension is defined here. If multiple files (extensions) are produced from the
         # source files, only the leading one is required here
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}checkpoint_manifest",
+            type=lambda x: bool(str2bool(x)),
+            default=False,
+            help="record processed files in the completed files manifest and use it for checkpointing",
+        )
         parser.add_argument(
             f"--{self.cli_arg_prefix}files_to_checkpoint",
             type=ast.literal_eval,
@@ -137,6 +144,33 @@ class DataAccessFactory(DataAccessFactoryBase):
         parser.add_argument(
             f"--{self.cli_arg_prefix}num_samples", type=int, default=-1, help="number of random input files to process"
         )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}listing_cache",
+            type=str,
+            default=None,
+            help="local folder for caching input files listings, used to skip listing on reruns",
+        )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}listing_cache_ttl",
+            type=int,
+            default=86400,
+            help="max age (sec) of cached S3 listings. Local listings are validated by folders modification time",
+        )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}listing_threads",
+            type=int,
+            default=1,
+            help="number of threads listing S3 sub folders concurrently",
+        )
+        parser.add_argument(
+            f"--{self.cli_arg_prefix}s3_transfer",
+            type=ast.literal_eval,
+            default=None,
+            help="AST string of S3 transfer tuning options, containing any of the keys max_pool_connections, "
+            "multipart_threshold (bytes), part_size (bytes), transfer_threads, backoff_base (sec), "
+            "backoff_max (sec).\n"
+            "Example: { 'max_pool_connections': 64, 'multipart_threshold': 134217728, 'transfer_threads': 16 }",
+        )
 
     def apply_input_params(self, args: Union[dict, argparse.Namespace]) -> bool:
         """
@@ -160,6 +194,11 @@ class DataAccessFactory(DataAccessFactoryBase):
         n_samples = arg_dict.get(f"{self.cli_arg_prefix}num_samples", -1)
         files_to_use = arg_dict.get(f"{self.cli_arg_prefix}files_to_use", [".parquet"])
         files_to_checkpoint = arg_dict.get(f"{self.cli_arg_prefix}files_to_checkpoint", [".parquet"])
+        checkpoint_manifest = arg_dict.get(f"{self.cli_arg_prefix}checkpoint_manifest", False)
+        listing_cache = arg_dict.get(f"{self.cli_arg_prefix}listing_cache", None)
+        listing_cache_ttl = arg_dict.get(f"{self.cli_arg_prefix}listing_cache_ttl", 86400)
+        listing_threads = arg_dict.get(f"{self.cli_arg_prefix}listing_threads", 1)
+        s3_transfer = arg_dict.get(f"{self.cli_arg_prefix}s3_transfer", None)
         # check which configuration (S3 or Local) is specified
         s3_config_specified = 1 if s3_config is not None else 0
         local_config_specified = 1 if local_config is not None else 0
@@ -215,12 +254,29 @@ class DataAccessFactory(DataAccessFactoryBase):
                 f"Both max files {max_files} and random samples {n_samples} are defined. Only one allowed at a time"
             )
             return False
+        if s3_transfer is not None:
+            unknown = set(s3_transfer.keys()) - set(S3_TRANSFER_KEYS)
+            if len(unknown) > 0:
+                self.logger.error(
+                    f"data factory {self.cli_arg_prefix} unknown S3 transfer options {unknown}, "
+                    f"supported are {S3_TRANSFER_KEYS}"
+                )
+                return False
         self.checkpointing = checkpointing
         self.max_files = max_files
         self.n_samples = n_samples
         self.files_to_use = files_to_use
         self.files_to_checkpoint = files_to_checkpoint
+        self.checkpoint_manifest = checkpoint_manifest
+        self.listing_cache = listing_cache
+        self.listing_cache_ttl = listing_cache_ttl
+        self.listing_threads = listing_threads
+        self.s3_transfer = s3_transfer
         self.dsets = data_sets
+        if listing_cache is not None:
+            self.logger.info(
+                f"data factory {self.cli_arg_prefix} using listing cache {listing_cache}, ttl {listing_cache_ttl}"
+            )
         if data_sets is None or len(data_sets) < 1:
             self.logger.info(
                 f"data factory {self.cli_arg_prefix} "
@@ -251,6 +307,11 @@ class DataAccessFactory(DataAccessFactoryBase):
                 n_samples=self.n_samples,
                 files_to_use=self.files_to_use,
                 files_to_checkpoint=self.files_to_checkpoint,
+                checkpoint_manifest=self.checkpoint_manifest,
+                listing_cache=self.listing_cache,
+                listing_cache_ttl=self.listing_cache_ttl,
+                listing_threads=self.listing_threads,
+                s3_transfer=self.s3_transfer,
             )
         else:
             # anything else is local data
@@ -262,4 +323,7 @@ class DataAccessFactory(DataAccessFactoryBase):
                 n_samples=self.n_samples,
                 files_to_use=self.files_to_use,
                 files_to_checkpoint=self.files_to_checkpoint,
+                checkpoint_manifest=self.checkpoint_manifest,
+                listing_cache=self.listing_cache,
+                listing_cache_ttl=self.listing_cache_ttl,
             )
@@ -39,6 +39,11 @@ class DataAccessFactoryBase(CLIArgumentProvider):
         self.n_samples = -1
         self.files_to_use = []
         self.files_to_checkpoint = []
+        self.checkpoint_manifest = False
+        self.listing_cache = None
+        self.listing_cache_ttl = 86400
+        self.listing_threads = 1
+        self.s3_transfer = None
         self.cli_arg_prefix = cli_arg_prefix
         self.params = {}
         self.logger = get_logger(__name__ + str(uuid.uuid4()))
@@ -71,12 +76,15 @@ class DataAccessFactoryBase(CLIArgumentProvider):
         """
         params = {
             "checkpointing": self.checkpointing,
+            "checkpoint_manifest": self.checkpoint_manifest,
             "max_files": self.max_files,
             "random_samples": self.n_samples,
             "files_to_use": self.files_to_use,
         }
         if self.dsets is not None:
             params["data sets"] = self.dsets
+        if self.listing_cache is not None:
+            params["listing_cache"] = self.listing_cache
         return params
 
     def create_data_access(self) -> DataAccess:
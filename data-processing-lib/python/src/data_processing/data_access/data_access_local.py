@@ -11,9 +11,9 @@
 ################################################################################
 
 import gzip
+import hashlib
 import json
 import os
-from pathlib import Path
 from typing import Any
 
 import pyarrow as pa
@@ -39,6 +39,9 @@ class DataAccessLocal(DataAccess):
         n_samples: int = -1,
         files_to_use: list[str] = [".parquet"],
         files_to_checkpoint: list[str] = [".parquet"],
+        listing_cache: str = None,
+        listing_cache_ttl: int = 86400,
+        checkpoint_manifest: bool = False,
     ):
         """
         Create data access class for folder based configuration
@@ -49,9 +52,14 @@ class DataAccessLocal(DataAccess):
         :param n_samples: amount of files to randomly sample
         :param files_to_use: files extensions of files to include
         :param files_to_checkpoint: files extensions of files to use for checkpointing
+        :param listing_cache: local folder for caching input files listings, None - no caching
+        :param listing_cache_ttl: not used, local listings are validated by the folders modification time
+        :param checkpoint_manifest: flag to use completed files manifest for checkpointing
         """
         super().__init__(d_sets=d_sets, checkpoint=checkpoint, m_files=m_files, n_samples=n_samples,
-                         files_to_use=files_to_use, files_to_checkpoint=files_to_checkpoint)
+                         files_to_use=files_to_use, files_to_checkpoint=files_to_checkpoint,
+                         listing_cache=listing_cache, listing_cache_ttl=listing_cache_ttl,
+                         checkpoint_manifest=checkpoint_manifest)
         if local_config is None:
             self.input_folder = None
             self.output_folder = None
@@ -82,19 +90,71 @@ class DataAccessLocal(DataAccess):
         """
         return self.input_folder
 
+    @staticmethod
+    def _scan_folder(path: str, files: list[os.DirEntry], folders: list[os.DirEntry], with_files: bool = True) -> None:
+        """
+        Recursively walk the folder using os.scandir, which gets entry types without additional stat calls.
+        Similar to Path.rglob, symbolic links to folders are returned, but not followed
+        :param path: folder path
+        :param files: list to add file entries to
+        :param folders: list to add folder entries to
+        :param with_files: flag to collect file entries
+        :return: None
+        """
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        folders.append(entry)
+                        if not entry.is_symlink():
+                            DataAccessLocal._scan_folder(
+                                path=entry.path, files=files, folders=folders, with_files=with_files
+                            )
+                    elif with_files:
+                        files.append(entry)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return
+
+    @staticmethod
+    def _path_key(path: str) -> list[str]:
+        """
+        Sorting key, ordering paths by their components, same as sorting of Path objects
+        :param path: path
+        :return: list of path components
+        """
+        return path.split(os.sep)
+
     def _list_files_folder(self, path: str) -> tuple[list[dict[str, Any]], int]:
         """
         Get files for a given folder and all sub folders
         :param path: path
         :return: List of files
         """
-        files = sorted(Path(path).rglob("*"))
-        res = []
-        for file in files:
-            if file.is_dir():
+        files = []
+        DataAccessLocal._scan_folder(path=path, files=files, folders=[])
+        res = [{"name": entry.path, "size": entry.stat().st_size} for entry in files]
+        return sorted(res, key=lambda f: DataAccessLocal._path_key(f["name"])), 0
+
+    def _get_listing_version(self, path: str) -> str:
+        """
+        Get version of the folder content, computed from modification times of the folder and all its
+        sub folders. Folder modification time changes whenever files are added, removed or renamed in it
+        :param path: path
+        :return: version string
+        """
+        folders = []
+        DataAccessLocal._scan_folder(path=path, files=[], folders=folders, with_files=False)
+        version = hashlib.sha256()
+        try:
+            version.update(f"{path}:{os.stat(path).st_mtime_ns}".encode("utf-8"))
+        except OSError:
+            return None
+        for folder in sorted(folders, key=lambda f: f.path):
+            try:
+                version.update(f"{folder.path}:{folder.stat().st_mtime_ns}".encode("utf-8"))
+            except OSError:
                 continue
-            res.append({"name": str(file), "size": file.stat().st_size})
-        return res, 0
+        return version.hexdigest()
 
     def _get_folders_to_use(self) -> tuple[list[str], int]:
         """
@@ -102,29 +162,29 @@ class DataAccessLocal(DataAccess):
         :return: list of folders and retries
         """
         folders_to_use = []
-        files = sorted(Path(self.input_folder).rglob("*"))
-        for file in files:
-            if file.is_dir():
-                folder = str(file)
-                for s_name in self.d_sets:
-                    if folder.endswith(s_name):
-                        folders_to_use.append(folder)
-                        break
+        folders = []
+        DataAccessLocal._scan_folder(path=self.input_folder, files=[], folders=folders, with_files=False)
+        for folder in sorted([f.path for f in folders], key=DataAccessLocal._path_key):
+            for s_name in self.d_sets:
+                if folder.endswith(s_name):
+                    folders_to_use.append(folder)
+                    break
         return folders_to_use, 0
 
-    def get_table(self, path: str) -> tuple[pa.table, int]:
+    def get_table(self, path: str, columns: list[str] = None) -> tuple[pa.table, int]:
         """
         Attempts to read a PyArrow table from the given path.
 
         Args:
             path (str): Path to the file containing the table.
+            columns (list[str]): Optional list of columns to read, None - all columns.
 
         Returns:
             pyarrow.Table: PyArrow table if read successfully, None otherwise.
         """
 
         try:
-            table = pq.read_table(path)
+            table = pq.read_table(path, columns=columns)
             return table, 0
         except (FileNotFoundError, IOError, pa.ArrowException) as e:
             logger.error(f"Error reading table from {path}: {e}")
@@ -34,6 +34,11 @@ class DataAccessS3(DataAccess):
         n_samples: int = -1,
         files_to_use: list[str] = [".parquet"],
         files_to_checkpoint: list[str] = [".parquet"],
+        listing_cache: str = None,
+        listing_cache_ttl: int = 86400,
+        checkpoint_manifest: bool = False,
+        listing_threads: int = 1,
+        s3_transfer: dict[str, Any] = None,
     ):
         """
         Create data access class for folder based configuration
@@ -45,9 +50,17 @@ class DataAccessS3(DataAccess):
         :param n_samples: amount of files to randomly sample
         :param files_to_use: files extensions of files to include
         :param files_to_checkpoint: files extensions of files to use for checkpointing
+        :param listing_cache: local folder for caching input files listings, None - no caching
+        :param listing_cache_ttl: max age (sec) of the cached listings
+        :param checkpoint_manifest: flag to use completed files manifest for checkpointing
+        :param listing_threads: number of threads listing sub folders concurrently
+        :param s3_transfer: dictionary of S3 transfer tuning options (connection pool size, multipart
+                            threshold, part size, transfer threads, backoff), see ArrowS3 for details
         """
         super().__init__(d_sets=d_sets, checkpoint=checkpoint, m_files=m_files, n_samples=n_samples,
-                         files_to_use=files_to_use, files_to_checkpoint=files_to_checkpoint)
+                         files_to_use=files_to_use, files_to_checkpoint=files_to_checkpoint,
+                         listing_cache=listing_cache, listing_cache_ttl=listing_cache_ttl,
+                         checkpoint_manifest=checkpoint_manifest)
         if (
             s3_credentials is None
             or s3_credentials.get("access_key", None) is None
@@ -66,6 +79,8 @@ class DataAccessS3(DataAccess):
             secret_key=s3_credentials.get("secret_key"),
             endpoint=s3_credentials.get("url", None),
             region=s3_credentials.get("region", None),
+            list_threads=listing_threads,
+            **(s3_transfer or {}),
         )
 
     def get_output_folder(self) -> str:
@@ -114,14 +129,15 @@ class DataAccessS3(DataAccess):
                     break
         return folders_to_use, retries
 
-    def get_table(self, path: str) -> tuple[pyarrow.table, int]:
+    def get_table(self, path: str, columns: list[str] = None) -> tuple[pyarrow.table, int]:
         """
         Get pyArrow table for a given path
         :param path - file path
+        :param columns - optional list of columns to read, default None - all columns
         :return: pyArrow table or None, if the table read failed and number of retries
         """
         try:
-            return self.arrS3.read_table(path)
+            return self.arrS3.read_table(path, columns=columns)
         except Exception as e:
             self.logger.error(f"Exception reading table {path} from S3 - {e}")
             return None, 0
@@ -13,7 +13,7 @@
 import argparse
 import ast
 
-from data_processing.utils import CLIArgumentProvider, ParamsUtils, get_logger
+from data_processing.utils import CLIArgumentProvider, ParamsUtils, get_logger, str2bool
 
 
 logger = get_logger(__name__)
@@ -38,6 +38,7 @@ class TransformExecutionConfiguration(CLIArgumentProvider):
         self.code_location = {}
         self.name = name
         self.print_params = print_params
+        self.stream_batches = False
 
     def add_input_params(self, parser: argparse.ArgumentParser) -> None:
         """
@@ -59,6 +60,12 @@ class TransformExecutionConfiguration(CLIArgumentProvider):
             default=None,
             help="AST string containing code location\n" + ParamsUtils.get_ast_help_text(help_example_dict),
         )
+        parser.add_argument(
+            f"--{runtime_cli_prefix}stream_batches",
+            type=lambda x: bool(str2bool(x)),
+            default=False,
+            help="process parquet files one row group at a time, so that only one row group is decoded into a table",
+        )
 
     def apply_input_params(self, args: argparse.Namespace) -> bool:
         """
@@ -76,9 +83,12 @@ class TransformExecutionConfiguration(CLIArgumentProvider):
             "job id": captured["job_id"],
         }
         self.code_location = captured["code_location"]
+        self.stream_batches = captured["stream_batches"]
         # print parameters
         logger.info(f"pipeline id {self.pipeline_id}")
         if self.print_params:
             logger.info(f"job details {self.job_details}")
         logger.info(f"code location {self.code_location}")
+        if self.stream_batches:
+            logger.info("streaming parquet files by row groups")
         return True
@@ -34,6 +34,9 @@ class PythonTransformExecutionConfiguration(TransformExecutionConfiguration):
         """
         super().__init__(name=name, print_params=False)
         self.num_processors = 0
+        self.io_threads = 0
+        self.io_buffer_mb = 1024
+        self.table_workers = 0
 
     def add_input_params(self, parser: argparse.ArgumentParser) -> None:
         """
@@ -42,6 +45,27 @@ class PythonTransformExecutionConfiguration(TransformExecutionConfiguration):
         :return:
         """
         parser.add_argument(f"--{cli_prefix}num_processors", type=int, default=0, help="size of multiprocessing pool")
+        parser.add_argument(
+            f"--{cli_prefix}io_threads",
+            type=int,
+            default=0,
+            help="number of threads prefetching input and writing output files in the background, "
+            "0 - synchronous I/O. Used only for sequential execution",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}io_buffer_mb",
+            type=int,
+            default=1024,
+            help="max size (MB) of prefetched input files and pending output files",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}table_workers",
+            type=int,
+            default=0,
+            help="number of processes transforming slices of a table in parallel, 0 - tables are transformed "
+            "by the file processor. Used only for sequential execution of table transforms processing rows "
+            "independently (declaring parallel_slices)",
+        )
 
         return TransformExecutionConfiguration.add_input_params(self, parser=parser)
 
@@ -56,10 +80,22 @@ class PythonTransformExecutionConfiguration(TransformExecutionConfiguration):
         captured = CLIArgumentProvider.capture_parameters(args, cli_prefix, False)
         # store parameters locally
         self.num_processors = captured["num_processors"]
+        self.io_threads = captured["io_threads"]
+        self.io_buffer_mb = captured["io_buffer_mb"]
+        self.table_workers = captured["table_workers"]
         # print them
         if self.num_processors > 0:
             # we are using multiprocessing
             logger.info(f"using multiprocessing, num processors {self.num_processors}")
+        elif self.io_threads > 0:
+            # we are using background I/O
+            logger.info(f"using background I/O, io threads {self.io_threads}, io buffer {self.io_buffer_mb} MB")
+        if self.table_workers > 0:
+            if self.num_processors > 0:
+                logger.warning("table workers are not used with multiprocessing, ignoring them")
+                self.table_workers = 0
+            else:
+                logger.info(f"transforming tables in parallel, table workers {self.table_workers}")
         return True
 
     def get_input_params(self) -> dict[str, Any]:
@@ -67,4 +103,10 @@ class PythonTransformExecutionConfiguration(TransformExecutionConfiguration):
         get input parameters for job_input_params in metadata
         :return: dictionary of parameters
         """
-        return {"num_processors": self.num_processors}
+        return {
+            "num_processors": self.num_processors,
+            "io_threads": self.io_threads,
+            "io_buffer_mb": self.io_buffer_mb,
+            "table_workers": self.table_workers,
+            "stream_batches": self.stream_batches,
+        }
@@ -10,12 +10,18 @@
 # limitations under the License.
 ################################################################################
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from data_processing.data_access import DataAccessFactoryBase
 from data_processing.runtime import AbstractTransformFileProcessor
-from data_processing.transform import AbstractTransform, TransformStatistics
-from data_processing.utils import UnrecoverableException
+from data_processing.transform import (
+    AbstractTransform,
+    ParallelTableTransform,
+    TransformStatistics,
+)
+from data_processing.utils import MB, UnrecoverableException
 
 
 class PythonTransformFileProcessor(AbstractTransformFileProcessor):
@@ -30,6 +36,11 @@ class PythonTransformFileProcessor(AbstractTransformFileProcessor):
         transform_params: dict[str, Any],
         transform_class: type[AbstractTransform],
         is_folder: bool,
+        stream_batches: bool = False,
+        io_threads: int = 0,
+        io_buffer_mb: int = 1024,
+        table_workers: int = 0,
+        max_file_size: int = 0,
     ):
         """
         Init method
@@ -38,22 +49,176 @@ class PythonTransformFileProcessor(AbstractTransformFileProcessor):
         :param transform_params - transform parameters
         :param transform_class: transform class
         :param is_folder: folder transform flag
+        :param stream_batches: flag to feed table transforms one row group at a time
+        :param io_threads: number of threads prefetching input files and writing output files in the
+                           background. 0 means that files are read and written synchronously
+        :param io_buffer_mb: max size (MB) of prefetched input files and of output files waiting to be written
+        :param table_workers: number of processes transforming slices of a table in parallel. 0 means that
+                              tables are transformed by this processor
+        :param max_file_size: size (bytes) of the largest input file (from the files listing), it is reserved
+                              from the I/O buffer for every read in progress. 0 means that the size is unknown
+                              and the whole I/O buffer is reserved, so only a single file is read ahead
         """
         # invoke superclass
         super().__init__(
             data_access_factory=data_access_factory,
             transform_parameters=dict(transform_params),
             is_folder=is_folder,
+            stream_batches=stream_batches,
         )
         self.transform_params["statistics"] = statistics
         # Create local processor
         try:
-            self.transform = transform_class(self.transform_params)
+            if table_workers > 0 and not is_folder and ParallelTableTransform.supports(transform_class):
+                self.transform = ParallelTableTransform(
+                    transform_class=transform_class, config=self.transform_params, workers=table_workers
+                )
+            else:
+                if table_workers > 0:
+                    self.logger.warning(
+                        f"{transform_class.__name__} does not support transforming table slices in parallel, "
+                        f"tables are transformed by a single instance"
+                    )
+                self.transform = transform_class(self.transform_params)
         except Exception as e:
             self.logger.error(f"Exception creating transform  {e}")
             raise UnrecoverableException("failed creating transform")
         # Create statistics
         self.stats = statistics
+        # Set up background I/O
+        self.io_threads = io_threads
+        self.io_buffer_size = io_buffer_mb * MB
+        self.read_reservation = max_file_size if max_file_size > 0 else self.io_buffer_size
+        self.io_executor = None
+        if io_threads > 0 and not is_folder:
+            self.io_executor = ThreadPoolExecutor(max_workers=io_threads)
+        self.reads = {}
+        self.writes = deque()
+        self.write_size = 0
+        self.write_failed = False
+
+    def prefetch(self, files: list[str]) -> None:
+        """
+        Start reading the upcoming input files in the background. The amount of files read ahead is limited
+        by the number of I/O threads and the size of the prefetched data (including reads in progress) by the
+        I/O buffer size. A single file is always read ahead, even if it is larger than the I/O buffer
+        :param files: list of the files to process, in processing order, starting from the current one
+        :return: None
+        """
+        if self.io_executor is None:
+            return
+        for f_name in files:
+            if len(self.reads) > self.io_threads:
+                break
+            if f_name in self.reads:
+                continue
+            if len(self.reads) > 0 and self._prefetched_size() + self.read_reservation > self.io_buffer_size:
+                # back pressure - wait for the prefetched data to be consumed
+                break
+            self.reads[f_name] = self.io_executor.submit(self.data_access.get_file, path=f_name)
+
+    def _prefetched_size(self) -> int:
+        """
+        Get size of the prefetched data, that is not consumed yet. Reads in progress are charged with the
+        reserved size, as their data can not be measured until they complete
+        :return: size of prefetched data
+        """
+        size = 0
+        for read in self.reads.values():
+            if not read.done():
+                size += self.read_reservation
+            elif read.exception() is None and read.result()[0] is not None:
+                size += len(read.result()[0])
+        return size
+
+    def flush(self) -> None:
+        """
+        Flush the transform, wait for all background writes to complete and stop the I/O threads
+        :return: None
+        """
+        try:
+            super().flush()
+            self._complete_writes(budget=0)
+        finally:
+            if self.io_executor is not None:
+                self.io_executor.shutdown(wait=True)
+                self.io_executor = None
+                self.reads = {}
+
+    def _get_file(self, f_name: str) -> tuple[bytes, int]:
+        """
+        Read input file, using prefetched data if it is available
+        :param f_name: file name
+        :return: file content and number of retries
+        """
+        read = self.reads.pop(f_name, None)
+        if read is None:
+            return super()._get_file(f_name=f_name)
+        return read.result()
+
+    def _save_file(self, path: str, data: bytes) -> bool:
+        """
+        Write output file in the background. If the size of pending writes exceeds the I/O buffer size,
+        wait for the oldest writes to complete
+        :param path: output file path
+        :param data: file content
+        :return: True
+        """
+        if self.io_executor is None:
+            return super()._save_file(path=path, data=data)
+        write = self.io_executor.submit(self.data_access.save_file, path=path, data=data)
+        self.writes.append((write, path, len(data)))
+        self.write_size += len(data)
+        self._complete_writes(budget=self.io_buffer_size)
+        return True
+
+    def _complete_file(self, f_name: str) -> None:
+        """
+        Record file as completed. When writing in the background, the file is only completed
+        once all of its (preceding) writes are done, so a marker is queued after them
+        :param f_name: input file name
+        :return: None
+        """
+        if self.io_executor is None:
+            super()._complete_file(f_name=f_name)
+            return
+        self.writes.append((None, f_name, 0))
+        self._complete_writes(budget=self.io_buffer_size)
+        self._check_completed_files()
+
+    def _save_completed_files(self) -> None:
+        """
+        Wait for background writes, so that all completed files are recorded, before saving them
+        :return: None
+        """
+        self._complete_writes(budget=0)
+        super()._save_completed_files()
+
+    def _complete_writes(self, budget: int) -> None:
+        """
+        Collect results of the completed background writes, blocking until the size of the pending
+        writes is within budget
+        :param budget: max size of the pending writes
+        :return: None
+        """
+        while len(self.writes) > 0 and (
+            self.write_size > budget or self.writes[0][0] is None or self.writes[0][0].done()
+        ):
+            write, path, size = self.writes.popleft()
+            if write is None:
+                # all writes of the input file are done
+                if not self.write_failed:
+                    self.completed_files.append(path)
+                self.write_failed = False
+                continue
+            self.write_size -= size
+            save_res, retries = write.result()
+            if retries > 0:
+                self._publish_stats({"data access retries": retries})
+            if save_res is None:
+                self.logger.warning(f"Failed to write file {path}")
+                self._publish_stats({"failed_writes": 1})
+                self.write_failed = True
 
     def _publish_stats(self, stats: dict[str, Any]) -> None:
         self.stats.add_stats(stats)
@@ -69,7 +234,8 @@ class PythonPoolTransformFileProcessor(AbstractTransformFileProcessor):
         data_access_factory: DataAccessFactoryBase,
         transform_params: dict[str, Any],
         transform_class: type[AbstractTransform],
-        is_folder: bool
+        is_folder: bool,
+        stream_batches: bool = False,
     ):
         """
         Init method
@@ -77,11 +243,13 @@ class PythonPoolTransformFileProcessor(AbstractTransformFileProcessor):
         :param transform_params - transform parameters
         :param transform_class: transform class
         :param is_folder: folder tranform flag
+        :param stream_batches: flag to feed table transforms one row group at a time
         """
         super().__init__(
             data_access_factory=data_access_factory,
             transform_parameters=dict(transform_params),
             is_folder=is_folder,
+            stream_batches=stream_batches,
         )
         # Add data access and statistics to the processor parameters
         self.transform_params["data_access"] = self.data_access
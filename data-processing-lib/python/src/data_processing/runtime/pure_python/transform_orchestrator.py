@@ -14,7 +14,7 @@ import time
 import traceback
 import psutil
 from datetime import datetime
-from multiprocessing import Pool
+from multiprocessing import Barrier, Pool
 from typing import Any
 
 from data_processing.data_access import DataAccessFactoryBase
@@ -25,7 +25,7 @@ from data_processing.runtime.pure_python import (
     PythonTransformRuntimeConfiguration,
 )
 from data_processing.transform import AbstractTransform, TransformStatistics, AbstractFolderTransform
-from data_processing.utils import GB, get_logger
+from data_processing.utils import GB, MB, get_logger
 
 
 logger = get_logger(__name__)
@@ -73,6 +73,7 @@ def orchestrate(
     # create additional execution parameters
     runtime = runtime_config.create_transform_runtime()
     is_folder = issubclass(runtime_config.get_transform_class(), AbstractFolderTransform)
+    profile = {}
     try:
         if is_folder:
             # folder transform
@@ -104,6 +105,7 @@ def orchestrate(
                 ),
                 transform_class=runtime_config.get_transform_class(),
                 is_folder=is_folder,
+                stream_batches=execution_config.stream_batches,
             )
         else:
             # using sequential execution
@@ -117,6 +119,11 @@ def orchestrate(
                 ),
                 transform_class=runtime_config.get_transform_class(),
                 is_folder=is_folder,
+                stream_batches=execution_config.stream_batches,
+                io_threads=execution_config.io_threads,
+                io_buffer_mb=execution_config.io_buffer_mb,
+                table_workers=execution_config.table_workers,
+                max_file_size=int(profile.get("max_file_size", 0) * MB),
             )
         status = "success"
         return_code = 0
@@ -166,6 +173,11 @@ def _process_transforms(
     transform_params: dict[str, Any],
     transform_class: type[AbstractTransform],
     is_folder: bool,
+    stream_batches: bool = False,
+    io_threads: int = 0,
+    io_buffer_mb: int = 1024,
+    table_workers: int = 0,
+    max_file_size: int = 0,
 ) -> None:
     """
     Process transforms sequentially
@@ -176,6 +188,11 @@ def _process_transforms(
     :param transform_params - transform parameters
     :param transform_class: transform class
     :param is_folder: folder transform flag
+    :param stream_batches: flag to feed table transforms one row group at a time
+    :param io_threads: number of threads for background reads/writes, 0 - synchronous I/O
+    :param io_buffer_mb: max size (MB) of prefetched input and pending output
+    :param table_workers: number of processes transforming table slices, 0 - tables are not sliced
+    :param max_file_size: size (bytes) of the largest input file, 0 - unknown
     :return: metadata for the execution
     """
     # create executor
@@ -185,11 +202,18 @@ def _process_transforms(
         transform_params=transform_params,
         transform_class=transform_class,
         is_folder=is_folder,
+        stream_batches=stream_batches,
+        io_threads=io_threads,
+        io_buffer_mb=io_buffer_mb,
+        table_workers=table_workers,
+        max_file_size=max_file_size,
     )
     # process data
     t_start = time.time()
     completed = 0
     for path in files:
+        # start reading next files, while this one is processed
+        executor.prefetch(files[completed : completed + 1 + io_threads])
         executor.process_file(path)
         completed += 1
         if completed % print_interval == 0:
@@ -204,6 +228,44 @@ def _process_transforms(
     logger.info(f"done flushing in {round(time.time() - start, 3)} sec")
 
 
+# file processor of the pool worker process, set once by the pool initializer
+_worker_processor = None
+# barrier synchronizing flush of all pool workers
+_worker_barrier = None
+
+
+def _init_worker(processor: PythonPoolTransformFileProcessor, barrier: Barrier) -> None:
+    """
+    Pool worker initializer - keep the file processor in the worker, so that its transform (and any data it
+    buffers) lives for the whole execution and is not recreated for every task
+    :param processor: file processor
+    :param barrier: barrier synchronizing flush of all pool workers
+    :return: None
+    """
+    global _worker_processor, _worker_barrier
+    _worker_processor = processor
+    _worker_barrier = barrier
+
+
+def _process_file(f_name: str) -> dict[str, Any]:
+    """
+    Process a file by the file processor of the worker
+    :param f_name: file name
+    :return: statistics
+    """
+    return _worker_processor.process_file(f_name)
+
+
+def _flush_worker() -> dict[str, Any]:
+    """
+    Flush the file processor of the worker. A worker blocks on the barrier until all workers have taken
+    a flush task, so that every worker executes exactly one of them
+    :return: statistics
+    """
+    _worker_barrier.wait()
+    return _worker_processor.flush()
+
+
 def _process_transforms_multiprocessor(
     files: list[str],
     size: int,
@@ -211,7 +273,8 @@ def _process_transforms_multiprocessor(
     data_access_factory: DataAccessFactoryBase,
     transform_params: dict[str, Any],
     transform_class: type[AbstractTransform],
-    is_folder: bool
+    is_folder: bool,
+    stream_batches: bool = False,
 ) -> TransformStatistics:
     """
     Process transforms using multiprocessing pool
@@ -222,6 +285,7 @@ def _process_transforms_multiprocessor(
     :param transform_params - transform parameters
     :param transform_class: transform class
     :param is_folder: folder transform class
+    :param stream_batches: flag to feed table transforms one row group at a time
     :return: metadata for the execution
     """
     # result statistics
@@ -232,13 +296,14 @@ def _process_transforms_multiprocessor(
         transform_params=transform_params,
         transform_class=transform_class,
         is_folder=is_folder,
+        stream_batches=stream_batches,
     )
     completed = 0
     t_start = time.time()
     # create multiprocessing pool
-    with Pool(processes=size) as pool:
+    with Pool(processes=size, initializer=_init_worker, initargs=(processor, Barrier(size))) as pool:
         # execute for every input file
-        for result in pool.imap_unordered(processor.process_file, files):
+        for result in pool.imap_unordered(_process_file, files):
             completed += 1
             # accumulate statistics
             statistics.add_stats(result)
@@ -249,10 +314,8 @@ def _process_transforms_multiprocessor(
                     f"in {round((time.time() - t_start)/60., 3)} min"
                 )
         logger.info(f"Done processing {completed} files, waiting for flush() completion.")
-        results = [{}] * size
-        # flush
-        for i in range(size):
-            results[i] = pool.apply_async(processor.flush)
+        # flush every worker once
+        results = [pool.apply_async(_flush_worker) for _ in range(size)]
         for s in results:
             statistics.add_stats(s.get())
     logger.info(f"done flushing in {time.time() - t_start} sec")
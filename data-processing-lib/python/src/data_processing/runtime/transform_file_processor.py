@@ -14,9 +14,16 @@ import traceback
 from typing import Any
 
 from data_processing.data_access import DataAccessFactoryBase
+from data_processing.transform import AbstractTableTransform
 from data_processing.utils import TransformUtils, UnrecoverableException, get_logger
 
 
+# completed files are saved to the manifest when either this amount of them is accumulated
+CHECKPOINT_FILES = 1000
+# or this amount of seconds passed since the last save
+CHECKPOINT_INTERVAL = 60
+
+
 class AbstractTransformFileProcessor:
     """
     This is the the base class implementing processing of a single binary file
@@ -27,12 +34,14 @@ class AbstractTransformFileProcessor:
         data_access_factory: DataAccessFactoryBase,
         transform_parameters: dict[str, Any],
         is_folder: bool = False,
+        stream_batches: bool = False,
     ):
         """
         Init method
         :param data_access_factory: Data Access Factory
         :param transform_parameters: Transform parameters
         :param is_folder: folder transform flag
+        :param stream_batches: flag to feed table transforms one row group at a time
         """
         self.logger = get_logger(__name__)
         # validate parameters
@@ -49,6 +58,11 @@ class AbstractTransformFileProcessor:
         self.transform_params = transform_parameters
         self.transform_params["data_access"] = self.data_access
         self.is_folder = is_folder
+        self.stream_batches = stream_batches
+        # completed files manifest support
+        self.completed_files = []
+        self.checkpoint_time = time.time()
+        self.file_write_failed = False
 
     def process_file(self, f_name: str) -> None:
         """
@@ -61,9 +75,10 @@ class AbstractTransformFileProcessor:
             self.logger.warning("No data_access found. Returning.")
             return
         t_start = time.time()
+        self.file_write_failed = False
         if not self.is_folder:
             # Read source file only if we are processing file
-            filedata, retries = self.data_access.get_file(path=f_name)
+            filedata, retries = self._get_file(f_name=f_name)
             if retries > 0:
                 self._publish_stats({"data access retries": retries})
             if filedata is None:
@@ -76,7 +91,11 @@ class AbstractTransformFileProcessor:
             self.logger.debug(f"Begin transforming file {f_name}")
             if not self.is_folder:
                 # execute local processing
-                out_files, stats = self.transform.transform_binary(file_name=f_name, byte_array=filedata)
+                if self.stream_batches and isinstance(self.transform, AbstractTableTransform):
+                    # stream input file by row groups
+                    out_files, stats = self.transform.transform_binary_batches(file_name=f_name, byte_array=filedata)
+                else:
+                    out_files, stats = self.transform.transform_binary(file_name=f_name, byte_array=filedata)
                 name_extension = TransformUtils.get_file_extension(f_name)
                 self.last_file_name = name_extension[0]
                 self.last_file_name_next_index = None
@@ -87,6 +106,9 @@ class AbstractTransformFileProcessor:
             self.logger.debug(f"Done transforming file {f_name}, got {len(out_files)} files")
             # save results
             self._submit_file(t_start=t_start, out_files=out_files, stats=stats)
+            if not self.is_folder and self.data_access.checkpoint_manifest:
+                # record file as completed
+                self._complete_file(f_name=f_name)
         # Process unrecoverable exceptions
         except UnrecoverableException as _:
             self.logger.warning(f"Transform has thrown unrecoverable exception processing file {f_name}. Exiting...")
@@ -103,6 +125,8 @@ class AbstractTransformFileProcessor:
         the hook for them to return back locally stored data and their statistics.
         :return: None
         """
+        if self.data_access.checkpoint_manifest:
+            self._save_completed_files()
         if self.last_file_name is None or self.is_folder:
             # for some reason a given worker never processed anything. Happens in testing
             # when the amount of workers is greater than the amount of files
@@ -163,12 +187,7 @@ class AbstractTransformFileProcessor:
                 self.logger.debug(
                     f"Writing transformed file {self.last_file_name}{self.last_extension} to {output_name}"
                 )
-                save_res, retries = self.data_access.save_file(path=output_name, data=dt)
-                if retries > 0:
-                    self._publish_stats({"data access retries": retries})
-                if save_res is None:
-                    self.logger.warning(f"Failed to write file {output_name}")
-                    self._publish_stats({"failed_writes": 1})
+                self._save_file(path=output_name, data=dt)
                 # Store execution statistics. Doing this async
                 self._publish_stats(
                     {
@@ -204,12 +223,7 @@ class AbstractTransformFileProcessor:
                         )
                         dt = file_ext[0]
                     file_sizes += len(dt)
-                    save_res, retries = self.data_access.save_file(path=output_name_indexed, data=dt)
-                    if retries > 0:
-                        self._publish_stats({"data access retries": retries})
-                    if save_res is None:
-                        self.logger.warning(f"Failed to write file {output_name_indexed}")
-                        self._publish_stats({"failed_writes": 1})
+                    if not self._save_file(path=output_name_indexed, data=dt):
                         break
                 self.last_file_name_next_index = start_index + count
                 self._publish_stats(
@@ -223,6 +237,71 @@ class AbstractTransformFileProcessor:
         if len(stats) > 0:
             self._publish_stats(stats)
 
+    def _get_file(self, f_name: str) -> tuple[bytes, int]:
+        """
+        Read input file. Subclasses can override it to get the file content from a different source,
+        for example, prefetched data
+        :param f_name: file name
+        :return: file content and number of retries
+        """
+        return self.data_access.get_file(path=f_name)
+
+    def _save_file(self, path: str, data: bytes) -> bool:
+        """
+        Write output file and publish write statistics
+        :param path: output file path
+        :param data: file content
+        :return: True, if the file is written (or scheduled to be written), False otherwise
+        """
+        save_res, retries = self.data_access.save_file(path=path, data=data)
+        if retries > 0:
+            self._publish_stats({"data access retries": retries})
+        if save_res is None:
+            self.logger.warning(f"Failed to write file {path}")
+            self._publish_stats({"failed_writes": 1})
+            self.file_write_failed = True
+            return False
+        return True
+
+    def _complete_file(self, f_name: str) -> None:
+        """
+        Add file to the list of completed files, if all of its outputs were written successfully,
+        and periodically save this list to the completed files manifest
+        :param f_name: input file name
+        :return: None
+        """
+        if not self.file_write_failed:
+            self.completed_files.append(f_name)
+        self._check_completed_files()
+
+    def _check_completed_files(self) -> None:
+        """
+        Save completed files to the manifest, if enough of them is accumulated or enough time passed
+        :return: None
+        """
+        if (
+            len(self.completed_files) >= CHECKPOINT_FILES
+            or time.time() - self.checkpoint_time >= CHECKPOINT_INTERVAL
+        ):
+            self._save_completed_files()
+
+    def _save_completed_files(self) -> None:
+        """
+        Save completed files to the completed files manifest
+        :return: None
+        """
+        self.checkpoint_time = time.time()
+        if len(self.completed_files) == 0:
+            return
+        save_res, retries = self.data_access.save_completed_files(files=self.completed_files)
+        if retries > 0:
+            self._publish_stats({"data access retries": retries})
+        if save_res is None:
+            # files will be reprocessed on restart
+            self.logger.warning(f"Failed to save {len(self.completed_files)} completed files to the manifest")
+            self._publish_stats({"failed_writes": 1})
+        self.completed_files = []
+
     def _publish_stats(self, stats: dict[str, Any]) -> None:
         """
         Publishing execution statistics
@@ -0,0 +1,188 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from multiprocessing import Pool
+from typing import Any
+
+import pyarrow as pa
+from data_processing.transform.table_transform import AbstractTableTransform
+from data_processing.utils import UnrecoverableException
+
+
+# minimal number of rows of a table slice, processed by a worker
+MIN_SLICE_ROWS = 64
+# number of slices per worker, more slices balance the load of workers better
+SLICES_PER_WORKER = 4
+
+# transform instance of the worker process, created once by the pool initializer
+_worker_transform = None
+# exception creating the transform instance of the worker process
+_worker_error = None
+
+
+def _table_to_ipc(table: pa.Table) -> bytes:
+    """
+    Serialize table (slice) to Arrow IPC stream. Unlike pickling, only the sliced part of the buffers is written
+    :param table: table
+    :return: serialized table
+    """
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _table_from_ipc(data: bytes) -> pa.Table:
+    """
+    Deserialize table from Arrow IPC stream
+    :param data: serialized table
+    :return: table
+    """
+    return pa.ipc.open_stream(data).read_all()
+
+
+def _init_worker(transform_class: type[AbstractTableTransform], config: dict[str, Any]) -> None:
+    """
+    Worker process initializer - create the transform once per worker, so that models, etc. are loaded once
+    :param transform_class: transform class
+    :param config: transform configuration
+    :return: None
+    """
+    global _worker_transform, _worker_error
+    try:
+        _worker_transform = transform_class(config)
+    except Exception as e:
+        # failing initializer makes the pool restart workers forever, report the failure with the first slice
+        _worker_error = e
+
+
+def _transform_slice(data: bytes, file_name: str) -> tuple[list[bytes], dict[str, Any]]:
+    """
+    Transform a table slice in the worker process
+    :param data: serialized table slice
+    :param file_name: name of the file the table comes from
+    :return: serialized output tables and statistics
+    """
+    if _worker_transform is None:
+        raise UnrecoverableException(f"failed creating transform in the worker: {_worker_error}")
+    out_tables, stats = _worker_transform.transform(table=_table_from_ipc(data), file_name=file_name)
+    return [_table_to_ipc(table) for table in out_tables], stats
+
+
+class ParallelTableTransform(AbstractTableTransform):
+    """
+    Runs a table transform in a pool of worker processes. Every table is split into slices (ranges of rows),
+    which are transformed by the workers in parallel and the output tables of the slices are concatenated
+    in the order of the slices. Every worker creates its own instance of the transform once, when the pool
+    is started, so models, etc. are loaded once per worker and not per table.
+    This is only correct for transforms, which process rows independently and keep no state between rows or
+    tables, such transforms set parallel_slices (see supports()).
+    Statistics of the slices are merged by merge_partial_stats() of the transform class, which sums row counters
+    and takes statistics listed in its table_stats_keys once per table. Output tables at the same position of
+    the returned lists have to have compatible schemas, types are promoted when they are concatenated
+    (for example int64 and double columns, when types are inferred from the slice values).
+    Reading and writing of parquet files, column projection and row filtering are done by the (main) process
+    using this transform.
+    """
+
+    def __init__(
+        self,
+        transform_class: type[AbstractTableTransform],
+        config: dict[str, Any],
+        workers: int,
+        min_slice_rows: int = MIN_SLICE_ROWS,
+    ):
+        """
+        Initialization
+        :param transform_class: class of the transform to run, it is created with config in every worker
+        :param config: transform configuration, has to be picklable
+        :param workers: number of worker processes
+        :param min_slice_rows: minimal number of rows of a slice
+        """
+        super().__init__(config)
+        self.transform_class = transform_class
+        self.config = config
+        self.workers = workers
+        self.min_slice_rows = max(1, min_slice_rows)
+        self.pool = None
+        # start workers now, before the caller starts any threads
+        self._get_pool()
+
+    @staticmethod
+    def supports(transform_class: type) -> bool:
+        """
+        Check whether a transform class can be run in parallel over table slices. Transforms have to opt in by
+        setting parallel_slices, as the worker instances do not share any state (e.g. document filters or id
+        generators). Subclasses of such transforms buffering data (implementing flush) or processing files
+        differently (implementing transform_binary) can not be run either
+        :param transform_class: transform class
+        :return: True if it can
+        """
+        if not issubclass(transform_class, AbstractTableTransform) or not transform_class.parallel_slices:
+            return False
+        methods = ["transform_binary", "transform_binary_batches", "transform_batch", "flush", "flush_binary"]
+        return all(getattr(transform_class, name) is getattr(AbstractTableTransform, name) for name in methods)
+
+    def _get_pool(self) -> Pool:
+        """
+        Get workers pool, start it on the first use
+        :return: pool
+        """
+        if self.pool is None:
+            self.logger.info(f"Starting {self.workers} workers for {self.transform_class.__name__}")
+            self.pool = Pool(
+                processes=self.workers, initializer=_init_worker, initargs=(self.transform_class, self.config)
+            )
+        return self.pool
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Transform a table by slices in the worker processes
+        :param table: table
+        :param file_name: name of the file the table comes from
+        :return: a tuple of a list of 0 or more converted tables and a dictionary of statistics
+        """
+        n_slices = max(1, min(self.workers * SLICES_PER_WORKER, table.num_rows // self.min_slice_rows))
+        slice_rows = max(1, -(-table.num_rows // n_slices))
+        slices = [
+            (_table_to_ipc(table.slice(offset, slice_rows)), file_name)
+            for offset in range(0, max(table.num_rows, 1), slice_rows)
+        ]
+        self.logger.debug(f"Transforming table with {table.num_rows} rows in {len(slices)} slices")
+        results = self._get_pool().starmap(_transform_slice, slices)
+        # reassemble output tables and statistics in the order of slices
+        outputs = []
+        for out_tables, _ in results:
+            for index, data in enumerate(out_tables):
+                if index == len(outputs):
+                    outputs.append([])
+                outputs[index].append(_table_from_ipc(data))
+        stats = self.transform_class.merge_partial_stats([slice_stats for _, slice_stats in results])
+        return [pa.concat_tables(tables, promote_options="permissive") for tables in outputs], stats
+
+    def flush(self) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Stop the workers, transformed slices are never buffered
+        :return: no tables and statistics
+        """
+        self.close()
+        return [], {}
+
+    def close(self) -> None:
+        """
+        Stop the workers. They are started again, if the transform is used afterwards
+        :return: None
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
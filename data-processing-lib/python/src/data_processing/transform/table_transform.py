@@ -13,16 +13,32 @@
 from typing import Any
 
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from data_processing.transform import AbstractBinaryTransform
 from data_processing.utils import TransformUtils
 
 
+# configuration keys for the input columns and row filter (see TransformConfiguration)
+INPUT_COLUMNS_KEY = "table_input_columns"
+INPUT_FILTER_KEY = "table_input_filter"
+# name of the column holding position of the row in the input file, when only some of the columns are read
+ROW_INDEX_COLUMN = "__row_index__"
+
+
 class AbstractTableTransform(AbstractBinaryTransform):
     """
     Extends AbstractBinaryTransform to expect the byte arrays from to contain a pyarrow Table.
     Sub-classes are expected to implement transform() on the parsed Table instances.
     """
 
+    # keys of the statistics counting tables (files) rather than rows, see merge_partial_stats()
+    table_stats_keys: tuple[str, ...] = ()
+    # set by transforms, which process rows independently and keep no state across rows or tables (counters,
+    # filters of seen documents, etc.), so that slices of a table can be transformed by separate instances,
+    # see ParallelTableTransform
+    parallel_slices: bool = False
+
     def __init__(self, config: dict[str, Any]):
         """
         Initialize based on the dictionary of configuration information.
@@ -31,6 +47,8 @@ class AbstractTableTransform(AbstractBinaryTransform):
 
         super().__init__(config)
         self.logger = get_logger(__name__)
+        self.input_columns = config.get(INPUT_COLUMNS_KEY, None)
+        self.input_filter = config.get(INPUT_FILTER_KEY, None)
 
     def transform_binary(self, file_name: str, byte_array: bytes) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
         """
@@ -47,7 +65,16 @@ class AbstractTableTransform(AbstractBinaryTransform):
             self.logger.warning(f"Get wrong file type {file_name}")
             return [], {"wrong file type": 1}
         # convert to table
-        table = TransformUtils.convert_binary_to_arrow(data=byte_array)
+        if self.input_columns is None and self.input_filter is None:
+            table = TransformUtils.convert_binary_to_arrow(data=byte_array)
+        else:
+            # read only required columns and rows
+            table = TransformUtils.convert_binary_to_arrow(
+                data=byte_array,
+                columns=self.input_columns,
+                filters=self.input_filter,
+                row_index=ROW_INDEX_COLUMN if self.input_columns is not None else None,
+            )
         if table is None:
             self.logger.warning("Transformation of file to table failed")
             return [], {"failed_reads": 1}
@@ -57,6 +84,17 @@ class AbstractTableTransform(AbstractBinaryTransform):
             return [], {"skipped empty tables": 1}
         # transform table
         out_tables, stats = self.transform(table=table, file_name=file_name)
+        if ROW_INDEX_COLUMN in table.column_names:
+            # join back columns that were not read
+            schema = pq.read_schema(pa.BufferReader(byte_array))
+            out_tables = self._join_columns(
+                out_tables=out_tables,
+                read_remaining=lambda names: TransformUtils.convert_binary_to_arrow(data=byte_array, columns=names),
+                schema=schema,
+                columns=self.input_columns,
+            )
+            if out_tables is None:
+                return [], {"failed_reads": 1}
         # Add number of rows to stats
         stats = stats | {"source_doc_count": table.num_rows}
         # convert tables to files
@@ -64,6 +102,192 @@ class AbstractTableTransform(AbstractBinaryTransform):
             out_tables=out_tables, stats=stats | {"source_doc_count": table.num_rows}
         )
 
+    def transform_binary_batches(
+        self, file_name: str, byte_array: bytes
+    ) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
+        """
+        Streaming version of transform_binary. Instead of materializing the complete input table, the input
+        parquet file is read one row group at a time, every row group is passed to transform_batch() and the
+        resulting tables are appended to incremental parquet writers. Only a single row group is decoded into
+        an Arrow table at a time, but the (encoded) input file and the (encoded) output files are still held
+        in memory, as the input is passed in and the outputs are returned as bytes.
+        Statistics of the row groups are merged by merge_partial_stats(), so they have to be numeric counters,
+        unless the transform overrides it.
+        If there is an error, an exception must be raised - exit()ing is not generally allowed.
+        :param byte_array: contents of the input file to be transformed.
+        :param file_name: the file name of the file containing the given byte_array.
+        :return: a tuple of a list of 0 or more tuples and a dictionary of statistics that will be propagated
+                to metadata.  Each element of the return list, is a tuple of the transformed bytes and a string
+                holding the extension to be used when writing out the new bytes.
+        """
+        # validate extension
+        if TransformUtils.get_file_extension(file_name)[1] != ".parquet":
+            self.logger.warning(f"Get wrong file type {file_name}")
+            return [], {"wrong file type": 1}
+        # open parquet file
+        try:
+            parquet_file = pq.ParquetFile(pa.BufferReader(byte_array))
+        except Exception as e:
+            self.logger.warning(f"Opening parquet file failed, exception {e}")
+            return [], {"failed_reads": 1}
+        source_rows = parquet_file.metadata.num_rows
+        # Ensure that table is not empty
+        if source_rows == 0:
+            self.logger.warning(f"table is empty, skipping processing")
+            return [], {"skipped empty tables": 1}
+        batches_stats = []
+        streams = []
+        writers = []
+        out_docs = 0
+        try:
+            offset = 0
+            for group in range(parquet_file.num_row_groups):
+                # transform a single row group
+                if self.input_columns is None and self.input_filter is None:
+                    batch = parquet_file.read_row_group(group)
+                    out_tables, batch_stats = self.transform_batch(batch=batch, file_name=file_name)
+                else:
+                    out_tables, batch_stats = self._transform_projected_batch(
+                        byte_array=byte_array,
+                        parquet_file=parquet_file,
+                        group=group,
+                        offset=offset,
+                        file_name=file_name,
+                    )
+                offset += parquet_file.metadata.row_group(group).num_rows
+                batches_stats.append(batch_stats)
+                for index in range(len(out_tables)):
+                    out_table = out_tables[index]
+                    if not TransformUtils.verify_no_duplicate_columns(table=out_table, file=""):
+                        self.logger.warning("Transformer created file with the duplicate columns")
+                        return [], {"duplicate columns result": 1}
+                    if index == len(writers):
+                        # first table for this output, create writer
+                        streams.append(pa.BufferOutputStream())
+                        writers.append(pq.ParquetWriter(streams[index], schema=out_table.schema, compression="ZSTD"))
+                    if out_table.schema != writers[index].schema:
+                        out_table = out_table.cast(writers[index].schema)
+                    writers[index].write_table(out_table)
+                    out_docs += out_table.num_rows
+        except Exception as e:
+            self.logger.warning(f"Failed to write batch to parquet, exception {e}")
+            return [], {"failed_writes": 1}
+        finally:
+            for writer in writers:
+                writer.close()
+        out_files = [(bytes(stream.getvalue()), ".parquet") for stream in streams]
+        stats = self.merge_partial_stats(batches_stats)
+        return out_files, stats | {"source_doc_count": source_rows, "result_doc_count": out_docs}
+
+    @classmethod
+    def merge_partial_stats(cls, partial_stats: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Merge statistics of transforming parts (ranges of rows) of a table into the statistics of the table. This
+        is used, when a table is transformed in parts, by transform_binary_batches() and ParallelTableTransform. Statistics listed in
+        table_stats_keys are counted once per table and taken from the first part, all other statistics have to be
+        numeric counters and are summed over the parts. Transforms returning other statistics should override it.
+        :param partial_stats: statistics returned for the parts, in the order of the parts
+        :return: statistics of the table
+        """
+        stats = {}
+        for part_stats in partial_stats:
+            for key, val in part_stats.items():
+                if key in cls.table_stats_keys:
+                    stats.setdefault(key, val)
+                else:
+                    stats[key] = stats.get(key, 0) + val
+        return stats
+
+    def transform_batch(self, batch: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Converts a single row group of the input file into output table(s). This is invoked by
+        transform_binary_batches() for every row group of the input file, tables returned at the same position
+        of the list for different row groups are written to the same output file, so they have to have the same
+        schema. The default implementation simply delegates to transform(), which is correct for all transforms
+        that process rows independently. Transforms requiring the complete table should not be used with streaming.
+        If there is an error, an exception must be raised - exit()ing is not generally allowed.
+        :param batch: table containing a single row group of the input file
+        :param file_name: the file name of the file containing the given batch.
+        :return: a tuple of a list of 0 or more converted tables and a dictionary of statistics that will be
+        propagated to metadata
+        """
+        return self.transform(table=batch, file_name=file_name)
+
+    def _transform_projected_batch(
+        self, byte_array: bytes, parquet_file: pq.ParquetFile, group: int, offset: int, file_name: str
+    ) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Transform a single row group, reading only input columns and rows matching the input filter
+        :param byte_array: contents of the input file
+        :param parquet_file: input parquet file
+        :param group: row group number
+        :param offset: position of the first row of the row group in the file
+        :param file_name: the file name of the input file
+        :return: a tuple of a list of 0 or more converted tables and a dictionary of statistics
+        """
+        schema = parquet_file.schema_arrow
+        columns = self.input_columns if self.input_columns is not None else schema.names
+        batch = TransformUtils._read_table_with_row_index(
+            reader=pa.BufferReader(byte_array),
+            columns=columns,
+            filters=self.input_filter,
+            row_index=ROW_INDEX_COLUMN,
+            row_groups=[group],
+        )
+        out_tables, stats = self.transform_batch(batch=batch, file_name=file_name)
+
+        out_tables = self._join_columns(
+            out_tables=out_tables,
+            read_remaining=lambda names: parquet_file.read_row_group(group, columns=names),
+            schema=schema,
+            columns=columns,
+            offset=offset,
+        )
+        if out_tables is None:
+            raise Exception(f"Failed to read remaining columns of the row group {group}")
+        return out_tables, stats
+
+    @staticmethod
+    def _join_columns(
+        out_tables: list[pa.Table], read_remaining: Any, schema: pa.Schema, columns: list[str], offset: int = 0
+    ) -> list[pa.Table]:
+        """
+        Join columns of the input, that were not read, back to the tables produced by the transform. Only tables
+        containing row index column are joined, other tables (for example, aggregates) are returned as is.
+        :param out_tables: tables produced by the transform
+        :param read_remaining: function reading given list of columns of the input
+        :param schema: schema of the input file
+        :param columns: input columns, that were read
+        :param offset: row index of the first row returned by read_remaining
+        :return: list of tables or None, if reading remaining columns failed
+        """
+        remaining = None
+        result = []
+        for table in out_tables:
+            if ROW_INDEX_COLUMN not in table.column_names:
+                result.append(table)
+                continue
+            indexes = pc.subtract(table[ROW_INDEX_COLUMN], offset)
+            table = table.drop_columns([ROW_INDEX_COLUMN])
+            if remaining is None:
+                # read columns that were not read initially (only once)
+                names = [name for name in schema.names if name not in columns]
+                if len(names) == 0:
+                    return [
+                        t.drop_columns([ROW_INDEX_COLUMN]) if ROW_INDEX_COLUMN in t.column_names else t
+                        for t in out_tables
+                    ]
+                remaining = read_remaining(names)
+                if remaining is None:
+                    return None
+            carried = remaining.take(indexes)
+            # keep original column order, columns added by the transform go last
+            names = [name for name in schema.names if name in table.column_names or name in carried.column_names]
+            names += [name for name in table.column_names if name not in schema.names]
+            arrays = [table[name] if name in table.column_names else carried[name] for name in names]
+            result.append(pa.Table.from_arrays(arrays, names=names))
+        return result
+
     def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
         """
         Converts input table into an output table.
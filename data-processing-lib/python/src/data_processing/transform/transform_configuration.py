@@ -14,6 +14,10 @@ from argparse import ArgumentParser
 from typing import Any
 
 from data_processing.transform import AbstractTransform
+from data_processing.transform.table_transform import (
+    INPUT_COLUMNS_KEY,
+    INPUT_FILTER_KEY,
+)
 from data_processing.utils import CLIArgumentProvider
 
 
@@ -63,12 +67,38 @@ class TransformConfiguration(CLIArgumentProvider):
             del self.params[key]
         return parameters
 
+    def get_input_columns(self) -> list[str]:
+        """
+        Get the list of input columns used by the transform. When defined, table transforms decode only these
+        columns of the input file and the remaining columns are joined back to the tables produced by the
+        transform, that preserve input rows (contain row index column). Transforms that only read a few
+        columns of wide tables should override this method, typically using values of self.params
+        :return: list of columns or None, if the transform needs all columns
+        """
+        return None
+
+    def get_input_filter(self) -> list[Any]:
+        """
+        Get row filter, applied to the input table before it is passed to the transform. The filter is defined
+        in the DNF format of pyarrow.parquet.read_table, for example [("lang", "=", "en")] and is pushed down
+        to parquet row groups statistics. Rows not matching the filter are not included in the output.
+        :return: row filter or None, if all rows are used
+        """
+        return None
+
     def get_transform_params(self) -> dict[str, Any]:
         """
          Get transform parameters
         :return: transform parameters
         """
-        return self.params
+        params = self.params
+        columns = self.get_input_columns()
+        if columns is not None:
+            params = params | {INPUT_COLUMNS_KEY: columns}
+        row_filter = self.get_input_filter()
+        if row_filter is not None:
+            params = params | {INPUT_FILTER_KEY: row_filter}
+        return params
 
 
 def get_transform_config(
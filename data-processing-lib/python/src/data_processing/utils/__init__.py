@@ -4,5 +4,7 @@ from data_processing.utils.cli_utils import GB, KB, MB, CLIArgumentProvider, str
 from data_processing.utils.log import get_logger
 from data_processing.utils.params_utils import ParamsUtils
 from data_processing.utils.transform_utils import TransformUtils, RANDOM_SEED, LOCAL_TO_DISK
+from data_processing.utils.ingest_utils import ParquetRowsWriter, map_zip_members
+from data_processing.utils.lru_cache import LRUCache
 from data_processing.utils.pipinstaller import PipInstaller
 from data_processing.utils.transform_configurator import TransformRuntime, TransformsConfiguration
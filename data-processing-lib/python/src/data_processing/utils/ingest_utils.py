@@ -0,0 +1,157 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import io
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_processing.utils.cli_utils import MB
+
+
+# default number of rows of a row group written by ParquetRowsWriter
+ROW_GROUP_ROWS = 1000
+# default size of an output file, after which ParquetRowsWriter starts a new one
+MAX_FILE_SIZE = 512 * MB
+# number of members processed ahead of the consumer per worker thread
+PENDING_PER_WORKER = 4
+
+
+def map_zip_members(
+    byte_array: bytes,
+    process: Callable[[zipfile.ZipInfo, bytes], Any],
+    member_filter: Optional[Callable[[zipfile.ZipInfo], bool]] = None,
+    workers: int = 1,
+) -> Iterator[tuple[zipfile.ZipInfo, Any, Optional[Exception]]]:
+    """
+    Read and process the (file) members of a zip archive in a pool of threads. Decompression, decoding,
+    hashing, etc. of different members run in parallel, as they release the GIL. Results are yielded in
+    the order of members, at most workers * PENDING_PER_WORKER members are processed ahead of the consumer,
+    so memory does not depend on the size of the archive
+    :param byte_array: zip archive
+    :param process: function processing a member, called with the member info and its content
+    :param member_filter: function selecting members to process, all file members if None
+    :param workers: number of worker threads
+    :return: iterator of the member info, the result of process and the exception reading or processing
+            the member (None on success)
+    """
+
+    with zipfile.ZipFile(io.BytesIO(byte_array)) as opened_zip:
+
+        def read_member(member: zipfile.ZipInfo) -> tuple[Any, Optional[Exception]]:
+            try:
+                with opened_zip.open(member) as file:
+                    return process(member, file.read()), None
+            except Exception as e:
+                return None, e
+
+        members = (
+            member
+            for member in opened_zip.infolist()
+            if not member.is_dir() and (member_filter is None or member_filter(member))
+        )
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            pending = deque()
+            for member in members:
+                pending.append((member, executor.submit(read_member, member)))
+                if len(pending) >= max(1, workers) * PENDING_PER_WORKER:
+                    member, future = pending.popleft()
+                    yield member, *future.result()
+            while pending:
+                member, future = pending.popleft()
+                yield member, *future.result()
+
+
+class ParquetRowsWriter:
+    """
+    Writes rows to parquet files in memory. Rows are accumulated column wise and written as row groups of
+    at most row_group_rows rows, so only a single row group is kept as python objects. A new file is started
+    when the current one reaches max_file_size bytes (compressed). All row groups have the schema of the
+    first one.
+    """
+
+    def __init__(self, row_group_rows: int = ROW_GROUP_ROWS, max_file_size: int = MAX_FILE_SIZE):
+        """
+        Initialization
+        :param row_group_rows: maximum number of rows of a row group
+        :param max_file_size: size of a file in bytes, after which a new file is started
+        """
+        self.row_group_rows = max(1, row_group_rows)
+        self.max_file_size = max_file_size
+        self.columns = {}
+        self.buffered_rows = 0
+        self.schema = None
+        self.stream = None
+        self.writer = None
+        self.files = []
+        self.rows = 0
+
+    def add_row(self, row: dict[str, Any]) -> None:
+        """
+        Add a row, all rows have to have the same keys
+        :param row: row as a dictionary of column names to values
+        :return: None
+        """
+        for key, value in row.items():
+            self.columns.setdefault(key, []).append(value)
+        self.buffered_rows += 1
+        self.rows += 1
+        if self.buffered_rows >= self.row_group_rows:
+            self._write_row_group()
+
+    def _write_row_group(self) -> None:
+        """
+        Write buffered rows as a row group, start a new file if the current one is full
+        :return: None
+        """
+        if self.buffered_rows == 0:
+            return
+        table = pa.table(self.columns)
+        self.columns = {}
+        self.buffered_rows = 0
+        if self.schema is None:
+            self.schema = table.schema
+        elif table.schema != self.schema:
+            table = table.select(self.schema.names).cast(self.schema)
+        if self.writer is None:
+            self.stream = pa.BufferOutputStream()
+            self.writer = pq.ParquetWriter(self.stream, schema=self.schema, compression="ZSTD")
+        self.writer.write_table(table)
+        if self.stream.tell() >= self.max_file_size:
+            self._close_file()
+
+    def _close_file(self) -> None:
+        """
+        Finish the current file
+        :return: None
+        """
+        if self.writer is not None:
+            self.writer.close()
+            self.files.append(bytes(self.stream.getvalue()))
+            self.writer = None
+            self.stream = None
+
+    def close(self) -> list[tuple[bytes, str]]:
+        """
+        Write remaining rows and finish the files. Without any rows a single file with an empty table is created
+        :return: list of parquet files content and extension
+        """
+        self._write_row_group()
+        self._close_file()
+        if len(self.files) == 0:
+            stream = pa.BufferOutputStream()
+            pq.write_table(table=pa.table({}), where=stream, compression="ZSTD")
+            self.files.append(bytes(stream.getvalue()))
+        return [(data, ".parquet") for data in self.files]
@@ -0,0 +1,63 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """
+    Bounded cache, evicting the least recently used entries once it is full. Used by transforms to keep
+    results computed for previous tables (model outputs, etc.) across transform invocations
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Create cache
+        :param max_size: max number of entries, 0 - nothing is cached
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get entry, marking it as the most recently used
+        :param key: entry key
+        :param default: value returned for a missing entry
+        :return: entry value or default
+        """
+        value = self.entries.get(key, self)
+        if value is self:
+            return default
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Add (or replace) entry as the most recently used, evicting the least recently used entries
+        beyond max_size
+        :param key: entry key
+        :param value: entry value
+        :return: None
+        """
+        if self.max_size <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -14,15 +14,21 @@ import hashlib
 import os
 import string
 import sys
-from typing import Any
+from typing import Any, Union
 
 import mmh3
+import numpy as np
 import pyarrow as pa
 import pyarrow.parquet as pq
 
 
 RANDOM_SEED = 42
 LOCAL_TO_DISK = 2
+# bytes kept by normalize_string - all except space, new line and punctuation
+NORMALIZE_KEEP = np.ones(256, dtype=bool)
+NORMALIZE_KEEP[[ord(c) for c in " \n" + string.punctuation]] = False
+# characters whose str.lower() mapping differs from the per character utf8 lower case
+SPECIAL_CASING_PATTERN = "[\u0130\u03a3]"
 
 
 class TransformUtils:
@@ -58,6 +64,64 @@ class TransformUtils:
         """
         return doc.replace(" ", "").replace("\n", "").lower().translate(str.maketrans("", "", string.punctuation))
 
+    @staticmethod
+    def normalize_string_array(docs: Union[pa.Array, pa.ChunkedArray]) -> pa.ChunkedArray:
+        """
+        Vectorized version of normalize_string, normalizing complete array of strings. Nulls are
+        normalized as a string "None"
+        :param docs: array of strings
+        :return: array of normalized strings
+        """
+        import pyarrow.compute as pc
+
+        docs = pc.fill_null(docs, "None")
+        if isinstance(docs, pa.ChunkedArray):
+            removed = pa.chunked_array(
+                [TransformUtils._remove_ascii_characters(chunk) for chunk in docs.chunks], type=docs.type
+            )
+        else:
+            removed = TransformUtils._remove_ascii_characters(docs)
+        normalized = pc.utf8_lower(removed)
+        # utf8proc lower case does not implement context and multi character mappings of str.lower,
+        # recompute strings containing characters affected by them
+        special = pc.match_substring_regex(docs, pattern=SPECIAL_CASING_PATTERN)
+        if pc.any(special).as_py():
+            values = normalized.to_pylist()
+            for index in pc.indices_nonzero(special).to_pylist():
+                values[index] = TransformUtils.normalize_string(docs[index].as_py())
+            normalized = pa.chunked_array([pa.array(values, type=docs.type)])
+        return normalized if isinstance(normalized, pa.ChunkedArray) else pa.chunked_array([normalized])
+
+    @staticmethod
+    def _remove_ascii_characters(docs: pa.Array) -> pa.Array:
+        """
+        Remove characters, removed by normalize_string, from array of strings without nulls. As ASCII bytes never
+        appear inside multibyte UTF-8 sequences, characters can be removed directly from the data buffer
+        :param docs: string array
+        :return: string array with characters removed
+        """
+        _, offsets_buffer, data_buffer = docs.buffers()
+        if data_buffer is None or len(docs) == 0:
+            return docs
+        offset_type = np.int64 if pa.types.is_large_string(docs.type) else np.int32
+        offsets = np.frombuffer(offsets_buffer, dtype=offset_type)[docs.offset : docs.offset + len(docs) + 1]
+        data = np.frombuffer(data_buffer, dtype=np.uint8)[offsets[0] : offsets[-1]]
+        keep = NORMALIZE_KEEP[data]
+        # count kept bytes of every non empty string to build new offsets
+        lengths = np.diff(offsets)
+        non_empty = lengths > 0
+        kept = np.zeros(len(docs) + 1, dtype=np.int64)
+        if len(data) > 0:
+            starts = (offsets[:-1] - offsets[0])[non_empty]
+            kept[1:][non_empty] = np.add.reduceat(keep.view(np.uint8), starts, dtype=np.int64)
+        new_offsets = np.cumsum(kept).astype(offset_type)
+        return pa.Array.from_buffers(
+            docs.type,
+            len(docs),
+            [None, pa.py_buffer(new_offsets), pa.py_buffer(np.compress(keep, data))],
+            null_count=0,
+        )
+
     @staticmethod
     def str_to_hash(val: str) -> str:
         """
@@ -129,11 +193,23 @@ class TransformUtils:
             )
 
     @staticmethod
-    def convert_binary_to_arrow(data: bytes, schema: pa.schema = None) -> pa.Table:
+    def convert_binary_to_arrow(
+        data: bytes,
+        schema: pa.schema = None,
+        columns: list[str] = None,
+        filters: list[Any] = None,
+        row_index: str = None,
+    ) -> pa.Table:
         """
         Convert byte array to table
         :param data: byte array
         :param schema: optional Arrow table schema used for reading table, default None
+        :param columns: optional list of columns to read, default None - all columns
+        :param filters: optional row filter in the DNF format of pyarrow.parquet.read_table, for example
+                        [("lang", "=", "en"), ("size", ">", 100)]. Row groups are pruned based on the
+                        parquet statistics, remaining rows are filtered after reading. Default None
+        :param row_index: optional name of the column to add to the table, containing the position of the row
+                          in the file. Used to join the columns that were not read back to the table
         :return: table or None if the conversion failed
         """
         from data_processing.utils import get_logger
@@ -141,12 +217,71 @@ class TransformUtils:
         logger = get_logger(__name__)
         try:
             reader = pa.BufferReader(data)
-            table = pq.read_table(reader, schema=schema)
-            return table
+            if row_index is None:
+                return pq.read_table(reader, schema=schema, columns=columns, filters=filters)
+            return TransformUtils._read_table_with_row_index(
+                reader=reader, columns=columns, filters=filters, row_index=row_index
+            )
         except Exception as e:
             logger.error(f"Failed to convert byte array to arrow table, exception {e}. Skipping it")
             return None
 
+    @staticmethod
+    def _read_table_with_row_index(
+        reader: pa.BufferReader,
+        columns: list[str],
+        filters: list[Any],
+        row_index: str,
+        row_groups: list[int] = None,
+    ) -> pa.Table:
+        """
+        Read table row group by row group, adding row position column
+        :param reader: buffer reader for the parquet file
+        :param columns: list of columns to read, None - all columns
+        :param filters: row filter in the DNF format, None - no filtering
+        :param row_index: name of the row position column
+        :param row_groups: row groups to read, None - all row groups
+        :return: table
+        """
+        import pyarrow.dataset as ds
+
+        parquet_file = pq.ParquetFile(reader)
+        if columns is None:
+            columns = parquet_file.schema_arrow.names
+        read_columns = list(columns)
+        groups = range(parquet_file.num_row_groups) if row_groups is None else row_groups
+        expression = None
+        if filters is not None:
+            expression = pq.filters_to_expression(filters)
+            # filters columns have to be read for filtering
+            for conjunction in filters if isinstance(filters[0], list) else [filters]:
+                for name, _, _ in conjunction:
+                    if name not in read_columns:
+                        read_columns.append(name)
+            # use row groups statistics to skip row groups that can not match
+            fragment = ds.ParquetFileFormat().make_fragment(reader)
+            matching = {
+                group.id for piece in fragment.split_by_row_group(filter=expression) for group in piece.row_groups
+            }
+            groups = [group for group in groups if group in matching]
+        offsets = [0]
+        for group in range(parquet_file.num_row_groups):
+            offsets.append(offsets[-1] + parquet_file.metadata.row_group(group).num_rows)
+        tables = []
+        for group in groups:
+            table = parquet_file.read_row_group(group, columns=read_columns)
+            table = table.append_column(
+                row_index, pa.array(range(offsets[group], offsets[group + 1]), type=pa.int64())
+            )
+            if expression is not None:
+                table = table.filter(expression)
+            tables.append(table.select(list(columns) + [row_index]))
+        if len(tables) == 0:
+            schema = parquet_file.schema_arrow
+            fields = [schema.field(name) for name in columns] + [pa.field(row_index, pa.int64())]
+            return pa.schema(fields).empty_table()
+        return pa.concat_tables(tables)
+
     @staticmethod
     def convert_arrow_to_binary(table: pa.Table) -> bytes:
         """
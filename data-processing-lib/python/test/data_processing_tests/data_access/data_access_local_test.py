@@ -629,3 +629,67 @@ class TestSaveFile(TestInit):
     def test_invalid_filename(self):
         file_info, _ = self.dal.save_file("", b"Data")
         assert file_info is None
+
+
+class TestListingCache:
+    test_dir = os.path.join(os.sep, "tmp", "input_listing_cache")
+    cache_dir = os.path.join(os.sep, "tmp", "listing_cache")
+
+    def test_cached_listing(self):
+        dal = DataAccessLocal(
+            {"input_folder": self.test_dir, "output_folder": self.test_dir + "_output"}, listing_cache=self.cache_dir
+        )
+        os.makedirs(os.path.join(self.test_dir, "sub"), exist_ok=True)
+        for name in ["a.parquet", os.path.join("sub", "b.parquet")]:
+            with open(os.path.join(self.test_dir, name), "wb") as f:
+                f.write(b"data")
+        files, _, _ = dal._get_files_folder(path=self.test_dir, files_to_use=None, cm_files=-1, use_cache=True)
+        assert len(os.listdir(self.cache_dir)) == 1
+        # listing is served from the cache, while the folder does not change
+        with patch.object(DataAccessLocal, "_list_files_folder") as list_files:
+            cached, _, _ = dal._get_files_folder(path=self.test_dir, files_to_use=None, cm_files=-1, use_cache=True)
+            list_files.assert_not_called()
+        assert cached == files
+        # adding file to the sub folder invalidates the cache
+        with open(os.path.join(self.test_dir, "sub", "c.parquet"), "wb") as f:
+            f.write(b"data")
+        updated, _, _ = dal._get_files_folder(path=self.test_dir, files_to_use=None, cm_files=-1, use_cache=True)
+        assert len(updated) == 3
+        for folder in [self.test_dir, self.cache_dir]:
+            for root, dirs, names in os.walk(folder, topdown=False):
+                for name in names:
+                    os.remove(os.path.join(root, name))
+                os.rmdir(root)
+
+
+class TestCheckpointManifest:
+    input_dir = os.path.join(os.sep, "tmp", "input_manifest")
+    output_dir = os.path.join(os.sep, "tmp", "output_manifest")
+
+    def test_completed_files(self):
+        dal = DataAccessLocal(
+            {"input_folder": self.input_dir, "output_folder": self.output_dir}, checkpoint=True, checkpoint_manifest=True
+        )
+        os.makedirs(self.input_dir, exist_ok=True)
+        names = [os.path.join(self.input_dir, f"file{i}.parquet") for i in range(4)]
+        for name in names:
+            with open(name, "wb") as f:
+                f.write(b"data")
+        # empty manifest - fall back to the output listing
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, "file0.parquet"), "wb") as f:
+            f.write(b"data")
+        files, _, _ = dal.get_files_to_process()
+        assert files == names[1:]
+        # manifest segments written by different workers
+        dal.save_completed_files(files=names[1:2])
+        dal.save_completed_files(files=names[2:3])
+        completed, _ = dal.get_completed_files()
+        assert completed == set(names[1:3])
+        files, _, _ = dal.get_files_to_process()
+        assert files == [names[0], names[3]]
+        for folder in [self.input_dir, self.output_dir]:
+            for root, dirs, f_names in os.walk(folder, topdown=False):
+                for name in f_names:
+                    os.remove(os.path.join(root, name))
+                os.rmdir(root)
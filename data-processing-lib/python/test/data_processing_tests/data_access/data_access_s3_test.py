@@ -137,3 +137,92 @@ def test_files_to_process():
         assert 0.034458160400390625 == profile["max_file_size"]
         assert 0.034458160400390625 == profile["min_file_size"]
         assert 0.06891632080078125 == profile["total_file_size"]
+
+
+def test_concurrent_listing():
+    """
+    Testing that concurrent listing returns the same files and folders as the sequential one
+    :return: None
+    """
+    with mock_aws():
+        d_a = DataAccessS3(s3_credentials=s3_cred, s3_config=s3_conf, d_sets=None, checkpoint=False, m_files=-1)
+        _create_and_populate_bucket(d_a=d_a, input_location=f"{s3_conf['input_folder']}", n_files=2)
+        _create_and_populate_bucket(d_a=d_a, input_location=f"{s3_conf['input_folder']}dataset=d1/", n_files=3)
+        _create_and_populate_bucket(d_a=d_a, input_location=f"{s3_conf['input_folder']}dataset=d1/a/", n_files=2)
+        _create_and_populate_bucket(d_a=d_a, input_location=f"{s3_conf['input_folder']}dataset=d2/", n_files=4)
+        files, _ = d_a.arrS3.list_files(s3_conf["input_folder"])
+        folders, _ = d_a.arrS3.list_folders(s3_conf["input_folder"])
+        d_a.arrS3.list_threads = 4
+        c_files, _ = d_a.arrS3.list_files(s3_conf["input_folder"])
+        c_folders, _ = d_a.arrS3.list_folders(s3_conf["input_folder"])
+        assert 11 == len(files)
+        assert files == c_files
+        assert 3 == len(folders)
+        assert folders == c_folders
+
+
+def test_multipart_transfer():
+    """
+    Testing that large files are written with multipart upload and read back with ranged reads
+    :return: None
+    """
+    with mock_aws():
+        d_a = DataAccessS3(
+            s3_credentials=s3_cred,
+            s3_config=s3_conf,
+            s3_transfer={"multipart_threshold": 6 * 1024 * 1024, "part_size": 5 * 1024 * 1024, "transfer_threads": 4},
+        )
+        d_a.arrS3.s3_client.create_bucket(Bucket="test")
+        data = os.urandom(13 * 1024 * 1024)
+        path = f"{s3_conf['output_folder']}large.bin"
+        result, _ = d_a.save_file(path=path, data=data)
+        assert result is not None
+        # 3 parts - 5MB, 5MB and 3MB
+        assert "-3" in result["ETag"]
+        r_data, _ = d_a.get_file(path)
+        # files of all sizes are returned as bytes
+        assert isinstance(r_data, bytes) and data == r_data
+        # small and empty files are read with a single request
+        for size in [0, 1024]:
+            small = os.urandom(size)
+            d_a.save_file(path=f"{s3_conf['output_folder']}small.bin", data=small)
+            r_data, _ = d_a.get_file(f"{s3_conf['output_folder']}small.bin")
+            assert isinstance(r_data, bytes) and small == r_data
+
+
+def test_read_pinned_version_and_client_errors():
+    """
+    Testing that an object overwritten during a ranged read is not returned and that client errors are not retried
+    :return: None
+    """
+    with mock_aws():
+        d_a = DataAccessS3(
+            s3_credentials=s3_cred,
+            s3_config=s3_conf,
+            s3_transfer={"multipart_threshold": 6 * 1024 * 1024, "part_size": 5 * 1024 * 1024, "transfer_threads": 1},
+        )
+        s3_client = d_a.arrS3.s3_client
+        s3_client.create_bucket(Bucket="test")
+        path = f"{s3_conf['output_folder']}large.bin"
+        d_a.save_file(path=path, data=os.urandom(13 * 1024 * 1024))
+        get_object = s3_client.get_object
+        requests = []
+
+        def overwriting_get_object(**kwargs):
+            requests.append(kwargs)
+            result = get_object(**kwargs)
+            if len(requests) == 1:
+                # the object is overwritten after its first part was read
+                s3_client.put_object(Bucket="test", Key=kwargs["Key"], Body=os.urandom(13 * 1024 * 1024))
+            return result
+
+        s3_client.get_object = overwriting_get_object
+        r_data, _ = d_a.get_file(path)
+        assert r_data is None
+        # remaining parts are pinned to the ETag of the first one and fail without retries
+        assert all("IfMatch" in request for request in requests[1:])
+        assert len(requests) == 3
+        # missing files fail without retries
+        requests.clear()
+        r_data, _ = d_a.get_file(f"{s3_conf['output_folder']}missing.bin")
+        assert r_data is None and len(requests) == 1
@@ -30,5 +30,25 @@ class TestRayNOOPTransform(AbstractTransformLauncherTest):
         basedir = "../../../../test-data/data_processing/python/noop/"
         basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), basedir))
         launcher = PythonTransformLauncher(NOOPPythonTransformConfiguration())
-        fixtures = [(launcher, {"noop_sleep_sec": 0}, basedir + "/input", basedir + "/expected")]
+        fixtures = [
+            (launcher, {"noop_sleep_sec": 0}, basedir + "/input", basedir + "/expected"),
+            (
+                launcher,
+                {"noop_sleep_sec": 0, "runtime_stream_batches": True},
+                basedir + "/input",
+                basedir + "/expected",
+            ),
+            (
+                launcher,
+                {"noop_sleep_sec": 0, "runtime_io_threads": 2, "runtime_io_buffer_mb": 1},
+                basedir + "/input",
+                basedir + "/expected",
+            ),
+            (
+                launcher,
+                {"noop_sleep_sec": 0, "runtime_table_workers": 2},
+                basedir + "/input",
+                basedir + "/expected",
+            ),
+        ]
         return fixtures
@@ -10,13 +10,26 @@
 # limitations under the License.
 ################################################################################
 
+import json
 import os
+import sys
+import tempfile
+from typing import Any
 
-from data_processing.runtime.pure_python import PythonTransformLauncher
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_processing.runtime.pure_python import (
+    PythonTransformLauncher,
+    PythonTransformRuntimeConfiguration,
+)
 from data_processing.test_support.launch.transform_test import (
     AbstractTransformLauncherTest,
 )
-from data_processing.test_support.transform import NOOPPythonTransformConfiguration
+from data_processing.test_support.transform import (
+    NOOPPythonTransformConfiguration,
+    NOOPTransform,
+    NOOPTransformConfiguration,
+)
 
 
 class TestPythonNOOPTransform(AbstractTransformLauncherTest):
@@ -35,3 +48,47 @@ class TestPythonNOOPTransform(AbstractTransformLauncherTest):
             {"noop_sleep_sec": 0, "runtime_num_processors": 2},
             basedir + "/input", basedir + "/expected"))
         return fixtures
+
+
+class BufferingNOOPTransform(NOOPTransform):
+    """
+    Keeps all tables in memory and returns them on flush
+    """
+
+    def __init__(self, config: dict[str, Any]):
+        super().__init__(config)
+        self.buffer = []
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        self.buffer.append(table)
+        return [], {"rows in": table.num_rows}
+
+    def flush(self) -> tuple[list[pa.Table], dict[str, Any]]:
+        tables = [pa.concat_tables(self.buffer, promote_options="permissive")] if len(self.buffer) > 0 else []
+        rows = sum(table.num_rows for table in self.buffer)
+        self.buffer = []
+        return tables, {"rows out": rows}
+
+
+def test_multiprocessor_flush():
+    """
+    Verify that every pool worker keeps its transform for all of its files and is flushed exactly once,
+    so that no buffered data is lost
+    """
+    basedir = "../../../../test-data/data_processing/python/noop/"
+    basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), basedir))
+    launcher = PythonTransformLauncher(
+        PythonTransformRuntimeConfiguration(transform_config=NOOPTransformConfiguration(BufferingNOOPTransform))
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sys.argv = AbstractTransformLauncherTest._get_argv(
+            {"noop_sleep_sec": 0, "runtime_num_processors": 2}, basedir + "/input", temp_dir
+        )
+        assert launcher.launch() == 0
+        with open(os.path.join(temp_dir, "metadata.json")) as f:
+            stats = json.load(f)["job_output_stats"]
+        assert stats["rows in"] == 13 and stats["rows out"] == 13
+        rows = 0
+        for root, _, files in os.walk(temp_dir):
+            rows += sum(pq.read_metadata(os.path.join(root, f)).num_rows for f in files if f.endswith(".parquet"))
+        assert rows == 13
@@ -0,0 +1,55 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import threading
+
+from data_processing.data_access import DataAccessFactory
+from data_processing.runtime.pure_python import PythonTransformFileProcessor
+from data_processing.test_support.transform import NOOPTransform
+from data_processing.transform import TransformStatistics
+from data_processing.utils import MB
+
+
+def _create_processor(max_file_size: int) -> PythonTransformFileProcessor:
+    return PythonTransformFileProcessor(
+        data_access_factory=DataAccessFactory(),
+        statistics=TransformStatistics(),
+        transform_params={"sleep_sec": None},
+        transform_class=NOOPTransform,
+        is_folder=False,
+        io_threads=4,
+        io_buffer_mb=1,
+        max_file_size=max_file_size,
+    )
+
+
+def test_prefetch_reserves_reads_in_progress():
+    """
+    Verify that reads in progress are charged against the I/O buffer and that flush stops the I/O threads
+    """
+    release = threading.Event()
+
+    def get_file(path: str) -> tuple[bytes, int]:
+        release.wait()
+        return bytes(MB // 2), 0
+
+    files = [f"file{i}.parquet" for i in range(5)]
+    for max_file_size, expected_reads in [(0, 1), (MB // 2, 2), (MB // 4, 4)]:
+        release.clear()
+        processor = _create_processor(max_file_size=max_file_size)
+        processor.data_access.get_file = get_file
+        processor.prefetch(files)
+        assert len(processor.reads) == expected_reads
+        release.set()
+        executor = processor.io_executor
+        processor.flush()
+        assert processor.io_executor is None and executor._shutdown
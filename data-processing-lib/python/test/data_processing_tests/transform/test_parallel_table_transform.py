@@ -0,0 +1,81 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from typing import Any
+
+import pyarrow as pa
+import pytest
+from data_processing.test_support.transform.noop_transform import NOOPTransform
+from data_processing.transform import AbstractTableTransform, ParallelTableTransform
+from data_processing.utils import TransformUtils, UnrecoverableException
+
+
+class NameLengthTransform(AbstractTableTransform):
+    """
+    Adds length of names, as python ints for short names and floats for long ones
+    """
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        lengths = [len(name) if len(name) < 6 else float(len(name)) for name in table["name"].to_pylist()]
+        table = TransformUtils.add_column(table=table, name="length", content=lengths)
+        return [table], {"rows": table.num_rows}
+
+
+class BufferingTransform(NOOPTransform):
+    def flush(self) -> tuple[list[pa.Table], dict[str, Any]]:
+        return [], {}
+
+
+class FailingTransform(NOOPTransform):
+    def __init__(self, config: dict[str, Any]):
+        raise Exception("can not create transform")
+
+
+def test_parallel_table_transform():
+    """
+    Verify that transforming table slices in parallel produces the same result as transforming the table
+    """
+    table = pa.Table.from_pydict({"name": [f"name{i}" for i in range(20)], "age": list(range(20))})
+    transform = ParallelTableTransform(
+        transform_class=NOOPTransform, config={"sleep_sec": None}, workers=2, min_slice_rows=3
+    )
+    out_tables, stats = transform.transform(table=table)
+    assert len(out_tables) == 1 and out_tables[0].equals(table)
+    # rows are counted over all slices, the file once
+    assert stats == {"nfiles": 1, "nrows": 20}
+    transform.close()
+    # column types inferred differently in slices are promoted
+    transform = ParallelTableTransform(transform_class=NameLengthTransform, config={}, workers=2, min_slice_rows=4)
+    out_tables, stats = transform.transform(table=table)
+    expected, _ = NameLengthTransform({}).transform(table=table)
+    assert out_tables[0].equals(expected[0]) and stats == {"rows": 20}
+    out_tables, stats = transform.transform(table=table.slice(0, 0))
+    assert out_tables[0].num_rows == 0
+    assert transform.flush() == ([], {})
+
+
+def test_parallel_table_transform_failures():
+    assert ParallelTableTransform.supports(NOOPTransform)
+    # transforms have to opt in, subclasses buffering data can not be sliced even then
+    assert not ParallelTableTransform.supports(NameLengthTransform)
+    assert not ParallelTableTransform.supports(BufferingTransform)
+    transform = ParallelTableTransform(transform_class=FailingTransform, config={}, workers=1)
+    with pytest.raises(UnrecoverableException):
+        transform.transform(table=pa.Table.from_pydict({"name": ["name"]}))
+    transform.close()
+
+
+def test_merge_partial_stats():
+    partial_stats = [{"nfiles": 1, "nrows": 3}, {"nfiles": 1, "nrows": 4, "errors": 1}]
+    assert NOOPTransform.merge_partial_stats(partial_stats) == {"nfiles": 1, "nrows": 7, "errors": 1}
+    assert NameLengthTransform.merge_partial_stats(partial_stats) == {"nfiles": 2, "nrows": 7, "errors": 1}
+    assert NOOPTransform.merge_partial_stats([]) == {}
@@ -0,0 +1,50 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_processing.test_support.transform.noop_transform import NOOPTransform
+from data_processing.utils import TransformUtils
+
+
+def _to_parquet(table: pa.Table, row_group_size: int) -> bytes:
+    writer = pa.BufferOutputStream()
+    pq.write_table(table=table, where=writer, row_group_size=row_group_size)
+    return bytes(writer.getvalue())
+
+
+def test_transform_binary_batches():
+    """
+    Verify that streaming by row groups produces the same result as the complete table transform
+    """
+    table = pa.Table.from_pydict({"name": pa.array([f"name{i}" for i in range(10)]), "age": pa.array(range(10))})
+    transform = NOOPTransform({"sleep_sec": None})
+    out_files, stats = transform.transform_binary_batches(
+        file_name="test.parquet", byte_array=_to_parquet(table=table, row_group_size=3)
+    )
+    assert len(out_files) == 1
+    assert out_files[0][1] == ".parquet"
+    # rows are counted over all row groups, the file once
+    assert stats == {"nfiles": 1, "nrows": 10, "source_doc_count": 10, "result_doc_count": 10}
+    result = TransformUtils.convert_binary_to_arrow(data=out_files[0][0])
+    assert result.equals(table)
+
+
+def test_transform_binary_batches_wrong_input():
+    transform = NOOPTransform({"sleep_sec": None})
+    empty = pa.Table.from_pydict({"name": pa.array([], type=pa.string())})
+    out_files, stats = transform.transform_binary_batches(
+        file_name="test.parquet", byte_array=_to_parquet(table=empty, row_group_size=3)
+    )
+    assert out_files == [] and stats == {"skipped empty tables": 1}
+    out_files, stats = transform.transform_binary_batches(file_name="test.txt", byte_array=b"")
+    assert out_files == [] and stats == {"wrong file type": 1}
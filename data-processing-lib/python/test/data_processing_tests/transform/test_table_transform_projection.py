@@ -0,0 +1,89 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from data_processing.transform import AbstractTableTransform
+from data_processing.transform.table_transform import (
+    INPUT_COLUMNS_KEY,
+    INPUT_FILTER_KEY,
+)
+from data_processing.utils import TransformUtils
+
+
+class EvenLengthTransform(AbstractTableTransform):
+    """
+    Keeps rows with even length of contents, adds length column and returns length histogram
+    """
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        if self.input_columns is not None:
+            assert "contents" in table.column_names and "id" not in table.column_names
+        lengths = pc.utf8_length(table["contents"])
+        table = table.append_column("length", lengths).filter(pc.equal(pc.bit_wise_and(lengths, 1), 0))
+        histogram = pa.table({"length": pc.unique(lengths)})
+        return [table, histogram], {}
+
+
+def _to_parquet(table: pa.Table, row_group_size: int) -> bytes:
+    writer = pa.BufferOutputStream()
+    pq.write_table(table=table, where=writer, row_group_size=row_group_size)
+    return bytes(writer.getvalue())
+
+
+table = pa.Table.from_pydict(
+    {
+        "id": pa.array(range(20)),
+        "contents": pa.array(["a" * (i % 7) for i in range(20)]),
+        "lang": pa.array(["en" if i < 12 else "fr" for i in range(20)]),
+    }
+)
+
+
+def _run(config: dict[str, Any], stream: bool) -> list[pa.Table]:
+    transform = EvenLengthTransform(config)
+    data = _to_parquet(table=table, row_group_size=4)
+    if stream:
+        out_files, _ = transform.transform_binary_batches(file_name="test.parquet", byte_array=data)
+    else:
+        out_files, _ = transform.transform_binary(file_name="test.parquet", byte_array=data)
+    return [TransformUtils.convert_binary_to_arrow(data=out_file[0]) for out_file in out_files]
+
+
+def test_column_projection():
+    """
+    Verify that reading only declared columns and joining back the remaining ones gives the same result
+    """
+    for stream in [False, True]:
+        expected = _run(config={}, stream=stream)
+        projected = _run(config={INPUT_COLUMNS_KEY: ["contents"]}, stream=stream)
+        assert expected[0].column_names == ["id", "contents", "lang", "length"]
+        assert projected[0].equals(expected[0])
+        assert projected[1].equals(expected[1])
+
+
+def test_row_filter():
+    """
+    Verify that rows not matching the input filter are removed before the transform
+    """
+    for stream in [False, True]:
+        for columns in [None, ["contents"]]:
+            config = {INPUT_FILTER_KEY: [("lang", "=", "en")]}
+            if columns is not None:
+                config[INPUT_COLUMNS_KEY] = columns
+            result = _run(config=config, stream=stream)[0]
+            assert result.column_names == ["id", "contents", "lang", "length"]
+            assert result["id"].to_pylist() == [i for i in range(12) if (i % 7) % 2 == 0]
+            assert set(result["lang"].to_pylist()) == {"en"}
@@ -0,0 +1,75 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import io
+import unittest
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_processing.utils import ParquetRowsWriter, map_zip_members
+
+
+class TestIngestUtils(unittest.TestCase):
+    def test_map_zip_members(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zip_file:
+            zip_file.writestr("dir/", "")
+            for i in range(50):
+                zip_file.writestr(f"dir/file{i}.txt", f"content {i}")
+            zip_file.writestr("dir/bad.txt", b"\xff")
+            zip_file.writestr("dir/skip.md", "skipped")
+
+        def process(member: zipfile.ZipInfo, content: bytes) -> str:
+            return content.decode("utf-8")
+
+        for workers in [1, 4]:
+            results = list(
+                map_zip_members(
+                    byte_array=buf.getvalue(),
+                    process=process,
+                    member_filter=lambda member: member.filename.endswith(".txt"),
+                    workers=workers,
+                )
+            )
+            self.assertEqual([f"dir/file{i}.txt" for i in range(50)] + ["dir/bad.txt"], [r[0].filename for r in results])
+            self.assertEqual([f"content {i}" for i in range(50)], [r[1] for r in results[:-1]])
+            self.assertTrue(all(r[2] is None for r in results[:-1]))
+            self.assertIsNone(results[-1][1])
+            self.assertIsInstance(results[-1][2], UnicodeDecodeError)
+
+    def test_parquet_rows_writer(self):
+        rows = [{"id": i, "text": f"text {i}" * 100} for i in range(95)]
+        writer = ParquetRowsWriter(row_group_rows=10)
+        for row in rows:
+            writer.add_row(row)
+        files = writer.close()
+        self.assertEqual(1, len(files))
+        self.assertEqual(95, writer.rows)
+        parquet_file = pq.ParquetFile(io.BytesIO(files[0][0]))
+        self.assertEqual(10, parquet_file.num_row_groups)
+        self.assertEqual(rows, parquet_file.read().to_pylist())
+
+        # new files are started when the size is reached
+        writer = ParquetRowsWriter(row_group_rows=10, max_file_size=1)
+        for row in rows:
+            writer.add_row(row)
+        files = writer.close()
+        self.assertEqual(10, len(files))
+        self.assertEqual([".parquet"] * 10, [ext for _, ext in files])
+        table = pa.concat_tables([pq.read_table(io.BytesIO(data)) for data, _ in files])
+        self.assertEqual(rows, table.to_pylist())
+
+        # a single empty file without rows
+        files = ParquetRowsWriter().close()
+        self.assertEqual(1, len(files))
+        self.assertEqual(0, pq.read_table(io.BytesIO(files[0][0])).num_rows)
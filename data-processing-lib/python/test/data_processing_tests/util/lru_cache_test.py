@@ -0,0 +1,44 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import unittest
+
+from data_processing.utils import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction(self):
+        cache = LRUCache(max_size=3)
+        for key in ["a", "b", "c"]:
+            cache.put(key, key.upper())
+        # "a" becomes the most recently used, so "b" is evicted by "d"
+        self.assertEqual("A", cache.get("a"))
+        cache.put("d", "D")
+        self.assertEqual(3, len(cache))
+        self.assertNotIn("b", cache)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(["c", "a", "d"], list(cache.entries))
+        # replacing a value refreshes the entry
+        cache.put("c", "C2")
+        cache.put("e", "E")
+        self.assertEqual(["d", "c", "e"], list(cache.entries))
+        self.assertEqual("C2", cache.get("c"))
+        # cached None is distinguished from a missing entry
+        cache.put("n", None)
+        self.assertIsNone(cache.get("n", "missing"))
+        self.assertEqual("missing", cache.get("a", "missing"))
+
+    def test_disabled(self):
+        cache = LRUCache(max_size=0)
+        cache.put("a", 1)
+        self.assertEqual(0, len(cache))
+        self.assertIsNone(cache.get("a"))
@@ -12,6 +12,7 @@
 
 import unittest
 
+import pyarrow as pa
 from data_processing.utils import TransformUtils
 
 
@@ -30,3 +31,9 @@ class TestUtils(unittest.TestCase):
 
         path = "http://myhostname.com/rel0_7/a/lang%3Den/dataset=freelaw/"
         self.assertEqual(expected_path, TransformUtils.clean_path(path))
+
+    def test_normalize_string_array(self):
+        docs = pa.array(["Hello, World!\nFoo  Bar", None, "", "İstanbul ΣΟΦΟΣ", "a\\b[c]^d-e", "Zürich..."])
+        for array in [docs, docs.slice(1, 4), pa.chunked_array([docs.slice(0, 2), docs.slice(2)])]:
+            expected = [TransformUtils.normalize_string(str(doc)) for doc in array.to_pylist()]
+            self.assertEqual(expected, TransformUtils.normalize_string_array(array).to_pylist())
@@ -107,4 +107,5 @@ class RayTransformExecutionConfiguration(TransformExecutionConfiguration):
             "number of workers": self.n_workers,
             "worker options": self.worker_options,
             "actor creation delay": self.creation_delay,
+            "stream_batches": self.stream_batches,
         }
@@ -31,11 +31,13 @@ class RayTransformFileProcessor(AbstractTransformFileProcessor):
             transform_class: local transform class
             transform_params: dictionary of parameters for local transform creation
             statistics: object reference to statistics
+            stream_batches: flag to feed table transforms one row group at a time
         """
         super().__init__(
             data_access_factory=params.get("data_access_factory", None),
             transform_parameters=dict(params.get("transform_params", {})),
-            is_folder=params.get("is_folder", False)
+            is_folder=params.get("is_folder", False),
+            stream_batches=params.get("stream_batches", False),
         )
         # Create statistics
         self.stats = params.get("statistics", None)
@@ -91,6 +91,7 @@ def orchestrate(
             ),
             "statistics": statistics,
             "is_folder": is_folder,
+            "stream_batches": preprocessing_params.stream_batches,
         }
         logger.debug("Creating actors")
         processors = RayUtils.create_actors(
@@ -82,4 +82,5 @@ class SparkTransformExecutionConfiguration(TransformExecutionConfiguration):
         """
         return {
             "RDD parallelization": self.parallelization,
+            "stream_batches": self.stream_batches,
         }
@@ -30,6 +30,7 @@ class SparkTransformFileProcessor(AbstractTransformFileProcessor):
         runtime_configuration: SparkTransformRuntimeConfiguration,
         statistics: TransformStatistics,
         is_folder: bool,
+        stream_batches: bool = False,
     ):
         """
         Init method
@@ -38,6 +39,7 @@ class SparkTransformFileProcessor(AbstractTransformFileProcessor):
             data_access_factory=data_access_factory,
             transform_parameters=runtime_configuration.get_transform_params(),
             is_folder=is_folder,
+            stream_batches=stream_batches,
         )
         # Add data access ant statistics to the processor parameters
         self.runtime_configuration = runtime_configuration
@@ -101,6 +101,7 @@ def orchestrate(
     spark_runtime_config = sc.broadcast(runtime_config)
     daf = sc.broadcast(data_access_factory)
     spark_bcast_params = sc.broadcast(bcast_params)
+    stream_batches = execution_configuration.stream_batches
 
     def process_partition(iterator):
         """
@@ -121,6 +122,7 @@ def orchestrate(
             runtime_configuration=runtime_conf,
             statistics=statistics,
             is_folder=is_folder,
+            stream_batches=stream_batches,
         )
         first = True
         for f in iterator:
@@ -46,6 +46,8 @@ def compute_exec_params_func(
     code2parquet_domain: str,
     code2parquet_snapshot: str,
     code2parquet_detect_programming_lang: bool,
+    code2parquet_workers: int,
+    code2parquet_max_mbytes_per_file: float,
 ) -> dict:
     from runtime_utils import KFPUtils
 
@@ -63,6 +65,8 @@ def compute_exec_params_func(
         "code2parquet_domain": code2parquet_domain,
         "code2parquet_snapshot": code2parquet_snapshot,
         "code2parquet_detect_programming_lang": code2parquet_detect_programming_lang,
+        "code2parquet_workers": code2parquet_workers,
+        "code2parquet_max_mbytes_per_file": code2parquet_max_mbytes_per_file,
     }
 
 
@@ -126,6 +130,8 @@ def code2parquet(
     code2parquet_detect_programming_lang: bool = True,
     code2parquet_domain: str = "code",
     code2parquet_snapshot: str = "github",
+    code2parquet_workers: int = 4,
+    code2parquet_max_mbytes_per_file: float = 512,
     code2parquet_s3_access_secret: str = "s3-secret",
     # additional parameters
     additional_params: str = '{"wait_interval": 2, "wait_cluster_ready_tmout": 400, "wait_cluster_up_tmout": 300, "wait_job_ready_tmout": 400, "wait_print_tmout": 30, "http_retries": 5, "delete_cluster_delay_minutes": 0}',
@@ -168,6 +174,8 @@ def code2parquet(
     :param code2parquet_detect_programming_lang - detect programming language flag
     :param code2parquet_domain: domain
     :param code2parquet_snapshot: snapshot
+    :param code2parquet_workers: number of threads decoding the members of a zip file
+    :param code2parquet_max_mbytes_per_file: max size (MB) of an output parquet file
     :param code2parquet_s3_access_secret - ingest to parquet s3 access secret
                     (here we are assuming that select language info is in S3, but potentially in the different bucket)
     :return: None
@@ -192,6 +200,8 @@ def code2parquet(
             code2parquet_domain=code2parquet_domain,
             code2parquet_snapshot=code2parquet_snapshot,
             code2parquet_detect_programming_lang=code2parquet_detect_programming_lang,
+            code2parquet_workers=code2parquet_workers,
+            code2parquet_max_mbytes_per_file=code2parquet_max_mbytes_per_file,
         )
         ComponentUtils.add_settings_to_component(compute_exec_params, ONE_HOUR_SEC * 2)
         # start Ray cluster
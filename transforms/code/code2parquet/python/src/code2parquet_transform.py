@@ -10,7 +10,6 @@
 # limitations under the License.
 ################################################################################
 
-import io
 import json
 import logging
 import os
@@ -20,10 +19,16 @@ from argparse import ArgumentParser, Namespace
 from datetime import datetime
 from typing import Any
 
-import pyarrow as pa
 from data_processing.data_access import DataAccess, DataAccessFactory
 from data_processing.transform import AbstractBinaryTransform, TransformConfiguration
-from data_processing.utils import CLIArgumentProvider, TransformUtils, str2bool
+from data_processing.utils import (
+    MB,
+    CLIArgumentProvider,
+    ParquetRowsWriter,
+    TransformUtils,
+    map_zip_members,
+    str2bool,
+)
 
 
 shortname = "code2parquet"
@@ -45,6 +50,12 @@ domain_key = "domain"
 domain_cli_key = f"{cli_prefix}{domain_key}"
 snapshot_key = "snapshot"
 snapshot_cli_key = f"{cli_prefix}{snapshot_key}"
+workers_key = "workers"
+workers_cli_key = f"{cli_prefix}{workers_key}"
+workers_default = 4
+max_mbytes_per_file_key = "max_mbytes_per_file"
+max_mbytes_per_file_cli_key = f"{cli_prefix}{max_mbytes_per_file_key}"
+max_mbytes_per_file_default = 512
 
 
 def get_supported_languages(lang_file: str, data_access: DataAccess, logger: logging.Logger) -> dict[str, str]:
@@ -66,6 +77,8 @@ class CodeToParquetTransform(AbstractBinaryTransform):
                 supported_langs_file - if supported_langs, is not provided, then read a map
                     of language names keyed to a list of extensions, from this json file.  The file is read using
                     the DataAccessFactory, under the code2parquet_data_factory key.
+                workers - number of threads reading and decoding zip members.
+                max_mbytes_per_file - size (MB) of an output parquet file, after which a new one is started.
         """
         from data_processing.utils import get_logger
 
@@ -94,6 +107,8 @@ class CodeToParquetTransform(AbstractBinaryTransform):
             self.shared_columns["domain"] = domain
         if snapshot is not None:
             self.shared_columns["snapshot"] = snapshot
+        self.workers = config.get(workers_key, workers_default)
+        self.max_file_size = int(config.get(max_mbytes_per_file_key, max_mbytes_per_file_default) * MB)
 
     def _get_lang_from_ext(self, ext):
         lang = "unknown"
@@ -101,52 +116,56 @@ class CodeToParquetTransform(AbstractBinaryTransform):
             lang = self.languages_supported.get(ext, lang)
         return lang
 
+    def _decode_member(self, member: zipfile.ZipInfo, content_bytes: bytes) -> tuple[str, str]:
+        """
+        Decode the content of a zip member and compute its hash, runs in the worker threads
+        """
+        content_string = TransformUtils.decode_content(content_bytes)
+        if not content_string:
+            return content_string, None
+        return content_string, TransformUtils.str_to_hash(content_string)
+
     def transform_binary(self, file_name: str, byte_array: bytes) -> tuple[list[tuple[bytes, str]], dict[str, Any]]:
         """
-        Converts raw data file (ZIP) to Parquet format
+        Converts raw data file (ZIP) to Parquet format.
+        Members are decoded in a pool of threads and rows are written as bounded row groups. A new output
+        file is started whenever the current one reaches max_mbytes_per_file.
         """
         # We currently only process .zip files
         if TransformUtils.get_file_extension(file_name)[1] != ".zip":
             self.logger.warning(f"Got unsupported file type {file_name}, skipping")
             return [], {}
-        data = []
-        number_of_rows = 0
-        with zipfile.ZipFile(io.BytesIO(bytes(byte_array))) as opened_zip:
-            # Loop through each file member in the ZIP archive
-            for member in opened_zip.infolist():
-                if not member.is_dir():
-                    with opened_zip.open(member) as file:
-                        try:
-                            # Read the content of the file
-                            content_bytes = file.read()
-                            # Decode the content
-                            content_string = TransformUtils.decode_content(content_bytes)
-                            if content_string and len(content_string) > 0:
-                                ext = TransformUtils.get_file_extension(member.filename)[1]
-                                row_data = {
-                                    "title": member.filename,
-                                    "document": TransformUtils.get_file_basename(file_name),
-                                    "contents": content_string,
-                                    "document_id": str(uuid.uuid4()),
-                                    "ext": ext,
-                                    "hash": TransformUtils.str_to_hash(content_string),
-                                    "size": len(content_string),
-                                    "date_acquired": datetime.now().isoformat(),
-                                    "repo_name": os.path.splitext(os.path.basename(file_name))[0],
-                                } | self.shared_columns
-                                if self.detect_programming_lang:
-                                    lang = self._get_lang_from_ext(ext)
-                                    row_data["programming_language"] = lang  # TODO column name should be configurable
-                                data.append(row_data)
-                                number_of_rows += 1
-                            else:
-                                self.logger.warning(
-                                    f"file {member.filename} is empty. content {content_string}, skipping"
-                                )
-                        except Exception as e:
-                            self.logger.warning(f"Exception {str(e)} processing file {member.filename}, skipping")
-        table = pa.Table.from_pylist(data)
-        return [(TransformUtils.convert_arrow_to_binary(table=table), ".parquet")], {"number of rows": number_of_rows}
+        document = TransformUtils.get_file_basename(file_name)
+        repo_name = os.path.splitext(os.path.basename(file_name))[0]
+        date_acquired = datetime.now().isoformat()
+        writer = ParquetRowsWriter(max_file_size=self.max_file_size)
+        for member, result, error in map_zip_members(
+            byte_array=bytes(byte_array), process=self._decode_member, workers=self.workers
+        ):
+            if error is not None:
+                self.logger.warning(f"Exception {str(error)} processing file {member.filename}, skipping")
+                continue
+            content_string, content_hash = result
+            if content_string and len(content_string) > 0:
+                ext = TransformUtils.get_file_extension(member.filename)[1]
+                row_data = {
+                    "title": member.filename,
+                    "document": document,
+                    "contents": content_string,
+                    "document_id": str(uuid.uuid4()),
+                    "ext": ext,
+                    "hash": content_hash,
+                    "size": len(content_string),
+                    "date_acquired": date_acquired,
+                    "repo_name": repo_name,
+                } | self.shared_columns
+                if self.detect_programming_lang:
+                    lang = self._get_lang_from_ext(ext)
+                    row_data["programming_language"] = lang  # TODO column name should be configurable
+                writer.add_row(row_data)
+            else:
+                self.logger.warning(f"file {member.filename} is empty. content {content_string}, skipping")
+        return writer.close(), {"number of rows": writer.rows}
 
 
 class CodeToParquetTransformConfiguration(TransformConfiguration):
@@ -194,6 +213,18 @@ class CodeToParquetTransformConfiguration(TransformConfiguration):
             help="Domain value assigned to all imported documents.",
             default=None,
         )
+        parser.add_argument(
+            f"--{workers_cli_key}",
+            type=int,
+            default=workers_default,
+            help="Number of threads reading and decoding the members of a zip file",
+        )
+        parser.add_argument(
+            f"--{max_mbytes_per_file_cli_key}",
+            type=float,
+            default=max_mbytes_per_file_default,
+            help="Max size (MB) of an output parquet file, a zip file is written to multiple files if needed",
+        )
         # Create the DataAccessFactor to use CLI args
         self.daf = DataAccessFactory(cli_prefix, False)
         # Add the DataAccessFactory parameters to the transform's configuration parameters.
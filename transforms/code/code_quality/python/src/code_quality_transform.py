@@ -32,6 +32,29 @@ from transformers import AutoTokenizer
 CODE_QUALITY_PARAMS = "code_quality_params"
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+# number of files tokenized together
+TOKENIZER_BATCH_SIZE = 256
+# alpha numeric flags of ASCII characters
+ASCII_ALNUM = np.array([chr(code).isalnum() for code in range(128)])
+AUTOGENERATED_KEYWORDS = ["auto-generated", "autogenerated", "automatically generated"]
+CONFIG_OR_TEST_KEYWORDS = ["unit tests", "test file", "configuration file"]
+PYTHON_KEYWORDS = ["def ", "class ", "for ", "while "]
+# columns added by the transform
+CODE_QUALITY_COLUMNS = [
+    "line_mean",
+    "line_max",
+    "total_num_lines",
+    "avg_longest_lines",
+    "alphanum_frac",
+    "char_token_ratio",
+    "autogenerated",
+    "config_or_test",
+    "has_no_keywords",
+    "has_few_assignments",
+    "is_xml",
+    "is_html",
+]
+
 
 def is_xml(data, lang):
     """
@@ -66,124 +89,106 @@ def is_html(data, lang):
 
 
 # CODEPARROT FILTERS
-def calculate_line_stats(data, lines_max=7):
-    """
-    Calculates mean and max line length of file
-    """
-    line_lengths = np.array([len(line) for line in data.splitlines()])
-    if line_lengths.shape[0] < lines_max:
-        lines_max = line_lengths.shape[0]
-    longest_lines = np.sort(line_lengths)[::-1][:lines_max]
-    return {
-        "line_mean": np.mean(line_lengths),
-        "line_max": np.max(line_lengths),
-        "avg_longest_lines": np.mean(longest_lines),
-        "num_lines": line_lengths.shape[0],
-    }
-
-
-def calculate_alpha_stats(data):
+def count_alphanumeric(data):
     """
-    Calculates mean alpha numeric of input data
+    Count alpha numeric characters of input data (same as str.isalnum of every character). ASCII characters
+    are looked up on the encoded bytes, other characters are checked once per distinct code point
     """
-    alphanum_frac = np.mean([c.isalnum() for c in data])
-    return {"alphanum_frac": alphanum_frac}
-
-
-def calculate_char_token_ratio(data, tokenizer):
+    if data.isascii():
+        codes = np.frombuffer(data.encode("ascii"), dtype=np.uint8)
+        return int(np.count_nonzero(ASCII_ALNUM[codes]))
+    codes = np.frombuffer(data.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+    is_ascii = codes < 128
+    count = np.count_nonzero(ASCII_ALNUM[codes[is_ascii]])
+    others, others_counts = np.unique(codes[~is_ascii], return_counts=True)
+    others_alnum = np.fromiter((chr(code).isalnum() for code in others), dtype=bool, count=len(others))
+    return int(count + others_counts[others_alnum].sum())
+
+
+def calculate_token_counts(texts, tokenizer, batch_size=TOKENIZER_BATCH_SIZE):
     """
-    Compute character/token ratio of the file with tokenizer.
+    Compute number of tokens of every file, tokenizing files in batches. Only the lengths of the encodings
+    are returned, so no attention masks, etc. are built.
     """
-    input_ids = tokenizer(data, truncation=False)["input_ids"]
-    ratio = len(data) / len(input_ids)
-    return {"char_token_ratio": ratio}
-
-
-def is_autogenerated(data, scan_width=5):
+    counts = []
+    for start in range(0, len(texts), batch_size):
+        encodings = tokenizer(
+            texts[start : start + batch_size],
+            truncation=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            return_length=True,
+        )
+        counts.extend(encodings["length"])
+    return counts
+
+
+ASSIGNMENTS_LANGUAGES = [
+    "java",
+    "python",
+    "c",
+    "c++",
+    "c#",
+    "go",
+    "javascript",
+    "go",
+    "ruby",
+    "perl",
+    "swift",
+    "rust",
+    "r",
+    "matlab",
+]
+
+
+def calculate_file_stats(data, language, num_tokens, scan_width=5, coeff=0.2, minimum=4, lines_max=7):
     """
-    Check if file is autogenerated by looking for keywords in the first few lines of the file.
+    Compute all statistics of a file (heuristics of CodeParrot and BigCode Dataset):
+    - mean and max line length, number of lines and mean length of the lines_max longest lines
+    - alpha numeric fraction and character/token ratio
+    - autogenerated - autogenerated keywords in the first scan_width lines
+    - config_or_test - config/test keywords in the first scan_width lines or the words "config"/"test" occur
+      more than coeff times the number of lines
+    - has_no_keywords - python file without function, class, for loop or while loop keywords
+    - has_few_assignments - file uses symbol "=" at most minimum times
+    - is_xml and is_html
+    Lines are split and the file is lower cased once. Keywords and symbols never span lines, so they are
+    counted in the whole (lower cased) file.
+    :param data: file contents
+    :param language: programming language of the file
+    :param num_tokens: number of tokens of the file
+    :return: statistics in the order of the output columns
     """
-    keywords = ["auto-generated", "autogenerated", "automatically generated"]
     lines = data.splitlines()
-    for _, line in zip(range(scan_width), lines):
-        for keyword in keywords:
-            if keyword in line.lower():
-                return True
-    else:
-        return False
-
-
-def is_config_or_test(data, scan_width=5, coeff=0.2):
-    """
-    Check if file is a configuration file or a unit test by :
-    1- looking for keywords in the first few lines of the file.
-    2- counting number of occurrences of the words 'config' and 'test' with respect to number of lines.
-    """
-    keywords = ["unit tests", "test file", "configuration file"]
-    lines = data.splitlines()
-    count_config = 0
-    count_test = 0
-    # first test
-    for _, line in zip(range(scan_width), lines):
-        for keyword in keywords:
-            if keyword in line.lower():
-                return True
-    # second test
-    nlines = data.count("\n")
-    threshold = int(coeff * nlines)
-    for line in lines:
-        count_config += line.lower().count("config")
-        count_test += line.lower().count("test")
-        if count_config > threshold or count_test > threshold:
-            return True
-    return False
-
-
-def has_no_keywords(data, language):
-    """
-    Check if a python file has none of the keywords for: funcion, class, for loop, while loop.
-    """
-    if language.lower() == "python":
-        keywords = ["def ", "class ", "for ", "while "]
-        lines = data.splitlines()
-        for line in lines:
-            for keyword in keywords:
-                if keyword in line.lower():
-                    return False
-        return True
-    return False
+    lower = data.lower()
+    language = language.lower()
 
+    # line statistics
+    line_lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+    longest_lines = np.sort(line_lengths)[::-1][:lines_max]
 
-def has_few_assignments(data, language, minimum=4):
-    """
-    Check if file uses symbol '=' less than `minimum` times.
-    """
-    langs_to_inspect = [
-        "java",
-        "python",
-        "c",
-        "c++",
-        "c#",
-        "go",
-        "javascript",
-        "go",
-        "ruby",
-        "perl",
-        "swift",
-        "rust",
-        "r",
-        "matlab",
-    ]
-
-    if language.lower() in langs_to_inspect:
-        lines = data.splitlines()
-        counter = 0
-        for line in lines:
-            counter += line.lower().count("=")
-            if counter > minimum:
-                return False
-        return True
-    return False
+    # keywords in the first lines
+    head = [line.lower() for line in lines[:scan_width]]
+    autogenerated = any(keyword in line for line in head for keyword in AUTOGENERATED_KEYWORDS)
+    config_or_test = any(keyword in line for line in head for keyword in CONFIG_OR_TEST_KEYWORDS)
+    if not config_or_test:
+        threshold = int(coeff * data.count("\n"))
+        config_or_test = lower.count("config") > threshold or lower.count("test") > threshold
+
+    return (
+        np.mean(line_lengths),
+        np.max(line_lengths),
+        line_lengths.shape[0],
+        np.mean(longest_lines),
+        count_alphanumeric(data) / len(data) if len(data) > 0 else np.nan,
+        len(data) / num_tokens,
+        autogenerated,
+        config_or_test,
+        language == "python" and not any(keyword in lower for keyword in PYTHON_KEYWORDS),
+        language in ASSIGNMENTS_LANGUAGES and data.count("=") <= minimum,
+        is_xml(data, language),
+        is_html(data, language),
+    )
 
 
 class CodeQualityTransform(AbstractTableTransform):
@@ -208,53 +213,18 @@ class CodeQualityTransform(AbstractTableTransform):
             table, [self.code_quality["contents_column_name"], self.code_quality["language_column_name"]]
         )
 
-        line_mean_values = []
-        line_max_values = []
-        no_lines_values = []
-        avg_longest_lines_values = []
-        alphanum_frac_values = []
-        char_token_ratio_values = []
-        is_autogenerated_values = []
-        is_config_or_test_values = []
-        has_no_keywords_values = []
-        has_few_assignments_values = []
-        is_xml_values = []
-        is_html_values = []
-
         contents = table.column(self.code_quality["contents_column_name"]).to_pylist()
         languages = table.column(self.code_quality["language_column_name"]).to_pylist()
-
-        # loop over rows and compute filter stats
-        for i, c in enumerate(contents):
-            # compute lines statistics
-            stats = calculate_line_stats(c)
-            line_mean_values.append(stats["line_mean"])
-            line_max_values.append(stats["line_max"])
-            no_lines_values.append(stats["num_lines"])
-            avg_longest_lines_values.append(stats["avg_longest_lines"])
-
-            alphanum_frac_values.append(calculate_alpha_stats(c)["alphanum_frac"])
-            char_token_ratio_values.append(calculate_char_token_ratio(c, self.tokenizer)["char_token_ratio"])
-
-            is_autogenerated_values.append(is_autogenerated(c))
-            is_config_or_test_values.append(is_config_or_test(c))
-            has_no_keywords_values.append(has_no_keywords(c, languages[i]))
-            has_few_assignments_values.append(has_few_assignments(c, languages[i]))
-            is_xml_values.append(is_xml(c, languages[i]))
-            is_html_values.append(is_html(c, languages[i]))
-
-        table = TransformUtils.add_column(table=table, name="line_mean", content=line_mean_values)
-        table = TransformUtils.add_column(table=table, name="line_max", content=line_max_values)
-        table = TransformUtils.add_column(table=table, name="total_num_lines", content=no_lines_values)
-        table = TransformUtils.add_column(table=table, name="avg_longest_lines", content=avg_longest_lines_values)
-        table = TransformUtils.add_column(table=table, name="alphanum_frac", content=alphanum_frac_values)
-        table = TransformUtils.add_column(table=table, name="char_token_ratio", content=char_token_ratio_values)
-        table = TransformUtils.add_column(table=table, name="autogenerated", content=is_autogenerated_values)
-        table = TransformUtils.add_column(table=table, name="config_or_test", content=is_config_or_test_values)
-        table = TransformUtils.add_column(table=table, name="has_no_keywords", content=has_no_keywords_values)
-        table = TransformUtils.add_column(table=table, name="has_few_assignments", content=has_few_assignments_values)
-        table = TransformUtils.add_column(table=table, name="is_xml", content=is_xml_values)
-        table = TransformUtils.add_column(table=table, name="is_html", content=is_html_values)
+        num_tokens = calculate_token_counts(contents, self.tokenizer)
+
+        # compute filter stats of all rows, columns are in the order of statistics
+        stats = [
+            calculate_file_stats(c, language, n_tokens)
+            for c, language, n_tokens in zip(contents, languages, num_tokens)
+        ]
+        columns = list(zip(*stats)) if len(stats) > 0 else [[] for _ in CODE_QUALITY_COLUMNS]
+        for name, values in zip(CODE_QUALITY_COLUMNS, columns):
+            table = TransformUtils.add_column(table=table, name=name, content=list(values))
 
         return [table], {}
 
@@ -43,6 +43,8 @@ def compute_exec_params_func(
     header_cleanser_contents_column_name: str,
     header_cleanser_license: bool,
     header_cleanser_copyright: bool,
+    header_cleanser_scan_lines: int,
+    header_cleanser_cache_size: int,
 ) -> dict:
     from runtime_utils import KFPUtils
 
@@ -58,6 +60,8 @@ def compute_exec_params_func(
         "header_cleanser_contents_column_name": header_cleanser_contents_column_name,
         "header_cleanser_license": header_cleanser_license,
         "header_cleanser_copyright": header_cleanser_copyright,
+        "header_cleanser_scan_lines": header_cleanser_scan_lines,
+        "header_cleanser_cache_size": header_cleanser_cache_size,
     }
 
 
@@ -121,6 +125,8 @@ def header_cleanser(
     header_cleanser_contents_column_name: str = "contents",
     header_cleanser_license: bool = True,
     header_cleanser_copyright: bool = True,
+    header_cleanser_scan_lines: int = 0,
+    header_cleanser_cache_size: int = 10000,
     # additional parameters
     additional_params: str = '{"wait_interval": 2, "wait_cluster_ready_tmout": 800, "wait_cluster_up_tmout": 300, "wait_job_ready_tmout": 400, "wait_print_tmout": 30, "http_retries": 5, "delete_cluster_delay_minutes": 0}',
 ):
@@ -159,6 +165,8 @@ def header_cleanser(
     :param contents_column_name - Name of the column holds the data to process
     :param license - Hold value true or false to delete/remove license or not.
     :param copyright - Hold value true or false to delete/remove copyright or not.
+    :param scan_lines - Scan only header and trailing comment blocks of at most this number of lines, 0 scans all.
+    :param cache_size - Number of scan results cached by content hash, 0 disables caching.
     :return: None
     """
     # create clean_up task
@@ -179,6 +187,8 @@ def header_cleanser(
             header_cleanser_contents_column_name=header_cleanser_contents_column_name,
             header_cleanser_license=header_cleanser_license,
             header_cleanser_copyright=header_cleanser_copyright,
+            header_cleanser_scan_lines=header_cleanser_scan_lines,
+            header_cleanser_cache_size=header_cleanser_cache_size,
         )
 
         ComponentUtils.add_settings_to_component(compute_exec_params, ONE_HOUR_SEC * 2)
@@ -10,6 +10,7 @@
 
 ################################################################################
 
+import hashlib
 import os
 import tempfile
 from argparse import ArgumentParser, Namespace
@@ -19,8 +20,9 @@ from data_processing.runtime.pure_python.runtime_configuration import (
     PythonTransformRuntimeConfiguration,
 )
 from data_processing.transform import AbstractTableTransform, TransformConfiguration
-from data_processing.utils import CLIArgumentProvider, get_logger, str2bool
+from data_processing.utils import CLIArgumentProvider, LRUCache, get_logger, str2bool
 from scancode import api
+from typecode import contenttype
 
 
 logger = get_logger(__name__)
@@ -30,14 +32,24 @@ cli_prefix = short_name + "_"
 COLUMN_KEY = "contents_column_name"
 LICENSE_KEY = "license"
 COPYRIGHT_KEY = "copyright"
+SCAN_LINES_KEY = "scan_lines"
+CACHE_SIZE_KEY = "cache_size"
 
 column_cli_params = f"{cli_prefix}{COLUMN_KEY}"
 license_cli_params = f"{cli_prefix}{LICENSE_KEY}"
 copyright_cli_params = f"{cli_prefix}{COPYRIGHT_KEY}"
+scan_lines_cli_params = f"{cli_prefix}{SCAN_LINES_KEY}"
+cache_size_cli_params = f"{cli_prefix}{CACHE_SIZE_KEY}"
 
 DEFAULT_COLUMN = "contents"
 DEFAULT_LICENSE = True
 DEFAULT_COPYRIGHT = True
+DEFAULT_SCAN_LINES = 0
+DEFAULT_CACHE_SIZE = 10000
+
+# comment syntax used to find the header and trailing comment blocks of a document
+LINE_COMMENTS = ("#", "//", "--", ";", "%")
+BLOCK_COMMENTS = {"/*": "*/", "<!--": "-->", '"""': '"""', "'''": "'''"}
 
 
 def file_generate(content):
@@ -81,9 +93,9 @@ def check_empty_comment(code, ignore_lines):
     if min_index != 0:
         min_index = min_index - 1
 
-    if max_index <= len(code_list):
-        max_index = max_index + 2
+    max_index = min(max_index + 2, len(code_list))
 
+    ignored = set(ignore_lines)
     for index in range(min_index, max_index):
         if all(
             not isinstance(x, (int, float, complex))
@@ -91,12 +103,119 @@ def check_empty_comment(code, ignore_lines):
             or (isinstance(x, str) and not x.isalnum())
             for x in code_list[index]
         ):
-            if index not in ignore_lines:
+            if index not in ignored:
                 ignore_lines.append(index)
+                ignored.add(index)
 
     return ignore_lines
 
 
+def remove_lines(code, ignore_lines):
+    """
+    Remove lines with the given (0 based) indexes from code.
+    """
+    ignored = set(ignore_lines)
+    return "\n".join([line for i, line in enumerate(code.split("\n"), 0) if i not in ignored])
+
+
+def _is_comment(stripped, closing):
+    """
+    Check whether a stripped line is blank or (part of) a comment. closing is the end marker of the block
+    comment the line is in, None if it is not in one. Returns the result and the closing marker for the next line.
+    """
+    if closing is not None:
+        return True, None if closing in stripped else closing
+    if stripped == "" or stripped.startswith(LINE_COMMENTS):
+        return True, None
+    for opening, end in BLOCK_COMMENTS.items():
+        if stripped.startswith(opening):
+            return True, None if end in stripped[len(opening) :] else end
+    return False, None
+
+
+def find_header_and_trailer(lines, max_lines):
+    """
+    Find the header (leading comment block) and the trailing comment block of a document, each of at most
+    max_lines lines. If the document does not start with a comment, the header is its first max_lines lines.
+    Returns the end of the header and the start of the trailer, as line indexes.
+    """
+    header_end = 0
+    closing = None
+    for index, line in enumerate(lines[:max_lines]):
+        stripped = line.strip()
+        comment, closing = _is_comment(stripped, closing)
+        # allow for preambles like <?php or <?xml ...?>
+        if not comment and not (index == 0 and stripped.startswith("<?")):
+            break
+        header_end = index + 1
+    if header_end == 0:
+        header_end = min(len(lines), max_lines)
+
+    trailer_start = len(lines)
+    opening = None
+    for index in range(len(lines) - 1, max(header_end, len(lines) - max_lines) - 1, -1):
+        stripped = lines[index].strip()
+        if opening is not None:
+            if opening in stripped:
+                opening = None
+            trailer_start = index
+            continue
+        if stripped == "":
+            continue
+        if stripped.startswith(LINE_COMMENTS):
+            trailer_start = index
+            continue
+        for start, end in BLOCK_COMMENTS.items():
+            if stripped.endswith(end):
+                if start not in stripped[: -len(end)]:
+                    opening = start
+                trailer_start = index
+                break
+        else:
+            break
+    return header_end, trailer_start
+
+
+class ScancodeScanner:
+    """
+    Runs scancode license and copyright detection on texts. scancode scans files, every text is written to a
+    scratch file named by the hash of the text, which is removed after the scan. typecode caches the file type of
+    every scanned location without a bound, the entry of the scratch file is dropped with it, so memory does not
+    grow with the number of distinct texts. Results are cached by the hash of the text, so that repeated texts
+    (e.g. the same license header in many files) are scanned once.
+    """
+
+    def __init__(self, license: bool, copyright: bool, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.license = license
+        self.copyright = copyright
+        self.cache = LRUCache(max_size=cache_size)
+        self.scratch_dir = tempfile.TemporaryDirectory(prefix="header_cleanser_")
+
+    def scan(self, text: str) -> tuple[list[int], list[int]]:
+        """
+        Detect license and copyright lines in text.
+        Returns the (0 based) indexes of license lines and of copyright lines.
+        """
+        data = text.encode("utf-8", errors="replace")
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        scratch_path = os.path.abspath(os.path.join(self.scratch_dir.name, f"{key.hex()}.txt"))
+        with open(scratch_path, "wb") as scratch_file:
+            scratch_file.write(data)
+        try:
+            license_lines = fetch_index(api.get_licenses(scratch_path)) if self.license else []
+            copyright_lines = fetch_index(api.get_copyrights(scratch_path)) if self.copyright else []
+        finally:
+            os.remove(scratch_path)
+            # the path is unique per content, its cached file type is never used again
+            contenttype._registry.pop(scratch_path, None)
+        result = (license_lines, copyright_lines)
+        self.cache.put(key, result)
+        return result
+
+
 def remove_copyright(code):
     """
     Using scancode.api function to detecte and remove copyright.
@@ -106,7 +225,7 @@ def remove_copyright(code):
     os.remove(file_path)
     ignore_lines = fetch_index(copyright_dict)
     if ignore_lines != []:
-        modified_code = "\n".join([line for i, line in enumerate(code.split("\n"), 0) if i not in ignore_lines])
+        modified_code = remove_lines(code, ignore_lines)
         return modified_code, ignore_lines != []
     else:
         return code, False
@@ -121,7 +240,7 @@ def remove_license(code):
     os.remove(file_path)
     ignore_lines = fetch_index(license_dict)
     if ignore_lines != []:
-        modified_code = "\n".join([line for i, line in enumerate(code.split("\n"), 0) if i not in ignore_lines])
+        modified_code = remove_lines(code, ignore_lines)
         return modified_code, ignore_lines != []
     else:
         return code, False
@@ -138,7 +257,7 @@ def remove_license_copyright(code):
     ignore_lines = ignore_lines_license + ignore_lines_copyright
     if ignore_lines != []:
         ignore_lines = check_empty_comment(code, ignore_lines)
-        modified_code = "\n".join([line for i, line in enumerate(code.split("\n"), 0) if i not in ignore_lines])
+        modified_code = remove_lines(code, ignore_lines)
         return modified_code, True
     else:
         return code, False
@@ -151,33 +270,47 @@ class HeaderCleanserTransform(AbstractTableTransform):
         self.column_name = config.get(COLUMN_KEY, DEFAULT_COLUMN)
         self.license_remove = config.get(LICENSE_KEY, DEFAULT_LICENSE)
         self.copyright_remove = config.get(COPYRIGHT_KEY, DEFAULT_COPYRIGHT)
+        self.scan_lines = config.get(SCAN_LINES_KEY, DEFAULT_SCAN_LINES)
+        self.scanner = ScancodeScanner(
+            self.license_remove, self.copyright_remove, config.get(CACHE_SIZE_KEY, DEFAULT_CACHE_SIZE)
+        )
+
+    def _cleanse(self, code: str) -> tuple[str, bool]:
+        """
+        Remove license and copyright lines from code. With scan_lines, only the header and the trailing
+        comment block are scanned. Returns the updated code and whether anything was detected.
+        """
+        lines = code.split("\n")
+        header_end = trailer_start = len(lines)
+        if self.scan_lines > 0:
+            header_end, trailer_start = find_header_and_trailer(lines, self.scan_lines)
+            scanned = "\n".join(lines[:header_end] + lines[trailer_start:])
+        else:
+            scanned = code
+        license_lines, copyright_lines = self.scanner.scan(scanned)
+        # map lines of the scanned text to lines of the code
+        ignore_lines = [
+            i if i < header_end else i - header_end + trailer_start for i in license_lines + copyright_lines
+        ]
+        if ignore_lines == []:
+            return code, False
+        if self.license_remove and self.copyright_remove:
+            ignore_lines = check_empty_comment(code, ignore_lines)
+        return remove_lines(code, ignore_lines), True
 
     def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict]:
 
+        remove_code_count = 0
+        if not self.license_remove and not self.copyright_remove:
+            return [table], {"Removed code count": remove_code_count}
+
         contents = table.column(self.column_name).to_pylist()
         updated_content = []
-        remove_code_count = 0
         for content in contents:
-            if self.license_remove and self.copyright_remove:
-                new_content, detect = remove_license_copyright(content)
-                if detect:
-                    remove_code_count += 1
-                updated_content.append(new_content)
-
-            elif self.copyright_remove:
-                new_content, detect = remove_copyright(content)
-                if detect:
-                    remove_code_count += 1
-                updated_content.append(new_content)
-
-            elif self.license_remove:
-                new_content, detect = remove_license(content)
-                if detect:
-                    remove_code_count += 1
-                updated_content.append(new_content)
-
-            else:
-                return [table], {"Removed code count": remove_code_count}
+            new_content, detect = self._cleanse(content)
+            if detect:
+                remove_code_count += 1
+            updated_content.append(new_content)
 
         updated_content = pa.array(updated_content)
 
@@ -212,10 +345,31 @@ class HeaderCleanserTransformConfiguration(TransformConfiguration):
             default=f"{DEFAULT_COPYRIGHT}",
             help="Set False if copyright should not be removed ",
         )
+        parser.add_argument(
+            f"--{scan_lines_cli_params}",
+            required=False,
+            type=int,
+            default=DEFAULT_SCAN_LINES,
+            help="Scan at most this number of leading (header) and trailing comment lines of a document, "
+            "0 scans the whole document",
+        )
+        parser.add_argument(
+            f"--{cache_size_cli_params}",
+            required=False,
+            type=int,
+            default=DEFAULT_CACHE_SIZE,
+            help="Number of scan results cached by content hash per worker, 0 disables caching",
+        )
 
     def apply_input_params(self, args: Namespace) -> bool:
         captured = CLIArgumentProvider.capture_parameters(args, cli_prefix, False)
         self.params = self.params | captured
+        if self.params.get(SCAN_LINES_KEY, DEFAULT_SCAN_LINES) < 0:
+            logger.error(f"Parameter {scan_lines_cli_params} should be non-negative")
+            return False
+        if self.params.get(CACHE_SIZE_KEY, DEFAULT_CACHE_SIZE) < 0:
+            logger.error(f"Parameter {cache_size_cli_params} should be non-negative")
+            return False
         return True
 
 
@@ -21,8 +21,12 @@ from header_cleanser_transform import (
     COLUMN_KEY,
     COPYRIGHT_KEY,
     LICENSE_KEY,
+    SCAN_LINES_KEY,
     HeaderCleanserTransform,
+    ScancodeScanner,
+    find_header_and_trailer,
 )
+from typecode import contenttype
 
 
 class TestHeaderCleanserTransform(AbstractTableTransformTest):
@@ -102,5 +106,47 @@ class TestHeaderCleanserTransform(AbstractTableTransformTest):
         return fixtures
 
 
+def test_find_header_and_trailer():
+    lines = ["#!/usr/bin/env python", "# Copyright 2024", "", '"""', "Licensed", '"""', "import os", "x = 1", "# end"]
+    assert find_header_and_trailer(lines, 20) == (6, 8)
+    assert find_header_and_trailer(lines, 3) == (3, 8)
+    lines = ["<?php", "/*", " * Copyright 2024", " */", "echo 1;", "/* trailing", "   comment */", ""]
+    assert find_header_and_trailer(lines, 20) == (4, 5)
+    # no leading comment, the header is the window
+    lines = ["package a;", "class A {}", "}"]
+    assert find_header_and_trailer(lines, 2) == (2, 3)
+
+
+def test_scan_header_and_trailer():
+    code = "\n".join(
+        [
+            "// Copyright (c) 2019 ACME Inc.",
+            "// SPDX-License-Identifier: MIT",
+            "int x = 1;",
+            'char *s = "Copyright 2020 Other Corp.";',
+            "int y = 2;",
+            "// Copyright 2021 Trailer Corp.",
+        ]
+    )
+    transform = HeaderCleanserTransform({LICENSE_KEY: True, COPYRIGHT_KEY: True, SCAN_LINES_KEY: 2})
+    table = pa.table({"contents": [code, code]})
+    out_tables, metadata = transform.transform(table)
+    expected = "\n".join(["int x = 1;", 'char *s = "Copyright 2020 Other Corp.";', "int y = 2;"])
+    assert out_tables[0]["contents"].to_pylist() == [expected, expected]
+    assert metadata == {"Removed code count": 2}
+    # the second document is served from the cache
+    assert len(transform.scanner.cache) == 1
+
+
+def test_scanner_releases_scratch_files():
+    scanner = ScancodeScanner(license=False, copyright=True, cache_size=1)
+    registry_size = len(contenttype._registry)
+    for i in range(3):
+        assert scanner.scan(f"// Copyright {2020 + i} ACME Inc.\nint x = {i};") == ([], [0])
+    # scratch files and their cached file types are dropped after every scan
+    assert os.listdir(scanner.scratch_dir.name) == []
+    assert len(contenttype._registry) == registry_size
+
+
 if __name__ == "__main__":
     t = TestHeaderCleanserTransform()
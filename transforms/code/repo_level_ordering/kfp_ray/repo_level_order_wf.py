@@ -50,6 +50,7 @@ def compute_exec_params_func(
     repo_lvl_sorting_algo: str,
     repo_lvl_output_by_langs: bool,
     repo_lvl_combine_rows: bool,
+    repo_lvl_shuffle_partitions: int,
 ) -> dict:
     from runtime_utils import KFPUtils
 
@@ -68,6 +69,7 @@ def compute_exec_params_func(
         "repo_lvl_store_ray_cpus": repo_lvl_store_ray_cpus,
         "repo_lvl_store_ray_nworkers": repo_lvl_store_ray_nworkers,
         "repo_lvl_sorting_algo": repo_lvl_sorting_algo,
+        "repo_lvl_shuffle_partitions": repo_lvl_shuffle_partitions,
     }
     if repo_lvl_stage_one_only == True:
         res["repo_lvl_stage_one_only"] = ""
@@ -151,6 +153,7 @@ def repo_level_order(
     repo_lvl_sorting_algo: str = "SORT_BY_PATH",
     repo_lvl_output_by_langs: bool = False,
     repo_lvl_combine_rows: bool = False,
+    repo_lvl_shuffle_partitions: int = 0,
     # additional parameters
     additional_params: str = '{"wait_interval": 2, "wait_cluster_ready_tmout": 400, "wait_cluster_up_tmout": 300, "wait_job_ready_tmout": 400, "wait_print_tmout": 30, "http_retries": 5, "delete_cluster_delay_minutes": 0}',
 ):
@@ -197,6 +200,7 @@ def repo_level_order(
     :param repo_lvl_sorting_algo - # Specifies sorting algo. It is one of SORT_SEMANTIC, SORT_BY_PATH, SORT_SEMANTIC_NORMALISED
     :param repo_lvl_output_by_langs - # If specified, output is grouped into programming language folders
     :param repo_lvl_combine_rows - # If specified, output rows per repo are combined to form a single repo
+    :param repo_lvl_shuffle_partitions - # Number of partitions the rows are shuffled into by repo, 0 for automatic
     :return: None
     """
     # create clean_up task
@@ -226,6 +230,7 @@ def repo_level_order(
             repo_lvl_sorting_algo=repo_lvl_sorting_algo,
             repo_lvl_output_by_langs=repo_lvl_output_by_langs,
             repo_lvl_combine_rows=repo_lvl_combine_rows,
+            repo_lvl_shuffle_partitions=repo_lvl_shuffle_partitions,
         )
 
         ComponentUtils.add_settings_to_component(compute_exec_params, ONE_HOUR_SEC * 2)
@@ -1,12 +1,81 @@
 import os
+import zlib
 from typing import List
 
-import pandas as pd
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 import ray
 from data_processing.utils import get_logger
 
 
+# temporary column holding the index of the input file of a row, keeps rows of a repo in the order of files
+FILE_INDEX_COLUMN = "__repo_lvl_file_index"
+# buffered rows of a partition are put to the object store, once they reach this size
+PARTITION_PUT_BYTES = 64 * 1024 * 1024
+
+
+def partition_of(value: str, n_partitions: int) -> int:
+    """
+    Returns the partition of a grouping column value. Unlike hash(), crc32 is the same in all processes.
+    """
+    return zlib.crc32(value.encode("utf-8")) % n_partitions
+
+
+def split_by_partition(table: pa.Table, column_name: str, n_partitions: int) -> List[pa.Table]:
+    """
+    Splits the table into `n_partitions` tables by the hash of `column_name` values, rows
+    with the same value end up in the same partition. Rows with null values are dropped.
+
+    Args:
+        table (pa.Table): The input PyArrow table.
+        column_name (str): The name of the column to partition by.
+        n_partitions (int): Number of partitions.
+
+    Returns:
+        List[pa.Table]: Table of every partition, keeping the order of the rows.
+    """
+    encoded = pc.dictionary_encode(table.column(column_name)).combine_chunks()
+    codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    value_partitions = np.array(
+        [partition_of(value, n_partitions) for value in encoded.dictionary.to_pylist()] + [-1], dtype=np.int64
+    )
+    # nulls (code -1) are mapped to partition -1
+    row_partitions = value_partitions[codes]
+    order = np.argsort(row_partitions, kind="stable")
+    bounds = np.searchsorted(row_partitions[order], np.arange(n_partitions + 1))
+    sorted_table = table.take(pa.array(order))
+    return [sorted_table.slice(start, end - start) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def split_by_group(table: pa.Table, column_name: str) -> List[tuple]:
+    """
+    Splits the table by the values of `column_name`. Rows of a group keep their order, or are ordered
+    by FILE_INDEX_COLUMN if the table has it. The column is removed.
+
+    Args:
+        table (pa.Table): The input PyArrow table.
+        column_name (str): The name of the column to group by.
+
+    Returns:
+        List[Tuple[str, pa.Table]]: Value and table of every group.
+    """
+    table = table.filter(pc.is_valid(table.column(column_name)))
+    encoded = pc.dictionary_encode(table.column(column_name)).combine_chunks()
+    codes = encoded.indices.to_numpy()
+    if FILE_INDEX_COLUMN in table.column_names:
+        order = np.lexsort((table.column(FILE_INDEX_COLUMN).to_numpy(), codes))
+        table = table.drop_columns([FILE_INDEX_COLUMN])
+    else:
+        order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(encoded.dictionary)))])
+    sorted_table = table.take(pa.array(order))
+    return [
+        (value, sorted_table.slice(start, end - start))
+        for value, start, end in zip(encoded.dictionary.to_pylist(), bounds[:-1], bounds[1:])
+    ]
+
+
 class GroupByRepo:
     """
     This class can read a list of parquet files and transform the rows of
@@ -43,22 +112,42 @@ class GroupByRepo:
     def process(self, repo: str, files: List[str]):
         try:
             repo_table = self._read_table_for_group(self.repo_column_name, repo, files)
-            if len(repo_table) == 0:
-                # not processing empty table
-                return
+            self._process_repo_table(repo, repo_table)
+        except Exception as e:
+            self.logger.error(f"Failed processing repo: {repo}. {e}")
 
-            def sanitize_path(repo_name):
-                return repo_name.replace("/", "%2F")
+    def process_partition(self, tables: List[pa.Table]):
+        """
+        Processes all repos of a partition. The tables hold the rows of the partition read from the input files,
+        and are split by repo with pure arrow operations.
+        """
+        tables = [table for table in tables if table is not None and len(table) > 0]
+        if len(tables) == 0:
+            return 0
+        partition_table = pa.concat_tables(tables, promote_options="permissive")
+        repo_tables = split_by_group(partition_table, self.repo_column_name)
+        for repo, repo_table in repo_tables:
+            try:
+                self._process_repo_table(repo, repo_table)
+            except Exception as e:
+                self.logger.error(f"Failed processing repo: {repo}. {e}")
+        return len(repo_tables)
 
-            repo = sanitize_path(repo)
-            tables = self.table_mapper(repo_table, repo)
+    def _process_repo_table(self, repo: str, repo_table: pa.Table):
+        if len(repo_table) == 0:
+            # not processing empty table
+            return
 
-            for out_table, filename in tables:
+        def sanitize_path(repo_name):
+            return repo_name.replace("/", "%2F")
 
-                self.logger.info(f"Write {filename}, tables: {len(out_table)}")
-                self._write_parquet(out_table, filename)
-        except Exception as e:
-            self.logger.error(f"Failed processing repo: {repo}. {e}")
+        repo = sanitize_path(repo)
+        tables = self.table_mapper(repo_table, repo)
+
+        for out_table, filename in tables:
+
+            self.logger.info(f"Write {filename}, tables: {len(out_table)}")
+            self._write_parquet(out_table, filename)
 
     def _write_parquet(self, table, repo_name):
         # since we already know the repo
@@ -68,16 +157,14 @@ class GroupByRepo:
 
     def _read_table_for_group(self, grouping_column, group, files):
         """This function reads the files and filters the tables based on grouping_column value"""
-        dfs = []
+        tables = []
         for file in files:
             table, _ = self.data_access.get_table(os.path.normpath(file))
             # filtering each table is more memory efficient than
             # reading all tables and filtering later.
-            filtered_table = self._filter_table_by_column(table, grouping_column, group)
-            dfs.append(filtered_table.to_pandas())
-        df = pd.concat(dfs)
+            tables.append(self._filter_table_by_column(table, grouping_column, group))
 
-        return pa.Table.from_pandas(df)
+        return pa.concat_tables(tables, promote_options="permissive")
 
     def _filter_table_by_column(self, table: pa.Table, column_name: str, column_value: str) -> pa.Table:
         """
@@ -99,6 +186,91 @@ class GroupByRepo:
         return filtered_table
 
 
+class RepoPartitioner:
+    """
+    This class reads parquet files once and splits their rows by the hash of
+    `repo_column_name` into `n_partitions` partitions, so that all rows of a repo
+    end up in the same partition. Partitions are put to the ray object store
+    and later processed by `GroupByRepo.process_partition`.
+    """
+
+    def __init__(self, repo_column_name, n_partitions, data_access):
+        self.repo_column_name = repo_column_name
+        self.n_partitions = n_partitions
+        self.logger = get_logger(__name__)
+        self.data_access = data_access
+        # tables of every partition not yet put to object store and their size
+        self.buffers = [[] for _ in range(n_partitions)]
+        self.buffered_bytes = [0] * n_partitions
+        # object refs of every partition
+        self.refs = [[] for _ in range(n_partitions)]
+
+    def process(self, file_index: int, file: str):
+        """Reads a file and adds its rows to the partitions"""
+        try:
+            table, _ = self.data_access.get_table(os.path.normpath(file))
+            if table is None:
+                self.logger.error(f"Failed reading file: {file}")
+                return 0
+            table = table.append_column(FILE_INDEX_COLUMN, pa.array(np.full(len(table), file_index, dtype=np.int32)))
+            for partition, partition_table in enumerate(
+                split_by_partition(table, self.repo_column_name, self.n_partitions)
+            ):
+                if len(partition_table) == 0:
+                    continue
+                self.buffers[partition].append(partition_table)
+                self.buffered_bytes[partition] += partition_table.nbytes
+                if self.buffered_bytes[partition] >= PARTITION_PUT_BYTES:
+                    self._put(partition)
+            return len(table)
+        except Exception as e:
+            self.logger.error(f"Failed partitioning file: {file}. {e}")
+            return 0
+
+    def flush(self):
+        """
+        Puts the remaining rows to object store.
+
+        Returns:
+            List[List[ObjectRef]]: object refs of the tables of every partition.
+        """
+        for partition in range(self.n_partitions):
+            self._put(partition)
+        return self.refs
+
+    def _put(self, partition: int):
+        if len(self.buffers[partition]) == 0:
+            return
+        table = pa.concat_tables(self.buffers[partition], promote_options="permissive")
+        self.refs[partition].append(ray.put(table))
+        self.buffers[partition] = []
+        self.buffered_bytes[partition] = 0
+
+
+@ray.remote(scheduling_strategy="SPREAD")
+class RepoPartitionerActor(RepoPartitioner):
+    """
+    This Actor represents a proxy to the class `RepoPartitioner`. It owns the
+    partitions it put to object store, so it has to be alive until they are processed.
+
+    A sample `params` dict for this actor looks like.
+
+      params = {
+         'repo_column_name': str,
+         'n_partitions': int,
+         'data_access_factory': data access factory to read the input files
+      }
+
+    """
+
+    def __init__(self, params: dict):
+        super().__init__(
+            params["repo_column_name"],
+            params["n_partitions"],
+            params["data_access_factory"].create_data_access(),
+        )
+
+
 @ray.remote(scheduling_strategy="SPREAD")
 class GroupByRepoActor(GroupByRepo):
     """
@@ -123,3 +295,7 @@ class GroupByRepoActor(GroupByRepo):
             params["data_access_factory"].create_data_access(),
             params["mapper"],
         )
+
+    def process_partition(self, refs: list):
+        # object refs in a list are not resolved by ray
+        return super().process_partition(ray.get(refs))
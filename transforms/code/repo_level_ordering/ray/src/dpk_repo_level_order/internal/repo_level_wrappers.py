@@ -8,9 +8,9 @@ from dpk_repo_level_order.internal.check_languages import (
     get_dominant_language_repo_packing,
 )
 from dpk_repo_level_order.internal.sorting.semantic_ordering import (
-    check_and_update_title,
-    sort_by_path,
-    sort_sem,
+    check_and_update_title_table,
+    sort_sem_table,
+    sort_table_by_path,
 )
 from func_timeout.exceptions import FunctionTimedOut
 
@@ -20,31 +20,26 @@ SORT_SEMANTIC = "SORT_SEMANTIC"
 SORT_SEMANTIC_NORMALISED = "SORT_SEMANTIC_NORMALISED"
 
 
-def semantic_sort(df, logger, title_column_name, language_column_name):
-    return sort_sem(
-        files_df=df, logger=logger, title_column_name=title_column_name, language_column_name=language_column_name
+def semantic_sort(table, logger, title_column_name, language_column_name):
+    return sort_sem_table(
+        table=table, logger=logger, title_column_name=title_column_name, language_column_name=language_column_name
     )
 
 
-def semantic_sort_normalised(df, logger, title_column_name, language_column_name):
-    check_and_update_title(df)
-    return sort_sem(
-        files_df=df, logger=logger, title_column_name=title_column_name, language_column_name=language_column_name
-    )
-
-
-def default_sort(df, logger, title_column_name, language_column_name):
-    return sort_by_path(df=df, logger=logger, title_column_name=title_column_name)
+def default_sort(table, logger, title_column_name, language_column_name):
+    return sort_table_by_path(table=table, logger=logger, title_column_name=title_column_name)
 
 
 def get_sorting_func(
     sorting_algo: str, title_column_name: str, logger: logging.Logger, language_column_name: str
 ) -> Callable[[pa.Table], pa.Table]:
+    # normalised titles are kept also when sorting falls back to sort_by_path
+    normalise_titles = sorting_algo == SORT_SEMANTIC_NORMALISED
     if sorting_algo == SORT_SEMANTIC:
         sort_by = semantic_sort
         logger.info("semantic sort enabled")
     elif sorting_algo == SORT_SEMANTIC_NORMALISED:
-        sort_by = semantic_sort_normalised
+        sort_by = semantic_sort
         logger.info("normalised semantic sort enabled")
     else:
         sort_by = default_sort
@@ -54,22 +49,26 @@ def get_sorting_func(
         if table.num_rows < 2:
             logger.info(f"Not enough rows to sort for {file_name}. Skip sorting.")
             return table
-        df = table.to_pandas()
+        if normalise_titles:
+            table, _ = check_and_update_title_table(table)
         try:
-            sorted_df = sort_by(
-                df=df, logger=logger, title_column_name=title_column_name, language_column_name=language_column_name
+            sorted_table = sort_by(
+                table=table,
+                logger=logger,
+                title_column_name=title_column_name,
+                language_column_name=language_column_name,
             )
         except FunctionTimedOut as e:
             logger.error(
                 f"Exception while sorting [{file_name}].\n Exception: {e.__class__.__name__}.\n Falling back to default sort_by_path"
             )
-            sorted_df = sort_by_path(df=df, logger=logger, title_column_name=title_column_name)
+            sorted_table = sort_table_by_path(table=table, logger=logger, title_column_name=title_column_name)
         except Exception as e:
             logger.error(
                 f"Exception while sorting [{file_name}].\n Exception: {e.__class__.__name__}.\n Falling back to default sort_by_path"
             )
-            sorted_df = sort_by_path(df=df, logger=logger, title_column_name=title_column_name)
-        return pa.Table.from_pandas(sorted_df, preserve_index=False)
+            sorted_table = sort_table_by_path(table=table, logger=logger, title_column_name=title_column_name)
+        return sorted_table
 
     return sorter
 
@@ -2,4 +2,7 @@ from dpk_repo_level_order.internal.sorting.semantic_ordering.sort_by_semantic_de
     sort_by_path,
     sort_sem,
     check_and_update_title,
+    check_and_update_title_table,
+    sort_sem_table,
+    sort_table_by_path,
 )
@@ -1,6 +1,6 @@
 import logging
 import re
-from collections import defaultdict, namedtuple
+from collections import Counter, defaultdict, namedtuple
 from logging import Logger
 from pathlib import Path
 
@@ -39,7 +39,82 @@ def get_analysis_obj(full_repo_name):
     return analysis
 
 
+# parsers by (file extension, language), created once per process and reused for all repos
+_parsers_cache = {}
+
+
+class FileIndex:
+    """
+    Indexes of the files of a repo, for O(1) resolution of import dependencies.
+    """
+
+    def __init__(self, files_list):
+        self.files_list = files_list
+        self.files_set = set(files_list)
+        # files by their path suffixes starting after a "/", built on first use
+        self._suffixes = None
+
+    def __contains__(self, file_name):
+        return file_name in self.files_set
+
+    def files_with_suffix(self, suffix):
+        """returns the files, whose path ends with "/" + suffix, in the order of the files list"""
+        if self._suffixes is None:
+            self._suffixes = defaultdict(list)
+            for file_name in self.files_list:
+                start = file_name.find("/")
+                while start >= 0:
+                    self._suffixes[file_name[start + 1 :]].append(file_name)
+                    start = file_name.find("/", start + 1)
+        return self._suffixes.get(suffix, [])
+
+
+class DependencyGraph:
+    """
+    Directed dependency graph of the files of a repo, kept as adjacency lists of node indexes.
+    An edge goes from a dependency to the file depending on it.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        self.node_index = {node: index for index, node in enumerate(self.nodes)}
+        self.num_methods = {}
+        self.successors = [[] for _ in self.nodes]
+        self.edges = []
+        self._edges_set = set()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def set_num_methods(self, node, num_methods):
+        self.num_methods[self.node_index[node]] = num_methods
+
+    def add_edge(self, source, target):
+        edge = (self.node_index[source], self.node_index[target])
+        if edge not in self._edges_set:
+            self._edges_set.add(edge)
+            self.edges.append(edge)
+            self.successors[edge[0]].append(edge[1])
+
+    def to_networkx(self):
+        dep_graph = nx.DiGraph()
+        for index, node in enumerate(self.nodes):
+            if index in self.num_methods:
+                dep_graph.add_node(node, num_methods=self.num_methods[index])
+            else:
+                dep_graph.add_node(node)
+        dep_graph.add_edges_from((self.nodes[source], self.nodes[target]) for source, target in self.edges)
+        return dep_graph
+
+
 def get_parser(file_extension, language):
+    key = (file_extension, language)
+    if key not in _parsers_cache:
+        _parsers_cache[key] = _create_parser(file_extension, language)
+    return _parsers_cache[key]
+
+
+def _create_parser(file_extension, language):
     parsers = Emerge()._parsers
     only_permit_languages = None
     if language == "c":
@@ -61,6 +136,16 @@ def get_parsers(files_df, language_column_name="language"):
     return ext_parsers_map
 
 
+def get_parsers_for_files(files, extension_column_name="ext", language_column_name="language"):
+    """returns parsers of the (extension, language) pairs of files, most common pairs first"""
+    pairs = Counter(
+        (file_dict[extension_column_name], file_dict[language_column_name])
+        for file_dict in files
+        if file_dict[extension_column_name] is not None and file_dict[language_column_name] is not None
+    )
+    return {(ext, language): get_parser(ext, language) for (ext, language), _ in pairs.most_common()}
+
+
 def get_parser_results(
     files,
     analysis,
@@ -73,6 +158,10 @@ def get_parser_results(
 ):
     unparsed_files = []
     parser_results = {}
+    # parsers are reused for all repos, drop the results of the previous repo
+    for parser in ext_parsers_map.values():
+        if parser:
+            parser.results.clear()
     for file_dict in files:
         full_file_name = file_dict[title_column_name]
         try:
@@ -106,7 +195,7 @@ def get_files_list(files_df, title_column_name):
 
 
 def find_file_dependencies(
-    files_set: set[str],
+    files_set: FileIndex,
     file_name: str,
     scanned_import_dependencies: list[str],
     analysis,
@@ -123,9 +212,7 @@ def find_file_dependencies(
     elif file_name.endswith(".java"):
         for dep in scanned_import_dependencies:
             dep_file = dep.replace(".", "/") + ".java"
-            for exst_file in files_set:
-                if dep_file in exst_file:
-                    file_deps.append(exst_file)
+            file_deps.extend(files_set.files_with_suffix(dep_file))
     else:
         # ".c", ".cpp", ".js", ".jsx", ".ts", ".tsx", ".go", ".h", ".m", ".swift", ".kt", ".groovy", ".rb"
         for dep in scanned_import_dependencies:
@@ -145,17 +232,14 @@ def find_num_methods(scanned_parser_name, scanned_tokens):
 
 
 def build_graph_from_results(parser_results, files_set, files_list, analysis, title_column_name):
-    dep_graph = nx.DiGraph()
-    for file_name in files_list:
-        file_name = remove_tmp_src_dir(file_name, analysis)
-        dep_graph.add_node(file_name)
+    dep_graph = DependencyGraph(remove_tmp_src_dir(file_name, analysis) for file_name in files_list)
     for file_name in parser_results:
         file_result = parser_results[file_name]
         scanned_import_dependencies = file_result.scanned_import_dependencies
         file_deps = find_file_dependencies(files_set, file_name, scanned_import_dependencies, analysis)
         file_name = remove_tmp_src_dir(file_name, analysis)
         num_methods = find_num_methods(file_result.scanned_by, file_result.scanned_tokens)
-        dep_graph.nodes[file_name]["num_methods"] = num_methods
+        dep_graph.set_num_methods(file_name, num_methods)
         for dep in file_deps:
             dep = remove_tmp_src_dir(dep, analysis)
             if dep != file_name:
@@ -422,27 +506,47 @@ def add_files_info_to_analysis_obj(analysis, files_list):
     return analysis
 
 
-def build_edges(files_df_org, logger: Logger, title_column_name="new_title", language_column_name="language"):
-    full_repo_name = files_df_org.repo_name.to_list()[0]
+def build_dependency_graph(
+    files, full_repo_name, logger: Logger, title_column_name="new_title", language_column_name="language"
+):
+    """
+    Builds the dependency graph of the files of a repo.
+    files is a list of dicts with the title, contents, ext and language of every file.
+    """
     analysis = get_analysis_obj(full_repo_name)
-    files_df = add_repo_path(files_df_org, analysis, title_column_name)
-    files_df.ext = files_df.ext.str.lower()
-    files_df.language = files_df[language_column_name].str.lower()
-    files = files_df.to_dict(orient="records")
-    files_list = get_files_list(files_df, title_column_name)
-    files_set = set(files_list)
-    logger.info(f"method - build_edges: Number of files received - {len(files_list)}")
+    files = [
+        file_dict
+        | {
+            title_column_name: analysis.source_directory + file_dict[title_column_name],
+            "ext": file_dict["ext"].lower() if file_dict["ext"] is not None else None,
+            language_column_name: (
+                file_dict[language_column_name].lower() if file_dict[language_column_name] is not None else None
+            ),
+        }
+        for file_dict in files
+    ]
+    files_list = list(dict.fromkeys(file_dict[title_column_name] for file_dict in files))
+    files_index = FileIndex(files_list)
+    logger.info(f"method - build_dependency_graph: Number of files received - {len(files_list)}")
     analysis = add_files_info_to_analysis_obj(analysis, files_list)
-    ext_parsers_map = get_parsers(files_df, language_column_name)
+    ext_parsers_map = get_parsers_for_files(files, language_column_name=language_column_name)
     parser_results = get_parser_results(
         files,
         analysis,
         ext_parsers_map,
-        files_set,
+        files_index.files_set,
         logger,
         title_column_name,
         language_column_name=language_column_name,
     )
-    dep_graph = build_graph_from_results(parser_results, files_set, files_list, analysis, title_column_name)
-    logger.info(f"Number of nodes in dependency graph - {len(dep_graph.nodes)}")
+    dep_graph = build_graph_from_results(parser_results, files_index, files_list, analysis, title_column_name)
+    logger.info(f"Number of nodes in dependency graph - {len(dep_graph)}, edges - {len(dep_graph.edges)}")
     return dep_graph
+
+
+def build_edges(files_df_org, logger: Logger, title_column_name="new_title", language_column_name="language"):
+    full_repo_name = files_df_org.repo_name.to_list()[0]
+    columns = [title_column_name, "contents", "ext", language_column_name]
+    files = files_df_org[columns].to_dict(orient="records")
+    dep_graph = build_dependency_graph(files, full_repo_name, logger, title_column_name, language_column_name)
+    return dep_graph.to_networkx()
@@ -2,13 +2,19 @@ import time
 from logging import Logger
 
 import pandas as pd
+import pyarrow as pa
 from dpk_repo_level_order.internal.sorting.semantic_ordering.build_dep_graph import (
+    build_dependency_graph,
     build_edges,
 )
 from dpk_repo_level_order.internal.sorting.semantic_ordering.topological_sort import (
+    topological_sort_indices,
     topological_sort_on_df,
 )
-from dpk_repo_level_order.internal.sorting.semantic_ordering.utils import sort_by_path
+from dpk_repo_level_order.internal.sorting.semantic_ordering.utils import (
+    sort_by_path,
+    sort_by_path_indices,
+)
 from func_timeout import func_set_timeout
 
 
@@ -29,6 +35,30 @@ def check_and_update_title(df: pd.DataFrame, title_column="title"):
     return replace_title
 
 
+def check_and_update_title_table(table: pa.Table, title_column="title"):
+    """
+    Equivalent of check_and_update_title for pyarrow tables, returns the (updated) table and whether titles
+    were replaced
+    """
+    https_str = "https://"
+    len_str = len(https_str)
+    new_prefix = "HTTPS_PREFIX/"
+
+    try:
+        titles = table.column(title_column).to_pylist()
+        # check if title contains https_str in the beginning
+        if (len(titles[0]) > len_str) and (titles[0][:len_str] == https_str):
+            new_titles = pa.array([x.replace(https_str, new_prefix, 1) for x in titles])
+            if "orig_title" in table.column_names:
+                table = table.set_column(table.column_names.index("orig_title"), "orig_title", table[title_column])
+            else:
+                table = table.append_column("orig_title", table[title_column])
+            return table.set_column(table.column_names.index(title_column), title_column, new_titles), True
+    except:
+        pass
+    return table, False
+
+
 supported_exts = {
     ".py",
     ".c",
@@ -77,3 +107,46 @@ def sort_sem(files_df: pd.DataFrame, logger: Logger, title_column_name="new_titl
         received_shape == transformed_shape
     ), f"Recieved Shape - {received_shape} not matching Transformed Shape - {transformed_shape}"
     return files_df_sorted
+
+
+def sort_table_by_path(table: pa.Table, logger: Logger, title_column_name="new_title"):
+    """Equivalent of sort_by_path for pyarrow tables, without conversion to pandas"""
+    try:
+        indices = sort_by_path_indices(table.column(title_column_name).to_pylist(), table.column("ext").to_pylist())
+    except Exception:
+        logger.exception("Error while default sorting")
+        return table
+    return table.take(indices)
+
+
+@func_set_timeout(1800)
+def sort_sem_table(table: pa.Table, logger: Logger, title_column_name="new_title", language_column_name="language"):
+    """
+    Equivalent of sort_sem for pyarrow tables. The dependency graph is built from the columns needed by the
+    parsers and the rows of the table are reordered with a single take, without conversion to pandas.
+    """
+    titles = table.column(title_column_name).to_pylist()
+    extensions = table.column("ext").to_pylist()
+
+    if any(ext in supported_exts for ext in extensions):
+        logger.info("Proceeding with semantic sorting")
+
+        start_time = time.time()
+        files = table.select([title_column_name, "contents", "ext", language_column_name]).to_pylist()
+        full_repo_name = table.column("repo_name")[0].as_py()
+        dep_graph = build_dependency_graph(files, full_repo_name, logger, title_column_name, language_column_name)
+        graph_time = round(time.time() - start_time, 2)
+        logger.info(f"sort_sem_table: time taken build_dependency_graph - {graph_time}")
+
+        # Dependency based Topological Sort
+        start_time = time.time()
+        indices = topological_sort_indices(dep_graph, titles, extensions, logger)
+        sort_time = round(time.time() - start_time, 2)
+        logger.info(f"sort_sem_table: time taken topological sort - {sort_time}")
+
+    else:
+        logger.info("Proceeding with directory structure based sorting")
+        # Default Sort
+        indices = sort_by_path_indices(titles, extensions)
+
+    return table.take(indices)
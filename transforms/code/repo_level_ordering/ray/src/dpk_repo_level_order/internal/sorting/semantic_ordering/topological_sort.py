@@ -1,11 +1,19 @@
+import heapq
 import random
 
 import networkx as nx
 import pandas as pd
-from dpk_repo_level_order.internal.sorting.semantic_ordering.utils import sort_by_path
+from dpk_repo_level_order.internal.sorting.semantic_ordering.utils import (
+    sort_by_path,
+    sort_by_path_indices,
+)
 from networkx import read_graphml
 
 
+# graphs with more nodes are sorted on adjacency lists, without networkx
+LARGE_GRAPH_NODES = 2000
+
+
 # Find and remove cycles by removing random edges from cycle
 def remove_cycles(g, logger=None):
     random.seed(42)
@@ -134,9 +142,11 @@ def topological_sort_on_df(input_graph, df, logger, title_column_name="new_title
             logger.debug(sorted_df_without_dep2.head())
 
     df_with_dep = df[df[title_column_name].isin(nodes_with_dependencies)]
+    node_positions = {node: position for position, node in enumerate(nodes_with_dependencies)}
     sorted_df_with_dep = df_with_dep.sort_values(
         by=title_column_name,
-        key=lambda column: column.map(lambda e: nodes_with_dependencies.index(e)),
+        key=lambda column: column.map(node_positions),
+        kind="stable",
     )
 
     # combine the two dataframe subsets to obtain final sorted dataframe
@@ -150,6 +160,101 @@ def topological_sort_on_df(input_graph, df, logger, title_column_name="new_title
     return df_topo_sorted
 
 
+# Topologically sort the nodes of a weakly connected component with Kahn's algorithm.
+# Instead of searching for cycles first, the node with the fewest unsorted dependencies is
+# always taken next, so a cycle is broken by dropping the remaining edges into that node.
+def _kahn_sort_component(graph, component, in_degree, logger=None):
+    heap = [(in_degree[node], node) for node in component]
+    heapq.heapify(heap)
+    visited = set()
+    sorted_nodes = []
+    n_forced = 0
+    while heap:
+        degree, node = heapq.heappop(heap)
+        if node in visited or degree != in_degree[node]:
+            continue
+        if degree > 0:
+            n_forced += 1
+        visited.add(node)
+        sorted_nodes.append(graph.nodes[node])
+        for successor in graph.successors[node]:
+            if successor not in visited:
+                in_degree[successor] -= 1
+                heapq.heappush(heap, (in_degree[successor], successor))
+    if logger and n_forced > 0:
+        logger.info(f"Number of nodes taken with unsorted dependencies (cycles) - {n_forced}")
+    return sorted_nodes
+
+
+# Obtain topologically sorted weakly connected components of a DependencyGraph,
+# largest components first, using its adjacency lists
+def topo_sort_components_arrays(graph, logger=None):
+    n_nodes = len(graph)
+    parents = list(range(n_nodes))
+
+    def find(node):
+        while parents[node] != node:
+            parents[node] = parents[parents[node]]
+            node = parents[node]
+        return node
+
+    in_degree = [0] * n_nodes
+    for source, target in graph.edges:
+        in_degree[target] += 1
+        root_source, root_target = find(source), find(target)
+        if root_source != root_target:
+            parents[max(root_source, root_target)] = min(root_source, root_target)
+
+    components = {}
+    for node in range(n_nodes):
+        components.setdefault(find(node), []).append(node)
+    connected_nodes = sorted(components.values(), key=len, reverse=True)
+    return [_kahn_sort_component(graph, nodes, in_degree, logger) for nodes in connected_nodes]
+
+
+# Perform the topological sorting of a DependencyGraph. Small graphs are sorted with networkx,
+# large ones on adjacency lists, which avoids the repeated cycle searches of remove_cycles
+def topological_sort_graph(graph, logger=None, max_networkx_nodes=LARGE_GRAPH_NODES):
+    if len(graph) <= max_networkx_nodes:
+        return perform_topological_sort(graph.to_networkx(), logger)
+
+    sorted_comps_list = topo_sort_components_arrays(graph, logger)
+    nodes_without_depedencies = [e[0] for e in sorted_comps_list if len(e) == 1]
+    nodes_with_dependencies = [node for e in sorted_comps_list if len(e) > 1 for node in e]
+    if logger:
+        logger.info(
+            f"Number of nodes - {len(graph)}, edges - {len(graph.edges)}, components -  {len(sorted_comps_list)}"
+        )
+        logger.info(
+            f"Nodes without dependency - {len(nodes_without_depedencies)}, "
+            f"with dependencies - {len(nodes_with_dependencies)}"
+        )
+    sorted_nodes = nodes_without_depedencies + nodes_with_dependencies
+    assert len(sorted_nodes) == len(graph), "Initial and final node counts don't match"
+    return sorted_nodes, nodes_without_depedencies, nodes_with_dependencies
+
+
+# Obtain the order of the rows (files) based on topological sorting of a DependencyGraph,
+# equivalent of topological_sort_on_df on lists of titles and extensions
+def topological_sort_indices(graph, titles, extensions, logger=None):
+    sorted_nodes, nodes_without_depedencies, nodes_with_dependencies = topological_sort_graph(graph, logger)
+
+    nodes_without_depedencies = set(nodes_without_depedencies)
+    rows_without_dep = [i for i, title in enumerate(titles) if title in nodes_without_depedencies]
+    part1, part2 = sort_by_path_indices(
+        [titles[i] for i in rows_without_dep], [extensions[i] for i in rows_without_dep], split_by_filetype=True
+    )
+
+    node_positions = {node: position for position, node in enumerate(nodes_with_dependencies)}
+    rows_with_dep = sorted(
+        (i for i, title in enumerate(titles) if title in node_positions), key=lambda i: node_positions[titles[i]]
+    )
+
+    indices = [rows_without_dep[i] for i in part1] + rows_with_dep + [rows_without_dep[i] for i in part2]
+    assert len(indices) == len(titles), "Row counts don't match"
+    return indices
+
+
 def get_dependency_graph():
     g = read_graphml("./emerge-file_result_dependency_graph.graphml")
     g.edges()
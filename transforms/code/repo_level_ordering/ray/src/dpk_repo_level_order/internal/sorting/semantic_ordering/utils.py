@@ -118,3 +118,29 @@ def sort_by_path(
             return original_df_cp, None
         else:
             return original_df_cp
+
+
+def sort_by_path_indices(titles: list, extensions: list, split_by_filetype=False):
+    """
+    Equivalent of sort_by_path on plain lists, returns the row indices in the sorted order.
+    Rows are sorted by directory, then readme files, files with documentation extensions and remaining files
+    of every directory are sorted by file name. With split_by_filetype, it returns two lists of indices:
+    readme and documentation files of all directories, followed by the remaining files of all directories.
+    """
+    exts_set = set(exts)
+    keys = []
+    for title, ext in zip(titles, extensions):
+        filename = title.split("/")[-1]
+        directory = title.replace(os.path.basename(title), "")
+        if "readme" in filename.lower():
+            file_type = 0
+        elif isinstance(ext, str) and ext.lower() in exts_set:
+            file_type = 1
+        else:
+            file_type = 2
+        keys.append((directory, file_type, filename))
+    if split_by_filetype:
+        indices = sorted(range(len(keys)), key=lambda i: (keys[i][1], keys[i][0], keys[i][2]))
+        n_docs = sum(1 for key in keys if key[1] < 2)
+        return indices[:n_docs], indices[n_docs:]
+    return sorted(range(len(keys)), key=keys.__getitem__)
@@ -0,0 +1,129 @@
+import os
+import uuid
+import zlib
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pyarrow.fs import FileSelector, FileType, LocalFileSystem, S3FileSystem
+
+
+KEY_COLUMN = "key"
+VALUE_COLUMN = "value"
+SCHEMA = pa.schema([(KEY_COLUMN, pa.string()), (VALUE_COLUMN, pa.string())])
+
+
+class ParquetSegmentStore:
+    """
+    This class behaves like a keyed value list store similar to dict[str,List[str]].
+    It buffers (key, value) records in memory and appends them in batches as parquet
+    segment files to a backend folder. Records are sharded by the hash of the key into
+    `n_shards` sub folders, so that a single key can be looked up by reading only its shard.
+
+    Every writer writes its own segments, which enables multiple parallel processes/nodes to
+    use this data structure. Buffered records are only visible to the readers after `flush`.
+    This class supports local filesystem as well as s3 filesystem.
+    """
+
+    def __init__(self, backend_path, s3_params=None, n_shards=16, max_buffered_records=1000000):
+        self.backend_path = backend_path
+        self.n_shards = n_shards
+        self.max_buffered_records = max_buffered_records
+        if s3_params is not None:
+            self.fs = S3FileSystem(
+                access_key=s3_params["access_key"],
+                secret_key=s3_params["secret_key"],
+                endpoint_override=s3_params["endpoint"],
+                request_timeout=20,
+                connect_timeout=20,
+            )
+            self.s3 = True
+        else:
+            self.fs = LocalFileSystem()
+            self.s3 = None
+        self.keys = []
+        self.values = []
+
+    def _shard(self, key):
+        # unlike hash(), crc32 is the same in all processes
+        return zlib.crc32(key.encode("utf-8")) % self.n_shards
+
+    def _shard_path(self, shard):
+        return os.path.join(self.backend_path, f"shard={shard}")
+
+    def put(self, key, item):
+        self.keys.append(key)
+        self.values.append(os.path.basename(item))
+        if len(self.keys) >= self.max_buffered_records:
+            self.flush()
+
+    def put_dict(self, dicta):
+        for k, v in dicta.items():
+            self.put(k, v)
+
+    def flush(self):
+        """Writes buffered records, at most one segment per shard"""
+        if len(self.keys) == 0:
+            return
+        table = pa.table([pa.array(self.keys), pa.array(self.values)], schema=SCHEMA)
+        self.keys = []
+        self.values = []
+        shards = pa.array([self._shard(key) for key in table[KEY_COLUMN].to_pylist()])
+        segment_name = f"{uuid.uuid4()}.parquet"
+        for shard in pc.unique(shards).to_pylist():
+            shard_path = self._shard_path(shard)
+            if not self.s3:
+                self.fs.create_dir(shard_path)
+            segment = table.filter(pc.equal(shards, shard))
+            pq.write_table(segment, os.path.join(shard_path, segment_name), filesystem=self.fs)
+
+    def _segments(self, path):
+        selector = FileSelector(path, allow_not_found=True, recursive=True)
+        return sorted(
+            info.path
+            for info in self.fs.get_file_info(selector)
+            if info.type == FileType.File and info.path.endswith(".parquet")
+        )
+
+    def _read(self, path):
+        tables = [pq.read_table(file, filesystem=self.fs) for file in self._segments(path)]
+        if len(tables) == 0:
+            return SCHEMA.empty_table()
+        return pa.concat_tables(tables)
+
+    def _group(self, table):
+        grouped = table.group_by(KEY_COLUMN).aggregate([(VALUE_COLUMN, "distinct")])
+        return zip(grouped[KEY_COLUMN].to_pylist(), grouped[f"{VALUE_COLUMN}_distinct"].to_pylist())
+
+    def get(self, key):
+        table = self._read(self._shard_path(self._shard(key)))
+        values = table.filter(pc.equal(table[KEY_COLUMN], key))[VALUE_COLUMN]
+        return pc.unique(values).to_pylist()
+
+    def items(self):
+        return pc.unique(self._read(self.backend_path)[KEY_COLUMN]).to_pylist()
+
+    def items_kv(self):
+        """returns the key, value list tuple for all keys, with a single scan of the segments"""
+        return list(self._group(self._read(self.backend_path)))
+
+    def remove(self, key):
+        """
+        Removes all values of the key, buffered and flushed ones. Segments of the key's shard are
+        rewritten without the key's records, segments left without records are deleted
+        """
+        kept = [i for i, k in enumerate(self.keys) if k != key]
+        self.keys = [self.keys[i] for i in kept]
+        self.values = [self.values[i] for i in kept]
+        for file in self._segments(self._shard_path(self._shard(key))):
+            segment = pq.read_table(file, filesystem=self.fs)
+            remaining = segment.filter(pc.not_equal(segment[KEY_COLUMN], key))
+            if remaining.num_rows == segment.num_rows:
+                continue
+            if remaining.num_rows == 0:
+                self.fs.delete_file(file)
+            else:
+                pq.write_table(remaining, file, filesystem=self.fs)
+
+    def __repr__(self):
+        return f"ParquetSegmentStore: {self.backend_path}"
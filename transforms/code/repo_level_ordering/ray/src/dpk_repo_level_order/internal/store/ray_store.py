@@ -74,6 +74,10 @@ class KeyedValueListActorPool:
         local_dict = local_dict | received_dict
         return local_dict
 
+    def flush(self):
+        """values are put to the actors directly, nothing to flush"""
+        pass
+
     def put(self, key: str, value: str):
         # may randomly append to an actor
         dict_ = random.choice(self.processors)
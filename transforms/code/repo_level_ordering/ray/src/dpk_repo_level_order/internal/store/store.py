@@ -114,7 +114,7 @@ class FSStore:
                 print("Failed writing value for {key}.")
                 # Add the failed  key, value to queue. self.failed_put_requests, to
                 # attempt to write again, in the flush function
-                self.failed_put_requests = self.failed_put_requests.append((key, value))
+                self.failed_put_requests.append((key, value))
                 raise
 
     def _delete_values(self, filesystem, backend_path, key):
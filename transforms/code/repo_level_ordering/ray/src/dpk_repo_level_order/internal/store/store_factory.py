@@ -2,6 +2,7 @@ from dpk_repo_level_order.internal.store.ray_store import (
     KeyedValueListActorPool,
     create_pool,
 )
+from dpk_repo_level_order.internal.store.parquet_store import ParquetSegmentStore
 from dpk_repo_level_order.internal.store.store import FSStore
 
 
@@ -10,6 +11,8 @@ store_type_value_s3 = "s3"
 store_type_value_local = "local"
 store_type_value_ray = "ray"
 store_type_value_ray_2 = "ray_store"
+store_type_value_local_parquet = "local_parquet"
+store_type_value_s3_parquet = "s3_parquet"
 
 store_type_key = "store_type"
 store_backend_dir_key = "store_backend_dir"
@@ -42,11 +45,16 @@ def validate_store_params(store_params):
             raise ValueError(f"Unsupported key: {k} in store_params")
     # required params
     store_type = store_params[store_type_key]
-    if store_type in [store_type_value_s3, store_type_value_local]:
+    if store_type in [
+        store_type_value_s3,
+        store_type_value_local,
+        store_type_value_s3_parquet,
+        store_type_value_local_parquet,
+    ]:
         # backedndir is required
         if store_backend_dir_key not in store_params.keys():
             raise ValueError(f"{store_backend_dir_key} not set for {store_type}")
-        if store_type is store_type_value_s3:
+        if store_type in [store_type_value_s3, store_type_value_s3_parquet]:
             # s3 creds are required
             for required in [store_s3_keyid_key, store_s3_endpoint_key, store_s3_secret_key]:
                 if required not in store_params.keys():
@@ -59,15 +67,15 @@ def validate_store_params(store_params):
 
 def create_store_params(captured):
     print("Creating Store Params")
-    if captured[store_type_key] == store_type_value_s3:
+    if captured[store_type_key] in [
+        store_type_value_s3,
+        store_type_value_local,
+        store_type_value_s3_parquet,
+        store_type_value_local_parquet,
+    ]:
         store_params = {
             store_backend_dir_key: captured[store_backend_dir_key],
-            store_type_key: store_type_value_s3,
-        }
-    elif captured[store_type_key] == store_type_value_local:
-        store_params = {
-            store_backend_dir_key: captured[store_backend_dir_key],
-            store_type_key: store_type_value_local,
+            store_type_key: captured[store_type_key],
         }
     else:
         store_params = {
@@ -89,7 +97,7 @@ def init_store_params(store_params, logger):
             workers = store_params[store_ray_nworkers_key]
             store_params = store_params | {store_pool_key: create_pool(cpus, workers)}
             return store_params
-        if store_params[store_type_key] == store_type_value_s3:
+        if store_params[store_type_key] in [store_type_value_s3, store_type_value_s3_parquet]:
             store_params = store_params | {
                 store_s3_keyid_key: store_params[s3_creds_key]["access_key"],
                 store_s3_secret_key: store_params[s3_creds_key]["secret_key"],
@@ -111,11 +119,11 @@ def create_store(store_params):
 
     store_backend_dir = store_params[store_backend_dir_key]
     s3_params = None
-    if store_params[store_type_key] == store_type_value_local:
+    if store_params[store_type_key] in [store_type_value_local, store_type_value_local_parquet]:
         print("Creating local store.")
         s3_params = None
 
-    if store_params[store_type_key] == store_type_value_s3:
+    if store_params[store_type_key] in [store_type_value_s3, store_type_value_s3_parquet]:
         s3_params = {
             "secret_key": store_params[store_s3_secret_key],
             "access_key": store_params[store_s3_keyid_key],
@@ -124,4 +132,6 @@ def create_store(store_params):
         print(f"Creating S3 Store with {list(s3_params.keys())}")
 
         store_backend_dir = store_backend_dir.replace("s3://", "")
+    if store_params[store_type_key] in [store_type_value_local_parquet, store_type_value_s3_parquet]:
+        return ParquetSegmentStore(store_backend_dir, s3_params)
     return FSStore(store_backend_dir, s3_params)
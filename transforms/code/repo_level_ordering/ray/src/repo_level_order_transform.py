@@ -55,6 +55,7 @@ sorting_algo_key = "sorting_algo"
 
 output_by_langs_key = "output_by_langs"
 output_superrows_key = "combine_rows"
+shuffle_partitions_key = "shuffle_partitions"
 
 group_batch_size = 50
 
@@ -67,6 +68,9 @@ sort_enable_default = False
 sort_algo_default = "SORT_BY_PATH"
 output_by_lang_default = False
 superrows_default = False
+shuffle_partitions_default = 0
+# input files per shuffle partition, if the number of partitions is not set
+shuffle_files_per_partition = 4
 
 
 class RepoLevelOrderTransform(AbstractTableTransform):
@@ -81,12 +85,16 @@ class RepoLevelOrderTransform(AbstractTableTransform):
             grouping_column - name of the column to do groupby
             store_params - A dictionary to create a key-value store which stores key: str -> value: List(str)
                            The dictionary should contain:
-                           store_type - Type of store. One of [store_type_value_s3, store_type_value_local, store_type_value_ray ].
+                           store_type - Type of store. One of [store_type_value_s3, store_type_value_local, store_type_value_ray,
+                                        store_type_value_s3_parquet, store_type_value_local_parquet ].
                                         store_type_value_ray is preferred for cluster,
                                         store_type_value_local for single node if cpus are less.
+                                        store_type_value_s3_parquet and store_type_value_local_parquet write
+                                        the groups in batches to parquet segments, for large data.
                            store_backend_dir - A path for
-                                        store types [ store_type_value_s3, store_type_value_local]
-                           s3_creds: A dictionary for S3 creds if using store_type_value_s3.
+                                        store types [ store_type_value_s3, store_type_value_local,
+                                        store_type_value_s3_parquet, store_type_value_local_parquet]
+                           s3_creds: A dictionary for S3 creds if using store_type_value_s3 or store_type_value_s3_parquet.
                                      {'access_key', 'secret_key', 'url'},
                                      None if store is ray or local
                            store_pool_key: A list of actors if store_type_value_ray, otherwise None
@@ -160,6 +168,13 @@ class RepoLevelOrderTransform(AbstractTableTransform):
         metadata = {"nfiles": 1, "nrows": len(table)} | stats
         return [], metadata
 
+    def flush(self) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        Write the groups buffered by the store (store types local_parquet and s3_parquet)
+        """
+        self.store.flush()
+        return [], {}
+
 
 class RepoLevelOrderRuntime(DefaultRayTransformRuntime):
     """
@@ -183,6 +198,7 @@ class RepoLevelOrderRuntime(DefaultRayTransformRuntime):
             ray_num_cpus - Number of cpus per Ray Actor.
             output_by_langs_key - Bool, if True, the output files are written to language folder
             output_superrows_key - Bool, if True, all rows in output are collated toa single row.
+            shuffle_partitions - Number of partitions rows are shuffled into by repo, 0 for automatic.
             store_params - A dictionary to create/update store, used by transform and runtime.
 
         """
@@ -197,6 +213,7 @@ class RepoLevelOrderRuntime(DefaultRayTransformRuntime):
         self.combine_rows = self.params[output_superrows_key]
         self.ray_workers = self.params[stage_two_ray_workers_key]
         self.ray_num_cpus = self.params[stage_two_ray_cpus_key]
+        self.shuffle_partitions = self.params.get(shuffle_partitions_key, shuffle_partitions_default)
 
     def _initialize_store_params(self):
 
@@ -296,13 +313,43 @@ class RepoLevelOrderRuntime(DefaultRayTransformRuntime):
 
         self.logger.info(f"Stage 1 Finished in {datetime.datetime.now() - self.start_time}.")
 
-        from dpk_repo_level_order.internal.repo_grouper import GroupByRepoActor
+        import ray
+        from dpk_repo_level_order.internal.repo_grouper import (
+            GroupByRepoActor,
+            RepoPartitionerActor,
+        )
         from ray.util import ActorPool
 
         p_input = self._prepare_inputs()
         if self.stage_one_only:
             return {"nrepos": len(p_input)}
 
+        # Shuffle: every input file is read once and its rows are split into
+        # partitions by the hash of repo, so that all rows of a repo are in one partition.
+        files = sorted({file for _, repo_files in p_input for file in repo_files})
+        n_partitions = self.shuffle_partitions
+        if n_partitions <= 0:
+            n_partitions = max(self.ray_workers, -(-len(files) // shuffle_files_per_partition))
+        partitioners = RayUtils.create_actors(
+            clazz=RepoPartitionerActor,
+            params={
+                "repo_column_name": self.repo_column_name,
+                "n_partitions": n_partitions,
+                "data_access_factory": self.daf,
+            },
+            actor_options={"num_cpus": self.ray_num_cpus},
+            n_actors=self.ray_workers,
+        )
+        self.logger.info(f"Partitioning {len(files)} files into {n_partitions} partitions")
+        f_pool = ActorPool(partitioners)
+        list(f_pool.map_unordered(lambda a, x: a.process.remote(x[0], x[1]), list(enumerate(files))))
+        partitions = [[] for _ in range(n_partitions)]
+        for partitioner_refs in ray.get([p.flush.remote() for p in partitioners]):
+            for partition, refs in enumerate(partitioner_refs):
+                partitions[partition].extend(refs)
+        partitions = [refs for refs in partitions if len(refs) > 0]
+        self.logger.info(f"Partitioning finished in {datetime.datetime.now() - self.start_time}.")
+
         repo_mapper_func = self._prepare_mapper_function()
         processors = RayUtils.create_actors(
             clazz=GroupByRepoActor,
@@ -317,8 +364,11 @@ class RepoLevelOrderRuntime(DefaultRayTransformRuntime):
         )
 
         p_pool = ActorPool(processors)
-        self.logger.info(f"Processing {len(p_input)} repos with {self.ray_workers} workers")
-        replies = list(p_pool.map_unordered(lambda a, x: a.process.remote(x[0], x[1]), p_input))
+        self.logger.info(
+            f"Processing {len(p_input)} repos in {len(partitions)} partitions with {self.ray_workers} workers"
+        )
+        # partitioners own the partitions, they are kept alive until all partitions are processed
+        replies = list(p_pool.map_unordered(lambda a, x: a.process_partition.remote(x), partitions))
         return {"nrepos": len(p_input)}
 
     def compute_execution_stats(self, stats: dict[str, Any]) -> dict[str, Any]:
@@ -380,7 +430,9 @@ class RepoLevelOrderTransformConfiguration(TransformConfiguration):
             f"--{cli_prefix}{store_type_key}",
             type=str,
             default=store_type_default,
-            help="Intermediate store to hold repo grouping info. Should be one of (ray, s3, local). s3 and local are persistent, ray is ephemeral",
+            help="Intermediate store to hold repo grouping info. Should be one of (ray, s3, local, s3_parquet, local_parquet). "
+            "s3, local, s3_parquet and local_parquet are persistent, ray is ephemeral. s3_parquet and local_parquet "
+            "write the grouping info in batches to parquet files and are recommended for large data.",
         )
         parser.add_argument(
             f"--{cli_prefix}{store_dir_key}",
@@ -423,6 +475,13 @@ class RepoLevelOrderTransformConfiguration(TransformConfiguration):
             default=superrows_default,
             help="If specified, output rows per repo are combined to form a single repo",
         )
+        parser.add_argument(
+            f"--{cli_prefix}{shuffle_partitions_key}",
+            type=int,
+            default=shuffle_partitions_default,
+            help="Number of partitions the rows are shuffled into by repo, in the second stage. "
+            f"If 0, one partition per {shuffle_files_per_partition} input files, at least one per worker.",
+        )
 
     def apply_input_params(self, args: Namespace) -> bool:
         """
@@ -0,0 +1,52 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import pyarrow.parquet as pq
+from dpk_repo_level_order.internal.store.parquet_store import (
+    KEY_COLUMN,
+    ParquetSegmentStore,
+)
+
+
+def test_parquet_segment_store(tmp_path):
+    backend_dir = str(tmp_path)
+    # two writers, like two workers of the first stage
+    store1 = ParquetSegmentStore(backend_dir)
+    store2 = ParquetSegmentStore(backend_dir, max_buffered_records=2)
+    store1.put_dict({"org/repo": "/input/a.parquet", "repo2": "/input/a.parquet"})
+    store2.put_dict({"org/repo": "b.parquet", "repo3": "b.parquet"})
+    store2.put("repo3", "c.parquet")
+    # records of store1 are buffered until flush
+    assert sorted(store2.items()) == ["org/repo", "repo3"]
+    store1.flush()
+    store2.flush()
+
+    items = {key: sorted(values) for key, values in store1.items_kv()}
+    assert items == {
+        "org/repo": ["a.parquet", "b.parquet"],
+        "repo2": ["a.parquet"],
+        "repo3": ["b.parquet", "c.parquet"],
+    }
+    assert sorted(store1.get("org/repo")) == ["a.parquet", "b.parquet"]
+    assert store1.get("unknown") == []
+
+    # removed keys are dropped from the buffer and from the segments, emptied segments are deleted
+    store1.put("repo2", "d.parquet")
+    store1.remove("repo2")
+    store1.flush()
+    store1.remove("repo3")
+    assert store1.get("repo2") == []
+    assert store1.get("repo3") == []
+    assert sorted(store1.items()) == ["org/repo"]
+    assert sorted(store2.get("org/repo")) == ["a.parquet", "b.parquet"]
+    segments = [pq.read_table(file) for file in tmp_path.glob("*/*.parquet")]
+    assert [segment[KEY_COLUMN].to_pylist() for segment in segments] == [["org/repo"]] * len(segments)
@@ -0,0 +1,40 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import numpy as np
+import pyarrow as pa
+from dpk_repo_level_order.internal.repo_grouper import (
+    FILE_INDEX_COLUMN,
+    split_by_group,
+    split_by_partition,
+)
+
+
+def test_shuffle_by_repo():
+    files = [
+        pa.table({"repo_name": ["a", "b", None, "a", "c"], "title": ["1", "2", "3", "4", "5"]}),
+        pa.table({"repo_name": ["c", "a", "d"], "title": ["6", "7", "8"]}),
+    ]
+    partitions = [[], [], []]
+    for file_index, table in enumerate(files):
+        table = table.append_column(FILE_INDEX_COLUMN, pa.array(np.full(len(table), file_index, dtype=np.int32)))
+        for partition, partition_table in enumerate(split_by_partition(table, "repo_name", len(partitions))):
+            partitions[partition].append(partition_table)
+
+    repos = {}
+    for tables in partitions:
+        # rows of a repo keep the order of the files, even if the tables are not in the file order
+        for repo, repo_table in split_by_group(pa.concat_tables(tables[::-1]), "repo_name"):
+            assert repo not in repos
+            assert repo_table.column_names == ["repo_name", "title"]
+            repos[repo] = repo_table["title"].to_pylist()
+    assert repos == {"a": ["1", "4", "7"], "b": ["2"], "c": ["5", "6"], "d": ["8"]}
@@ -0,0 +1,74 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+from dpk_repo_level_order.internal.sorting.semantic_ordering.build_dep_graph import (
+    DependencyGraph,
+    FileIndex,
+)
+from dpk_repo_level_order.internal.sorting.semantic_ordering.topological_sort import (
+    topological_sort_graph,
+    topological_sort_indices,
+)
+from dpk_repo_level_order.internal.sorting.semantic_ordering.utils import (
+    sort_by_path_indices,
+)
+
+
+def build_graph(nodes, edges):
+    graph = DependencyGraph(nodes)
+    for source, target in edges:
+        graph.add_edge(source, target)
+    return graph
+
+
+def test_file_index():
+    index = FileIndex(["/repo/src/com/a/B.java", "/repo/test/com/a/B.java", "/repo/xcom/a/B.java"])
+    assert "/repo/xcom/a/B.java" in index
+    assert index.files_with_suffix("com/a/B.java") == ["/repo/src/com/a/B.java", "/repo/test/com/a/B.java"]
+    assert index.files_with_suffix("B.java") == [
+        "/repo/src/com/a/B.java",
+        "/repo/test/com/a/B.java",
+        "/repo/xcom/a/B.java",
+    ]
+    assert index.files_with_suffix("com/a/C.java") == []
+
+
+def test_sort_by_path_indices():
+    titles = ["b/z.py", "b/README.md", "a.py", "b/doc.md", "b/a.py"]
+    exts = [".py", ".md", ".py", ".md", ".py"]
+    assert sort_by_path_indices(titles, exts) == [2, 1, 3, 4, 0]
+    assert sort_by_path_indices(titles, exts, split_by_filetype=True) == ([1, 3], [2, 4, 0])
+
+
+def test_topological_sort_large_graph():
+    nodes = ["a.py", "b.py", "c.py", "d.py", "e.py", "f.py", "g.py"]
+    # a -> b -> c -> a is a cycle, e is isolated
+    edges = [("a.py", "b.py"), ("b.py", "c.py"), ("c.py", "a.py"), ("d.py", "c.py"), ("f.py", "g.py")]
+    for max_networkx_nodes in [0, len(nodes)]:
+        sorted_nodes, without_dependencies, with_dependencies = topological_sort_graph(
+            build_graph(nodes, edges), max_networkx_nodes=max_networkx_nodes
+        )
+        assert sorted(sorted_nodes) == nodes
+        assert without_dependencies == ["e.py"]
+        assert with_dependencies[:4] != ["f.py", "g.py"]
+        assert with_dependencies.index("f.py") < with_dependencies.index("g.py")
+        assert with_dependencies.index("d.py") < with_dependencies.index("c.py")
+        assert with_dependencies.index("b.py") < with_dependencies.index("c.py")
+    sorted_nodes, _, with_dependencies = topological_sort_graph(build_graph(nodes, edges), max_networkx_nodes=0)
+    assert with_dependencies == ["d.py", "a.py", "b.py", "c.py", "f.py", "g.py"]
+
+
+def test_topological_sort_indices():
+    titles = ["lib.py", "main.py", "README.md", "util.py", "main.py"]
+    exts = [".py", ".py", ".md", ".py", ".py"]
+    graph = build_graph(["lib.py", "main.py", "README.md", "util.py"], [("lib.py", "main.py")])
+    assert topological_sort_indices(graph, titles, exts) == [2, 0, 1, 4, 3]
@@ -0,0 +1,152 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""
+@ Description:
+    Compute all document quality statistics (doc_c4_statistics and doc_Gopher_statistics) of a document
+    in a single pass over shared intermediate results (words, lines, normalized text), with patterns
+    compiled once. Results are identical to the ones of the individual functions.
+"""
+
+import re
+
+from doc_c4_statistics import C4BadWordsMatcher, c4_text_normalization
+from doc_Gopher_statistics import hirakata_pat
+
+
+# statistics columns, in the order they are added to the table
+DOCQ_COLUMNS = [
+    "docq_total_words",
+    "docq_mean_word_len",
+    "docq_symbol_to_word_ratio",
+    "docq_sentence_count",
+    "docq_lorem_ipsum_ratio",
+    "docq_curly_bracket_ratio",
+    "docq_contain_bad_word",
+    "docq_bullet_point_ratio",
+    "docq_ellipsis_line_ratio",
+    "docq_alphabet_word_ratio",
+    "docq_contain_common_en_words",
+]
+DOCQ_JA_COLUMNS = ["docq_avg_ja_sentence_len", "docq_first_ja_alphabet_pos"]
+
+SYMBOLS = ("#", "...")
+BULLETS = ("-", "*")
+COMMON_ENGLISH_WORDS = ["the", "and", "to", "that", "of", "with", "be", "have"]
+SENTENCE_RE = re.compile(r"\b[^.!?]+[.!?]*", flags=re.UNICODE)
+LOREM_IPSUM_RE = re.compile("lorem ipsum", re.IGNORECASE)
+# ASCII text can contain "lorem ipsum" after normalization, only if it matches this
+LOREM_IPSUM_ASCII_RE = re.compile(r"l[\W_]*o[\W_]*r[\W_]*e[\W_]*m[\W_]*i[\W_]*p[\W_]*s[\W_]*u[\W_]*m", re.IGNORECASE)
+
+
+class DocQualityStatistics:
+    """
+    Computes document quality statistics
+    """
+
+    def __init__(self, text_lang: str, bad_words: list[str]):
+        """
+        Initialization
+        :param text_lang: language of the documents
+        :param bad_words: bad words (ldnoobw)
+        """
+        self.text_lang = text_lang
+        self.bad_words = C4BadWordsMatcher(bad_words)
+        self.columns = DOCQ_COLUMNS + (DOCQ_JA_COLUMNS if text_lang == "ja" else [])
+
+    def compute(self, texts: list[str]) -> dict[str, list]:
+        """
+        Compute statistics of documents
+        :param texts: documents
+        :return: statistics columns (name to values)
+        """
+        columns = {name: [] for name in self.columns}
+        values = [columns[name] for name in self.columns]
+        for text in texts:
+            for column, value in zip(values, self._compute(text)):
+                column.append(value)
+        return columns
+
+    def _compute(self, text: str) -> tuple:
+        """
+        Compute statistics of a document, same as compute_word_statistics, c4_sentence_count,
+        c4_contain_pattern_ratio (lorem ipsum and curly brackets), c4_contains_ldnoobw_words,
+        compute_bullet_point_ellipsis_alphabet_word_ratio, contains_common_English_words and
+        for japanese compute_average_japanese_sentence_length and find_first_japanese_alphabet_position
+        :param text: document
+        :return: statistics, in the order of columns
+        """
+        # word statistics
+        words = text.split()
+        total_words = len(words)
+        mean_word_len = symbol_to_word_ratio = alphabet_word_ratio = 0
+        if total_words > 0:
+            mean_word_len = sum(map(len, words)) / total_words
+            symbol_words = 0
+            if SYMBOLS[0] in text or SYMBOLS[1] in text:
+                symbol_words = sum(1 for word in words if SYMBOLS[0] in word or SYMBOLS[1] in word)
+            symbol_to_word_ratio = symbol_words / total_words
+            alphabet_words = sum(1 for word in words if word.isalpha() or any(c.isalpha() for c in word))
+            alphabet_word_ratio = alphabet_words / total_words
+
+        # sentences
+        kutens = text.count("。")
+        if self.text_lang == "ja":
+            sentence_count = kutens
+        else:
+            sentence_count = len(SENTENCE_RE.findall(text)) if len(text) > 0 else 0
+
+        # patterns
+        lorem_ipsum_ratio = 0.0
+        if not text.isascii() or LOREM_IPSUM_ASCII_RE.search(text) is not None:
+            normalized = c4_text_normalization(text, self.text_lang)
+            if len(normalized) > 0:
+                lorem_ipsum_ratio = len(LOREM_IPSUM_RE.findall(normalized)) / len(normalized)
+        curly_bracket_ratio = 0.0
+        for sign in ["{", "}"]:
+            count = text.count(sign)
+            curly_bracket_ratio += float(count) / len(text) if count > 0 else 0.0
+
+        # lines, lines are only split by "\n"
+        total_lines = text.count("\n") + 1
+        bullet_lines = text.startswith(BULLETS) + sum(text.count("\n" + bullet) for bullet in BULLETS)
+        ellipsis_lines = text.endswith("...") + text.count("...\n")
+
+        stats = (
+            total_words,
+            mean_word_len,
+            symbol_to_word_ratio,
+            sentence_count,
+            lorem_ipsum_ratio,
+            curly_bracket_ratio,
+            self.bad_words.contains(text),
+            bullet_lines / total_lines,
+            ellipsis_lines / total_lines,
+            alphabet_word_ratio,
+            self._contains_common_english_words(text),
+        )
+        if self.text_lang == "ja":
+            avg_ja_sentence_len = int(len(text) / kutens) if kutens > 0 else len(text)
+            first_ja_alphabet = hirakata_pat.search(text)
+            stats += (avg_ja_sentence_len, -1 if first_ja_alphabet is None else first_ja_alphabet.start())
+        return stats
+
+    def _contains_common_english_words(self, text: str, min_count: int = 2) -> bool:
+        if self.text_lang != "en":
+            return False
+        count = 0
+        for word in COMMON_ENGLISH_WORDS:
+            if word in text:
+                count += 1
+            if count == min_count:
+                return True
+        return False
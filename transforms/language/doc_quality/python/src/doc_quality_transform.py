@@ -18,19 +18,8 @@ import pyarrow as pa
 from data_processing.data_access import DataAccess, DataAccessFactory
 from data_processing.transform import AbstractTableTransform, TransformConfiguration
 from data_processing.utils import CLIArgumentProvider, TransformUtils, get_logger
-from doc_c4_statistics import (
-    c4_contain_pattern_ratio,
-    c4_contains_ldnoobw_words,
-    c4_load_ldnoobw_words,
-    c4_sentence_count,
-)
-from doc_Gopher_statistics import (
-    compute_average_japanese_sentence_length,
-    compute_bullet_point_ellipsis_alphabet_word_ratio,
-    compute_word_statistics,
-    contains_common_English_words,
-    find_first_japanese_alphabet_position,
-)
+from doc_quality_statistics import DocQualityStatistics
+from doc_quality_utils import load_bad_words
 
 
 logger = get_logger(__name__)
@@ -70,10 +59,11 @@ class DocQualityTransform(AbstractTableTransform):
 
         daf = config.get(data_factory_internal_key, None)
         bad_word_filepath = config.get(bad_word_filepath_key, None)
+        bad_words = []
         if bad_word_filepath is not None:
             if os.path.exists(bad_word_filepath):
                 logger.info(f"Load badwords found locally from {bad_word_filepath}")
-                self.re_pattern = c4_load_ldnoobw_words(ft_lang=self.text_lang, file_path=bad_word_filepath)
+                bad_words = load_bad_words(ft_lang=self.text_lang, file_path=bad_word_filepath)
             else:
                 if daf is None:
                     raise RuntimeError(
@@ -86,7 +76,9 @@ class DocQualityTransform(AbstractTableTransform):
                 with tempfile.TemporaryDirectory() as temp_dir:
                     # use a temporary directory until model is loaded to memory
                     bad_word_filepath = self._write_locally(data_access, bad_word_filepath, temp_dir)
-                    self.re_pattern = c4_load_ldnoobw_words(ft_lang=self.text_lang, file_path=bad_word_filepath)
+                    bad_words = load_bad_words(ft_lang=self.text_lang, file_path=bad_word_filepath)
+        # all patterns are compiled once here
+        self.statistics = DocQualityStatistics(text_lang=self.text_lang, bad_words=bad_words)
 
     def _write_locally(self, data_access: DataAccess, path: str, temp_dir: str) -> str:
         filename = os.path.basename(path)
@@ -101,81 +93,10 @@ class DocQualityTransform(AbstractTableTransform):
         Put Transform-specific to convert one Table to 0 or more tables. It also returns
         a dictionary of execution statistics - arbitrary dictionary
         """
-        docq_total_words = []
-        docq_mean_word_len = []
-        docq_symbol_to_word_ratio = []
-        docq_sentence_count = []
-        docq_curly_bracket_ratio = []
-        docq_lorem_ipsum_ratio = []
-        docq_contain_bad_word = []
-        docq_bullet_point_ratio = []
-        docq_ellipsis_line_ratio = []
-        docq_alphabet_word_ratio = []
-        docq_contain_common_en_words = []
-        if self.text_lang == "ja":
-            # for japanese language, add 2 extra columns for 2 heuristic rules:
-            docq_avg_ja_sentence_len = []
-            docq_first_ja_alphabet_pos = []
-
-        for text in table[self.doc_content_column].to_pylist():
-            total_words, mean_word_len, symbol_to_word_ratio = compute_word_statistics(text)
-            docq_total_words.append(total_words)
-            docq_mean_word_len.append(mean_word_len)
-            docq_symbol_to_word_ratio.append(symbol_to_word_ratio)
-
-            docq_sentence_count.append(c4_sentence_count(text, ft_lang=self.text_lang))
-
-            docq_lorem_ipsum_ratio.append(
-                c4_contain_pattern_ratio(text, pattern="lorem ipsum", ft_lang=self.text_lang, normalize_text=True)
-            )
-            curly_bracket_ratio = 0.0
-            for sign in ["{", "}"]:
-                curly_bracket_ratio += c4_contain_pattern_ratio(
-                    text, pattern=sign, ft_lang=self.text_lang, normalize_text=False
-                )
-            docq_curly_bracket_ratio.append(curly_bracket_ratio)
-            docq_contain_bad_word.append(c4_contains_ldnoobw_words(text, self.re_pattern))
-
-            (
-                bullet_point_ratio,
-                ellipsis_line_ratio,
-                alphabet_word_ratio,
-            ) = compute_bullet_point_ellipsis_alphabet_word_ratio(text)
-            docq_bullet_point_ratio.append(bullet_point_ratio)
-            docq_ellipsis_line_ratio.append(ellipsis_line_ratio)
-            docq_alphabet_word_ratio.append(alphabet_word_ratio)
-
-            docq_contain_common_en_words.append(contains_common_English_words(text, self.text_lang))
-
-            if self.text_lang == "ja":
-                docq_avg_ja_sentence_len.append(compute_average_japanese_sentence_length(text))
-                docq_first_ja_alphabet_pos.append(find_first_japanese_alphabet_position(text))
-
-        table = TransformUtils.add_column(table=table, name="docq_total_words", content=docq_total_words)
-        table = TransformUtils.add_column(table=table, name="docq_mean_word_len", content=docq_mean_word_len)
-        table = TransformUtils.add_column(
-            table=table, name="docq_symbol_to_word_ratio", content=docq_symbol_to_word_ratio
-        )
-        table = TransformUtils.add_column(table=table, name="docq_sentence_count", content=docq_sentence_count)
-        table = TransformUtils.add_column(table=table, name="docq_lorem_ipsum_ratio", content=docq_lorem_ipsum_ratio)
-        table = TransformUtils.add_column(
-            table=table, name="docq_curly_bracket_ratio", content=docq_curly_bracket_ratio
-        )
-        table = TransformUtils.add_column(table=table, name="docq_contain_bad_word", content=docq_contain_bad_word)
-        table = TransformUtils.add_column(table=table, name="docq_bullet_point_ratio", content=docq_bullet_point_ratio)
-        table = TransformUtils.add_column(
-            table=table, name="docq_ellipsis_line_ratio", content=docq_ellipsis_line_ratio
-        )
-        table = TransformUtils.add_column(
-            table=table, name="docq_alphabet_word_ratio", content=docq_alphabet_word_ratio
-        )
-        table = TransformUtils.add_column(
-            table=table, name="docq_contain_common_en_words", content=docq_contain_common_en_words
-        )
-
-        if self.text_lang == "ja":
-            table = table.append_column("docq_avg_ja_sentence_len", pa.array(docq_avg_ja_sentence_len))
-            table = table.append_column("docq_first_ja_alphabet_pos", pa.array(docq_first_ja_alphabet_pos))
+        TransformUtils.validate_columns(table=table, required=[self.doc_content_column])
+        columns = self.statistics.compute(table[self.doc_content_column].to_pylist())
+        for name, values in columns.items():
+            table = TransformUtils.add_column(table=table, name=name, content=values)
 
         metadata = {
             "total_docs_count": table.num_rows,
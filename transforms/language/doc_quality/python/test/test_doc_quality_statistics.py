@@ -0,0 +1,79 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import os
+
+from doc_c4_statistics import (
+    C4BadWordsMatcher,
+    c4_contain_pattern_ratio,
+    c4_contains_ldnoobw_words,
+    c4_load_ldnoobw_words,
+    c4_sentence_count,
+)
+from doc_Gopher_statistics import (
+    compute_average_japanese_sentence_length,
+    compute_bullet_point_ellipsis_alphabet_word_ratio,
+    compute_word_statistics,
+    contains_common_English_words,
+    find_first_japanese_alphabet_position,
+)
+from doc_quality_statistics import DocQualityStatistics
+from doc_quality_utils import load_bad_words
+
+
+bad_word_filepath = os.path.abspath(os.path.join(os.path.dirname(__file__), "../ldnoobw/en"))
+texts = [
+    "",
+    " ",
+    " : This documents is for test . ? ",
+    "This javascript has Lorem ipsum. It also has a {test} string with {brackets}.",
+    "lo.rem, IP_SUM\n\n- first #tag\n* second...\n...",
+    "成田空港第1ターミナルに向かう。Lorem ipsum lorem ipsum 。{成田空港第1タ}ーミナルに向かう。",
+    "ｌｏｒｅｍ　ｉｐｓｕｍ。本日晴天也",
+    "Café naïve ½ ² 三 _ 42 ...",
+    "an S&M g-Spot and 2 girls 1 cup, with the 🖕",
+    "2 girls  1 cup, assassin, ſex, Kinky, ıdiot",
+]
+
+
+def test_bad_words_matcher():
+    bad_words = load_bad_words("en", bad_word_filepath)
+    pattern = c4_load_ldnoobw_words("en", bad_word_filepath)
+    matcher = C4BadWordsMatcher(bad_words)
+    for text in texts + [word.upper() for word in bad_words] + [f"x{word}_" for word in bad_words]:
+        assert matcher.contains(text) == c4_contains_ldnoobw_words(text, pattern), text
+    assert not C4BadWordsMatcher([]).contains("any text")
+
+
+def test_statistics():
+    for lang in ["en", "ja"]:
+        pattern = c4_load_ldnoobw_words(lang, bad_word_filepath)
+        columns = DocQualityStatistics(lang, load_bad_words(lang, bad_word_filepath)).compute(texts)
+        for i, text in enumerate(texts):
+            curly_bracket_ratio = 0.0
+            for sign in ["{", "}"]:
+                curly_bracket_ratio += c4_contain_pattern_ratio(text, pattern=sign, ft_lang=lang, normalize_text=False)
+            expected = [
+                *compute_word_statistics(text),
+                c4_sentence_count(text, ft_lang=lang),
+                c4_contain_pattern_ratio(text, pattern="lorem ipsum", ft_lang=lang, normalize_text=True),
+                curly_bracket_ratio,
+                c4_contains_ldnoobw_words(text, pattern),
+                *compute_bullet_point_ellipsis_alphabet_word_ratio(text),
+                contains_common_English_words(text, lang),
+            ]
+            if lang == "ja":
+                expected += [
+                    compute_average_japanese_sentence_length(text),
+                    find_first_japanese_alphabet_position(text),
+                ]
+            assert [values[i] for values in columns.values()] == expected, text
@@ -2,13 +2,10 @@ import enum
 import time
 from argparse import ArgumentParser, Namespace
 from typing import Any
-import zipfile
 import io
 import trafilatura
 from datetime import datetime
 
-import pyarrow as pa
-
 # disabled for now
 # from data_processing_ray.runtime.ray import RayTransformLauncher
 # from data_processing_ray.runtime.ray.runtime_configuration import (
@@ -18,7 +15,7 @@ import pyarrow as pa
 
 
 from data_processing.transform import AbstractBinaryTransform, TransformConfiguration
-from data_processing.utils import CLIArgumentProvider, get_logger, TransformUtils
+from data_processing.utils import CLIArgumentProvider, get_logger, TransformUtils, MB, ParquetRowsWriter, map_zip_members
 
 
 
@@ -29,8 +26,10 @@ class Html2ParquetTransform(AbstractBinaryTransform):
         self.output_format = config.get(html2parquet_output_format_key, html2parquet_output_format.MARKDOWN)
         if not isinstance(self.output_format, html2parquet_output_format):
             self.output_format = html2parquet_output_format[self.output_format]  
+        self.workers = config.get(html2parquet_workers_key, html2parquet_workers_default)
+        self.max_file_size = int(config.get(html2parquet_max_mbytes_per_file_key, html2parquet_max_mbytes_per_file_default) * MB)
 
-    def _convert_html2parquet(self, member_filename:str, file_name:str, content_bytes: bytes) -> dict:
+    def _convert_html2parquet(self, member_filename:str, file_name:str, content_bytes: bytes, date_acquired: str = None) -> dict:
         title = member_filename if member_filename else TransformUtils.get_file_basename(file_name)
         
         # Use Trafilatura library
@@ -51,7 +50,7 @@ class Html2ParquetTransform(AbstractBinaryTransform):
             "contents": content_string,
             "document_id": TransformUtils.str_to_hash(content_string),
             "size": len(content_string),
-            "date_acquired": datetime.now().isoformat()
+            "date_acquired": date_acquired if date_acquired else datetime.now().isoformat()
         }
 
         return row_data
@@ -63,32 +62,30 @@ class Html2ParquetTransform(AbstractBinaryTransform):
         If file_name is detected as a HTML file, it generates a pyarrow table with a single row
         that contains the document converted to a text string.
         If file_name is detected as a ZIP archive, it generates a pyarrow table with a row
-        for each HTML file detected in the archive.
+        for each HTML file detected in the archive. HTML files of the archive are converted in a pool of
+        threads and rows are written as bounded row groups, starting a new output file whenever the current
+        one reaches max_mbytes_per_file.
         """
         if TransformUtils.get_file_extension(file_name)[1] not in [".zip", ".html"]:
             error_message = f"Unsupported file type: {file_name}. Only ZIP and HTML files are supported."
             logger.error(error_message)
             raise ValueError(error_message)  # Raising an exception with the error message
-        data = []
-        number_of_rows = 0
+        writer = ParquetRowsWriter(max_file_size=self.max_file_size)
+        date_acquired = datetime.now().isoformat()
 
         # Process ZIP archive of HTML documents
         if(TransformUtils.get_file_extension(file_name)[1] == ".zip"):
-            with zipfile.ZipFile(io.BytesIO(bytes(byte_array))) as opened_zip:
-                # Loop through each file member in the ZIP archive
-                for member in opened_zip.infolist():
-                    if not member.is_dir() and TransformUtils.get_file_extension(member.filename)[1] == ".html":
-                        with opened_zip.open(member) as file:
-                            try:
-                                # Read the content of the file
-                                content_bytes = file.read()
-
-                                row_data = self._convert_html2parquet(member_filename=member.filename ,file_name=file_name, content_bytes=content_bytes)
-
-                                data.append(row_data)
-                                number_of_rows += 1
-                            except Exception as e:
-                                logger.warning(f"Exception {str(e)} processing file {member.filename}, skipping")
+            # Convert the HTML file members of the ZIP archive in worker threads
+            for member, row_data, error in map_zip_members(
+                byte_array=bytes(byte_array),
+                process=lambda member, content_bytes: self._convert_html2parquet(member_filename=member.filename, file_name=file_name, content_bytes=content_bytes, date_acquired=date_acquired),
+                member_filter=lambda member: TransformUtils.get_file_extension(member.filename)[1] == ".html",
+                workers=self.workers,
+            ):
+                if error is not None:
+                    logger.warning(f"Exception {str(error)} processing file {member.filename}, skipping")
+                    continue
+                writer.add_row(row_data)
             
   
         # Process single HTML documents
@@ -98,17 +95,15 @@ class Html2ParquetTransform(AbstractBinaryTransform):
                 # Read the content of the HTML file
                 content_bytes = buf.read()
 
-                row_data = self._convert_html2parquet(member_filename=None ,file_name=file_name, content_bytes=content_bytes)
+                row_data = self._convert_html2parquet(member_filename=None ,file_name=file_name, content_bytes=content_bytes, date_acquired=date_acquired)
 
-                data.append(row_data)
-                number_of_rows += 1
+                writer.add_row(row_data)
 
             except Exception as e:
                 logger.warning(f"Exception {str(e)} processing file {file_name}, skipping")
             
 
-        table = pa.Table.from_pylist(data)
-        return [(TransformUtils.convert_arrow_to_binary(table=table), ".parquet")], {"nrows": number_of_rows}
+        return writer.close(), {"nrows": writer.rows}
 
 
 logger = get_logger(__name__)
@@ -126,6 +121,12 @@ class html2parquet_output_format(str, enum.Enum):
 
 html2parquet_output_format_default = html2parquet_output_format.MARKDOWN
 html2parquet_output_format_cli_param = f"{cli_prefix}{html2parquet_output_format_key}"
+html2parquet_workers_key = f"workers"
+html2parquet_workers_default = 4
+html2parquet_workers_cli_param = f"{cli_prefix}{html2parquet_workers_key}"
+html2parquet_max_mbytes_per_file_key = f"max_mbytes_per_file"
+html2parquet_max_mbytes_per_file_default = 512
+html2parquet_max_mbytes_per_file_cli_param = f"{cli_prefix}{html2parquet_max_mbytes_per_file_key}"
 
 
 class Html2ParquetTransformConfiguration(TransformConfiguration):
@@ -142,6 +143,18 @@ class Html2ParquetTransformConfiguration(TransformConfiguration):
             help="Output format for the contents column.",
             default=html2parquet_output_format.MARKDOWN,
         ) 
+        parser.add_argument(
+            f"--{html2parquet_workers_cli_param}",
+            type=int,
+            help="Number of threads converting the HTML files of a ZIP archive.",
+            default=html2parquet_workers_default,
+        )
+        parser.add_argument(
+            f"--{html2parquet_max_mbytes_per_file_cli_param}",
+            type=float,
+            help="Max size (MB) of an output parquet file, a ZIP archive is written to multiple files if needed.",
+            default=html2parquet_max_mbytes_per_file_default,
+        )
 
     def apply_input_params(self, args: Namespace) -> bool:
         captured = CLIArgumentProvider.capture_parameters(args, cli_prefix, False)
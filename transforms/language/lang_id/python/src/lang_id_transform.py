@@ -28,16 +28,19 @@ model_url_key = "model_url"
 content_column_name_key = "content_column_name"
 output_lang_column_name_key = "output_lang_column_name"
 output_score_column_name_key = "output_score_column_name"
+max_chars_key = "max_chars"
 model_credential_cli_param = f"{cli_prefix}{model_credential_key}"
 model_kind_cli_param = f"{cli_prefix}{model_kind_key}"
 model_url_cli_param = f"{cli_prefix}{model_url_key}"
 content_column_name_cli_param = f"{cli_prefix}{content_column_name_key}"
 output_lang_column_name_cli_param = f"{cli_prefix}{output_lang_column_name_key}"
 output_score_column_name_cli_param = f"{cli_prefix}{output_score_column_name_key}"
+max_chars_cli_param = f"{cli_prefix}{max_chars_key}"
 
 default_content_column_name = "contents"
 default_output_lang_column_name = "lang"
 default_output_score_column_name = "score"
+default_max_chars = 0
 
 
 class LangIdentificationTransform(AbstractTableTransform):
@@ -61,6 +64,7 @@ class LangIdentificationTransform(AbstractTableTransform):
         self.content_column_name = config.get(content_column_name_key, default_content_column_name)
         self.output_lang_column_name = config.get(output_lang_column_name_key, default_output_lang_column_name)
         self.output_score_column_name = config.get(output_score_column_name_key, default_output_score_column_name)
+        self.max_chars = config.get(max_chars_key, default_max_chars)
 
     def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
         """
@@ -78,7 +82,13 @@ class LangIdentificationTransform(AbstractTableTransform):
             )
         self.logger.debug(f"Transforming one table with {len(table)} rows")
         table, stats = get_lang_ds_pa(
-            table, self.nlp_langid, self.content_column_name, self.output_lang_column_name, self.output_score_column_name)
+            table,
+            self.nlp_langid,
+            self.content_column_name,
+            self.output_lang_column_name,
+            self.output_score_column_name,
+            self.max_chars,
+        )
         self.logger.debug(f"Transformed one table with {len(table)} rows")
         return [table], stats
 
@@ -128,6 +138,12 @@ class LangIdentificationTransformConfiguration(TransformConfiguration):
             default=default_output_score_column_name,
             help="Column name to store the score of language identification",
         )
+        parser.add_argument(
+            f"--{max_chars_cli_param}",
+            type=int,
+            default=default_max_chars,
+            help="Max number of characters of a document used for language identification, 0 for the whole document",
+        )
 
     def apply_input_params(self, args: Namespace) -> bool:
         """
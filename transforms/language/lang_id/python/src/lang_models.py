@@ -14,6 +14,8 @@ import math
 from abc import ABCMeta, abstractmethod
 
 import fasttext
+import numpy as np
+import pyarrow as pa
 from huggingface_hub import hf_hub_download
 from langcodes import standardize_tag
 
@@ -26,8 +28,21 @@ class LangModel(metaclass=ABCMeta):
     def detect_lang(self, text: str) -> tuple[str, float]:
         pass
 
+    def detect_lang_batch(self, texts: list[str]) -> tuple[pa.Array, pa.Array]:
+        """
+        Detect language of a list of texts
+        :param texts: texts
+        :return: arrays of languages and scores
+        """
+        langs, scores = [], []
+        for text in texts:
+            lang, score = self.detect_lang(text)
+            langs.append(lang)
+            scores.append(score)
+        return pa.array(langs, type=pa.string()), pa.array(scores, type=pa.float64())
 
-class NoopModel(metaclass=ABCMeta):
+
+class NoopModel(LangModel):
     def detect_lang(self, text: str) -> tuple[str, float]:
         return "en", 0.0
 
@@ -36,12 +51,34 @@ class FastTextModel(LangModel):
     def __init__(self, url, credential):
         model_path = hf_hub_download(repo_id=url, filename="model.bin", token=credential)
         self.nlp = fasttext.load_model(model_path)
+        # standardized tags of the (few hundreds) model labels
+        self.tags = {}
+
+    def _standardize_label(self, label: str) -> str:
+        tag = self.tags.get(label)
+        if tag is None:
+            tag = self.tags[label] = standardize_tag(label.replace("__label__", ""))
+        return tag
 
     def detect_lang(self, text: str) -> tuple[str, float]:
         label, score = self.nlp.predict(
             text.replace("\n", " "), 1
         )  # replace newline to avoid ERROR: predict processes one line at a time (remove '\n') skipping the file
-        return standardize_tag(label[0].replace("__label__", "")), math.floor(score[0] * 1000) / 1000
+        return self._standardize_label(label[0]), math.floor(score[0] * 1000) / 1000
+
+    def detect_lang_batch(self, texts: list[str]) -> tuple[pa.Array, pa.Array]:
+        """
+        Detect language of a list of texts, using fastText multi line prediction
+        :param texts: texts
+        :return: arrays of languages and scores
+        """
+        if len(texts) == 0:
+            return pa.array([], type=pa.string()), pa.array([], type=pa.float64())
+        # replace newline, as fastText predicts one line at a time
+        labels, scores = self.nlp.predict([text.replace("\n", " ") for text in texts], 1)
+        langs = [self._standardize_label(label[0]) for label in labels]
+        scores = np.floor(np.array([score[0] for score in scores], dtype=np.float64) * 1000) / 1000
+        return pa.array(langs, type=pa.string()), pa.array(scores)
 
 
 class LangModelFactory:
@@ -13,6 +13,7 @@
 from typing import Any
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from data_processing.utils import TransformUtils, get_logger
 from lang_models import LangModel
 
@@ -26,21 +27,25 @@ def get_lang_ds_pa(
         content_column_name: str,
         output_lang_column_name: str,
         output_score_column_name: str,
+        max_chars: int = 0,
     ) -> tuple[pa.table, dict[str, Any]]:
-    detected_language = pa.Table.from_pylist(
-        list(
-            map(
-                lambda r: {"lang": r[0], "score": r[1]},
-                map(lambda x: nlp.detect_lang(x), table[content_column_name].to_pylist()),
-            )
-        )
-    )
-    stats = pa.table([detected_language["lang"]], names=["lang"]).group_by("lang").aggregate([("lang", "count")])
+    """
+    Detect language of the documents of a table
+    :param table: table
+    :param nlp: language model
+    :param content_column_name: name of the documents column
+    :param output_lang_column_name: name of the language column to add
+    :param output_score_column_name: name of the score column to add
+    :param max_chars: if positive, only the first max_chars characters of a document are used for detection
+    :return: table with language and score columns and number of documents per language
+    """
+    contents = table[content_column_name]
+    if max_chars > 0:
+        contents = pc.utf8_slice_codeunits(contents, 0, max_chars)
+    langs, scores = nlp.detect_lang_batch(contents.to_pylist())
     stats_dict = {}
-    for batch in stats.to_batches():
-        d = batch.to_pydict()
-        for lang, count in zip(d["lang"], d["lang_count"]):
-            stats_dict[lang] = count
-    result = TransformUtils.add_column(table=table, name=output_lang_column_name, content=detected_language["lang"])
-    result = TransformUtils.add_column(table=result, name=output_score_column_name, content=detected_language["score"])
+    for counts in pc.value_counts(langs).to_pylist():
+        stats_dict[counts["values"]] = counts["counts"]
+    result = TransformUtils.add_column(table=table, name=output_lang_column_name, content=langs)
+    result = TransformUtils.add_column(table=result, name=output_score_column_name, content=scores)
     return result, stats_dict
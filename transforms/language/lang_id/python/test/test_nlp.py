@@ -39,3 +39,20 @@ def test_language_identification():
     assert len(table["score"].to_pylist()) == len(table["lang"].to_pylist())
     assert "ft_lang" not in table.column_names
     assert "ft_score" not in table.column_names
+
+
+def test_language_identification_batch():
+    nlp_langid = LangModelFactory.create_model(
+        KIND_FASTTEXT, "facebook/fasttext-language-identification", "YOUR HUGGING FACE ACCOUNT TOKEN"
+    )
+    documents = [
+        "Der Tell Sabi Abyad („Hügel des weißen Jungen“) ist eine historische Siedlungsstätte\nim Belich-Tal.",
+        "Mu2 Gruis (36 Gruis) é uma estrela na direção da constelação de Grus.",
+        "Mu2 Gruis (36 Gruis) é uma estrela na direção da constelação de Grus.",
+    ]
+    langs, scores = nlp_langid.detect_lang_batch(documents)
+    assert list(zip(langs.to_pylist(), scores.to_pylist())) == [nlp_langid.detect_lang(d) for d in documents]
+    table = pa.Table.from_arrays([pa.array(documents)], names=["contents"])
+    table, stats = get_lang_ds_pa(table, nlp_langid, "contents", "lang", "score", max_chars=40)
+    assert table["lang"].to_pylist() == ["de", "pt", "pt"]
+    assert stats == {"de": 1, "pt": 2}
@@ -50,6 +50,9 @@ class FlairRecognizer(EntityRecognizer):
 
         supported_entities = supported_entities if supported_entities else self.ENTITIES
 
+        # sentences predicted in a batch, by their text
+        self.predictions = {}
+
         if model and model_path:
             raise ValueError("Only one of model or model_path should be provided.")
         elif model and not model_path:
@@ -71,6 +74,22 @@ class FlairRecognizer(EntityRecognizer):
         """Load the model, not used. Model is loaded during initialization."""
         pass
 
+    def predict_batch(self, texts: List[str], mini_batch_size: int = 32) -> None:
+        """
+        Predict entities of texts in mini batches. Predictions are used by analyze of the same texts, until
+        they are cleared.
+        :param texts: The texts to predict.
+        :param mini_batch_size: Number of sentences predicted together.
+        """
+        sentences = {text: Sentence(text) for text in texts if text.strip()}
+        if len(sentences) > 0:
+            self.model.predict(list(sentences.values()), mini_batch_size=mini_batch_size)
+        self.predictions.update(sentences)
+
+    def clear_predictions(self) -> None:
+        """Clear predictions of the last batch."""
+        self.predictions = {}
+
     def get_supported_entities(self) -> List[str]:
         """
         Return supported entities by this model.
@@ -94,8 +113,10 @@ class FlairRecognizer(EntityRecognizer):
 
         results = []
 
-        sentences = Sentence(text)
-        self.model.predict(sentences)
+        sentences = self.predictions.get(text)
+        if sentences is None:
+            sentences = Sentence(text)
+            self.model.predict(sentences)
 
         # If there are no specific list of entities, we will look for all of it.
         if not entities:
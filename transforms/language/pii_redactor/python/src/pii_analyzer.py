@@ -2,7 +2,7 @@ import logging
 
 import spacy
 from flair_recognizer import FlairRecognizer
-from presidio_analyzer import AnalyzerEngine, RecognizerRegistry
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine, RecognizerRegistry
 from presidio_analyzer.nlp_engine import NlpEngineProvider
 
 
@@ -14,11 +14,57 @@ NLP_ENGINE = "flair/ner-english-large"
 SPACY_MODEL = "en_core_web_sm"
 
 
+def needs_ner(entities):
+    """
+    Checks whether detecting the given entities requires the Flair NER model. Other entities are detected by
+    the predefined (pattern based) recognizers.
+
+    Args:
+        entities (List[str]): Entities to detect, all supported entities if empty.
+
+    Returns:
+        bool: True if any of the entities is detected by the NER model.
+    """
+    return not entities or any(entity in FlairRecognizer.ENTITIES for entity in entities)
+
+
+def split_text(text, max_chars):
+    """
+    Splits the text into segments of at most max_chars characters, preferring to split after a line break
+    and then after a white space in the second half of a segment.
+
+    Args:
+        text (str): The text to split.
+        max_chars (int): Maximal length of a segment, the text is not split if it is 0.
+
+    Returns:
+        List[Tuple[int, str]]: Offsets of the segments in the text and the segments.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [(0, text)]
+    segments = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = start + max_chars
+        cut = text.rfind("\n", start + max_chars // 2, end)
+        if cut < 0:
+            cut = text.rfind(" ", start + max_chars // 2, end)
+        cut = end if cut < 0 else cut + 1
+        segments.append((start, text[start:cut]))
+        start = cut
+    segments.append((start, text[start:]))
+    return segments
+
+
 class PIIAnalyzerEngine:
     def __init__(self, supported_entities=None, score_threshold=None):
         self.supported_entities = supported_entities
         self.score_threshold = score_threshold
+        self.flair_recognizer = None
         self.nlp_engine, self.registry = self._create_nlp_engine()
+        # analyzer is created once and shared by all documents
+        self.analyzer = AnalyzerEngine(nlp_engine=self.nlp_engine, registry=self.registry)
+        self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
 
     def _create_nlp_engine(self):
         """
@@ -36,9 +82,12 @@ class PIIAnalyzerEngine:
             log.info(f"========= downloading {SPACY_MODEL} ==========")
             spacy.cli.download(SPACY_MODEL)
 
-        # Add Flair recognizer to the registry
-        flair_recognizer = FlairRecognizer(model_path=NLP_ENGINE, supported_entities=self.supported_entities)
-        registry.add_recognizer(flair_recognizer)
+        # Add Flair recognizer to the registry, only if any of the entities is detected by NER
+        if needs_ner(self.supported_entities):
+            self.flair_recognizer = FlairRecognizer(model_path=NLP_ENGINE, supported_entities=self.supported_entities)
+            registry.add_recognizer(self.flair_recognizer)
+        else:
+            log.info(f"Entities {self.supported_entities} are detected without NER, not loading {NLP_ENGINE}")
 
         # Remove the default Spacy recognizer
         registry.remove_recognizer("SpacyRecognizer")
@@ -64,8 +113,55 @@ class PIIAnalyzerEngine:
             List[RecognizerResult]: Results of the PII analysis.
             List[entity_types]: Types of PII entities identified in the given input text
         """
-        analyzer = AnalyzerEngine(nlp_engine=self.nlp_engine, registry=self.registry)
-        analyze_results = analyzer.analyze(text=text, language=language, entities=self.supported_entities,
-                                           score_threshold=self.score_threshold)
+        analyze_results = self.analyzer.analyze(
+            text=text, language=language, entities=self.supported_entities, score_threshold=self.score_threshold
+        )
         entity_types = [result.entity_type for result in analyze_results]
         return analyze_results, entity_types
+
+    def analyze_texts(self, texts, language="en", batch_size=32, max_segment_chars=0):
+        """
+        Analyzes the given texts to identify PII entities. Texts are split into segments of bounded length,
+        which are analyzed in batches: spaCy processes a batch with a single pipe call and Flair predicts
+        a batch in mini batches.
+
+        Args:
+            texts (List[str]): The texts to analyze.
+            language (str): The language of the texts (default is "en").
+            batch_size (int): Number of segments analyzed together.
+            max_segment_chars (int): Maximal length of a segment, texts are not split if it is 0.
+
+        Returns:
+            List[Tuple[List[RecognizerResult], List[entity_types]]]: Results of the PII analysis and types
+            of PII entities identified for every text, same as analyze_text.
+        """
+        # segments of all texts and the index and offset of their text
+        segments = []
+        owners = []
+        for index, text in enumerate(texts):
+            for offset, segment in split_text(text, max_segment_chars):
+                segments.append(segment)
+                owners.append((index, offset))
+        analyze_results = [[] for _ in texts]
+        for start in range(0, len(segments), batch_size):
+            batch = segments[start : start + batch_size]
+            if self.flair_recognizer is not None:
+                self.flair_recognizer.predict_batch(batch, mini_batch_size=batch_size)
+            batch_results = list(
+                self.batch_analyzer.analyze_iterator(
+                    texts=batch,
+                    language=language,
+                    batch_size=batch_size,
+                    entities=self.supported_entities,
+                    score_threshold=self.score_threshold,
+                )
+            )
+            if self.flair_recognizer is not None:
+                self.flair_recognizer.clear_predictions()
+            for (index, offset), segment_results in zip(owners[start : start + batch_size], batch_results):
+                # move the results of a segment to the positions in its text
+                for result in segment_results:
+                    result.start += offset
+                    result.end += offset
+                analyze_results[index].extend(segment_results)
+        return [(results, [result.entity_type for result in results]) for results in analyze_results]
@@ -20,6 +20,8 @@ supported_entities_key = "entities"
 redaction_operator_key = "operator"
 doc_transformed_contents_key = "transformed_contents"
 score_threshold_key = "score_threshold"
+batch_size_key = "batch_size"
+max_segment_chars_key = "max_segment_chars"
 pii_contents_column = "contents"
 
 
@@ -27,6 +29,8 @@ supported_entities_cli_param = f"{cli_prefix}{supported_entities_key}"
 redaction_operator_cli_param = f"{cli_prefix}{redaction_operator_key}"
 doc_transformed_contents_cli_param = f"{cli_prefix}{doc_transformed_contents_key}"
 score_threshold_cli_param = f"{cli_prefix}{score_threshold_key}"
+batch_size_cli_param = f"{cli_prefix}{batch_size_key}"
+max_segment_chars_cli_param = f"{cli_prefix}{max_segment_chars_key}"
 
 default_score_threshold_key = 0.6
 """
@@ -40,6 +44,12 @@ default_supported_entities = ["PERSON", "EMAIL_ADDRESS", "ORGANIZATION", "DATE_T
 default_anonymizer_operator = "replace"
 """By default the anonymizer operator is replace which will replace it with the respective entity"""
 
+default_batch_size = 32
+"""By default 32 document segments are analyzed together"""
+
+default_max_segment_chars = 5000
+"""By default documents are analyzed in segments of at most 5000 characters, to bound the NER latency"""
+
 
 class PIIRedactorTransform(AbstractTableTransform):
     """
@@ -55,21 +65,32 @@ class PIIRedactorTransform(AbstractTableTransform):
         self.redaction_operator = config.get(redaction_operator_key, default_anonymizer_operator)
         self.doc_contents_key = config.get(doc_transformed_contents_key)
         score_threshold_value = config.get(score_threshold_key, default_score_threshold_key)
+        self.batch_size = config.get(batch_size_key, default_batch_size)
+        self.max_segment_chars = config.get(max_segment_chars_key, default_max_segment_chars)
 
         self.analyzer = PIIAnalyzerEngine(
             supported_entities=self.supported_entities, score_threshold=score_threshold_value
         )
         self.anonymizer = PIIAnonymizer(operator=self.redaction_operator.lower())
 
-    def _analyze_pii(self, text: str):
-        return self.analyzer.analyze_text(text)
-
-    def _redact_pii(self, text: str):
-        text = text.strip()
-        if text:
-            analyze_results, entity_types = self._analyze_pii(text)
-            anonymized_results = self.anonymizer.anonymize_text(text, analyze_results)
-            return anonymized_results.text, entity_types
+    def _redact_pii(self, texts: list[str]) -> tuple[list[str], list[list[str]]]:
+        """
+        Redact pii of documents, analyzing them in batches
+        :param texts: documents
+        :return: redacted documents and types of pii entities detected in every document
+        """
+        texts = [text.strip() for text in texts]
+        analyzed = self.analyzer.analyze_texts(
+            texts, batch_size=self.batch_size, max_segment_chars=self.max_segment_chars
+        )
+        redacted_texts = []
+        entity_types_list = []
+        for text, (analyze_results, entity_types) in zip(texts, analyzed):
+            if text:
+                text = self.anonymizer.anonymize_text(text, analyze_results).text
+            redacted_texts.append(text)
+            entity_types_list.append(entity_types)
+        return redacted_texts, entity_types_list
 
     def transform(self, table: pa.Table, file_name: Optional[str] = None) -> tuple[list[pa.Table], dict[str, Any]]:
         """
@@ -83,8 +104,7 @@ class PIIRedactorTransform(AbstractTableTransform):
         TransformUtils.validate_columns(table=table, required=[pii_contents_column])
         metadata = {"original_table_rows": table.num_rows, "original_column_count": len(table.column_names)}
 
-
-        redacted_texts, entity_types_list = zip(*table[pii_contents_column].to_pandas().apply(self._redact_pii))
+        redacted_texts, entity_types_list = self._redact_pii(table[pii_contents_column].to_pylist())
         table = table.add_column(0, self.doc_contents_key, [redacted_texts])
         table = table.add_column(0, "detected_pii", [entity_types_list])
         metadata["transformed_table_rows"] = table.num_rows
@@ -104,6 +124,7 @@ class PIIRedactorTransformConfiguration(TransformConfiguration):
             name=short_name,
             transform_class=PIIRedactorTransform,
         )
+        self.log = get_logger(__name__)
 
     def add_input_params(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
@@ -140,6 +161,22 @@ class PIIRedactorTransformConfiguration(TransformConfiguration):
             "Provide a value above 0.6",
         )
 
+        parser.add_argument(
+            f"--{batch_size_cli_param}",
+            type=int,
+            required=False,
+            default=default_batch_size,
+            help="Number of document segments analyzed together",
+        )
+
+        parser.add_argument(
+            f"--{max_segment_chars_cli_param}",
+            type=int,
+            required=False,
+            default=default_max_segment_chars,
+            help="Maximal length of document segments analyzed separately, 0 - documents are not split",
+        )
+
     def apply_input_params(self, args: argparse.Namespace) -> bool:
         """
         Validate and apply the arguments that have been parsed
@@ -148,5 +185,8 @@ class PIIRedactorTransformConfiguration(TransformConfiguration):
         """
         # Capture the args that are specific to this transform
         captured = CLIArgumentProvider.capture_parameters(args, cli_prefix, False)
+        if captured.get(batch_size_key) <= 0:
+            self.log.error(f"Parameter {batch_size_cli_param} should be greater than 0")
+            return False
         self.params = self.params | captured
         return True
@@ -1,5 +1,5 @@
 import pytest
-from pii_analyzer import PIIAnalyzerEngine
+from pii_analyzer import PIIAnalyzerEngine, split_text
 
 
 @pytest.fixture(scope="module")
@@ -46,3 +46,36 @@ def test_analyse_credit_card_number_correctly(analyzer):
     assert len(entity_types) == 3
     assert "CREDIT_CARD" in entity_types
     assert result
+
+
+def test_analyse_texts_same_as_analyse_text(analyzer):
+    input_texts = [
+        "Hello, my name is John Davidson and I live in Florida.My credit card number is 4095-2609-9393-4932",
+        "",
+        "This is a sample test",
+        "My email is tom@chadler.com and dob is 31.05.1987",
+    ]
+    results = analyzer.analyze_texts(input_texts, language="en", batch_size=2)
+    assert len(results) == len(input_texts)
+    for input_text, (result, entity_types) in zip(input_texts, results):
+        expected_result, expected_entity_types = analyzer.analyze_text(input_text, language="en")
+        assert entity_types == expected_entity_types
+        assert [(r.start, r.end) for r in result] == [(r.start, r.end) for r in expected_result]
+
+
+def test_analyse_texts_in_segments(analyzer):
+    input_text = "My email is tom@chadler.com\n" + "This is a sample test. " * 20 + "Contact sowmya@techiediver.com"
+    [(result, entity_types)] = analyzer.analyze_texts([input_text], language="en", max_segment_chars=100)
+    emails = [input_text[r.start : r.end] for r in result if r.entity_type == "EMAIL_ADDRESS"]
+    assert emails == ["tom@chadler.com", "sowmya@techiediver.com"]
+
+
+def test_split_text():
+    assert split_text("short text", 100) == [(0, "short text")]
+    assert split_text("no limit", 0) == [(0, "no limit")]
+    text = "first line\nsecond line with words\n" + "x" * 25
+    segments = split_text(text, 20)
+    assert "".join(segment for _, segment in segments) == text
+    assert all(len(segment) <= 20 for _, segment in segments)
+    assert all(text[offset : offset + len(segment)] == segment for offset, segment in segments)
+    assert segments[0] == (0, "first line\n")
@@ -1,7 +1,14 @@
+import pyarrow as pa
 from data_processing.test_support.transform.table_transform_test import (
     AbstractTableTransformTest,
 )
-from pii_redactor_transform import PIIRedactorTransform, doc_transformed_contents_key
+from pii_redactor_transform import (
+    PIIRedactorTransform,
+    batch_size_key,
+    doc_transformed_contents_key,
+    max_segment_chars_key,
+    supported_entities_key,
+)
 from test_data import expected_metadata_list, expected_table, table
 
 
@@ -21,3 +28,42 @@ class TestPIIRedactTransform(AbstractTableTransformTest):
             ),
         ]
         return fixtures
+
+
+def test_transform_pattern_entities_in_batches():
+    """
+    Runs transform on a small table, with entities detected without NER and more documents than a batch
+    """
+    transform = PIIRedactorTransform(
+        {
+            doc_transformed_contents_key: doc_transformed_contents_key,
+            supported_entities_key: ["EMAIL_ADDRESS"],
+            batch_size_key: 2,
+            max_segment_chars_key: 40,
+        }
+    )
+    input_table = pa.Table.from_pydict(
+        {
+            "contents": [
+                "My email is tom@chadler.com",
+                "",
+                "This is a sample test without any pii. Contact sowmya@techiediver.com",
+            ],
+            "doc_id": ["doc1", "doc2", "doc3"],
+        }
+    )
+    tables, metadata = transform.transform(input_table)
+    assert len(tables) == 1
+    assert tables[0].column(doc_transformed_contents_key).to_pylist() == [
+        "My email is <EMAIL_ADDRESS>",
+        "",
+        "This is a sample test without any pii. Contact <EMAIL_ADDRESS>",
+    ]
+    assert tables[0].column("detected_pii").to_pylist() == [["EMAIL_ADDRESS"], [], ["EMAIL_ADDRESS"]]
+    assert tables[0].column("doc_id").to_pylist() == ["doc1", "doc2", "doc3"]
+    assert metadata == {
+        "original_table_rows": 3,
+        "original_column_count": 2,
+        "transformed_table_rows": 3,
+        "transformed_column_count": 4,
+    }
@@ -10,13 +10,15 @@
 # limitations under the License.
 ################################################################################
 
+import hashlib
 import time
 from argparse import ArgumentParser, Namespace
 from typing import Any
 
+import numpy as np
 import pyarrow as pa
 from data_processing.transform import AbstractTableTransform, TransformConfiguration
-from data_processing.utils import CLIArgumentProvider, TransformUtils
+from data_processing.utils import CLIArgumentProvider, LRUCache, TransformUtils
 from sentence_transformers import SentenceTransformer
 
 
@@ -25,20 +27,33 @@ cli_prefix = f"{short_name}_"
 model_name_key = "model_name"
 content_column_name_key = "content_column_name"
 output_embeddings_column_name_key = "output_embeddings_column_name"
+batch_size_key = "batch_size"
+embeddings_dtype_key = "embeddings_dtype"
+cache_size_key = "cache_size"
 model_name_cli_param = f"{cli_prefix}{model_name_key}"
 content_column_name_cli_param = f"{cli_prefix}{content_column_name_key}"
 output_embeddings_column_name_cli_param = f"{cli_prefix}{output_embeddings_column_name_key}"
+batch_size_cli_param = f"{cli_prefix}{batch_size_key}"
+embeddings_dtype_cli_param = f"{cli_prefix}{embeddings_dtype_key}"
+cache_size_cli_param = f"{cli_prefix}{cache_size_key}"
 
 default_model_name = "BAAI/bge-small-en-v1.5"
 default_content_column_name = "contents"
 default_output_embeddings_column_name = "embeddings"
+default_batch_size = 32
+default_embeddings_dtype = "float32"
+default_cache_size = 10000
+embeddings_dtypes = ["float32", "float16"]
 
 
 class TextEncoderTransform(AbstractTableTransform):
     """
-    Implements a simple copy of a pyarrow Table.
+    Adds a column of text embeddings, computed by a sentence transformers model, to a pyarrow Table.
     """
 
+    table_stats_keys = ("nfiles",)
+    parallel_slices = True
+
     def __init__(self, config: dict[str, Any]):
         """ """
         # Make sure that the param name corresponds to the name used in apply_input_params method
@@ -54,7 +69,53 @@ class TextEncoderTransform(AbstractTableTransform):
             output_embeddings_column_name_key, default_output_embeddings_column_name
         )
 
+        self.batch_size = config.get(batch_size_key, default_batch_size)
+        self.embeddings_dtype = np.dtype(config.get(embeddings_dtype_key, default_embeddings_dtype))
+        self.cache_size = config.get(cache_size_key, default_cache_size)
+        # embeddings of the already encoded texts, keyed by the text hash, least recently used ones are evicted first
+        self.cache = LRUCache(max_size=self.cache_size)
+
         self.model = SentenceTransformer(self.model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        """
+        Compute normalized embeddings of texts. Texts are identified by a 16 byte hash, so that duplicate
+        documents within the table and across recent tables reuse an embedding (kept in the embeddings dtype)
+        instead of being encoded again. New texts are passed to the model in a single call, which sorts
+        them by length and encodes them in batches of batch_size
+        :param texts: texts to encode
+        :return: embeddings matrix (one row per text)
+        """
+        index, unique_texts = {}, []
+        text_index = np.empty(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+            j = index.get(key)
+            if j is None:
+                j = index[key] = len(unique_texts)
+                unique_texts.append(text)
+            text_index[i] = j
+        keys = list(index)
+        embeddings = np.empty((len(keys), self.dimension), dtype=self.embeddings_dtype)
+        missing = []
+        for i, key in enumerate(keys):
+            embedding = self.cache.get(key)
+            if embedding is None:
+                missing.append(i)
+            else:
+                embeddings[i] = embedding
+        if len(missing) > 0:
+            embeddings[missing] = self.model.encode(
+                [unique_texts[i] for i in missing],
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+            )
+            for i in missing:
+                self.cache.put(keys[i], embeddings[i].copy())
+        self.logger.debug(f"Encoded {len(missing)} texts, {len(texts) - len(missing)} texts taken from cache")
+        return embeddings[text_index]
 
     def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
         """ """
@@ -63,12 +124,9 @@ class TextEncoderTransform(AbstractTableTransform):
         # make sure that the content column exists
         TransformUtils.validate_columns(table=table, required=[self.content_column_name])
 
-        embeddings = list(
-            map(
-                lambda x: self.model.encode(x, normalize_embeddings=True),
-                table[self.content_column_name].to_pylist(),
-            ),
-        )
+        embeddings = self._encode(table[self.content_column_name].to_pylist())
+        # contiguous embeddings matrix is wrapped (zero copy) as a fixed size list column
+        embeddings = pa.FixedSizeListArray.from_arrays(pa.array(embeddings.reshape(-1)), self.dimension)
         result = TransformUtils.add_column(table=table, name=self.output_embeddings_column_name, content=embeddings)
 
         metadata = {"nfiles": 1, "nrows": len(result)}
@@ -113,6 +171,24 @@ class TextEncoderTransformConfiguration(TransformConfiguration):
             default=default_model_name,
             help=f"Name of the HF model to use for encoding the text. The default model is {default_model_name}",
         )
+        parser.add_argument(
+            f"--{batch_size_cli_param}",
+            type=int,
+            default=default_batch_size,
+            help="Number of texts encoded together",
+        )
+        parser.add_argument(
+            f"--{embeddings_dtype_cli_param}",
+            choices=embeddings_dtypes,
+            default=default_embeddings_dtype,
+            help="Type of the embeddings vector elements",
+        )
+        parser.add_argument(
+            f"--{cache_size_cli_param}",
+            type=int,
+            default=default_cache_size,
+            help="Max number of embeddings kept across tables, so that repeated texts are encoded once",
+        )
 
     def apply_input_params(self, args: Namespace) -> bool:
         """
@@ -121,6 +197,9 @@ class TextEncoderTransformConfiguration(TransformConfiguration):
         :return: True, if validate pass or False otherwise
         """
         captured = CLIArgumentProvider.capture_parameters(args, cli_prefix, False)
+        if captured.get(batch_size_key) <= 0:
+            self.logger.error(f"Parameter {batch_size_cli_param} should be greater than 0")
+            return False
 
         self.params = self.params | captured
         self.logger.info(f"text_encoder parameters are : {self.params}")
@@ -0,0 +1,61 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import numpy as np
+import pyarrow as pa
+import text_encoder_transform
+from text_encoder_transform import (
+    TextEncoderTransform,
+    cache_size_key,
+    embeddings_dtype_key,
+)
+
+
+class StubModel:
+    """
+    Model embedding a text as its length followed by 1, 2, 3, recording the texts it encodes
+    """
+
+    def __init__(self, model_name: str):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return 4
+
+    def encode(self, texts: list[str], batch_size: int, normalize_embeddings: bool, convert_to_numpy: bool):
+        self.encoded.append(list(texts))
+        return np.array([[len(text), 1, 2, 3] for text in texts], dtype=np.float32)
+
+
+def test_encode_duplicates_and_cached_texts_once(monkeypatch):
+    monkeypatch.setattr(text_encoder_transform, "SentenceTransformer", StubModel)
+    transform = TextEncoderTransform({embeddings_dtype_key: "float16", cache_size_key: 2})
+
+    # duplicate texts of a table are encoded once
+    out_tables, metadata = transform.transform(pa.table({"contents": ["a", "bb", "a", "ccc"]}))
+    embeddings = out_tables[0]["embeddings"]
+    assert embeddings.type == pa.list_(pa.float16(), 4)
+    assert embeddings.to_pylist() == [[1, 1, 2, 3], [2, 1, 2, 3], [1, 1, 2, 3], [3, 1, 2, 3]]
+    assert metadata == {"nfiles": 1, "nrows": 4}
+    assert transform.model.encoded == [["a", "bb", "ccc"]]
+
+    # texts of the previous table are taken from the cache, "a" was the least recently used and is evicted
+    out_tables, _ = transform.transform(pa.table({"contents": ["ccc", "dddd", "bb"]}))
+    assert out_tables[0]["embeddings"].to_pylist() == [[3, 1, 2, 3], [4, 1, 2, 3], [2, 1, 2, 3]]
+    assert transform.model.encoded[1:] == [["dddd"]]
+    transform.transform(pa.table({"contents": ["a", "bb"]}))
+    assert transform.model.encoded[2:] == [["a"]]
+
+    # tables without texts are not passed to the model
+    out_tables, _ = transform.transform(pa.table({"contents": pa.array([], type=pa.string())}))
+    assert out_tables[0]["embeddings"].type == pa.list_(pa.float16(), 4)
+    assert len(transform.model.encoded) == 3
@@ -174,4 +174,11 @@ class DocIDTransformConfigurationBase(TransformConfiguration):
 
         self.params = self.params | captured
         self.logger.info(f"Doc id parameters are : {self.params}")
-        return True
\ No newline at end of file
+        return True
+
+    def get_input_columns(self) -> list[str]:
+        """
+        Doc id only reads document column, the rest of the columns are carried to the output as is
+        :return: list of input columns
+        """
+        return [self.params.get(doc_column_name_key, doc_column_name_default)]
@@ -13,10 +13,14 @@
 import os
 
 from data_processing.runtime.pure_python import PythonTransformLauncher
+from data_processing.transform import ParallelTableTransform
 from data_processing.test_support.launch.transform_test import (
     AbstractTransformLauncherTest,
 )
-from doc_id_transform_python import DocIDPythonTransformRuntimeConfiguration
+from doc_id_transform_python import (
+    DocIDPythonTransformRuntimeConfiguration,
+    DocIDTransform,
+)
 from doc_id_transform_base import (doc_column_name_cli_param,
                                    hash_column_name_cli_param,
                                    int_column_name_cli_param,
@@ -40,4 +44,12 @@ class TestPythonDocIDTransform(AbstractTransformLauncherTest):
                   int_column_name_cli_param: "int_id_column",
                   start_id_cli_param: 5,
                   }
-        return [(launcher, config, basedir + "/input", basedir + "/expected")]
\ No newline at end of file
+        return [(launcher, config, basedir + "/input", basedir + "/expected")]
+
+
+def test_doc_id_table_slices_rejected():
+    """
+    Tables can not be transformed in slices by separate instances, integer ids are generated sequentially
+    across rows and tables
+    """
+    assert not ParallelTableTransform.supports(DocIDTransform)
@@ -10,12 +10,16 @@
 # limitations under the License.
 ################################################################################
 
+import hashlib
+import os
 import pickle
 from argparse import ArgumentParser, Namespace
-from typing import Any
+from typing import Any, Union
 
+import numpy as np
 import pyarrow as pa
-from data_processing.data_access import SnapshotUtils
+import pyarrow.compute as pc
+from data_processing.data_access import DataAccessLocal, SnapshotUtils
 from data_processing.transform import (
     AbstractTableTransform,
     TransformConfiguration,
@@ -42,9 +46,30 @@ int_column_name_cli_param = f"{cli_prefix}{int_column_name_key}"
 use_snapshot_cli_param = f"{cli_prefix}{use_snapshot_key}"
 snapshot_directory_cli_param = f"{cli_prefix}{snapshot_directory_key}"
 
+# hashes are stored as fixed width binary digests - first 16 bytes (128 bits) of sha256
+DIGEST_DTYPE = np.dtype("S16")
+DIGEST_HEX_LEN = 2 * DIGEST_DTYPE.itemsize
+# header of the binary snapshot, followed by sorted digests. Old snapshots are pickled sets of hex strings
+SNAPSHOT_HEADER = b"DPK_EDEDUP_HASH1"
+
+
+def hash_to_shard(h: str, n_shards: int) -> int:
+    """
+    Get shard (hash actor) for a hash. Uses the first 8 bytes of the digest, so that sharding of
+    hex strings (used by transforms) and binary digests (used by snapshot loading) is the same
+    :param h: hash hex string
+    :param n_shards: number of shards
+    :return: shard index
+    """
+    return int(h[:16], 16) % n_shards
+
+
 class HashFilter:
     """
-    Implements hash
+    Implements hash store. Hashes are kept as 16 bytes binary digests in a set of sorted NumPy arrays (runs)
+    of geometrically decreasing sizes. New hashes form a new run, which is merged with the previous one
+    once it reaches half of its size, which makes insert amortized O(log n) and membership checks
+    a handful of vectorized binary searches.
     """
 
     def __init__(self, params: dict[str, Any]):
@@ -53,30 +78,123 @@ class HashFilter:
         """
         self.logger = get_logger(__name__)
         self.actor_id = params.get("id", 1)
+        self.runs = []
         data_access_factory = params.get("data_access_factory", None)
         if data_access_factory is None:
             self.data_access = None
-            self.hashes = set()
         else:
             self.data_access = data_access_factory.create_data_access()
             snapshot = params.get("snapshot", None)
-            if snapshot is None:
-                self.hashes = set()
-            else:
+            if snapshot is not None:
                 try:
-                    b_hashes, _ = self.data_access.get_file(snapshot)
-                    self.hashes = pickle.loads(b_hashes)
+                    if isinstance(self.data_access, DataAccessLocal):
+                        # local snapshot can be memory mapped
+                        digests = self._map_snapshot(snapshot)
+                    else:
+                        b_hashes, _ = self.data_access.get_file(snapshot)
+                        digests = self.load_snapshot(b_hashes)
+                    if len(digests) > 0:
+                        self.runs = [digests]
                 except Exception as e:
                     self.logger.warning(f"Failed to load hashes collector {self.actor_id} with exception {e}")
                     raise UnrecoverableException("failed to load hashes")
 
-    def add_hashes(self, hashes: set[str]) -> None:
+    @staticmethod
+    def to_digests(ha: list[str]) -> np.ndarray:
+        """
+        Convert hex hashes to binary digests
+        :param ha: list of hex strings
+        :return: array of digests
+        """
+        if len(ha) == 0:
+            return np.empty(0, dtype=DIGEST_DTYPE)
+        return np.frombuffer(bytes.fromhex("".join([h[:DIGEST_HEX_LEN] for h in ha])), dtype=DIGEST_DTYPE)
+
+    @staticmethod
+    def shard_digests(digests: np.ndarray, n_shards: int) -> np.ndarray:
+        """
+        Get shards for binary digests, consistent with hash_to_shard
+        :param digests: array of digests
+        :param n_shards: number of shards
+        :return: array of shard indexes
+        """
+        return np.ascontiguousarray(digests).view(">u8")[::2] % np.uint64(n_shards)
+
+    @staticmethod
+    def load_snapshot(data: bytes) -> np.ndarray:
+        """
+        Load hashes from snapshot content
+        :param data: snapshot content
+        :return: sorted array of unique digests
+        """
+        if data[: len(SNAPSHOT_HEADER)] == SNAPSHOT_HEADER:
+            return np.frombuffer(data, dtype=DIGEST_DTYPE, offset=len(SNAPSHOT_HEADER))
+        # snapshot produced by the previous version - pickled set of hex strings
+        return np.unique(HashFilter.to_digests(list(pickle.loads(data))))
+
+    def _map_snapshot(self, snapshot: str) -> np.ndarray:
+        """
+        Memory map local snapshot file
+        :param snapshot: snapshot file
+        :return: sorted array of unique digests
+        """
+        with open(snapshot, "rb") as f:
+            header = f.read(len(SNAPSHOT_HEADER))
+        if header != SNAPSHOT_HEADER:
+            b_hashes, _ = self.data_access.get_file(snapshot)
+            return self.load_snapshot(b_hashes)
+        if os.path.getsize(snapshot) == len(SNAPSHOT_HEADER):
+            return np.empty(0, dtype=DIGEST_DTYPE)
+        return np.memmap(snapshot, dtype=DIGEST_DTYPE, mode="r", offset=len(SNAPSHOT_HEADER))
+
+    @staticmethod
+    def _merge(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """
+        Merge two sorted disjoint arrays of digests
+        :param first: first array
+        :param second: second array
+        :return: sorted array
+        """
+        if len(first) < len(second):
+            first, second = second, first
+        return np.insert(first, np.searchsorted(first, second), second)
+
+    def _contains(self, digests: np.ndarray) -> np.ndarray:
+        """
+        Check which of the digests are already stored
+        :param digests: array of digests
+        :return: boolean array
+        """
+        found = np.zeros(len(digests), dtype=bool)
+        for run in self.runs:
+            positions = np.minimum(np.searchsorted(run, digests), len(run) - 1)
+            found |= run[positions] == digests
+        return found
+
+    def _add(self, digests: np.ndarray) -> None:
+        """
+        Add sorted array of new digests
+        :param digests: sorted array of digests, not present in the store
+        :return: None
+        """
+        if len(digests) == 0:
+            return
+        self.runs.append(digests)
+        # merge runs while the last one is at least half of the previous one
+        while len(self.runs) > 1 and 2 * len(self.runs[-1]) >= len(self.runs[-2]):
+            last = self.runs.pop()
+            self.runs.append(self._merge(self.runs.pop(), last))
+
+    def add_hashes(self, hashes: Union[set[str], list[str], np.ndarray]) -> None:
         """
         Adding hashes
-        :param hashes: set of hashes to add
+        :param hashes: set of hashes to add, either hex strings or binary digests
         :return: None
         """
-        self.hashes.update(hashes)
+        if not isinstance(hashes, np.ndarray):
+            hashes = self.to_digests(list(hashes))
+        digests = np.unique(hashes)
+        self._add(digests[~self._contains(digests)])
 
     def get_unique(self, ha: list[str]) -> list[str]:
         """
@@ -84,20 +202,20 @@ class HashFilter:
         :param ha: new set of hashes
         :return: list of unique ones
         """
-        unique = []
-        for h in ha:
-            if h not in self.hashes:
-                # If a hash does not exist, add it to unique and add to the local set
-                self.hashes.add(h)
-                unique.append(h)
-        return unique
+        if len(ha) == 0:
+            return []
+        digests, first = np.unique(self.to_digests(ha), return_index=True)
+        new = ~self._contains(digests)
+        # add new hashes to the local store and return them in the order of the request
+        self._add(digests[new])
+        return [ha[i] for i in np.sort(first[new])]
 
     def get_hash_size(self) -> tuple[int, float]:
         """
         Get size of created hashes for statistics
         :return: size of the local set and its memory footprint
         """
-        return len(self.hashes), TransformUtils.deep_get_size(self.hashes) / GB
+        return sum(len(run) for run in self.runs), sum(run.nbytes for run in self.runs) / GB
 
     def snapshot(self) -> None:
         """
@@ -105,8 +223,12 @@ class HashFilter:
         :return: None
         """
         try:
-            # pickle content
-            b_doc = pickle.dumps(self.hashes)
+            # compact runs into a single sorted array
+            while len(self.runs) > 1:
+                last = self.runs.pop()
+                self.runs.append(self._merge(self.runs.pop(), last))
+            digests = self.runs[0] if len(self.runs) > 0 else np.empty(0, dtype=DIGEST_DTYPE)
+            b_doc = SNAPSHOT_HEADER + digests.tobytes()
             # Save it
             self.data_access.save_file(
                 f"{SnapshotUtils.get_snapshot_folder(self.data_access)}hash_collector_{self.actor_id}", b_doc
@@ -146,34 +268,32 @@ class EdedupTransformBase(AbstractTableTransform):
         hashes = set()
         unique = []
         hd = {}
-        # Compute unique hashes for the table
-        for n in range(table.num_rows):
-            doc = docs[n].as_py()
-            doc_id = doc_ids[n].as_py()
-            # Compute doc hash
-            h = TransformUtils.str_to_hash(TransformUtils.normalize_string(str(doc)))
-            if h not in hashes:  # Processing this hash for the first time
-                hashes.add(h)  # Remember it locally
-                hd[h] = doc_id
-                if len(hd) >= REQUEST_LEN:  # time to check remotely
-                    unique = unique + self._process_cached_hashes(hd=hd)
-                    hd = {}
+        # Compute unique hashes for the table, processing it in chunks
+        for start in range(0, table.num_rows, REQUEST_LEN):
+            chunk_ids = doc_ids.slice(start, REQUEST_LEN).to_pylist()
+            for h, doc_id in zip(self._hash_documents(docs.slice(start, REQUEST_LEN)), chunk_ids):
+                if h not in hashes:  # Processing this hash for the first time
+                    hashes.add(h)  # Remember it locally
+                    hd[h] = doc_id
+            if len(hd) >= REQUEST_LEN:  # time to check remotely
+                unique = unique + self._process_cached_hashes(hd=hd)
+                hd = {}
         if len(hd) > 0:  # Process remaining hashes
             unique = unique + self._process_cached_hashes(hd=hd)
 
         # Remove duplicates
-        unique_set = set(unique)
-        mask = [False] * table.num_rows
-        removed = []
-        index = 0
-        for id in table[self.doc_id_column]:
-            str_id = str(id)
-            if str_id in unique_set:
-                mask[index] = True
-                unique_set.remove(str_id)
-            else:
-                removed.append(str_id)
-            index += 1
+        mask = pc.is_in(doc_ids, value_set=pa.array(unique, type=doc_ids.type))
+        if pc.count_distinct(doc_ids, mode="all").as_py() < table.num_rows:
+            # document ids are not unique, keep only the first row for every id
+            ids = doc_ids.to_pylist()
+            keep = mask.to_pylist()
+            seen = set()
+            for index in range(len(keep)):
+                if keep[index]:
+                    keep[index] = ids[index] not in seen
+                    seen.add(ids[index])
+            mask = pa.array(keep)
+        removed = [str(doc_id) for doc_id in doc_ids.filter(pc.invert(mask)).to_pylist()]
         # Create output table
         out_table = table.filter(mask)
         # populate removed columns
@@ -186,6 +306,18 @@ class EdedupTransformBase(AbstractTableTransform):
         stats = {"source_documents": table.num_rows, "result_documents": out_table.num_rows}
         return [out_table], stats
 
+    @staticmethod
+    def _hash_documents(docs: pa.ChunkedArray) -> list[str]:
+        """
+        Compute hashes of normalized documents
+        :param docs: array of documents
+        :return: list of hashes
+        """
+        if not pa.types.is_string(docs.type) and not pa.types.is_large_string(docs.type):
+            return [TransformUtils.str_to_hash(TransformUtils.normalize_string(str(doc))) for doc in docs.to_pylist()]
+        normalized = TransformUtils.normalize_string_array(docs).cast(pa.large_binary())
+        return [hashlib.sha256(doc).hexdigest() for doc in normalized.to_pylist()]
+
     def _process_cached_hashes(self, hd: dict[str, str]) -> list[str]:
         """
         check hashes uniqueness with the distributed cache of hashes
@@ -247,3 +379,10 @@ class EdedupTransformConfigurationBase(TransformConfiguration):
         self.params = self.params | captured
         self.logger.info(f"exact dedup params are {self.params}")
         return True
+
+    def get_input_columns(self) -> list[str]:
+        """
+        Exact dedup only reads document and document id columns
+        :return: list of input columns
+        """
+        return [self.params.get(doc_column_name_key, "contents"), self.params.get(int_column_name_key, "document_id")]
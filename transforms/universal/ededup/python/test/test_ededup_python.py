@@ -13,10 +13,14 @@
 import os
 
 from data_processing.runtime.pure_python import PythonTransformLauncher
+from data_processing.transform import ParallelTableTransform
 from data_processing.test_support.launch.transform_test import (
     AbstractTransformLauncherTest,
 )
-from ededup_transform_python import EdedupPythonTransformRuntimeConfiguration
+from ededup_transform_python import (
+    EdedupPythonTransformRuntimeConfiguration,
+    EdedupTransform,
+)
 from ededup_transform_base import doc_column_name_cli_param, int_column_name_cli_param
 
 
@@ -33,3 +37,11 @@ class TestPythonEdedupTransform(AbstractTransformLauncherTest):
         launcher = PythonTransformLauncher(EdedupPythonTransformRuntimeConfiguration())
         config = {doc_column_name_cli_param: "contents", int_column_name_cli_param: "document_id"}
         return [(launcher, config, basedir + "/input", basedir + "/expected")]
+
+
+def test_ededup_table_slices_rejected():
+    """
+    Tables can not be transformed in slices by separate instances, documents are filtered against the hashes
+    of all the previous rows and tables
+    """
+    assert not ParallelTableTransform.supports(EdedupTransform)
@@ -10,13 +10,12 @@
 # limitations under the License.
 ################################################################################
 
-import pickle
 from argparse import ArgumentParser, Namespace
 from typing import Any
 
 import ray
 from data_processing.data_access import DataAccessFactoryBase, SnapshotUtils
-from data_processing.utils import TransformUtils, UnrecoverableException
+from data_processing.utils import UnrecoverableException
 from data_processing_ray.runtime.ray import (
     DefaultRayTransformRuntime,
     RayTransformLauncher,
@@ -29,6 +28,7 @@ from ededup_transform_base import (
     EdedupTransformConfigurationBase,
     HashFilter,
     cli_prefix,
+    hash_to_shard,
 )
 from ray.actor import ActorHandle
 from ededup_transform_base import use_snapshot_key
@@ -65,7 +65,7 @@ class EdedupRayTransform(EdedupTransformBase):
         request = [[] for _ in range(len(self.hashes))]
 
         for h in hd.keys():
-            request[TransformUtils.str_to_int(h) % len(self.hashes)].append(h)
+            request[hash_to_shard(h, len(self.hashes))].append(h)
 
         # Submit requests to appropriate hash actors
         remote_replies = []
@@ -152,20 +152,17 @@ class EdedupRayRuntime(DefaultRayTransformRuntime):
         for file in files.values():
             # convert the file
             try:
-                snaps = pickle.loads(file)
+                digests = HashFilter.load_snapshot(file)
             except Exception as e:
                 self.logger.warning(f"Failed to load hashes with exception {e}")
                 raise UnrecoverableException("failed to load hashes")
-            request = [[] for _ in range(len(self.filters))]
-            for h in snaps:
-                request[TransformUtils.str_to_int(h) % len(self.filters)].append(h)
+            shards = HashFilter.shard_digests(digests, len(self.filters))
             # Submit requests to appropriate hash actors
             remote_replies = []
-            i = 0
-            for req in request:
+            for i in range(len(self.filters)):
+                req = digests[shards == i]
                 if len(req) > 0:  # Only submit if the length is greater then 0
                     remote_replies.append(self.filters[i].add_hashes.remote(req))
-                i = i + 1
             # Process replies
             while remote_replies:
                 # Wait for replies
@@ -69,10 +69,11 @@ def fdedup_compute_execution_params(
     import math
     import sys
 
+    import numpy as np
     from data_processing.data_access import DataAccessS3
     from data_processing.utils import GB, KB
     from runtime_utils import KFPUtils
-    from scipy.integrate import quad as integrate
+    from scipy.special import beta, betainc
 
     EXECUTION_OF_KB_DOC = 0.003
 
@@ -90,43 +91,18 @@ def fdedup_compute_execution_params(
         :param false_negative_weight: false negative weight
         :return: number of buckets and bucket length
         """
-
-        def _false_positive_probability(ths: float, b: int, r: int) -> float:
-            """
-            Compute false positive probability
-            :param ths: filtering threshold
-            :param b: permutation
-            :param r: rel permutation
-            :return: probability
-            """
-            _probability = lambda s: 1 - (1 - s ** float(r)) ** float(b)
-            a, err = integrate(_probability, 0.0, ths)
-            return a
-
-        def _false_negative_probability(ths: float, b: int, r: int) -> float:
-            """
-            Compute false negative probability
-            :param ths: filtering threshold
-            :param b: permutation
-            :param r: rel permutation
-            :return: probability
-            """
-            _probability = lambda s: 1 - (1 - (1 - s ** float(r)) ** float(b))
-            a, err = integrate(_probability, ths, 1.0)
-            return a
-
-        min_error = float("inf")
-        opt = (0, 0)
-        for perm in range(1, num_perm + 1):
-            max_r = int(num_perm / perm)
-            for rel in range(1, max_r + 1):
-                fp = _false_positive_probability(threshold, perm, rel)
-                fn = _false_negative_probability(threshold, perm, rel)
-                error = fp * false_positive_weight + fn * false_negative_weight
-                if error < min_error:
-                    min_error = error
-                    opt = (perm, rel)
-        return opt
+        # false positive and false negative probabilities are integrals of 1 - (1 - s^r)^b, which are incomplete
+        # beta functions (substituting u = s^r), evaluated for all (bands, band length) pairs at once
+        bands = np.arange(1, num_perm + 1)
+        b = np.repeat(bands, num_perm // bands)
+        r = np.concatenate([np.arange(1, num_perm // band + 1) for band in bands])
+        a = 1.0 / r
+        x = threshold ** r.astype(np.float64)
+        full = beta(a, b + 1.0) * a
+        fp = threshold - full * betainc(a, b + 1.0, x)
+        fn = full * betainc(b + 1.0, a, 1.0 - x)
+        opt = int(np.argmin(fp * false_positive_weight + fn * false_negative_weight))
+        return int(b[opt]), int(r[opt])
 
     # fuzzy parameters
     num_buckets, length_bucket = fuzzy_optimal_param(
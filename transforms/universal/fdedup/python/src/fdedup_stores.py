@@ -0,0 +1,432 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import os
+from typing import Any, Union
+
+import numpy as np
+import pyarrow as pa
+from fdedup_transform_base import NO_SIMILARITY
+
+
+# (band hash, document id) pair of the bucket store
+BUCKET_DTYPE = np.dtype([("hash", "<u8"), ("doc", "<i8")])
+
+
+def table_to_ipc(table: pa.Table) -> bytes:
+    """
+    Serialize table as an Arrow IPC file (single record batch)
+    :param table: table
+    :return: file content
+    """
+    table = table.combine_chunks()
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=max(1, table.num_rows))
+    return sink.getvalue().to_pybytes()
+
+
+def table_from_ipc(source: Union[bytes, str]) -> pa.Table:
+    """
+    Read Arrow IPC file without copying its columns. Local files are memory mapped
+    :param source: file content or local file path
+    :return: table
+    """
+    if isinstance(source, str):
+        return pa.ipc.open_file(pa.memory_map(source, "r")).read_all()
+    return pa.ipc.open_file(pa.py_buffer(source)).read_all()
+
+
+def column_array(table: pa.Table, name: str) -> pa.Array:
+    """
+    Get table column as a single array, without copying it if the column has a single chunk
+    :param table: table
+    :param name: column name
+    :return: array
+    """
+    column = table[name]
+    return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+
+class MinHashStore:
+    """
+    Local store of document minhashes. Signatures are kept in a contiguous uint32 matrix (one row per
+    document) with a sorted document id index. When signatures in memory exceed the memory budget, they
+    are appended to a file in the spill folder, which is memory mapped once the store is finalized
+    """
+
+    def __init__(self, num_perm: int, memory_budget: int, folder: str = None):
+        """
+        Initialization
+        :param num_perm: number of permutations (signature length)
+        :param memory_budget: max size (bytes) of signatures kept in memory
+        :param folder: spill folder, None - signatures are never spilled
+        """
+        self.num_perm = num_perm
+        self.memory_budget = memory_budget
+        self.path = None if folder is None else os.path.join(folder, "minhashes.bin")
+        self.doc_ids = []
+        self.lengths = []
+        self.chunks = []
+        self.in_memory = 0
+        self.spilled = 0
+        # built by finalize
+        self.signatures = None
+        self.index = None
+        self.rows = None
+        self.mapped = False
+
+    def add(self, doc_ids: np.ndarray, lengths: np.ndarray, signatures: np.ndarray) -> None:
+        """
+        Add minhashes
+        :param doc_ids: document ids
+        :param lengths: document lengths
+        :param signatures: uint32 signature matrix (number of documents, number of permutations)
+        :return: None
+        """
+        self.doc_ids.append(np.asarray(doc_ids, dtype=np.int64))
+        self.lengths.append(np.asarray(lengths, dtype=np.int64))
+        self.chunks.append(np.ascontiguousarray(signatures, dtype=np.uint32))
+        self.in_memory += signatures.nbytes
+        if self.path is not None and self.in_memory > self.memory_budget:
+            self._spill()
+
+    def _spill(self) -> None:
+        """
+        Append in memory signatures to the spill file
+        :return: None
+        """
+        with open(self.path, "ab") as f:
+            for chunk in self.chunks:
+                f.write(chunk.tobytes())
+                self.spilled += chunk.shape[0]
+        self.chunks = []
+        self.in_memory = 0
+
+    def finalize(self) -> None:
+        """
+        Build the document id index. No minhashes can be added after this
+        :return: None
+        """
+        if self.index is not None:
+            return
+        self.doc_ids = np.concatenate(self.doc_ids) if len(self.doc_ids) > 0 else np.zeros(0, dtype=np.int64)
+        self.lengths = np.concatenate(self.lengths) if len(self.lengths) > 0 else np.zeros(0, dtype=np.int64)
+        if self.spilled > 0:
+            self._spill()
+            self._open_spilled()
+        elif len(self.chunks) > 0:
+            self.signatures = np.concatenate(self.chunks)
+        else:
+            self.signatures = np.zeros((0, self.num_perm), dtype=np.uint32)
+        self.chunks = []
+        self.rows = np.argsort(self.doc_ids, kind="stable")
+        self.index = self.doc_ids[self.rows]
+
+    def _open_spilled(self) -> None:
+        self.signatures = np.memmap(self.path, dtype=np.uint32, mode="r", shape=(self.spilled, self.num_perm))
+        self.mapped = True
+
+    def get(self, doc_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get minhashes of the documents, all of which have to be in the store
+        :param doc_ids: document ids
+        :return: document lengths and signature matrix
+        """
+        rows = np.searchsorted(self.index, doc_ids)
+        if self.rows is not None:
+            rows = self.rows[rows]
+        return self.lengths[rows], np.asarray(self.signatures[rows])
+
+    def get_size(self) -> tuple[int, int]:
+        """
+        Get store size
+        :return: number of documents and memory utilization (bytes)
+        """
+        if self.mapped:
+            return len(self.doc_ids), 0
+        rows = 0 if self.rows is None else self.rows.nbytes
+        return len(self.doc_ids), self.doc_ids.nbytes + self.lengths.nbytes + rows + self.signatures.nbytes
+
+    def to_table(self) -> pa.Table:
+        """
+        Get store content, sorted by document id, as a table of doc, length and signature (fixed size list) columns
+        :return: table
+        """
+        self.finalize()
+        rows = np.arange(len(self.index)) if self.rows is None else self.rows
+        signatures = np.ascontiguousarray(self.signatures[rows]).ravel()
+        return pa.table(
+            {
+                "doc": self.index,
+                "length": self.lengths[rows],
+                "signature": pa.FixedSizeListArray.from_arrays(pa.array(signatures), self.num_perm),
+            }
+        )
+
+    @classmethod
+    def from_table(cls, table: pa.Table) -> "MinHashStore":
+        """
+        Build finalized store from the table, created by to_table. Table columns are used without copying them,
+        so a store of a memory mapped table is memory mapped as well
+        :param table: table
+        :return: minhash store
+        """
+        signatures = column_array(table, "signature")
+        store = cls(num_perm=signatures.type.list_size, memory_budget=0)
+        store.doc_ids = column_array(table, "doc").to_numpy()
+        store.lengths = column_array(table, "length").to_numpy()
+        store.signatures = signatures.flatten().to_numpy().reshape(-1, store.num_perm)
+        store.index = store.doc_ids
+        store.mapped = True
+        return store
+
+    def close(self) -> None:
+        """
+        Release the store and remove its spill file
+        :return: None
+        """
+        self.signatures = None
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # spilled signatures are re opened by path, instead of being pickled
+        state = dict(self.__dict__)
+        if self.spilled > 0:
+            state["signatures"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if self.spilled > 0 and self.signatures is None:
+            self._open_spilled()
+
+
+class BucketStore:
+    """
+    Local store of buckets - (band hash, document id) pairs, hash partitioned, so that every partition
+    can be processed independently. When pairs in memory exceed the memory budget, every partition
+    is appended to its file in the spill folder
+    """
+
+    def __init__(self, num_partitions: int, memory_budget: int, folder: str = None):
+        """
+        Initialization
+        :param num_partitions: number of partitions
+        :param memory_budget: max size (bytes) of pairs kept in memory
+        :param folder: spill folder, None - pairs are never spilled
+        """
+        self.num_partitions = num_partitions
+        self.memory_budget = memory_budget
+        self.folder = folder
+        self.partitions = [[] for _ in range(num_partitions)]
+        self.in_memory = 0
+        self.spilled = False
+        self.n_pairs = 0
+
+    def _partition_path(self, partition: int) -> str:
+        return os.path.join(self.folder, f"buckets_{partition}.bin")
+
+    def add(self, doc_ids: np.ndarray, band_hashes: np.ndarray) -> None:
+        """
+        Add document band hashes
+        :param doc_ids: document ids
+        :param band_hashes: uint64 band hashes matrix (number of documents, number of bands)
+        :return: None
+        """
+        pairs = np.empty(band_hashes.size, dtype=BUCKET_DTYPE)
+        pairs["hash"] = band_hashes.ravel()
+        pairs["doc"] = np.repeat(np.asarray(doc_ids, dtype=np.int64), band_hashes.shape[1])
+        self.add_pairs(pairs)
+
+    def add_pairs(self, pairs: np.ndarray) -> None:
+        """
+        Add (band hash, document id) pairs
+        :param pairs: pairs array (BUCKET_DTYPE)
+        :return: None
+        """
+        partition = (pairs["hash"] % np.uint64(self.num_partitions)).astype(np.int64)
+        pairs = pairs[np.argsort(partition, kind="stable")]
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(partition, minlength=self.num_partitions))))
+        for p in range(self.num_partitions):
+            if bounds[p + 1] > bounds[p]:
+                self.partitions[p].append(pairs[bounds[p] : bounds[p + 1]])
+        self.in_memory += pairs.nbytes
+        self.n_pairs += len(pairs)
+        if self.folder is not None and self.in_memory > self.memory_budget:
+            self._spill()
+
+    def _spill(self) -> None:
+        """
+        Append in memory pairs to the partition files
+        :return: None
+        """
+        for p in range(self.num_partitions):
+            with open(self._partition_path(p), "ab") as f:
+                for chunk in self.partitions[p]:
+                    f.write(chunk.tobytes())
+            self.partitions[p] = []
+        self.in_memory = 0
+        self.spilled = True
+
+    def get_partitions(self) -> list[Union[np.ndarray, str]]:
+        """
+        Get partitions for processing. No pairs can be added after this
+        :return: list of partitions, either pairs array or the path of the partition file
+        """
+        if self.spilled:
+            self._spill()
+            return [self._partition_path(p) for p in range(self.num_partitions)]
+        partitions = [
+            np.concatenate(chunks) if len(chunks) > 0 else np.zeros(0, dtype=BUCKET_DTYPE)
+            for chunks in self.partitions
+        ]
+        self.partitions = [[] for _ in range(self.num_partitions)]
+        return partitions
+
+    @staticmethod
+    def load_buckets(partition: Union[np.ndarray, str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Load partition as buckets (CSR). Duplicate pairs are removed and documents of a bucket are sorted
+        :param partition: pairs array or the path of the partition file
+        :return: bucket offsets (number of buckets + 1) and document ids of all buckets
+        """
+        if isinstance(partition, str):
+            partition = np.fromfile(partition, dtype=BUCKET_DTYPE)
+        pairs = np.unique(partition)
+        return BucketStore.bucket_offsets(pairs["hash"]), pairs["doc"].copy()
+
+    @staticmethod
+    def bucket_offsets(hashes: np.ndarray) -> np.ndarray:
+        """
+        Get bucket offsets (CSR) of sorted band hashes
+        :param hashes: sorted band hashes
+        :return: bucket offsets (number of buckets + 1)
+        """
+        starts = np.flatnonzero(np.concatenate(([True], hashes[1:] != hashes[:-1]))) if len(hashes) > 0 else []
+        return np.concatenate((starts, [len(hashes)])).astype(np.int64)
+
+    def close(self) -> None:
+        """
+        Release the store and remove its spill files
+        :return: None
+        """
+        self.partitions = [[] for _ in range(self.num_partitions)]
+        if self.folder is None:
+            return
+        for p in range(self.num_partitions):
+            if os.path.exists(self._partition_path(p)):
+                os.remove(self._partition_path(p))
+
+
+class DocStore:
+    """
+    Local store of bucket processing results, kept as sorted int64 arrays of the retained document ids
+    and their cluster ids. A document removed by any bucket is removed, and a document is only assigned
+    NO_SIMILARITY if it was not clustered by any bucket, so the result does not depend on the order of updates
+    """
+
+    def __init__(self):
+        self.updates = []
+        self.removed_updates = []
+        self.doc_ids = np.zeros(0, dtype=np.int64)
+        self.clusters = np.zeros(0, dtype=np.int64)
+        self.removed = np.zeros(0, dtype=np.int64)
+        self.n_removed = 0
+
+    def add(self, doc_ids: np.ndarray, clusters: np.ndarray, removed: np.ndarray) -> None:
+        """
+        Add documents to keep and documents to remove
+        :param doc_ids: ids of documents to keep
+        :param clusters: cluster ids of documents to keep
+        :param removed: ids of documents to remove
+        :return: None
+        """
+        self.updates.append((np.asarray(doc_ids, dtype=np.int64), np.asarray(clusters, dtype=np.int64)))
+        self.removed_updates.append(np.asarray(removed, dtype=np.int64))
+
+    def finalize(self) -> None:
+        """
+        Merge added documents
+        :return: None
+        """
+        if len(self.updates) == 0 and len(self.removed_updates) == 0:
+            return
+        removed = np.unique(np.concatenate([self.removed] + self.removed_updates))
+        self.n_removed += len(removed) - len(self.removed)
+        self.removed = removed
+        doc_ids = np.concatenate([self.doc_ids] + [u[0] for u in self.updates])
+        clusters = np.concatenate([self.clusters] + [u[1] for u in self.updates])
+        self.updates = []
+        self.removed_updates = []
+        keep = ~np.isin(doc_ids, removed)
+        doc_ids = doc_ids[keep]
+        clusters = clusters[keep]
+        # sort by id, preferring actual clusters (the smallest one) over NO_SIMILARITY
+        order = np.lexsort((clusters, clusters == NO_SIMILARITY, doc_ids))
+        doc_ids = doc_ids[order]
+        first = np.concatenate(([True], doc_ids[1:] != doc_ids[:-1])) if len(doc_ids) > 0 else []
+        self.doc_ids = doc_ids[first]
+        self.clusters = clusters[order][first]
+
+    def filter(self, doc_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Filter documents
+        :param doc_ids: document ids
+        :return: mask of documents to keep and their cluster ids
+        """
+        if len(self.doc_ids) == 0:
+            return np.zeros(len(doc_ids), dtype=bool), np.zeros(0, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.doc_ids, doc_ids), len(self.doc_ids) - 1)
+        mask = self.doc_ids[pos] == doc_ids
+        return mask, self.clusters[pos[mask]]
+
+    def get_size(self) -> tuple[int, int, int]:
+        """
+        Get store size
+        :return: number of documents, number of removed documents and memory utilization (bytes)
+        """
+        return len(self.doc_ids), self.n_removed, self.doc_ids.nbytes + self.clusters.nbytes + self.removed.nbytes
+
+    def to_table(self) -> pa.Table:
+        """
+        Get the store as a table of doc, cluster and removed columns. Documents to keep come first, followed by
+        the removed documents (flagged by the removed column), their number is kept in the table metadata
+        :return: table
+        """
+        self.finalize()
+        n_docs = len(self.doc_ids)
+        n_removed = len(self.removed)
+        return pa.table(
+            {
+                "doc": np.concatenate((self.doc_ids, self.removed)),
+                "cluster": np.concatenate((self.clusters, np.full(n_removed, NO_SIMILARITY, dtype=np.int64))),
+                "removed": np.concatenate((np.zeros(n_docs, dtype=bool), np.ones(n_removed, dtype=bool))),
+            }
+        ).replace_schema_metadata({"removed": str(n_removed)})
+
+    @classmethod
+    def from_table(cls, table: pa.Table) -> "DocStore":
+        """
+        Build store from the table, created by to_table, without copying table columns
+        :param table: table
+        :return: document store
+        """
+        store = cls()
+        n_docs = table.num_rows - int((table.schema.metadata or {}).get(b"removed", 0))
+        doc_ids = column_array(table, "doc").to_numpy()
+        store.doc_ids = doc_ids[:n_docs]
+        store.clusters = column_array(table, "cluster").to_numpy()[:n_docs]
+        store.removed = doc_ids[n_docs:]
+        store.n_removed = len(store.removed)
+        return store
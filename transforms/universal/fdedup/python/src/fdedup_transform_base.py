@@ -0,0 +1,420 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import functools
+from typing import Iterator
+
+import mmh3
+import numpy as np
+import pyarrow as pa
+from data_processing.utils import RANDOM_SEED, TransformUtils
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.special import beta, betainc
+
+
+NO_SIMILARITY = -1
+REQUEST_LEN = 4096
+LONG_BUCKET = 5000
+LONG_BUCKET_PRINT = 1000
+# buckets longer than this are clustered by comparing their documents with a random sample of this size
+MAX_BUCKET_SIZE = 10000
+# max number of elements of the intermediate (documents x documents x permutations) matrix of signature comparison
+PAIRWISE_CHUNK_ELEMENTS = 1 << 24
+
+
+def band_error_probabilities(
+    threshold: float, num_bands: np.ndarray, length_band: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes false positive and false negative probabilities of LSH bands. Both are integrals of the probability
+    of documents with jaccard similarity s sharing a bucket, 1 - (1 - s^r)^b, which are incomplete beta functions
+    (substituting u = s^r), so they are evaluated in closed form for all (bands, band length) pairs at once
+    :param threshold: filtering threshold
+    :param num_bands: numbers of bands
+    :param length_band: band lengths
+    :return: false positive and false negative probabilities
+    """
+    b = np.asarray(num_bands, dtype=np.float64) + 1.0
+    a = 1.0 / np.asarray(length_band, dtype=np.float64)
+    x = threshold ** np.asarray(length_band, dtype=np.float64)
+    # integral of (1 - s^r)^b over [0, 1]
+    full = beta(a, b) * a
+    false_positive = threshold - full * betainc(a, b, x)
+    # complementary incomplete beta, avoiding cancellation for small probabilities
+    false_negative = full * betainc(b, a, 1.0 - x)
+    return false_positive, false_negative
+
+
+@functools.lru_cache(maxsize=None)
+def fuzzy_optimal_param(
+    threshold: float,
+    num_perm: int,
+    false_positive_weight: float,
+    false_negative_weight: float,
+) -> tuple[int, int]:
+    """
+    Computes parameters for fuzzy dedup
+    :param threshold: filtering threshold
+    :param num_perm: number of permutations
+    :param false_positive_weight: false positive weight
+    :param false_negative_weight: false negative weight
+    :return: number of buckets and bucket length
+    """
+    # all (bands, band length) pairs with bands * band length <= num_perm
+    bands = np.arange(1, num_perm + 1)
+    num_bands = np.repeat(bands, num_perm // bands)
+    length_band = np.concatenate([np.arange(1, num_perm // b + 1) for b in bands])
+    fp, fn = band_error_probabilities(threshold=threshold, num_bands=num_bands, length_band=length_band)
+    opt = int(np.argmin(fp * false_positive_weight + fn * false_negative_weight))
+    return int(num_bands[opt]), int(length_band[opt])
+
+
+def fuzzy_bands(
+    threshold: float, num_perm: int, num_bands: int = 0, length_band: int = 0
+) -> tuple[int, int, float, float]:
+    """
+    Get fuzzy dedup bands. Bands, that are not configured, are computed from the number of permutations,
+    the optimal ones (equal false positive and false negative weights) if neither is configured
+    :param threshold: filtering threshold
+    :param num_perm: number of permutations
+    :param num_bands: configured number of bands, 0 - not configured
+    :param length_band: configured band length, 0 - not configured
+    :return: number of bands, band length and their false positive and false negative probabilities
+    """
+    if num_bands <= 0 and length_band <= 0:
+        num_bands, length_band = fuzzy_optimal_param(
+            threshold=threshold, num_perm=num_perm, false_positive_weight=0.5, false_negative_weight=0.5
+        )
+    elif num_bands <= 0:
+        num_bands = num_perm // length_band
+    elif length_band <= 0:
+        length_band = num_perm // num_bands
+    fp, fn = band_error_probabilities(threshold=threshold, num_bands=num_bands, length_band=length_band)
+    return num_bands, length_band, float(fp), float(fn)
+
+
+# max number of elements of the intermediate (permutations x shingles) matrix of batched minhash
+MINHASH_CHUNK_ELEMENTS = 1 << 24
+
+
+def _rotl32(x: np.ndarray, r: int) -> np.ndarray:
+    return (x << np.uint32(r)) | (x >> np.uint32(32 - r))
+
+
+def murmur3_32(strings: pa.Array, seed: int = RANDOM_SEED) -> np.ndarray:
+    """
+    Vectorized unsigned 32 bit murmur3 of UTF-8 strings, producing the same values as
+    mmh3.hash(s, seed=seed, signed=False), used by TransformUtils.str_to_int
+    :param strings: arrow string array without nulls
+    :param seed: hash seed
+    :return: uint32 array of hashes
+    """
+    c1 = np.uint32(0xCC9E2D51)
+    c2 = np.uint32(0x1B873593)
+    if pa.types.is_large_string(strings.type):
+        offset_type = np.int64
+    else:
+        offset_type = np.int32
+    _, offsets_buffer, data_buffer = strings.buffers()
+    n = len(strings)
+    h = np.full(n, seed, dtype=np.uint32)
+    if n == 0:
+        return h
+    offsets = np.frombuffer(offsets_buffer, dtype=offset_type)[strings.offset : strings.offset + n + 1].astype(np.int64)
+    starts = offsets[:-1]
+    lengths = offsets[1:] - starts
+    # pad data, so that 4 byte blocks can be read at any position
+    data = np.zeros(offsets[-1] + 4, dtype=np.uint8)
+    if data_buffer is not None:
+        data[: offsets[-1]] = np.frombuffer(data_buffer, dtype=np.uint8)[: offsets[-1]]
+
+    def _read_block(positions: np.ndarray) -> np.ndarray:
+        # little endian 4 byte blocks
+        return (
+            data[positions].astype(np.uint32)
+            | (data[positions + 1].astype(np.uint32) << np.uint32(8))
+            | (data[positions + 2].astype(np.uint32) << np.uint32(16))
+            | (data[positions + 3].astype(np.uint32) << np.uint32(24))
+        )
+
+    with np.errstate(over="ignore"):
+        # body - process 4 byte blocks of all strings having the block
+        n_blocks = lengths // 4
+        active = np.flatnonzero(n_blocks > 0)
+        block = 0
+        while len(active) > 0:
+            k = _read_block(starts[active] + 4 * block)
+            k = _rotl32(k * c1, 15) * c2
+            hh = _rotl32(h[active] ^ k, 13)
+            h[active] = hh * np.uint32(5) + np.uint32(0xE6546B64)
+            block += 1
+            active = active[n_blocks[active] > block]
+        # tail - remaining 1 to 3 bytes
+        tail_length = lengths & 3
+        tail = np.flatnonzero(tail_length > 0)
+        if len(tail) > 0:
+            positions = starts[tail] + 4 * n_blocks[tail]
+            k = _read_block(positions)
+            # mask out bytes beyond the string end
+            k &= (np.uint32(1) << (tail_length[tail].astype(np.uint32) * np.uint32(8))) - np.uint32(1)
+            k = _rotl32(k * c1, 15) * c2
+            h[tail] ^= k
+        # finalization
+        h ^= lengths.astype(np.uint32)
+        h ^= h >> np.uint32(16)
+        h *= np.uint32(0x85EBCA6B)
+        h ^= h >> np.uint32(13)
+        h *= np.uint32(0xC2B2AE35)
+        h ^= h >> np.uint32(16)
+    return h
+
+
+class MurmurMH:
+    def __init__(self, num_perm: int, seed: int = RANDOM_SEED):
+        self.seed = seed
+        self.num_perm = num_perm
+        self.permutations = self._init_permutations(seed, num_perm)
+
+    def minhash(self, shingle_count: int, shingles: Iterator[str]) -> np.array:
+        def generator():
+            for shingle in shingles:
+                yield TransformUtils.str_to_int(shingle)
+
+        hash_values = np.fromiter(generator(), dtype=np.uint64, count=shingle_count)
+
+        result = np.zeros(self.permutations.shape, dtype=np.uint32)
+        for i, perm in enumerate(self.permutations):
+            result[i] = np.right_shift((perm * hash_values).T, 32).astype(np.uint32).min(axis=0, keepdims=False)
+        return result
+
+    def minhash_batch(self, shingles: list[list[str]]) -> np.ndarray:
+        """
+        Compute minhashes for a batch of documents. Shingles of all documents are hashed at once and all
+        permutations are applied in a single broadcasted operation, chunked by permutations to bound memory.
+        Produces the same values as minhash
+        :param shingles: list of (non empty) shingle lists, one per document
+        :return: uint32 signature matrix of shape (number of documents, number of permutations)
+        """
+        lengths = np.fromiter((len(doc_shingles) for doc_shingles in shingles), dtype=np.int64, count=len(shingles))
+        if len(shingles) == 0:
+            return np.zeros((0, self.num_perm), dtype=np.uint32)
+        flat = pa.array([shingle for doc_shingles in shingles for shingle in doc_shingles], type=pa.large_string())
+        hash_values = murmur3_32(flat).astype(np.uint64)
+        doc_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        result = np.empty((len(shingles), self.num_perm), dtype=np.uint32)
+        chunk = max(1, MINHASH_CHUNK_ELEMENTS // max(1, len(hash_values)))
+        for start in range(0, self.num_perm, chunk):
+            perms = self.permutations[start : start + chunk]
+            values = np.multiply(perms[:, None], hash_values[None, :])
+            np.right_shift(values, np.uint64(32), out=values)
+            result[:, start : start + chunk] = np.minimum.reduceat(values, doc_starts, axis=1).T
+        return result
+
+    @staticmethod
+    def band_hashes(signatures: np.ndarray, num_bands: int, length_band: int) -> np.ndarray:
+        """
+        Compute band hashes for a signature matrix. Every band is hashed using mmh3.hash64 of its bytes
+        :param signatures: uint32 signature matrix (number of documents, number of permutations)
+        :param num_bands: number of bands
+        :param length_band: band length
+        :return: uint64 matrix (number of documents, number of bands) of band hashes
+        """
+        signatures = np.ascontiguousarray(signatures)
+        result = np.empty((signatures.shape[0], num_bands), dtype=np.uint64)
+        band_bytes = 4 * length_band
+        for doc in range(signatures.shape[0]):
+            row = signatures[doc].tobytes()
+            result[doc] = [
+                mmh3.hash64(row[band * band_bytes : (band + 1) * band_bytes], seed=RANDOM_SEED, signed=False)[0]
+                for band in range(num_bands)
+            ]
+        return result
+
+    @staticmethod
+    def _init_permutations(seed: int, num_perm: int) -> np.array:
+        # see https://en.wikipedia.org/wiki/Universal_hashing#Avoiding_modular_arithmetic
+        max_int = np.uint64((1 << 64) - 1)
+        gen = np.random.RandomState(seed)
+        # get self.num_perm pseudo random numbers between 2 and max_int (excl)
+        permutations = np.array([gen.randint(0, max_int, dtype=np.uint64) for _ in range(num_perm)], dtype=np.uint64).T
+        # make all even pseudo random numbers odd by adding 1
+        permutations[permutations % 2 == 0] += 1
+        return permutations
+
+    @staticmethod
+    def jaccard(mh1: np.array, mh2: np.array) -> float:
+        return np.count_nonzero(mh1 == mh2)
+
+
+
+def similar_pairs(
+    signatures: np.ndarray, threshold: float, max_bucket_size: int = MAX_BUCKET_SIZE
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find pairs of similar documents of a bucket. Signatures of blocks of documents are compared with the signatures
+    of all documents of the bucket at once. For buckets longer than max_bucket_size, documents are only compared with
+    a (fixed seed) random sample of max_bucket_size documents, so similar documents are only found through the sample
+    :param signatures: signature matrix of the bucket documents
+    :param threshold: min number of equal minhashes for documents to be similar
+    :param max_bucket_size: max number of documents to compare all documents of the bucket with
+    :return: row indexes of the pairs of similar documents
+    """
+    n_docs, num_perm = signatures.shape
+    sampled = n_docs > max_bucket_size
+    if sampled:
+        pivots = np.sort(np.random.RandomState(RANDOM_SEED).choice(n_docs, size=max_bucket_size, replace=False))
+    else:
+        pivots = np.arange(n_docs)
+    block = max(1, PAIRWISE_CHUNK_ELEMENTS // max(1, n_docs * num_perm))
+    sources, targets = [], []
+    for start in range(0, len(pivots), block):
+        rows = pivots[start : start + block]
+        # without sampling, only compare with the following documents
+        first = 0 if sampled else rows[0]
+        counts = np.count_nonzero(signatures[rows, None, :] == signatures[None, first:, :], axis=2)
+        i, j = np.nonzero(counts >= threshold)
+        i = rows[i]
+        j = j + first
+        pair = i != j if sampled else j > i
+        sources.append(i[pair])
+        targets.append(j[pair])
+    if len(sources) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+def similar_edges(
+    signatures: np.ndarray, threshold: float, max_bucket_size: int = MAX_BUCKET_SIZE
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find edges connecting similar documents of a bucket. If there are more pairs of similar documents than
+    documents, pairs are reduced to the edges from every member of a connected component to its first member
+    :param signatures: signature matrix of the bucket documents
+    :param threshold: min number of equal minhashes for documents to be similar
+    :param max_bucket_size: max number of documents to compare all documents of the bucket with
+    :return: row indexes of the edges
+    """
+    n_docs = signatures.shape[0]
+    sources, targets = similar_pairs(signatures=signatures, threshold=threshold, max_bucket_size=max_bucket_size)
+    if len(sources) <= n_docs:
+        return sources, targets
+    graph = coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n_docs, n_docs))
+    _, components = connected_components(graph, directed=False)
+    connected = np.zeros(n_docs, dtype=bool)
+    connected[sources] = True
+    connected[targets] = True
+    return _star_edges(np.flatnonzero(connected), components[connected])
+
+
+def _star_edges(members: np.ndarray, labels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build edges from every member of a group to the first member of the group
+    :param members: group members
+    :param labels: group of every member
+    :return: edge sources and targets
+    """
+    if len(members) == 0:
+        return members, members
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    first = np.concatenate(([True], sorted_labels[1:] != sorted_labels[:-1]))
+    roots = order[first][np.cumsum(first) - 1]
+    return members[order[~first]], members[roots[~first]]
+
+
+class ClusterMerger:
+    """
+    Merges groups of similar documents, found in different buckets, into clusters - connected components
+    (union-find) of the overall similarity graph. Similar documents are kept as graph edges, along with document
+    lengths. In every cluster the longest document is kept, and the shortest one is used as the cluster id
+    """
+
+    def __init__(self):
+        self.sources = []
+        self.targets = []
+        self.doc_ids = []
+        self.lengths = []
+
+    def add_edges(self, doc_ids: np.ndarray, lengths: np.ndarray, sources: np.ndarray, targets: np.ndarray) -> None:
+        """
+        Add similar documents of a bucket
+        :param doc_ids: bucket document ids
+        :param lengths: bucket document lengths
+        :param sources: edge sources (row indexes of the bucket, see similar_edges)
+        :param targets: edge targets (row indexes of the bucket)
+        :return: None
+        """
+        if len(sources) == 0:
+            return
+        members = np.concatenate((sources, targets))
+        self.sources.append(np.asarray(doc_ids[sources], dtype=np.int64))
+        self.targets.append(np.asarray(doc_ids[targets], dtype=np.int64))
+        self.doc_ids.append(np.asarray(doc_ids[members], dtype=np.int64))
+        self.lengths.append(np.asarray(lengths[members], dtype=np.int64))
+
+    def add_clusters(self, clusters: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]) -> None:
+        """
+        Add clusters of another merger
+        :param clusters: clusters, as returned by get_clusters
+        :return: None
+        """
+        sources, targets, doc_ids, lengths = clusters
+        self.sources.append(sources)
+        self.targets.append(targets)
+        self.doc_ids.append(doc_ids)
+        self.lengths.append(lengths)
+
+    def _components(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute connected components of the similarity graph
+        :return: sorted unique document ids, their lengths and components
+        """
+        if len(self.doc_ids) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        doc_ids, first = np.unique(np.concatenate(self.doc_ids), return_index=True)
+        lengths = np.concatenate(self.lengths)[first]
+        sources = np.searchsorted(doc_ids, np.concatenate(self.sources))
+        targets = np.searchsorted(doc_ids, np.concatenate(self.targets))
+        graph = coo_matrix(
+            (np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(len(doc_ids), len(doc_ids))
+        )
+        _, components = connected_components(graph, directed=False)
+        return doc_ids, lengths, components
+
+    def get_clusters(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get compacted clusters (edges from every cluster member to the first one) to merge with another merger
+        :return: edge sources, edge targets, document ids and document lengths
+        """
+        doc_ids, lengths, components = self._components()
+        sources, targets = _star_edges(np.arange(len(doc_ids)), components)
+        return doc_ids[sources], doc_ids[targets], doc_ids, lengths
+
+    def resolve(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Resolve clusters
+        :return: ids of documents to keep, their cluster ids and ids of documents to remove
+        """
+        doc_ids, lengths, components = self._components()
+        if len(doc_ids) == 0:
+            return doc_ids, doc_ids, doc_ids
+        # longest document of every cluster (smallest id on ties)
+        order = np.lexsort((-lengths, components))
+        first = np.concatenate(([True], components[order][1:] != components[order][:-1]))
+        keep = order[first]
+        # shortest document of every cluster (largest id on ties)
+        order = np.lexsort((-np.arange(len(doc_ids)), lengths, components))
+        cluster_ids = doc_ids[order[first]]
+        removed = np.ones(len(doc_ids), dtype=bool)
+        removed[keep] = False
+        return doc_ids[keep], cluster_ids, doc_ids[removed]
@@ -0,0 +1,536 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from multiprocessing import Pool
+from typing import Any, Callable, Iterator, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from data_processing.data_access import DataAccessFactoryBase
+from data_processing.runtime.pure_python import (
+    DefaultPythonTransformRuntime,
+    PythonTransformLauncher,
+    PythonTransformRuntimeConfiguration,
+)
+from data_processing.transform import (
+    AbstractTableTransform,
+    TransformConfiguration,
+    TransformStatistics,
+)
+from data_processing.utils import (
+    GB,
+    MB,
+    RANDOM_SEED,
+    CLIArgumentProvider,
+    TransformUtils,
+    get_logger,
+)
+from fdedup_stores import BUCKET_DTYPE, BucketStore, DocStore, MinHashStore
+from fdedup_transform_base import (
+    MAX_BUCKET_SIZE,
+    NO_SIMILARITY,
+    REQUEST_LEN,
+    ClusterMerger,
+    MurmurMH,
+    similar_edges,
+    fuzzy_bands,
+)
+
+
+short_name = "fdedup"
+cli_prefix = f"{short_name}_"
+
+# number of hash partitions of the bucket store, processed independently
+BUCKET_PARTITIONS = 64
+
+logger = get_logger(__name__)
+
+# state of the preprocessing and bucket processing workers, set by the pool initializers
+_worker = {}
+
+
+def _init_preprocessor(data_access_factory: DataAccessFactoryBase, params: dict[str, Any]) -> None:
+    """
+    Initialize preprocessing worker
+    :param data_access_factory: data access factory
+    :param params: preprocessing parameters - doc_column, id_column, shingles_size, delimiters,
+                   num_permutations, num_bands and length_band
+    :return: None
+    """
+    _worker["data_access"] = data_access_factory.create_data_access()
+    _worker["params"] = params
+    _worker["mn_min_hash"] = MurmurMH(num_perm=params["num_permutations"], seed=RANDOM_SEED)
+
+
+def _preprocess_file(path: str) -> dict[str, Any]:
+    """
+    Compute minhashes and band hashes of the documents of a file
+    :param path: file path
+    :return: dictionary of doc_ids, lengths, signatures, band_hashes and stats
+    """
+    from compute_shingles import compute_shingles
+
+    params = _worker["params"]
+    mn_min_hash = _worker["mn_min_hash"]
+    stats = {}
+    table, retries = _worker["data_access"].get_table(path, columns=[params["doc_column"], params["id_column"]])
+    if retries > 0:
+        stats["data access retries"] = retries
+    if table is None:
+        logger.warning(f"Failed to read file {path}")
+        return {"stats": stats | {"failed_reads": 1}}
+    stats["preprocessed files"] = 1
+    docs = table[params["doc_column"]]
+    doc_ids = table[params["id_column"]].to_numpy()
+    lengths = pc.utf8_length(docs).to_numpy()
+    ids, lens, signatures = [], [], []
+    # process documents in batches
+    for start in range(0, table.num_rows, REQUEST_LEN):
+        batch_shingles = [
+            compute_shingles(txt=doc, word_shingle_size=params["shingles_size"], delimiter=params["delimiters"])
+            for doc in docs.slice(start, REQUEST_LEN).to_pylist()
+        ]
+        # documents with shingles
+        indexes = np.array([i for i in range(len(batch_shingles)) if len(batch_shingles[i]) > 0], dtype=np.int64)
+        if len(indexes) == 0:
+            continue
+        signatures.append(mn_min_hash.minhash_batch([batch_shingles[i] for i in indexes]))
+        ids.append(doc_ids[start + indexes])
+        lens.append(lengths[start + indexes])
+    if len(signatures) == 0:
+        return {"stats": stats}
+    signatures = np.concatenate(signatures)
+    return {
+        "doc_ids": np.concatenate(ids),
+        "lengths": np.concatenate(lens),
+        "signatures": signatures,
+        "band_hashes": MurmurMH.band_hashes(
+            signatures=signatures, num_bands=params["num_bands"], length_band=params["length_band"]
+        ),
+        "stats": stats,
+    }
+
+
+def _init_bucket_processor(minhashes: MinHashStore, threshold: float, max_bucket_size: int) -> None:
+    """
+    Initialize bucket processing worker
+    :param minhashes: minhash store
+    :param threshold: min number of equal minhashes for documents to be similar
+    :param max_bucket_size: max number of documents to compare all documents of the bucket with
+    :return: None
+    """
+    _worker["minhashes"] = minhashes
+    _worker["threshold"] = threshold
+    _worker["max_bucket_size"] = max_bucket_size
+
+
+def _process_partition(partition: Union[np.ndarray, str]) -> dict[str, Any]:
+    """
+    Process buckets of a bucket store partition, finding groups of similar documents in every bucket
+    and merging them into clusters
+    :param partition: bucket store partition
+    :return: dictionary of not_similar documents, clusters (see ClusterMerger) and number of buckets
+    """
+    minhashes = _worker["minhashes"]
+    offsets, bucket_docs = BucketStore.load_buckets(partition)
+    sizes = np.diff(offsets)
+    merger = ClusterMerger()
+    # single document buckets
+    not_similar = [bucket_docs[offsets[:-1][sizes == 1]]]
+    for start, size in zip(offsets[:-1][sizes > 1], sizes[sizes > 1]):
+        bucket = bucket_docs[start : start + size]
+        lengths, signatures = minhashes.get(bucket)
+        sources, targets = similar_edges(
+            signatures=signatures, threshold=_worker["threshold"], max_bucket_size=_worker["max_bucket_size"]
+        )
+        merger.add_edges(doc_ids=bucket, lengths=lengths, sources=sources, targets=targets)
+        similar = np.zeros(size, dtype=bool)
+        similar[sources] = True
+        similar[targets] = True
+        not_similar.append(bucket[~similar])
+    return {
+        "not_similar": np.concatenate(not_similar),
+        "clusters": merger.get_clusters(),
+        "number of buckets": len(sizes),
+    }
+
+
+class FdedupFilter(AbstractTableTransform):
+    """
+    Filtering documents
+    """
+
+    def __init__(self, config: dict):
+        """
+        Initialize based on the dictionary of configuration information.
+        The dictionary should contain the following:
+            doc_id_int_column - name of int doc id column
+            cluster_column - name of the cluster column
+            doc_store - documents to keep
+        """
+        super().__init__(config)
+        self.doc_id_column = config.get("doc_id_int_column", "")
+        self.cluster_column = config.get("cluster_column", "")
+        self.docs = config.get("doc_store", DocStore())
+
+    def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
+        """
+        De duping (filtering) table content.
+        :param table: table
+        :param file_name: name of the currently processing file
+        :return: resulting table, statistics
+        """
+        # make sure that the id column exists
+        TransformUtils.validate_columns(table=table, required=[self.doc_id_column])
+        ids = table[self.doc_id_column].to_numpy()
+        # only keep the first occurrence of the document id
+        _, first = np.unique(ids, return_index=True)
+        first = np.sort(first)
+        found, clusters = self.docs.filter(ids[first])
+        mask = np.zeros(len(ids), dtype=bool)
+        mask[first[found]] = True
+        out_table = TransformUtils.add_column(table=table.filter(mask), name=self.cluster_column, content=clusters)
+        # build execution statistics
+        stats = {"source_documents": table.num_rows, "result_documents": out_table.num_rows}
+        return [out_table], stats
+
+
+class FdedupRuntime(DefaultPythonTransformRuntime):
+    """
+    Fuzzy dedup runtime support. Here we are implementing first two steps of fuzzy dedup processing -
+    preprocessing, building local minhash and bucket stores, and bucket processing
+    """
+
+    def __init__(self, params: dict[str, Any]):
+        """
+        Create filter runtime
+        :param params: parameters, that should include
+            doc_column - name of the document column
+            id_column - name of the integer doc id column
+            cluster_column - name of the cluster column
+            num_permutations - number of permutations
+            threshold - threshold
+            num_bands - number of bands, 0 - computed
+            length_band - band length, 0 - computed
+            shingles_size - word shingles size
+            delimiters - delimiter
+            num_processes - number of processes for preprocessing and bucket processing
+            max_bucket_size - max number of documents to compare all documents of the bucket with
+            memory_budget_mb - memory (MB) for minhashes and buckets, before spilling them to disk
+            spill_folder - spill folder
+        """
+        super().__init__(params)
+        self.logger = get_logger(__name__)
+        self.docs = DocStore()
+        self.stats = {}
+        self.hash_memory = 0
+
+    def get_transform_config(
+        self, data_access_factory: DataAccessFactoryBase, statistics: TransformStatistics, files: list[str]
+    ) -> dict[str, Any]:
+        """
+        Build minhashes and buckets and process them to get the documents to keep
+        :param data_access_factory - data access factory
+        :param statistics - reference to the statistics object
+        :param files - list of files to process
+        :return: dictionary of filter init params
+        """
+        # compute fuzzy dedup parameters
+        num_permutations = self.params.get("num_permutations", 64)
+        threshold = self.params.get("threshold", 0.8)
+        num_bands, length_band, false_positive, false_negative = fuzzy_bands(
+            threshold=threshold,
+            num_perm=num_permutations,
+            num_bands=self.params.get("num_bands", 0),
+            length_band=self.params.get("length_band", 0),
+        )
+        self.logger.info(f"Fuzzy: num buckets {num_bands}, bucket length {length_band}")
+        self.stats |= {
+            "number of bands": num_bands,
+            "band length": length_band,
+            "false positive probability": false_positive,
+            "false negative probability": false_negative,
+        }
+        spill_folder = self.params.get("spill_folder", None)
+        if spill_folder is None or len(spill_folder) == 0:
+            folder = tempfile.mkdtemp(prefix="fdedup_")
+        else:
+            folder = tempfile.mkdtemp(prefix="fdedup_", dir=spill_folder)
+        memory_budget = self.params.get("memory_budget_mb", 2048) * MB
+        minhashes = MinHashStore(num_perm=num_permutations, memory_budget=memory_budget // 2, folder=folder)
+        buckets = BucketStore(num_partitions=BUCKET_PARTITIONS, memory_budget=memory_budget // 2, folder=folder)
+        try:
+            self._preprocess(
+                data_access_factory=data_access_factory,
+                files=files,
+                minhashes=minhashes,
+                buckets=buckets,
+                num_bands=num_bands,
+                length_band=length_band,
+            )
+            self._process_buckets(minhashes=minhashes, buckets=buckets, threshold=threshold * num_permutations)
+        finally:
+            minhashes.close()
+            buckets.close()
+            shutil.rmtree(folder, ignore_errors=True)
+        return self.params | {
+            "doc_id_int_column": self.params.get("id_column", ""),
+            "cluster_column": self.params.get("cluster_column", ""),
+            "doc_store": self.docs,
+        }
+
+    def _execute(
+        self, func: Callable, items: list[Any], initializer: Callable, initargs: tuple
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Execute function for every item, using multiprocessing pool, if more than one process is configured
+        :param func: function to execute
+        :param items: function arguments
+        :param initializer: worker initializer
+        :param initargs: worker initializer arguments
+        :return: iterator of function results (in any order)
+        """
+        num_processes = min(self.params.get("num_processes", 1), len(items))
+        if num_processes <= 1:
+            initializer(*initargs)
+            for item in items:
+                yield func(item)
+            return
+        with Pool(processes=num_processes, initializer=initializer, initargs=initargs) as pool:
+            for result in pool.imap_unordered(func, items):
+                yield result
+
+    def _preprocess(
+        self,
+        data_access_factory: DataAccessFactoryBase,
+        files: list[str],
+        minhashes: MinHashStore,
+        buckets: BucketStore,
+        num_bands: int,
+        length_band: int,
+    ) -> None:
+        """
+        Build minhash and bucket stores
+        :param data_access_factory - data access factory
+        :param files - list of files to process
+        :param minhashes - minhash store
+        :param buckets - bucket store
+        :param num_bands - number of bands
+        :param length_band - band length
+        :return: None
+        """
+        params = {
+            "doc_column": self.params.get("doc_column", ""),
+            "id_column": self.params.get("id_column", ""),
+            "shingles_size": self.params.get("shingles_size", 5),
+            "delimiters": self.params.get("delimiters", " "),
+            "num_permutations": self.params.get("num_permutations", 64),
+            "num_bands": num_bands,
+            "length_band": length_band,
+        }
+        start = time.time()
+        print_interval = max(1, len(files) // 100)
+        completed = 0
+        stats = TransformStatistics()
+        for result in self._execute(
+            func=_preprocess_file,
+            items=files,
+            initializer=_init_preprocessor,
+            initargs=(data_access_factory, params),
+        ):
+            stats.add_stats(result["stats"])
+            if "doc_ids" in result:
+                minhashes.add(doc_ids=result["doc_ids"], lengths=result["lengths"], signatures=result["signatures"])
+                buckets.add(doc_ids=result["doc_ids"], band_hashes=result["band_hashes"])
+            completed += 1
+            if completed % print_interval == 0:
+                self.logger.info(
+                    f"Preprocessed {completed} files ({round(100 * completed / len(files), 2)}%) "
+                    f"in {round((time.time() - start) / 60., 3)} min"
+                )
+        minhashes.finalize()
+        n_minhashes, minhash_memory = minhashes.get_size()
+        self.hash_memory += minhash_memory + buckets.n_pairs * BUCKET_DTYPE.itemsize
+        self.stats |= stats.get_execution_stats() | {
+            "number of min hashes": n_minhashes,
+            "preprocessing time": time.time() - start,
+        }
+        self.logger.info(f"Done preprocessing in {round((time.time() - start) / 60., 3)} min")
+
+    def _process_buckets(self, minhashes: MinHashStore, buckets: BucketStore, threshold: float) -> None:
+        """
+        Process buckets to get the documents to keep
+        :param minhashes - minhash store
+        :param buckets - bucket store
+        :param threshold - min number of equal minhashes for documents to be similar
+        :return: None
+        """
+        start = time.time()
+        n_buckets = 0
+        merger = ClusterMerger()
+        for result in self._execute(
+            func=_process_partition,
+            items=buckets.get_partitions(),
+            initializer=_init_bucket_processor,
+            initargs=(minhashes, threshold, self.params.get("max_bucket_size", MAX_BUCKET_SIZE)),
+        ):
+            not_similar = result["not_similar"]
+            self.docs.add(
+                doc_ids=not_similar,
+                clusters=np.full(len(not_similar), NO_SIMILARITY, dtype=np.int64),
+                removed=np.zeros(0, dtype=np.int64),
+            )
+            merger.add_clusters(result["clusters"])
+            n_buckets += result["number of buckets"]
+        # merge clusters across partitions
+        doc_ids, clusters, removed = merger.resolve()
+        self.docs.add(doc_ids=doc_ids, clusters=clusters, removed=removed)
+        self.docs.finalize()
+        self.stats |= {"number of buckets": n_buckets, "bucket processing time": time.time() - start}
+        self.logger.info(f"Done processing buckets in {round((time.time() - start) / 60., 3)} min")
+
+    def compute_execution_stats(self, stats: TransformStatistics) -> None:
+        """
+        Update/augment the given statistics object with runtime-specific additions/modifications.
+        :param stats: output of statistics as aggregated across all calls to all transforms.
+        :return: None
+        """
+        n_docs, n_removed, docs_memory = self.docs.get_size()
+        stats.add_stats(
+            self.stats
+            | {
+                "number of docs": n_docs,
+                "number of removed docs": n_removed,
+                "overall hash memory GB": (self.hash_memory + docs_memory) / GB,
+            }
+        )
+        current = stats.get_execution_stats()
+        dedup_prst = 100 * (1.0 - current.get("result_documents", 1) / current.get("source_documents", 1))
+        stats.add_stats({"de duplication %": dedup_prst})
+
+
+class FdedupTableTransformConfiguration(TransformConfiguration):
+    """
+    Provides support for configuring and using the associated Transform class include
+    configuration with CLI args and combining of metadata.
+    """
+
+    def __init__(self):
+        super().__init__(
+            name=short_name,
+            transform_class=FdedupFilter,
+        )
+        self.logger = get_logger(__name__)
+
+    def add_input_params(self, parser: ArgumentParser) -> None:
+        """
+        Add Transform-specific arguments to the given  parser.
+        """
+        parser.add_argument(f"--{cli_prefix}doc_column", type=str, default="contents", help="document column name")
+        parser.add_argument(
+            f"--{cli_prefix}id_column", type=str, default="int_document_id", help="integer document id column name"
+        )
+        parser.add_argument(f"--{cli_prefix}cluster_column", type=str, default="cluster", help="cluster column name")
+        parser.add_argument(f"--{cli_prefix}num_permutations", type=int, default=64, help="number of permutations")
+        parser.add_argument(f"--{cli_prefix}threshold", type=float, default=0.8, help="threshold")
+        parser.add_argument(
+            f"--{cli_prefix}num_bands",
+            type=int,
+            default=0,
+            help="number of LSH bands, 0 - computed from threshold and number of permutations",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}length_band",
+            type=int,
+            default=0,
+            help="LSH band length, 0 - computed from threshold and number of permutations",
+        )
+        parser.add_argument(f"--{cli_prefix}shingles_size", type=int, default=5, help="number of words in shingle")
+        parser.add_argument(
+            f"--{cli_prefix}delimiters", type=str, default=" ", help="delimiter for splitting document"
+        )
+        parser.add_argument(
+            f"--{cli_prefix}num_processes",
+            type=int,
+            default=1,
+            help="number of processes for preprocessing and bucket processing",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}max_bucket_size",
+            type=int,
+            default=MAX_BUCKET_SIZE,
+            help="max number of documents to compare documents of a bucket with, longer buckets are sampled",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}memory_budget_mb",
+            type=int,
+            default=2048,
+            help="memory (MB) for minhashes and buckets, above which they are spilled to disk",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}spill_folder",
+            type=str,
+            default=None,
+            help="folder for spilled minhashes and buckets, default - system temporary folder",
+        )
+
+    def apply_input_params(self, args: Namespace) -> bool:
+        """
+        Validate and apply the arguments that have been parsed
+        :param args: user defined arguments.
+        :return: True, if validate pass or False otherwise
+        """
+        captured = CLIArgumentProvider.capture_parameters(args, cli_prefix, False)
+        self.params = self.params | captured
+        if self.params["num_processes"] < 1:
+            self.logger.warning(f"number of processes should be at least 1, current {self.params['num_processes']}")
+            return False
+        num_bands, length_band, false_positive, false_negative = fuzzy_bands(
+            threshold=self.params["threshold"],
+            num_perm=self.params["num_permutations"],
+            num_bands=self.params["num_bands"],
+            length_band=self.params["length_band"],
+        )
+        if num_bands < 1 or length_band < 1 or num_bands * length_band > self.params["num_permutations"]:
+            self.logger.warning(
+                f"number of bands {num_bands} times band length {length_band} should be between 1 and "
+                f"number of permutations {self.params['num_permutations']}"
+            )
+            return False
+        self.logger.info(
+            f"fuzzy dedup bands {num_bands}, band length {length_band}, estimated false positive probability "
+            f"{round(false_positive, 4)}, false negative probability {round(false_negative, 4)}"
+        )
+        self.logger.info(f"fuzzy dedup params are {self.params}")
+        return True
+
+    def get_input_columns(self) -> list[str]:
+        """
+        Filtering only reads document id column
+        :return: list of input columns
+        """
+        return [self.params.get("id_column", "int_document_id")]
+
+
+class FdedupPythonTransformRuntimeConfiguration(PythonTransformRuntimeConfiguration):
+    def __init__(self):
+        super().__init__(transform_config=FdedupTableTransformConfiguration(), runtime_class=FdedupRuntime)
+
+
+if __name__ == "__main__":
+    launcher = PythonTransformLauncher(FdedupPythonTransformRuntimeConfiguration())
+    launcher.launch()
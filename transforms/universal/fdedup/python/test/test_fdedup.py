@@ -0,0 +1,150 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import mmh3
+import numpy as np
+import pyarrow as pa
+from scipy.integrate import quad
+from compute_shingles import compute_shingles
+from fdedup_stores import DocStore, MinHashStore, table_from_ipc, table_to_ipc
+from fdedup_transform_base import (
+    ClusterMerger,
+    MurmurMH,
+    band_error_probabilities,
+    fuzzy_bands,
+    fuzzy_optimal_param,
+    murmur3_32,
+    similar_edges,
+    similar_pairs,
+)
+
+
+def test_murmur3_32():
+    """
+    Verify that vectorized murmur hash matches mmh3
+    """
+    strings = ["", "a", "ab", "abc", "abcd", "abcde", "zürich straße", "x" * 37]
+    expected = [mmh3.hash(s, seed=42, signed=False) for s in strings]
+    assert murmur3_32(pa.array(strings)).tolist() == expected
+    assert murmur3_32(pa.array(strings).slice(3)).tolist() == expected[3:]
+
+
+def test_minhash_batch():
+    """
+    Verify that batched minhash produces the same signatures as per document minhash
+    """
+    docs = ["the quick brown fox jumps over the lazy dog " * n for n in range(1, 20)] + ["short"]
+    shingles = [compute_shingles(txt=doc, word_shingle_size=5) for doc in docs]
+    mh = MurmurMH(num_perm=64)
+    signatures = mh.minhash_batch(shingles)
+    assert signatures.shape == (len(docs), 64)
+    for i in range(len(docs)):
+        assert np.array_equal(signatures[i], mh.minhash(len(shingles[i]), shingles[i]))
+    bands = MurmurMH.band_hashes(signatures=signatures, num_bands=8, length_band=8)
+    assert bands.shape == (len(docs), 8)
+    assert bands[0, 1] == mmh3.hash64(signatures[0, 8:16].tobytes(), seed=42, signed=False)[0]
+
+
+def test_similar_pairs():
+    """
+    Verify vectorized comparison of the bucket documents, with and without sampling
+    """
+    rng = np.random.RandomState(0)
+    signatures = rng.randint(0, 1 << 30, size=(40, 16)).astype(np.uint32)
+    # documents 10-19 are near duplicates of document 0
+    signatures[10:20] = signatures[0]
+    signatures[10:20, 0] += 1
+    sources, targets = similar_pairs(signatures=signatures, threshold=14)
+    pairs = set(zip(sources.tolist(), targets.tolist()))
+    expected = {(i, j) for i in [0] + list(range(10, 20)) for j in range(10, 20) if j > i}
+    assert pairs == expected
+    # every duplicate is still connected through the sample
+    sources, targets = similar_pairs(signatures=signatures, threshold=14, max_bucket_size=20)
+    assert set(sources.tolist()) | set(targets.tolist()) == {0} | set(range(10, 20))
+    # edges are reduced to a star per connected component
+    sources, targets = similar_edges(signatures=signatures, threshold=14)
+    assert len(sources) == 10
+    assert set(targets.tolist()) == {0}
+
+
+def test_cluster_merger():
+    """
+    Verify merging of similar documents across buckets
+    """
+    merger = ClusterMerger()
+    # bucket 1: documents 1 and 2 are similar, bucket 2: documents 2 and 3
+    merger.add_edges(
+        doc_ids=np.array([1, 2, 9]), lengths=np.array([10, 30, 5]), sources=np.array([0]), targets=np.array([1])
+    )
+    other = ClusterMerger()
+    other.add_edges(doc_ids=np.array([3, 2]), lengths=np.array([20, 30]), sources=np.array([0]), targets=np.array([1]))
+    other.add_edges(doc_ids=np.array([7, 8]), lengths=np.array([4, 4]), sources=np.array([0]), targets=np.array([1]))
+    merger.add_clusters(other.get_clusters())
+    keep, clusters, removed = merger.resolve()
+    # longest document is kept (smallest id on ties), shortest is the cluster id (largest id on ties)
+    assert keep.tolist() == [2, 7]
+    assert clusters.tolist() == [1, 8]
+    assert removed.tolist() == [1, 3, 8]
+
+
+def test_store_snapshots(tmp_path):
+    """
+    Verify that stores restored from Arrow IPC snapshots (memory mapped) match the original ones
+    """
+    rng = np.random.RandomState(0)
+    minhashes = MinHashStore(num_perm=8, memory_budget=0)
+    minhashes.add(doc_ids=np.array([5, 1, 3]), lengths=np.array([50, 10, 30]), signatures=rng.randint(0, 100, (3, 8)))
+    minhashes.add(doc_ids=np.array([2]), lengths=np.array([20]), signatures=rng.randint(0, 100, (1, 8)))
+    path = str(tmp_path / "minhashes")
+    with open(path, "wb") as f:
+        f.write(table_to_ipc(minhashes.to_table()))
+    restored = MinHashStore.from_table(table_from_ipc(path))
+    ids = np.array([3, 2, 5])
+    for expected, actual in zip(minhashes.get(ids), restored.get(ids)):
+        assert np.array_equal(expected, actual)
+    docs = DocStore()
+    docs.add(doc_ids=np.array([1, 2, 3]), clusters=np.array([-1, -1, -1]), removed=np.zeros(0))
+    docs.add(doc_ids=np.array([2]), clusters=np.array([7]), removed=np.array([3]))
+    restored = DocStore.from_table(table_from_ipc(table_to_ipc(docs.to_table())))
+    mask, clusters = restored.filter(np.array([1, 2, 3, 4]))
+    assert mask.tolist() == [True, True, False, False]
+    assert clusters.tolist() == [-1, 7]
+    assert restored.get_size()[:2] == (2, 1)
+    assert restored.removed.tolist() == [3]
+    # documents removed before the snapshot stay removed, when added again after restoring it
+    restored.add(doc_ids=np.array([3, 4]), clusters=np.array([-1, -1]), removed=np.array([1]))
+    restored.finalize()
+    mask, clusters = restored.filter(np.array([1, 2, 3, 4]))
+    assert mask.tolist() == [False, True, False, True]
+    assert restored.get_size()[:2] == (2, 2)
+
+
+def test_fuzzy_optimal_param():
+    """
+    Verify closed form band error probabilities and optimal bands against numeric integration
+    """
+
+    def reference(threshold: float, num_perm: int) -> tuple[int, int]:
+        errors = {}
+        for b in range(1, num_perm + 1):
+            for r in range(1, num_perm // b + 1):
+                fp = quad(lambda s: 1 - (1 - s**r) ** b, 0.0, threshold)[0]
+                fn = quad(lambda s: (1 - s**r) ** b, threshold, 1.0)[0]
+                errors[(b, r)] = 0.5 * fp + 0.5 * fn
+        return min(errors, key=errors.get)
+
+    for threshold in [0.6, 0.7, 0.8, 0.9]:
+        assert fuzzy_optimal_param(threshold, 32, 0.5, 0.5) == reference(threshold, 32)
+    fp, fn = band_error_probabilities(threshold=0.7, num_bands=np.array([9, 100]), length_band=np.array([7, 10]))
+    assert np.allclose(fp, [quad(lambda s: 1 - (1 - s**r) ** b, 0.0, 0.7)[0] for b, r in [(9, 7), (100, 10)]])
+    assert np.allclose(fn, [quad(lambda s: (1 - s**r) ** b, 0.7, 1.0)[0] for b, r in [(9, 7), (100, 10)]])
+    assert fuzzy_bands(threshold=0.8, num_perm=64, num_bands=8)[:2] == (8, 8)
@@ -0,0 +1,46 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+import os
+
+from data_processing.runtime.pure_python import PythonTransformLauncher
+from data_processing.test_support.launch.transform_test import (
+    AbstractTransformLauncherTest,
+)
+from fdedup_transform_python import FdedupPythonTransformRuntimeConfiguration
+
+
+class TestPythonFdedupTransform(AbstractTransformLauncherTest):
+    """
+    Extends the super-class to define the test data for the tests defined there.
+    The name of this class MUST begin with the word Test so that pytest recognizes it as a test class.
+    """
+
+    def get_test_transform_fixtures(self) -> list[tuple]:
+        basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../test-data"))
+        config = {
+            # columns used
+            "fdedup_doc_column": "contents",
+            "fdedup_id_column": "int_id_column",
+            "fdedup_cluster_column": "cluster",
+            # fuzzy parameters
+            "fdedup_num_permutations": 64,
+            "fdedup_threshold": 0.8,
+            "fdedup_shingles_size": 5,
+            "fdedup_delimiters": " ",
+            # processing
+            "fdedup_num_processes": 2,
+            "fdedup_memory_budget_mb": 1,
+        }
+        launcher = PythonTransformLauncher(FdedupPythonTransformRuntimeConfiguration())
+        fixtures = [(launcher, config, basedir + "/input", basedir + "/expected")]
+        return fixtures
@@ -13,7 +13,7 @@
 import math
 
 from data_processing.utils import GB
-from fdedup_support import fuzzy_optimal_param
+from fdedup_transform_base import band_error_probabilities, fuzzy_optimal_param
 
 
 """
@@ -51,8 +51,15 @@ num_buckets, length_bucket = fuzzy_optimal_param(
     false_positive_weight=false_positive,
     false_negative_weight=false_negative,
 )
+false_positive_probability, false_negative_probability = band_error_probabilities(
+    threshold=threshold, num_bands=num_buckets, length_band=length_bucket
+)
 print(f"threshold {threshold}, num permutations {n_permutations}")
 print(f"Fuzzy parameters: num buckets {num_buckets}, bucket length {length_bucket}")
+print(
+    f"Estimated false positive probability {false_positive_probability}, "
+    f"false negative probability {false_negative_probability}"
+)
 
 print(f"Number of documents {number_of_docs}")
 
@@ -10,111 +10,56 @@
 # limitations under the License.
 ################################################################################
 
-import pickle
 import time
-from typing import Any, Iterator, Union
+from typing import Any
 
 import numpy as np
+import pyarrow as pa
 import ray
-from data_processing.data_access import SnapshotUtils
-from data_processing.utils import GB, RANDOM_SEED, TransformUtils, get_logger
+from data_processing.data_access import DataAccess, DataAccessLocal, SnapshotUtils
+from data_processing.utils import GB, get_logger
 from data_processing_ray.runtime.ray import RayUtils
+from fdedup_stores import (
+    BucketStore,
+    DocStore,
+    MinHashStore,
+    column_array,
+    table_from_ipc,
+    table_to_ipc,
+)
+from fdedup_transform_base import (
+    LONG_BUCKET,
+    MAX_BUCKET_SIZE,
+    NO_SIMILARITY,
+    ClusterMerger,
+    similar_edges,
+)
 from ray.actor import ActorHandle
 from ray.util import ActorPool
-from scipy.integrate import quad as integrate
 
 
-NO_SIMILARITY = -1
-REQUEST_LEN = 4096
-LONG_BUCKET = 5000
-LONG_BUCKET_PRINT = 1000
+def read_snapshot(data_access: DataAccess, path: str) -> pa.Table:
+    """
+    Read actor snapshot. Local snapshots are memory mapped, so that restoring an actor does not load its state
+    :param data_access: data access
+    :param path: snapshot path
+    :return: snapshot table
+    """
+    if isinstance(data_access, DataAccessLocal):
+        return table_from_ipc(path)
+    data, _ = data_access.get_file(path)
+    return table_from_ipc(data)
 
 
-def fuzzy_optimal_param(
-    threshold: float,
-    num_perm: int,
-    false_positive_weight: float,
-    false_negative_weight: float,
-) -> tuple[int, int]:
+def write_snapshot(data_access: DataAccess, path: str, table: pa.Table) -> None:
     """
-    Computes parameters for fuzzy dedup
-    :param threshold: filtering threshold
-    :param num_perm: number of permutations
-    :param false_positive_weight: false positive weight
-    :param false_negative_weight: false negative weight
-    :return: number of buckets and bucket length
+    Write actor snapshot as Arrow IPC file
+    :param data_access: data access
+    :param path: snapshot path
+    :param table: snapshot table
+    :return: None
     """
-
-    def _false_positive_probability(ths: float, b: int, r: int) -> float:
-        """
-        Compute false positive probability
-        :param ths: filtering threshold
-        :param b: permutation
-        :param r: rel permutation
-        :return: probability
-        """
-        _probability = lambda s: 1 - (1 - s ** float(r)) ** float(b)
-        a, err = integrate(_probability, 0.0, ths)
-        return a
-
-    def _false_negative_probability(ths: float, b: int, r: int) -> float:
-        """
-        Compute false negative probability
-        :param ths: filtering threshold
-        :param b: permutation
-        :param r: rel permutation
-        :return: probability
-        """
-        _probability = lambda s: 1 - (1 - (1 - s ** float(r)) ** float(b))
-        a, err = integrate(_probability, ths, 1.0)
-        return a
-
-    min_error = float("inf")
-    opt = (0, 0)
-    for perm in range(1, num_perm + 1):
-        max_r = int(num_perm / perm)
-        for rel in range(1, max_r + 1):
-            fp = _false_positive_probability(threshold, perm, rel)
-            fn = _false_negative_probability(threshold, perm, rel)
-            error = fp * false_positive_weight + fn * false_negative_weight
-            if error < min_error:
-                min_error = error
-                opt = (perm, rel)
-    return opt
-
-
-class MurmurMH:
-    def __init__(self, num_perm: int, seed: int = RANDOM_SEED):
-        self.seed = seed
-        self.num_perm = num_perm
-        self.permutations = self._init_permutations(seed, num_perm)
-
-    def minhash(self, shingle_count: int, shingles: Iterator[str]) -> np.array:
-        def generator():
-            for shingle in shingles:
-                yield TransformUtils.str_to_int(shingle)
-
-        hash_values = np.fromiter(generator(), dtype=np.uint64, count=shingle_count)
-
-        result = np.zeros(self.permutations.shape, dtype=np.uint32)
-        for i, perm in enumerate(self.permutations):
-            result[i] = np.right_shift((perm * hash_values).T, 32).astype(np.uint32).min(axis=0, keepdims=False)
-        return result
-
-    @staticmethod
-    def _init_permutations(seed: int, num_perm: int) -> np.array:
-        # see https://en.wikipedia.org/wiki/Universal_hashing#Avoiding_modular_arithmetic
-        max_int = np.uint64((1 << 64) - 1)
-        gen = np.random.RandomState(seed)
-        # get self.num_perm pseudo random numbers between 2 and max_int (excl)
-        permutations = np.array([gen.randint(0, max_int, dtype=np.uint64) for _ in range(num_perm)], dtype=np.uint64).T
-        # make all even pseudo random numbers odd by adding 1
-        permutations[permutations % 2 == 0] += 1
-        return permutations
-
-    @staticmethod
-    def jaccard(mh1: np.array, mh2: np.array) -> float:
-        return np.count_nonzero(mh1 == mh2)
+    data_access.save_file(path, table_to_ipc(table))
 
 
 @ray.remote(scheduling_strategy="SPREAD")
@@ -129,79 +74,60 @@ class DocCollector:
         """
         self.logger = get_logger(__name__)
         self.actor_id = params.get("id")
-        self.removed = set()
         data_access_factory = params.get("data_access")
         self.data_access = data_access_factory.create_data_access()
         snapshot = params.get("snapshot", None)
         if snapshot is None:
-            self.ids = {}
+            self.docs = DocStore()
         else:
             try:
-                bids, _ = self.data_access.get_file(snapshot)
-                self.ids = pickle.loads(bids)
+                self.docs = DocStore.from_table(read_snapshot(self.data_access, snapshot))
             except Exception as e:
                 self.logger.warning(f"Failed to load doc collector {self.actor_id} with exception {e}")
                 raise e
 
-    def add_documents(self, dr: tuple[list[tuple[int, int]], list[int]]) -> None:
+    def add_documents(self, doc_ids: np.ndarray, clusters: np.ndarray, removed: np.ndarray) -> None:
         """
-        Add documents and removed document
-        :param dr: documents to keep and documents to remove
-        :return:
+        Add documents and removed document. Removed documents are never kept and documents are only kept as
+        NO_SIMILARITY if they do not have a cluster
+        :param doc_ids: ids of documents to keep
+        :param clusters: cluster ids of documents to keep
+        :param removed: ids of documents to remove
+        :return: None
         """
-        docs = dr[0]
-        rm = dr[1]
-        # process documents to remove
-        for did in rm:
-            self.ids.pop(did, None)
-        self.removed.update(rm)
-        # process documents to keep
-        for key, val in docs:
-            if key in self.removed:
-                continue
-            if key in self.ids and val == NO_SIMILARITY:
-                # Do not update existing docs with NO_SIMILARITY
-                continue
-            else:
-                self.ids[key] = val
-
-    def filter(self, docs: list[int]) -> dict[int, int]:
+        self.docs.add(doc_ids=doc_ids, clusters=clusters, removed=removed)
+
+    def filter(self, doc_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
         """
         Filter documents
-        :param docs: documents to filter
-        :return: documents to keep
+        :param doc_ids: documents to filter
+        :return: mask of documents to keep and their cluster ids
         """
-        result = {}
-        for doc_id in docs:
-            r = self.ids.get(doc_id, None)
-            if r is not None:
-                result[doc_id] = r
-        return result
+        self.docs.finalize()
+        return self.docs.filter(doc_ids)
 
     def snapshot(self) -> None:
         """
         Snapshotting itself
         """
         try:
-            b_doc = pickle.dumps(self.ids)
-            self.data_access.save_file(
-                f"{SnapshotUtils.get_snapshot_folder(self.data_access)}docs/doc_collector_{self.actor_id}", b_doc
+            write_snapshot(
+                self.data_access,
+                f"{SnapshotUtils.get_snapshot_folder(self.data_access)}docs/doc_collector_{self.actor_id}",
+                self.docs.to_table(),
             )
         except Exception as e:
             self.logger.warning(f"Failed to snapshot doc collector {self.actor_id} with exception {e}")
             raise e
 
-    def get_size(self) -> tuple[int, float, int, float]:
+    def get_size(self) -> tuple[int, int, float]:
         """
         get sizes
-        :return: number of ids, its memory utilization, number of removed, its memory utilization
+        :return: number of ids, number of removed and memory utilization
         """
-        return (
-            len(self.ids),
-            TransformUtils.deep_get_size(self.ids) / GB,
-            len(self.removed),
-            TransformUtils.deep_get_size(self.removed) / GB,
-        )
+        self.docs.finalize()
+        n_docs, n_removed, memory = self.docs.get_size()
+        return n_docs, n_removed, memory / GB
 
 
 @ray.remote(scheduling_strategy="SPREAD")
@@ -221,46 +147,43 @@ class DocsMinHash:
         self.data_access = data_access_factory.create_data_access()
         snapshot = params.get("snapshot", None)
         if snapshot is None:
-            self.docs = {}
+            self.docs = MinHashStore(num_perm=params.get("num_permutations", 64), memory_budget=0)
         else:
             try:
-                bdocs, _ = self.data_access.get_file(snapshot)
-                self.docs = pickle.loads(bdocs)
+                self.docs = MinHashStore.from_table(read_snapshot(self.data_access, snapshot))
             except Exception as e:
                 self.logger.warning(f"Failed to load minhash collector {self.actor_id} with exception {e}")
                 raise e
 
-    def add_minhashes(self, updates: list[tuple[int, int, np.array]]) -> None:
+    def add_minhashes(self, doc_ids: np.ndarray, lengths: np.ndarray, signatures: np.ndarray) -> None:
         """
         Add minhashes
-        :param updates: minhash for doc_id a tuple of doc len and array of hashes
+        :param doc_ids: document ids
+        :param lengths: document lengths
+        :param signatures: signature matrix (number of documents, number of permutations)
         :return: None
         """
-        for doc_id, length, minhash in updates:
-            self.docs[doc_id] = np.concatenate(([length], minhash))
+        self.docs.add(doc_ids=doc_ids, lengths=lengths, signatures=signatures)
 
-    def get_minhashes(self, doc_ids: list[int]) -> list[tuple[int, int, np.array]]:
+    def get_minhashes(self, doc_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Get minhashes for a list of documents
-        :param doc_ids: list of doc ids
-        :return: doc id, len, minhashes
+        Get minhashes for documents, all of which have to be in this collector
+        :param doc_ids: doc ids
+        :return: doc ids, lengths and signature matrix
         """
-        result = []
-        for doc_id in doc_ids:
-            info = self.docs.get(doc_id)
-            if info is not None:
-                result.append((doc_id, info[0], info[1:]))
-        return result
+        self.docs.finalize()
+        lengths, signatures = self.docs.get(doc_ids)
+        return doc_ids, lengths, signatures
 
     def snapshot(self) -> None:
         """
         Snapshotting itself
         """
         try:
-            b_doc = pickle.dumps(self.docs)
-            self.data_access.save_file(
+            write_snapshot(
+                self.data_access,
                 f"{SnapshotUtils.get_snapshot_folder(self.data_access)}minhash/minhash_collector_{self.actor_id}",
-                b_doc,
+                self.docs.to_table(),
             )
         except Exception as e:
             self.logger.warning(f"Failed to snapshot minhash collector {self.actor_id} with exception {e}")
@@ -271,13 +194,16 @@ class DocsMinHash:
         Get size of used min hashes
         :return: number of docs, its memory utilization
         """
-        return len(self.docs), TransformUtils.deep_get_size(self.docs) / GB
+        self.docs.finalize()
+        n_docs, memory = self.docs.get_size()
+        return n_docs, memory / GB
 
 
 @ray.remote(scheduling_strategy="SPREAD")
 class BucketsHash:
     """
-    Actor storing buckets information
+    Actor storing buckets information. Buckets are kept as (band hash, document id) pairs, that are sorted
+    into CSR buckets (bucket offsets and documents of all buckets) before processing
     """
 
     def __init__(self, params: dict[str, Any]):
@@ -293,13 +219,16 @@ class BucketsHash:
         self.actor_id = params.get("id")
         data_access_factory = params.get("data_access")
         self.data_access = data_access_factory.create_data_access()
+        self.store = BucketStore(num_partitions=1, memory_budget=0)
+        # sorted unique pairs, built by _finalize
+        self.hashes = None
+        self.docs = None
         snapshot = params.get("snapshot", None)
-        if snapshot is None:
-            self.buckets = {}
-        else:
+        if snapshot is not None:
             try:
-                b_buckets, _ = self.data_access.get_file(snapshot)
-                self.buckets = pickle.loads(b_buckets)
+                table = read_snapshot(self.data_access, snapshot)
+                self.hashes = column_array(table, "hash").to_numpy()
+                self.docs = column_array(table, "doc").to_numpy()
             except Exception as e:
                 self.logger.warning(f"Failed to load buckets collector {self.actor_id} with exception {e}")
                 raise e
@@ -307,26 +236,25 @@ class BucketsHash:
         self.long_bucket_submit_counter = Counter("long_bucket_submitted", "Amount of long buckets submitted")
         self.short_bucket_submit_counter = Counter("short_bucket_submitted", "Amount of short buckets submitted")
 
-    def add_buckets(self, bck: list[tuple[int, list[int]]]) -> None:
+    def add_buckets(self, pairs: np.ndarray) -> None:
         """
         Add additional buckets to hash
-        :param bck: bucket information
+        :param pairs: (band hash, document id) pairs (BUCKET_DTYPE)
+        :return: None
+        """
+        self.store.add_pairs(pairs)
+
+    def _finalize(self) -> None:
+        """
+        Sort pairs into buckets. No buckets can be added after this
         :return: None
         """
-        for bucket in bck:
-            b_hash = bucket[0]
-            buckets_for_hash = self.buckets.get(b_hash)
-            if buckets_for_hash:
-                if type(buckets_for_hash) == int:
-                    self.buckets[b_hash] = [buckets_for_hash] + bucket[1]
-                else:
-                    buckets_for_hash.extend(bucket[1])
-            else:
-                if len(bucket[1]) == 1:
-                    self.buckets[b_hash] = bucket[1][0]
-                else:
-                    self.buckets[b_hash] = bucket[1]
-                self.bucket_created_counter.inc(1)
+        if self.hashes is not None:
+            return
+        pairs = np.unique(self.store.get_partitions()[0])
+        self.hashes = pairs["hash"].copy()
+        self.docs = pairs["doc"].copy()
+        self.store.close()
 
     def add_processing_submitter(self, submitter: ActorHandle) -> None:
         """
@@ -341,55 +269,56 @@ class BucketsHash:
         Process buckets to generate documents
         :return: None
         """
-
+        self._finalize()
+        offsets = BucketStore.bucket_offsets(self.hashes)
+        sizes = np.diff(offsets)
         # Remember usage
-        self.n_buckets = len(self.buckets)
-        self.bucket_memory = TransformUtils.deep_get_size(self.buckets) / GB
+        self.n_buckets = len(sizes)
+        self.bucket_memory = (self.hashes.nbytes + self.docs.nbytes + offsets.nbytes) / GB
+        self.bucket_created_counter.inc(self.n_buckets)
 
         # split buckets into short and long. Long buckets can take very long to process
-        long_buckets = []
-        short_buckets = []
-        while len(self.buckets) > 0:
-            doc_id, bucket = self.buckets.popitem()
-            if type(bucket) == list and len(bucket) > LONG_BUCKET:
-                # Its long
-                long_buckets.append(bucket)
-            else:
-                short_buckets.append(bucket)
+        long_buckets = np.flatnonzero(sizes > LONG_BUCKET)
+        short_buckets = np.flatnonzero(sizes <= LONG_BUCKET)
         self.logger.info(f"processing buckets {len(long_buckets)} long, {len(short_buckets)} short")
 
-        # process long buckets first - we are submitting them one at a time
-        for bucket in long_buckets:
-            if len(bucket) > 2 * LONG_BUCKET:
-                # For very long buckets, split them
-                self.logger.info(f"Splitting bucket of length len(bucket) into chunks")
-                smaller_bucket = [
-                    bucket[i * LONG_BUCKET : (i + 1) * LONG_BUCKET]
-                    for i in range((len(bucket) + LONG_BUCKET - 1) // LONG_BUCKET)
-                ]
-                for b in smaller_bucket:
-                    ray.get(self.submitter.submit_for_processing.remote([b]))
-                    self.long_bucket_submit_counter.inc(1)
-            else:
-                ray.get(self.submitter.submit_for_processing.remote([bucket]))
-                self.long_bucket_submit_counter.inc(1)
+        # process long buckets first - we are submitting them one at a time. Long buckets are not split,
+        # pairwise comparison of their documents is vectorized and capped by sampling (see similar_edges)
+        for bucket in long_buckets.tolist():
+            ray.get(self.submitter.submit_for_processing.remote(self._get_buckets(offsets, np.array([bucket]))))
+            self.long_bucket_submit_counter.inc(1)
         self.logger.info("Done submitting long buckets")
 
         # And now the rest of buckets
-        bucket_chunks = [short_buckets[i * 100 : (i + 1) * 100] for i in range((len(short_buckets) + 99) // 100)]
-        for b in bucket_chunks:
-            ray.get(self.submitter.submit_for_processing.remote(b))
-            self.short_bucket_submit_counter.inc(len(b))
+        for start in range(0, len(short_buckets), 100):
+            chunk = short_buckets[start : start + 100]
+            ray.get(self.submitter.submit_for_processing.remote(self._get_buckets(offsets, chunk)))
+            self.short_bucket_submit_counter.inc(len(chunk))
+
+    def _get_buckets(self, offsets: np.ndarray, buckets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get buckets for processing
+        :param offsets: bucket offsets
+        :param buckets: indexes of buckets
+        :return: buckets (CSR) - bucket offsets and documents of all buckets
+        """
+        starts = offsets[buckets]
+        sizes = offsets[buckets + 1] - starts
+        bucket_offsets = np.concatenate(([0], np.cumsum(sizes)))
+        # positions of the documents of every bucket
+        positions = np.repeat(starts - bucket_offsets[:-1], sizes) + np.arange(bucket_offsets[-1])
+        return bucket_offsets, self.docs[positions]
 
     def snapshot(self) -> None:
         """
         Snapshotting itself
         """
         try:
-            b_buckets = pickle.dumps(self.buckets)
-            self.data_access.save_file(
+            self._finalize()
+            write_snapshot(
+                self.data_access,
                 f"{SnapshotUtils.get_snapshot_folder(self.data_access)}buckets/buckets_collector_{self.actor_id}",
-                b_buckets,
+                pa.table({"hash": self.hashes, "doc": self.docs}),
             )
         except Exception as e:
             self.logger.warning(f"Failed to snapshot buckets collector {self.actor_id} with exception {e}")
@@ -417,11 +346,14 @@ class BucketsHashProcessor:
             remote_minhashes - handles to the remote minhashes
             mn_min_hash - MurmurMH class
             threshold - threshold
+            max_bucket_size - max number of documents to compare all documents of the bucket with
             statistics - statistics actor
         """
         from ray.util.metrics import Counter
 
         self.threshold = params["threshold"]
+        self.max_bucket_size = params.get("max_bucket_size", MAX_BUCKET_SIZE)
+        self.merger = ClusterMerger()
         self.mn_min_hash = params["mn_min_hash"]
         self.remote_docs = params["remote_docs"]
         self.remote_minhashes = params["remote_minhashes"]
@@ -429,146 +361,99 @@ class BucketsHashProcessor:
         self.logger = get_logger(__name__)
         self.bucket_processed_counter = Counter("bucket_processed", "Amount of buckets processed")
 
-    def _submit_generated_docs(self, docs: dict[int, int], removed: set[int]) -> None:
+    def _submit_generated_docs(self, docs: np.ndarray) -> None:
         """
-        Submit generated documents
+        Submit generated documents, that are not similar to any other document of their buckets
         :param docs: docs to submit
-        :param removed: removed documents
         :return: None
         """
-        # Remove doc ids that are already removed
-        for did in removed:
-            docs.pop(did, None)
-        # Build remote requests
-        request = [([], []) for _ in range(len(self.remote_docs))]
-        for key, value in docs.items():
-            req_tuple = request[key % len(self.remote_docs)]
-            req_tuple[0].append((key, value))
-        for did in removed:
-            req_tuple = request[did % len(self.remote_docs)]
-            req_tuple[1].append(did)
-        # Submit requests and wait for replies
+        n_collectors = len(self.remote_docs)
+        collectors = docs % n_collectors
         remote_replies = []
-        i = 0
-        for req in request:
-            if len(req[0]) > 0 or len(req[1]) > 0:  # Only submit if the request has data
-                remote_replies.append(self.remote_docs[i].add_documents.remote(req))
-            i += 1
+        for i in range(n_collectors):
+            ids = docs[collectors == i]
+            if len(ids) > 0:  # Only submit if the request has data
+                remote_replies.append(
+                    self.remote_docs[i].add_documents.remote(
+                        ids, np.full(len(ids), NO_SIMILARITY, dtype=np.int64), np.zeros(0, dtype=np.int64)
+                    )
+                )
         # Process replies
         RayUtils.wait_for_execution_completion(logger=self.logger, replies=remote_replies)
 
-    # get minhashes and length for docs in the bucket
-    def _get_minhashes_docs(self, doc_ids: list[int]) -> dict[int, tuple[int, list[int]]]:
+    # get minhashes and length for docs in the buckets
+    def _get_minhashes_docs(self, doc_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Get minhashes for documents by submitting requests to an appropriate doc collectors
+        Get minhashes for documents by submitting requests to an appropriate minhash collectors
         :param doc_ids: doc ids
-        :return: doc ids with hashes
+        :return: sorted doc ids, their lengths and signature matrix
         """
-        request = [[] for _ in range(len(self.remote_minhashes))]
-        for value in doc_ids:
-            request[value % len(self.remote_minhashes)].append(value)
+        doc_ids = np.unique(doc_ids)
+        n_collectors = len(self.remote_minhashes)
+        collectors = doc_ids % n_collectors
         remote_replies = []
-        i = 0
-        for req in request:
-            if len(req) > 0:  # Only submit if the length is greater then 0
-                remote_replies.append(self.remote_minhashes[i].get_minhashes.remote(req))
-            i += 1
+        for i in range(n_collectors):
+            ids = doc_ids[collectors == i]
+            if len(ids) > 0:  # Only submit if the length is greater then 0
+                remote_replies.append(self.remote_minhashes[i].get_minhashes.remote(ids))
         # Process replies
-        hashes = {}
-        while remote_replies:
-            # Wait for replies
-            ready, not_ready = ray.wait(remote_replies)
-            reply = ray.get(ready)[0]
-            for r in reply:
-                hashes[r[0]] = (r[1], r[2])
-            remote_replies = not_ready
-        return hashes
-
-    def process_buckets(self, buckets: list[Union[int, list[int]]]) -> None:
-        """
-        process buckets to generate documents
-        :param buckets: buckets
+        ids, lengths, signatures = zip(*ray.get(remote_replies))
+        ids = np.concatenate(ids)
+        order = np.argsort(ids)
+        return ids[order], np.concatenate(lengths)[order], np.concatenate(signatures)[order]
+
+    def process_buckets(self, buckets: tuple[np.ndarray, np.ndarray]) -> None:
+        """
+        process buckets to find similar documents. Documents, that are not similar to any other document
+        of their buckets are submitted as NO_SIMILARITY, while similar ones are merged into clusters,
+        that are resolved once all buckets are processed (see get_clusters)
+        :param buckets: buckets (CSR) - bucket offsets and documents of all buckets
         :return: none
         """
         t_start = time.time()
-        docs = {}
-        removed = set()
-        for bucket in buckets:
-            if type(bucket) == int:
-                # This hash has a single document
-                if bucket not in docs:
-                    docs[bucket] = NO_SIMILARITY
-                self.bucket_processed_counter.inc(1)
-                continue
-            # multiple documents
+        offsets, bucket_docs = buckets
+        sizes = np.diff(offsets)
+        # single document buckets
+        not_similar = [bucket_docs[offsets[:-1][sizes == 1]]]
+        self.bucket_processed_counter.inc(int(np.count_nonzero(sizes == 1)))
+        # multiple documents
+        multiple = np.flatnonzero(sizes > 1)
+        if len(multiple) > 0:
+            ids, lengths, signatures = self._get_minhashes_docs(
+                np.concatenate([bucket_docs[offsets[b] : offsets[b + 1]] for b in multiple])
+            )
+        for b in multiple.tolist():
             start = time.time()
-            bucket_len = len(bucket)
-            very_long = bucket_len > LONG_BUCKET
-
-            hashes = self._get_minhashes_docs(bucket)
-            set_list = []
-            unvisited = set(bucket)
-
-            # combine similar documents
-            index = 0
-            while len(unvisited) > 0:
-                current_doc_id = unvisited.pop()
-                current_mh = hashes[current_doc_id][1]
-                current_set = set()
-                for other_doc_id in bucket:
-                    if other_doc_id in unvisited:
-                        other_mh = hashes[other_doc_id][1]
-                        if self.mn_min_hash.jaccard(current_mh, other_mh) >= self.threshold:
-                            current_set.add(current_doc_id)
-                            current_set.add(other_doc_id)
-                            unvisited.discard(other_doc_id)
-                if len(current_set) > 0:
-                    set_list.append(current_set)
-                index += 1
-                if index % LONG_BUCKET_PRINT == 0:
-                    self.logger.info(f"processing very long {bucket_len} bucket, {index} documents so far")
-            if index > LONG_BUCKET_PRINT:
-                self.logger.info(f"done processing very long {bucket_len}")
-
-            # process created sets
-            for current_set in set_list:
-                for d in current_set:
-                    bucket.remove(d)
-                removed.update(current_set)
-                for i, doc_id in enumerate(current_set):
-                    if i == 0:
-                        cluster_id = doc_id
-                        remaining = doc_id
-                        min_len = hashes[doc_id][0]
-                        max_len = min_len
-                        continue
-                    c_len = hashes[doc_id][0]
-                    if c_len > max_len:
-                        max_len = c_len
-                        remaining = doc_id
-                        continue
-                    if c_len <= min_len:
-                        min_len = c_len
-                        cluster_id = doc_id
-                docs[remaining] = cluster_id
-                removed.discard(remaining)
-
-            # if we did not find docs in connections, submit them as NO_SIMILARITY
-            for d in bucket:
-                if d not in docs:
-                    docs[d] = NO_SIMILARITY
-            if very_long:
+            bucket = bucket_docs[offsets[b] : offsets[b + 1]]
+            rows = np.searchsorted(ids, bucket)
+            sources, targets = similar_edges(
+                signatures=signatures[rows], threshold=self.threshold, max_bucket_size=self.max_bucket_size
+            )
+            self.merger.add_edges(doc_ids=bucket, lengths=lengths[rows], sources=sources, targets=targets)
+            # if we did not find similar docs, submit them as NO_SIMILARITY
+            similar = np.zeros(len(bucket), dtype=bool)
+            similar[sources] = True
+            similar[targets] = True
+            not_similar.append(bucket[~similar])
+            if len(bucket) > LONG_BUCKET:
                 self.logger.info(
-                    f"Processed long ({bucket_len}) bucket in {round((time.time() - start) / 60.,3)} "
-                    f"min; "
-                    f"docs chains {len(set_list)}"
+                    f"Processed long ({len(bucket)}) bucket in {round((time.time() - start) / 60.,3)} "
+                    f"min; similar docs {np.count_nonzero(similar)}"
                 )
             self.bucket_processed_counter.inc(1)
         # Submit docs
-        self._submit_generated_docs(docs, removed)
+        docs = np.unique(np.concatenate(not_similar))
+        self._submit_generated_docs(docs)
         # peg stats
         self.stats.add_stats.remote({"generated doc_ids": len(docs), "bucket processing time": time.time() - t_start})
 
+    def get_clusters(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get clusters of similar documents, found by this processor
+        :return: clusters (see ClusterMerger.get_clusters)
+        """
+        return self.merger.get_clusters()
+
 
 @ray.remote(scheduling_strategy="SPREAD")
 class BucketsHashProcessorInvoker(object):
@@ -584,7 +469,7 @@ class BucketsHashProcessorInvoker(object):
         self.logger = get_logger(__name__)
         self.start = time.time()
 
-    def submit_for_processing(self, buckets: list[Union[int, list[int]]]) -> None:
+    def submit_for_processing(self, buckets: tuple[np.ndarray, np.ndarray]) -> None:
         # Get completed results
         if self.submitted < self.n_processors:  # still have room
             self.pool.submit(lambda a, v: a.process_buckets.remote(v), buckets)
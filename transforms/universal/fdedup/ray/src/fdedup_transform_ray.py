@@ -15,12 +15,13 @@ import time
 from argparse import ArgumentParser, Namespace
 from typing import Any
 
-import mmh3
 import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 import ray
 from data_processing.data_access import DataAccessFactoryBase, SnapshotUtils
 from data_processing.transform import AbstractTableTransform, TransformConfiguration
+from data_processing.transform.table_transform import INPUT_COLUMNS_KEY
 from data_processing.utils import (
     RANDOM_SEED,
     CLIArgumentProvider,
@@ -37,14 +38,19 @@ from data_processing_ray.runtime.ray.runtime_configuration import (
     RayTransformRuntimeConfiguration,
 )
 from fdedup_support import (
-    REQUEST_LEN,
     BucketsHash,
     BucketsHashProcessor,
     BucketsHashProcessorInvoker,
     DocCollector,
     DocsMinHash,
+)
+from fdedup_stores import BUCKET_DTYPE
+from fdedup_transform_base import (
+    MAX_BUCKET_SIZE,
+    REQUEST_LEN,
+    ClusterMerger,
     MurmurMH,
-    fuzzy_optimal_param,
+    fuzzy_bands,
 )
 from ray.actor import ActorHandle
 from ray.util import ActorPool
@@ -86,63 +92,50 @@ class FdedupTransform(AbstractTableTransform):
         self.minhashes = config.get("remote_minhashes", [])
         self.random_delay_limit = config.get("random_delay_limit", 10)
 
-    def _generate_minhashes(self, shingles: list[str]) -> np.array:
+    def _generate_minhashes(self, shingles: list[list[str]]) -> np.ndarray:
         """
-        Generate minhashes
-        :param shingles:
-        :return: generated minhashes
+        Generate minhashes for a batch of documents
+        :param shingles: list of shingles for every document
+        :return: signature matrix (number of documents, number of minhashes)
         """
-        min_hashes = self.mn_min_hash.minhash(len(shingles), shingles)
-        num_min_hashes = len(min_hashes)
+        min_hashes = self.mn_min_hash.minhash_batch(shingles)
+        num_min_hashes = min_hashes.shape[1]
         assert self.num_bands * self.length_band <= num_min_hashes, (
             f"num_bans*band_len must be <= num min hashes, was num_bands={self.num_bands}, "
             f"bands_len={self.length_band}, num_min hashes={num_min_hashes}"
         )
         return min_hashes
 
-    def _generate_buckets(self, min_hashes: np.array) -> list[int]:
-        """
-        Generate buckets
-        :param min_hashes: array of minhashes
-        :return:
-        """
-        return [
-            mmh3.hash64(min_hashes[i * self.length_band : (i + 1) * self.length_band], seed=RANDOM_SEED, signed=False)[
-                0
-            ]
-            for i in range(self.num_bands)
-        ]
-
     def _submit_buckets_minhashes(
-        self, buckets: dict[int, list[int]], minhashes: list[tuple[int, int, np.array]]
+        self, doc_ids: np.ndarray, lengths: np.ndarray, signatures: np.ndarray, band_hashes: np.ndarray
     ) -> None:
         """
-        Submit buckets to hash
-        :param buckets: buckets
-        :param minhashes: minhashes
+        Submit buckets and minhashes to the appropriate collectors
+        :param doc_ids: document ids
+        :param lengths: document lengths
+        :param signatures: signature matrix (number of documents, number of minhashes)
+        :param band_hashes: band hashes matrix (number of documents, number of bands)
         :return: None
         """
-        # bucket requests
-        request = [[] for _ in range(len(self.buckets))]
-        for key, value in buckets.items():
-            request[key % len(self.buckets)].append((key, value))
+        # bucket requests - (band hash, document id) pairs
+        pairs = np.empty(band_hashes.size, dtype=BUCKET_DTYPE)
+        pairs["hash"] = band_hashes.ravel()
+        pairs["doc"] = np.repeat(doc_ids, band_hashes.shape[1])
+        collectors = pairs["hash"] % np.uint64(len(self.buckets))
         # Submit requests to appropriate bucket collectors
         remote_replies = []
-        i = 0
-        for req in request:
+        for i in range(len(self.buckets)):
+            req = pairs[collectors == i]
             if len(req) > 0:  # Only submit if the length is greater then 0
                 remote_replies.append(self.buckets[i].add_buckets.remote(req))
-            i += 1
-        # Minhashes
-        request = [[] for _ in range(len(self.minhashes))]
-        for minh in minhashes:
-            request[minh[0] % len(self.minhashes)].append(minh)
-        # Submit requests to appropriate minhash collectors
-        i = 0
-        for req in request:
-            if len(req) > 0:  # Only submit if the length is greater then 0
-                remote_replies.append(self.minhashes[i].add_minhashes.remote(req))
-            i += 1
+        # Submit minhashes to appropriate minhash collectors
+        collectors = doc_ids % len(self.minhashes)
+        for i in range(len(self.minhashes)):
+            req = collectors == i
+            if np.any(req):  # Only submit if the length is greater then 0
+                remote_replies.append(
+                    self.minhashes[i].add_minhashes.remote(doc_ids[req], lengths[req], signatures[req])
+                )
         # wait for completion
         RayUtils.wait_for_execution_completion(logger=self.logger, replies=remote_replies)
 
@@ -155,48 +148,36 @@ class FdedupTransform(AbstractTableTransform):
         """
         from compute_shingles import compute_shingles
 
-        def flush(limit: int) -> None:
-            """
-            flushing buckets and minhashes to dedicated actors
-            :param limit: number of buckets to flush
-            :return: None
-            """
-            if len(buckets) >= limit:  # time to submit
-                nonlocal num_buckets
-                nonlocal num_minhashes
-                self._submit_buckets_minhashes(buckets, minhashes)
-                num_buckets = num_buckets + len(buckets)
-                num_minhashes = num_minhashes + len(minhashes)
-                buckets.clear()
-                minhashes.clear()
-
         # make sure that the doc column exists
         TransformUtils.validate_columns(table=table, required=[self.doc_column, self.doc_id_column])
         # Inner variables
-        buckets = {}
-        minhashes = []
         num_buckets = 0
         num_minhashes = 0
         docs = table[self.doc_column]
-        doc_ids = table[self.doc_id_column]
-        # for every document/its integer id
-        for n in range(table.num_rows):
-            doc = docs[n].as_py()
-            doc_id = doc_ids[n].as_py()
-            shingles = compute_shingles(txt=doc, word_shingle_size=self.word_shingle_size, delimiter=self.delimiter)
-            if len(shingles) > 0:
-                mh = self._generate_minhashes(shingles)
-                minhashes.append((doc_id, len(doc), mh))
-                candidates = self._generate_buckets(mh)
-
-                for b_hash in candidates:
-                    bucket_array = buckets.get(b_hash)
-                    if bucket_array is None:
-                        buckets[b_hash] = [doc_id]
-                    else:
-                        bucket_array.append(doc_id)
-                flush(REQUEST_LEN)
-        flush(0)
+        doc_ids = table[self.doc_id_column].to_numpy()
+        lengths = pc.utf8_length(docs).to_numpy()
+        # process documents in batches
+        for start in range(0, table.num_rows, REQUEST_LEN):
+            batch_shingles = [
+                compute_shingles(txt=doc, word_shingle_size=self.word_shingle_size, delimiter=self.delimiter)
+                for doc in docs.slice(start, REQUEST_LEN).to_pylist()
+            ]
+            # documents with shingles
+            indexes = np.array([i for i in range(len(batch_shingles)) if len(batch_shingles[i]) > 0], dtype=np.int64)
+            if len(indexes) == 0:
+                continue
+            signatures = self._generate_minhashes([batch_shingles[i] for i in indexes])
+            band_hashes = self.mn_min_hash.band_hashes(
+                signatures=signatures, num_bands=self.num_bands, length_band=self.length_band
+            )
+            self._submit_buckets_minhashes(
+                doc_ids=doc_ids[start + indexes],
+                lengths=lengths[start + indexes],
+                signatures=signatures,
+                band_hashes=band_hashes,
+            )
+            num_buckets += len(np.unique(band_hashes))
+            num_minhashes += len(indexes)
         # peg stats
         stats = {"generated buckets": num_buckets, "generated minhashes": num_minhashes}
         time.sleep(int(random.random() * self.random_delay_limit))
@@ -234,38 +215,28 @@ class FdedupFilter(AbstractTableTransform):
         """
         # make sure that the doc column exists
         TransformUtils.validate_columns(table=table, required=[self.doc_column, self.doc_id_column])
-        # inner variables
-        ids = table.column(self.doc_id_column)
+        # only look up the first occurrence of the document id
+        ids = table[self.doc_id_column].to_numpy()
+        unique, first = np.unique(ids, return_index=True)
         # Submit requests to an appropriate doc collectors
-        request = [[] for _ in range(len(self.docs))]
-        for value in ids:
-            doc_id = value.as_py()
-            request[doc_id % len(self.docs)].append(doc_id)
-        remote_replies = []
-        i = 0
-        for req in request:
-            if len(req) > 0:  # Only submit if the length is greater then 0
-                remote_replies.append(self.docs[i].filter.remote(req))
-            i += 1
+        collectors = unique % len(self.docs)
+        requests = [np.flatnonzero(collectors == i) for i in range(len(self.docs))]
+        remote_replies = [
+            self.docs[i].filter.remote(unique[requests[i]]) for i in range(len(self.docs)) if len(requests[i]) > 0
+        ]
+        requests = [req for req in requests if len(req) > 0]
         # Process replies
-        unique = {}
-        while remote_replies:
-            # Wait for replies
-            ready, not_ready = ray.wait(remote_replies)
-            reply = ray.get(ready)[0]
-            unique.update(reply)
-            remote_replies = not_ready
-        # Filter out table
-        mask = []
-        clusters = []
+        found = np.zeros(len(unique), dtype=bool)
+        unique_clusters = np.zeros(len(unique), dtype=np.int64)
+        for req, (req_mask, req_clusters) in zip(requests, ray.get(remote_replies)):
+            found[req[req_mask]] = True
+            unique_clusters[req[req_mask]] = req_clusters
         # Actual filtering
-        for n in range(table.num_rows):
-            doc_id = ids[n].as_py()
-            if doc_id in unique:
-                mask.append(True)
-                clusters.append(unique.pop(doc_id))
-            else:
-                mask.append(False)
+        rows = first[found]
+        order = np.argsort(rows)
+        mask = np.zeros(table.num_rows, dtype=bool)
+        mask[rows] = True
+        clusters = unique_clusters[found][order]
         # build out table
         out_table = TransformUtils.add_column(table=table.filter(mask), name=self.cluster_column, content=clusters)
         # build execution statistics
@@ -302,8 +273,11 @@ class FdedupRuntime(DefaultRayTransformRuntime):
             # fuzzy specific parameters
             num_permutations - number of permutations
             threshold - threshold
+            num_bands - number of bands, 0 - computed
+            length_band - band length, 0 - computed
             world_shingle_size - word shingles size
             delimiters - delimiter
+            max_bucket_size - max number of documents to compare all documents of the bucket with
         """
         from data_processing.utils import get_logger
 
@@ -314,6 +288,7 @@ class FdedupRuntime(DefaultRayTransformRuntime):
         self.sum_mh = 0
         self.sum_mh_mem = 0
         self.document_collectors = []
+        self.band_stats = {}
         self.snapshot_delay = self.params.get("snapshot_delay", 1)
         self.random_delay_limit = self.params.get("random_delay_limit", 10)
 
@@ -331,7 +306,7 @@ class FdedupRuntime(DefaultRayTransformRuntime):
             self.logger.info("continuing from the document actors snapshot")
             data_access = data_access_factory.create_data_access()
             path = f"{SnapshotUtils.get_snapshot_folder(data_access)}docs"
-            files, retries = data_access.get_folder_files(path=path)
+            files, retries = data_access.get_folder_files(path=path, return_data=False)
             if retries > 0:
                 statistics.add_stats.remote({"data access retries": retries})
             self.logger.info(f"Found the following snapshot files {files.keys()}")
@@ -351,6 +326,7 @@ class FdedupRuntime(DefaultRayTransformRuntime):
             "doc_id_int_column": self.params.get("id_column", ""),
             "cluster_column": self.params.get("cluster_column", ""),
             "remote_docs": self.document_collectors,
+            INPUT_COLUMNS_KEY: [self.params.get("doc_column", ""), self.params.get("id_column", "")],
             "random_delay_limit": self.random_delay_limit,
         }
 
@@ -370,7 +346,7 @@ class FdedupRuntime(DefaultRayTransformRuntime):
             data_access = data_access_factory.create_data_access()
             # recreate bucket collectors
             path = f"{SnapshotUtils.get_snapshot_folder(data_access)}buckets"
-            files, retries = data_access.get_folder_files(path=path)
+            files, retries = data_access.get_folder_files(path=path, return_data=False)
             if retries > 0:
                 statistics.add_stats.remote({"data access retries": retries})
             self.logger.debug(f"Found the following bucket snapshot files {files.keys()}")
@@ -384,7 +360,7 @@ class FdedupRuntime(DefaultRayTransformRuntime):
             self.logger.info(f"Created {len(bucket_collectors)} bucket collectors to continue processing")
             # recreate minhash collectors
             path = f"{SnapshotUtils.get_snapshot_folder(data_access)}minhash"
-            files, retries = data_access.get_folder_files(path=path)
+            files, retries = data_access.get_folder_files(path=path, return_data=False)
             if retries > 0:
                 statistics.add_stats.remote({"data access retries": retries})
             self.logger.debug(f"Found the following minhash snapshot files {files.keys()}")
@@ -425,13 +401,19 @@ class FdedupRuntime(DefaultRayTransformRuntime):
         :return: None
         """
         # compute fuzzy dedup parameters
-        num_buckets, length_bucket = fuzzy_optimal_param(
+        num_buckets, length_bucket, false_positive, false_negative = fuzzy_bands(
             threshold=self.params.get("threshold", 0.8),
             num_perm=self.params.get("num_permutations", 64),
-            false_positive_weight=0.5,
-            false_negative_weight=0.5,
+            num_bands=self.params.get("num_bands", 0),
+            length_band=self.params.get("length_band", 0),
         )
         self.logger.info(f"Fuzzy: num buckets {num_buckets}, bucket length {length_bucket}")
+        self.band_stats = {
+            "number of bands": num_buckets,
+            "band length": length_bucket,
+            "false positive probability": false_positive,
+            "false negative probability": false_negative,
+        }
         # Build bucket and minhash collectors
         bucket_collectors = [None] * self.params.get("num_bucket_actors", 1)
         for i in range(self.params.get("num_bucket_actors", 1)):
@@ -442,7 +424,11 @@ class FdedupRuntime(DefaultRayTransformRuntime):
         minhash_collectors = [None] * self.params.get("num_minhash_actors", 1)
         for i in range(self.params.get("num_minhash_actors", 1)):
             minhash_collectors[i] = DocsMinHash.options(**{"num_cpus": self.params.get("mhash_cpu", 0.5)}).remote(
-                {"id": i, "data_access": data_access_factory}
+                {
+                    "id": i,
+                    "data_access": data_access_factory,
+                    "num_permutations": self.params.get("num_permutations", 64),
+                }
             )
         self.logger.info(f"created {len(minhash_collectors)} minhash actors")
         self._preprocess_tables(
@@ -519,6 +505,7 @@ class FdedupRuntime(DefaultRayTransformRuntime):
                 "remote_minhashes": minhash_collectors,
                 "mn_min_hash": mn_min_hash,
                 "threshold": self.params.get("threshold", 0.8) * self.params.get("num_permutations", 64),
+                "max_bucket_size": self.params.get("max_bucket_size", MAX_BUCKET_SIZE),
                 "statistics": statistics,
             },
             actor_options=self.params.get("worker_options", None),
@@ -543,6 +530,8 @@ class FdedupRuntime(DefaultRayTransformRuntime):
         RayUtils.wait_for_execution_completion(logger=self.logger, replies=bucket_replies)
         # Wait for pool to complete
         ray.get(bucket_processor_invoker.wait_for_completion.remote())
+        # merge clusters found by different processors
+        self._resolve_clusters(bucket_processors=bucket_processors_list)
         self.logger.info(f"Done processing buckets in {round((time.time() - start) / 60.,3)} min")
         # At this point we can save doc actors, in case we would want to restart here
         self.logger.info(f"creating document snapshots")
@@ -583,6 +572,34 @@ class FdedupRuntime(DefaultRayTransformRuntime):
             ray.kill(actor=processor, no_restart=True)
         ray.kill(bucket_processor_invoker)
 
+    def _resolve_clusters(self, bucket_processors: list[ActorHandle]) -> None:
+        """
+        Merge clusters of similar documents, found by bucket processors, and submit documents to keep
+        (with their cluster ids) and documents to remove to document collectors
+        :param bucket_processors - bucket processors
+        :return: None
+        """
+        start = time.time()
+        merger = ClusterMerger()
+        for clusters in ray.get([processor.get_clusters.remote() for processor in bucket_processors]):
+            merger.add_clusters(clusters)
+        doc_ids, clusters, removed = merger.resolve()
+        n_collectors = len(self.document_collectors)
+        doc_collectors = doc_ids % n_collectors
+        removed_collectors = removed % n_collectors
+        replies = []
+        for i in range(n_collectors):
+            keep = doc_collectors == i
+            remove = removed_collectors == i
+            if np.any(keep) or np.any(remove):
+                replies.append(
+                    self.document_collectors[i].add_documents.remote(doc_ids[keep], clusters[keep], removed[remove])
+                )
+        RayUtils.wait_for_execution_completion(logger=self.logger, replies=replies)
+        self.logger.info(
+            f"Merged {len(doc_ids)} clusters, removing {len(removed)} docs in {round(time.time() - start, 3)} sec"
+        )
+
     def _preprocess_tables(
         self,
         data_access_factory: DataAccessFactoryBase,
@@ -632,6 +649,7 @@ class FdedupRuntime(DefaultRayTransformRuntime):
                 "remote_minhashes": minhash_collectors,
                 "delimiter": self.params.get("delimiter", " "),
                 "random_delay_limit": random_delay_limit,
+                INPUT_COLUMNS_KEY: [self.params.get("doc_column", ""), self.params.get("id_column", "")],
             },
             "base_table_stats": False,
         }
@@ -690,26 +708,28 @@ class FdedupRuntime(DefaultRayTransformRuntime):
         sum_docs = 0
         sum_docs_mem = 0
         sum_removed = 0
-        sum_removed_mem = 0
         replies = [collector.get_size.remote() for collector in self.document_collectors]
         while replies:
             ready, not_ready = ray.wait(replies)
-            d_amount, d_memory, r_amount, r_memory = ray.get(ready)[0]
+            d_amount, r_amount, d_memory = ray.get(ready)[0]
             sum_docs += d_amount
             sum_docs_mem += d_memory
             sum_removed += r_amount
-            sum_removed_mem += r_memory
             replies = not_ready
-        overall_hash_memory = self.sum_buckets_mem + self.sum_mh_mem + sum_docs_mem + sum_docs_mem + sum_removed_mem
+        overall_hash_memory = self.sum_buckets_mem + self.sum_mh_mem + sum_docs_mem
         dedup_prst = 100 * (1.0 - stats.get("result_documents", 1) / stats.get("source_documents", 1))
-        return {
-            "number of buckets": self.sum_buckets,
-            "number of docs": sum_docs,
-            "number of removed docs": sum_removed,
-            "number of min hashes": self.sum_mh,
-            "overall hash memory GB": overall_hash_memory,
-            "de duplication %": dedup_prst,
-        } | stats
+        return (
+            {
+                "number of buckets": self.sum_buckets,
+                "number of docs": sum_docs,
+                "number of removed docs": sum_removed,
+                "number of min hashes": self.sum_mh,
+                "overall hash memory GB": overall_hash_memory,
+                "de duplication %": dedup_prst,
+            }
+            | self.band_stats
+            | stats
+        )
 
 
 class FdedupTableTransformConfiguration(TransformConfiguration):
@@ -755,7 +775,25 @@ class FdedupTableTransformConfiguration(TransformConfiguration):
         )
         parser.add_argument(f"--{cli_prefix}num_permutations", type=int, default=64, help="number of permutations")
         parser.add_argument(f"--{cli_prefix}threshold", type=float, default=0.8, help="threshold")
+        parser.add_argument(
+            f"--{cli_prefix}num_bands",
+            type=int,
+            default=0,
+            help="number of LSH bands, 0 - computed from threshold and number of permutations",
+        )
+        parser.add_argument(
+            f"--{cli_prefix}length_band",
+            type=int,
+            default=0,
+            help="LSH band length, 0 - computed from threshold and number of permutations",
+        )
         parser.add_argument(f"--{cli_prefix}shingles_size", type=int, default=5, help="number of words in shingle")
+        parser.add_argument(
+            f"--{cli_prefix}max_bucket_size",
+            type=int,
+            default=MAX_BUCKET_SIZE,
+            help="max number of documents to compare documents of a bucket with, longer buckets are sampled",
+        )
         parser.add_argument(
             f"--{cli_prefix}delimiters", type=str, default=" ", help="delimiter for splitting document"
         )
@@ -788,7 +826,22 @@ class FdedupTableTransformConfiguration(TransformConfiguration):
         if self.params["use_bucket_snapshot"] and self.params["use_doc_snapshot"]:
             self.logger.warning("both bucket and doc snapshot are specified. Only one allowed")
             return False
-
+        num_bands, length_band, false_positive, false_negative = fuzzy_bands(
+            threshold=self.params["threshold"],
+            num_perm=self.params["num_permutations"],
+            num_bands=self.params["num_bands"],
+            length_band=self.params["length_band"],
+        )
+        if num_bands < 1 or length_band < 1 or num_bands * length_band > self.params["num_permutations"]:
+            self.logger.warning(
+                f"number of bands {num_bands} times band length {length_band} should be between 1 and "
+                f"number of permutations {self.params['num_permutations']}"
+            )
+            return False
+        self.logger.info(
+            f"fuzzy dedup bands {num_bands}, band length {length_band}, estimated false positive probability "
+            f"{round(false_positive, 4)}, false negative probability {round(false_negative, 4)}"
+        )
         self.logger.info(f"fuzzy dedup params are {self.params}")
         return True
 
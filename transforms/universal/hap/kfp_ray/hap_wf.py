@@ -46,6 +46,8 @@ def compute_exec_params_func(
     inference_engine: str,
     max_length: int,
     batch_size: int,
+    token_budget: int,
+    score_cache_size: int,
 ) -> dict:
     from runtime_utils import KFPUtils
 
@@ -65,6 +67,8 @@ def compute_exec_params_func(
         "inference_engine": inference_engine,
         "max_length": max_length,
         "batch_size": batch_size,
+        "token_budget": token_budget,
+        "score_cache_size": score_cache_size,
     }
 
 
@@ -137,6 +141,8 @@ def hap(
     inference_engine: str = "CPU",
     max_length: int = 512,
     batch_size: int = 128,
+    token_budget: int = 16384,
+    score_cache_size: int = 100000,
     # additional parameters
     additional_params: str = '{"wait_interval": 2, "wait_cluster_ready_tmout": 400, "wait_cluster_up_tmout": 300, "wait_job_ready_tmout": 400, "wait_print_tmout": 30, "http_retries": 5, "delete_cluster_delay_minutes": 0}',
 ):
@@ -179,6 +185,8 @@ def hap(
     :param inference_engine - # inference engine used
     :param max_length - # inference engine used
     :param batch_size - # batch size
+    :param token_budget - # max number of (padded) tokens in a batch
+    :param score_cache_size - # max number of cached sentence scores
     :return: None
     """
     # create clean_up task
@@ -205,6 +213,8 @@ def hap(
             inference_engine=inference_engine,
             max_length=max_length,
             batch_size=batch_size,
+            token_budget=token_budget,
+            score_cache_size=score_cache_size,
         )
 
         ComponentUtils.add_settings_to_component(compute_exec_params, ONE_HOUR_SEC * 2)
@@ -10,16 +10,18 @@
 # limitations under the License.
 ################################################################################
 import torch, nltk
-import pandas as pd
+import numpy as np
 import pyarrow as pa
 from typing import Any
 from data_processing.transform import AbstractTableTransform, TransformConfiguration
-from data_processing.utils import GB, TransformUtils, get_logger
+from data_processing.utils import GB, LRUCache, TransformUtils, get_logger
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from argparse import ArgumentParser, Namespace
 device = "cuda:0" if torch.cuda.is_available() else "cpu"
 nltk.download('punkt_tab')
 
+logger = get_logger(__name__)
+
 class HAPTransform(AbstractTableTransform):
     """
     Implements HAP transform
@@ -32,38 +34,89 @@ class HAPTransform(AbstractTableTransform):
         self.doc_text_column = config.get("doc_text_column", "contents")
         self.max_length = config.get("max_length", 512)
         self.batch_size = config.get("batch_size", 128)
+        self.token_budget = config.get("token_budget", 16384)
+        self.score_cache_size = config.get("score_cache_size", 100000)
+        # scores of the already scored sentences, least recently used ones are evicted first
+        self.score_cache = LRUCache(max_size=self.score_cache_size)
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name_or_path)
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name_or_path)
-
-    def _apply_model(self, data: list, batch_size: int) -> list[float]:
-        num_batches = len(data) // batch_size
-        data_sent_scores = []
-        for i in range(num_batches + 1):
-            print(f"Processing batch: {i}/{num_batches}")
-            start_idx = i * batch_size
-            end_idx = min((i + 1) * batch_size, len(data))
-            if start_idx >= end_idx: continue
-            inputs = self.tokenizer(data[start_idx:end_idx], max_length=self.max_length, padding=True, truncation=True, return_tensors="pt").to(device)
+        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name_or_path).to(device)
+        self.model.eval()
+
+    def _apply_model(self, data: list[str]) -> np.ndarray:
+        """
+        Score sentences. Repeated sentences (boilerplate, disclaimers, etc.) are scored by the model once per
+        table, sentences seen in recent tables are not scored again
+        :param data: sentences
+        :return: sentence scores
+        """
+        index = {}
+        sent_index = np.array([index.setdefault(sent, len(index)) for sent in data], dtype=np.int64)
+        unique = list(index)
+        scores = np.array([self.score_cache.get(sent, np.nan) for sent in unique], dtype=np.float64)
+        missing = np.flatnonzero(np.isnan(scores))
+        if len(missing) > 0:
+            sents = [unique[i] for i in missing]
+            scores[missing] = self._score(sents)
+            for sent, score in zip(sents, scores[missing].tolist()):
+                self.score_cache.put(sent, score)
+        return scores[sent_index]
+
+    def _score(self, data: list[str]) -> np.ndarray:
+        """
+        Run the model on sentences. Sentences are tokenized once, sorted by their token length and scored in
+        batches of similar lengths, so that padding is minimal. Batches are limited both by the batch size and
+        the token budget - the number of tokens of the padded batch
+        :param data: sentences
+        :return: sentence scores
+        """
+        encodings = self.tokenizer(data, max_length=self.max_length, truncation=True)
+        lengths = np.array([len(ids) for ids in encodings["input_ids"]], dtype=np.int64)
+        order = np.argsort(lengths, kind="stable")
+        scores = np.zeros(len(data), dtype=np.float64)
+        start = 0
+        while start < len(order):
+            # batch padded size grows with every (longer) sentence
+            window = lengths[order[start : start + self.batch_size]]
+            fits = np.arange(1, len(window) + 1) * window <= self.token_budget
+            end = start + max(1, int(np.count_nonzero(fits)))
+            batch = order[start:end]
+            inputs = self.tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()}, return_tensors="pt"
+            ).to(device)
             with torch.no_grad():
                 logits = self.model(**inputs).logits
-                data_sent_scores.extend(torch.softmax(logits, dim=1).cpu().numpy()[:, 1].tolist())
-        return data_sent_scores 
+            scores[batch] = torch.softmax(logits, dim=1)[:, 1].cpu().numpy()
+            logger.debug(f"Scored {end}/{len(order)} sentences, batch of {len(batch)} with {window[-1]} tokens")
+            start = end
+        return scores
 
-    def _apply_sent_split(self, data: list) -> tuple[list[str], list[int]]:
-        data_sents, data_sent_ids = [], []
+    def _apply_sent_split(self, data: list[str]) -> tuple[list[str], np.ndarray]:
+        """
+        Split documents into sentences
+        :param data: documents
+        :return: sentences of all documents and number of sentences of every document
+        """
+        data_sents, data_sent_counts = [], np.zeros(len(data), dtype=np.int64)
         for i, e in enumerate(data):
-            s_list = nltk.sent_tokenize(e)
+            s_list = nltk.sent_tokenize(" ".join(e.strip().splitlines()))
             data_sents.extend(s_list)
-            data_sent_ids.extend([i] * len(s_list))
-        return data_sents, data_sent_ids
-        
-    def _apply_aggregate(self, nb_doc: int, sent_scores: list[float], sent_ids: list[int]) -> list[float]:
-        doc_scores = []
-        for i in range(nb_doc):
-            temp = [score for idx, score in zip(sent_ids, sent_scores) if i == idx]
-            doc_scores.append(max(temp))
+            data_sent_counts[i] = len(s_list)
+        return data_sents, data_sent_counts
+
+    def _apply_aggregate(self, sent_counts: np.ndarray, sent_scores: np.ndarray) -> np.ndarray:
+        """
+        Aggregate sentence scores - the score of a document is the max score of its sentences
+        :param sent_counts: number of sentences of every document
+        :param sent_scores: sentence scores of all documents
+        :return: document scores (0 for documents without sentences)
+        """
+        doc_scores = np.zeros(len(sent_counts), dtype=np.float64)
+        non_empty = sent_counts > 0
+        if np.any(non_empty):
+            starts = np.cumsum(sent_counts) - sent_counts
+            doc_scores[non_empty] = np.maximum.reduceat(sent_scores, starts[non_empty])
         return doc_scores
-                 
+
     def transform(self, table: pa.Table, file_name: str = None) -> tuple[list[pa.Table], dict[str, Any]]:
         """
         Process a table of document text to generate a hap score for each document
@@ -72,28 +125,14 @@ class HAPTransform(AbstractTableTransform):
         """
         # make sure that the table contains "contents" column
         TransformUtils.validate_columns(table=table, required=[self.doc_text_column])
-        self.df = table.to_pandas()
-        df_doc_list = []
-        for i in range(len(self.df)):
-            text = self.df.iloc[i][self.doc_text_column]
-            text = " ".join(text.strip().splitlines())
-            df_doc_list.append(text)
-        
-        data_sents, data_sent_ids = self._apply_sent_split(df_doc_list)
-        data_sent_scores = self._apply_model(data_sents, self.batch_size)
-        
-        df_doc_scores = self._apply_aggregate(len(df_doc_list), data_sent_scores, data_sent_ids)
-        assert len(df_doc_list) == len(df_doc_scores)
-        
-        self.df['hap_score'] = df_doc_scores
-        print(self.df)
-        
-        out_table = pa.Table.from_pandas(self.df)
+        data_sents, data_sent_counts = self._apply_sent_split(table[self.doc_text_column].to_pylist())
+        data_sent_scores = self._apply_model(data_sents)
+        doc_scores = self._apply_aggregate(data_sent_counts, data_sent_scores)
+        out_table = TransformUtils.add_column(table=table, name=self.annotation_column, content=doc_scores)
         metadata = {}
         return [out_table], metadata
 
 
-logger = get_logger(__name__)
 class HAPTransformConfiguration(TransformConfiguration):
     """
     Provides support for configuring and using the associated Transform class include
@@ -160,6 +199,22 @@ class HAPTransformConfiguration(TransformConfiguration):
             help="batch size",
         )
 
+        parser.add_argument(
+            "--token_budget",
+            type=int,
+            required=False,
+            default=16384,
+            help="max number of (padded) tokens in a batch",
+        )
+
+        parser.add_argument(
+            "--score_cache_size",
+            type=int,
+            required=False,
+            default=100000,
+            help="max number of sentence scores cached across tables",
+        )
+
     def apply_input_params(self, args: Namespace) -> bool:
         """
         Validate and apply the arguments that have been parsed
@@ -172,5 +227,7 @@ class HAPTransformConfiguration(TransformConfiguration):
         self.params["inference_engine"] = args.inference_engine
         self.params["max_length"] = args.max_length
         self.params["batch_size"] = args.batch_size
+        self.params["token_budget"] = args.token_budget
+        self.params["score_cache_size"] = args.score_cache_size
         logger.info(f"hap params are {self.params} ")
         return True
@@ -0,0 +1,109 @@
+# (C) Copyright IBM Corp. 2024.
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#  http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+from types import SimpleNamespace
+
+import hap_transform
+import numpy as np
+import pyarrow as pa
+import pytest
+import torch
+from hap_transform import HAPTransform
+
+
+class StubTokenizer:
+    """
+    Tokenizer with a token per word, recording the sentences it tokenizes
+    """
+
+    def __init__(self):
+        self.tokenized = []
+
+    def __call__(self, data: list[str], max_length: int, truncation: bool) -> dict[str, list]:
+        self.tokenized.append(list(data))
+        input_ids = [[1] * min(len(sent.split()), max_length) for sent in data]
+        return {"input_ids": input_ids, "attention_mask": [[1] * len(ids) for ids in input_ids]}
+
+    def pad(self, encodings: dict[str, list], return_tensors: str):
+        length = max(len(ids) for ids in encodings["input_ids"])
+        batch = {
+            key: torch.tensor([ids + [0] * (length - len(ids)) for ids in values]) for key, values in encodings.items()
+        }
+        return SimpleNamespace(to=lambda device: batch)
+
+
+class StubModel:
+    """
+    Model scoring a sentence by its number of tokens, recording the (number of sentences, padded length) of every batch
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def to(self, device: str):
+        return self
+
+    def eval(self) -> None:
+        pass
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor):
+        self.batches.append(tuple(input_ids.shape))
+        lengths = attention_mask.sum(dim=1).to(torch.float64)
+        return SimpleNamespace(logits=torch.stack([torch.zeros_like(lengths), lengths], dim=1))
+
+
+def expected_score(n_tokens: int) -> float:
+    # softmax of logits (0, n_tokens)
+    return 1.0 / (1.0 + np.exp(-n_tokens))
+
+
+@pytest.fixture
+def transform(monkeypatch):
+    monkeypatch.setattr(hap_transform.AutoTokenizer, "from_pretrained", lambda name: StubTokenizer())
+    monkeypatch.setattr(
+        hap_transform.AutoModelForSequenceClassification, "from_pretrained", lambda name: StubModel()
+    )
+    return HAPTransform({"batch_size": 3, "token_budget": 8, "score_cache_size": 3})
+
+
+def test_score_batches(transform):
+    # token lengths 1, 5, 2, 2, 9 and 3
+    sents = ["a", "b b b b b", "c c", "d d", "e e e e e e e e e", "f f f"]
+    scores = transform._score(sents)
+    assert np.allclose(scores, [expected_score(n) for n in [1, 5, 2, 2, 9, 3]])
+    # sentences are batched by length: at most batch_size sentences and at most token_budget padded tokens,
+    # a sentence longer than the budget is scored alone
+    assert transform.model.batches == [(3, 2), (1, 3), (1, 5), (1, 9)]
+
+
+def test_apply_model_cache(transform):
+    scores = transform._apply_model(["a b", "c", "a b"])
+    assert np.allclose(scores, [expected_score(2), expected_score(1), expected_score(2)])
+    # repeated sentences are scored once, sentences of the previous calls are taken from the cache
+    scores = transform._apply_model(["c", "d e f", "a b"])
+    assert np.allclose(scores, [expected_score(1), expected_score(3), expected_score(2)])
+    assert transform.tokenizer.tokenized == [["a b", "c"], ["d e f"]]
+    # the cache holds 3 scores, "a b" is the least recently used one when "g" is added, so it is scored again
+    transform._apply_model(["g", "c"])
+    transform._apply_model(["a b", "c"])
+    assert transform.tokenizer.tokenized[2:] == [["g"], ["a b"]]
+    assert len(transform._apply_model([])) == 0
+
+
+def test_transform_documents_without_sentences(transform, monkeypatch):
+    monkeypatch.setattr(hap_transform.nltk, "sent_tokenize", lambda text: [s for s in text.split(". ") if s])
+    table = pa.table({"contents": ["", "x y. z", "   ", "u v w"]})
+    out_tables, metadata = transform.transform(table)
+    # documents without sentences score 0, other documents score as their highest scoring sentence
+    expected = [0.0, expected_score(2), 0.0, expected_score(3)]
+    assert np.allclose(out_tables[0]["hap_score"].to_pylist(), expected)
+    assert metadata == {}
+    assert np.array_equal(transform._apply_aggregate(np.array([0, 0]), np.array([])), [0.0, 0.0])
@@ -56,6 +56,8 @@ hap_params = {
     "inference_engine": "CPU",
     "max_length": 512,
     "batch_size": 128,
+    "token_budget": 16384,
+    "score_cache_size": 100000,
 }
 
 
@@ -32,6 +32,9 @@ class NOOPTransform(AbstractTableTransform):
     Implements a simple copy of a pyarrow Table.
     """
 
+    table_stats_keys = ("nfiles",)
+    parallel_slices = True
+
     def __init__(self, config: dict[str, Any]):
         """
         Initialize based on the dictionary of configuration information.
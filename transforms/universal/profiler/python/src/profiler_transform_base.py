@@ -174,3 +174,10 @@ class ProfilerTransformConfigurationBase(TransformConfiguration):
         if self.print_config:
             self.logger.info(f"profiler params are {self.params}")
         return True
+
+    def get_input_columns(self) -> list[str]:
+        """
+        Profiler only reads document column
+        :return: list of input columns
+        """
+        return [self.params.get(doc_column_name_key, "contents")]
@@ -256,3 +256,10 @@ class TokenizationTransformConfiguration(TransformConfiguration):
         self.params["chunk_size"] = args.tkn_chunk_size
 
         return True
+
+    def get_input_columns(self) -> list[str]:
+        """
+        Tokenization only reads document id and content columns
+        :return: list of input columns
+        """
+        return [self.params.get("doc_id_column", "document_id"), self.params.get("doc_content_column", "contents")]